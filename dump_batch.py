@@ -0,0 +1,150 @@
+import datetime
+import fnmatch
+import json
+import os
+import re
+import threading
+
+from dump_pipeline import DumpCancelled, DumpError
+from dump_runner import dump_database, job_connection_args, job_mysql_client, job_throttle
+from mysql_client import run_query
+
+# --- Bases système jamais incluses dans une sauvegarde "toutes les bases" ---
+SYSTEM_DATABASES = ("information_schema", "performance_schema", "mysql", "sys")
+
+# Valeurs par défaut de l'ordonnanceur
+DEFAULT_MAX_CONCURRENT = 4
+
+
+def parse_database_patterns(text):
+    """Découpe une saisie du type "shop, blog_*" en liste de noms ou de motifs."""
+    return [pattern for pattern in re.split(r"[,\s]+", text.strip()) if pattern]
+
+
+def is_batch_pattern(text):
+    """Indique si la saisie désigne plusieurs bases (liste, motif glob ou "*")."""
+    patterns = parse_database_patterns(text)
+    return len(patterns) > 1 or any(char in text for char in "*?[")
+
+
+def resolve_databases(mysql_exe_path, conn_args, patterns):
+    """
+    Résout une liste de noms et de motifs glob en noms de bases existantes (SHOW DATABASES).
+    Les bases système ne sont incluses que si elles sont nommées explicitement.
+    """
+    available = [row[0] for row in run_query(mysql_exe_path, conn_args, "SHOW DATABASES")]
+    databases = []
+    for pattern in patterns:
+        if any(char in pattern for char in "*?["):
+            matches = [name for name in available
+                       if fnmatch.fnmatchcase(name, pattern) and name not in SYSTEM_DATABASES]
+        else:
+            matches = [name for name in available if name == pattern]
+            if not matches:
+                raise DumpError(f"La base de données '{pattern}' n'existe pas sur le serveur.")
+        databases.extend(name for name in matches if name not in databases)
+    return databases
+
+
+def database_sizes(mysql_exe_path, conn_args):
+    """Taille estimée (données + index) de chaque base, d'après information_schema."""
+    sql = ("SELECT TABLE_SCHEMA, SUM(DATA_LENGTH + INDEX_LENGTH) "
+           "FROM information_schema.TABLES GROUP BY TABLE_SCHEMA")
+    return {name: int(size or 0) for name, size in run_query(mysql_exe_path, conn_args, sql)}
+
+
+def schedule_jobs(jobs, run_job, max_concurrent):
+    """
+    Exécute run_job(job) pour chaque job dans des threads, au plus max_concurrent à la fois.
+    Les jobs les plus gros (job["size"]) partent en premier : la durée totale tend
+    vers celle du plus long dump. Retourne les résultats dans l'ordre des jobs.
+    """
+    queue = sorted(range(len(jobs)), key=lambda index: jobs[index].get("size", 0), reverse=True)
+    results = [None] * len(jobs)
+    condition = threading.Condition()
+    state = {"running": 0}
+
+    def worker(index):
+        try:
+            results[index] = run_job(jobs[index])
+        finally:
+            with condition:
+                state["running"] -= 1
+                condition.notify_all()
+
+    with condition:
+        while queue or state["running"]:
+            if not queue or state["running"] >= max_concurrent:
+                condition.wait()
+                continue
+            next_index = queue.pop(0)
+            state["running"] += 1
+            threading.Thread(target=worker, args=(next_index,)).start()
+    return results
+
+
+def dump_batch(job, patterns, max_concurrent=DEFAULT_MAX_CONCURRENT, progress=None, cancellation=None):
+    """
+    Sauvegarde plusieurs bases d'un même serveur (noms ou motifs glob de patterns) avec les
+    paramètres de job ; l'erreur d'une base n'interrompt pas les autres.
+    Retourne le rapport commun, aussi écrit dans batch_<date>.json.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    mysql_exe_path = job_mysql_client(job)
+    conn_args = job_connection_args(job)
+    report("Recherche des bases à sauvegarder...")
+    databases = resolve_databases(mysql_exe_path, conn_args, patterns)
+    if not databases:
+        raise DumpError("Aucune base de données ne correspond à la sélection.")
+    sizes = database_sizes(mysql_exe_path, conn_args)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    jobs = [dict(job, db_name=name, size=sizes.get(name, 0)) for name in databases]
+    finished = []
+    finished_lock = threading.Lock()
+
+    def run_job(database_job):
+        try:
+            result = dump_database(database_job, timestamp, cancellation=cancellation, throttle=throttle)
+        except Exception as e:
+            result = {
+                "database": database_job["db_name"],
+                "host": database_job["db_host"],
+                "status": "cancelled" if isinstance(e, DumpCancelled) else "error",
+                "error": str(e)
+            }
+        with finished_lock:
+            finished.append(result)
+            report(f"Batch : {len(finished)}/{len(jobs)} bases traitées ({database_job['db_name']} : {result['status']})...")
+        return result
+
+    report(f"Batch : sauvegarde de {len(jobs)} bases ({max_concurrent} simultanées)...")
+    started = datetime.datetime.now()
+    throttle, monitor = job_throttle(job, conn_args, progress)
+    if monitor:
+        with monitor:
+            results = schedule_jobs(jobs, run_job, max_concurrent)
+    else:
+        results = schedule_jobs(jobs, run_job, max_concurrent)
+
+    batch_report = {
+        "started": started.isoformat(timespec="seconds"),
+        "duration": round((datetime.datetime.now() - started).total_seconds(), 3),
+        "host": job["db_host"],
+        "databases": len(results),
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] == "error"),
+        "cancelled": sum(1 for result in results if result["status"] == "cancelled"),
+        "total_size": sum(result.get("size", 0) for result in results),
+        "results": results
+    }
+    if throttle:
+        batch_report["throttle"] = throttle.as_dict()
+    report_path = os.path.join(job["output_folder"], f"batch_{timestamp}.json")
+    with open(report_path, 'w') as f:
+        json.dump(batch_report, f, indent=2)
+    batch_report["report_path"] = report_path
+    return batch_report
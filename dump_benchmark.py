@@ -0,0 +1,448 @@
+"""
+Banc d'essai du pipeline de sauvegarde, sans serveur MySQL.
+
+Un faux mysqldump (ce même script, sous-commande fake-mysqldump) produit un dump
+synthétique dont la taille, le nombre de tables, la largeur des lignes et la
+compressibilité se règlent ; un faux client mysql répond aux requêtes des modes
+parallèle et dépôt ; les modes native et export mesurent le moteur intégré et l'export
+CSV sur une base SQLite contenant les mêmes lignes. Chaque mode de sortie est exécuté dans son propre processus :
+débit de bout en bout, pic de mémoire (RSS) et pic d'occupation disque sont
+mesurés, ainsi que le temps processeur du pipeline (hors faux mysqldump et compresseurs
+externes, comptés à part), puis écrits dans un rapport JSON comparable d'une exécution à l'autre.
+
+    python dump_benchmark.py [--size 200] [--modes zip gzip ...] [--compare ancien.json]
+
+Unix uniquement (lanceurs shell, module resource).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+
+# --- Configuration du dump synthétique ---
+# Transmise au faux mysqldump et au faux client mysql par une variable d'environnement
+BENCH_ENV = "MYSQLDUMPER_BENCH"
+BENCH_DATABASE = "bench"
+DEFAULT_BENCH = {
+    "size": 200 * 1024 * 1024,  # Taille approximative du flux SQL
+    "tables": 8,
+    "row_width": 200,           # Octets de données par ligne
+    "compressibility": 0.5,     # Part répétitive de chaque ligne (0 : aléatoire, 1 : constante)
+    "seed": 1
+}
+INSERT_SIZE = 1024 * 1024      # Taille d'un INSERT étendu (comme net_buffer_length)
+WRITE_SIZE = 1024 * 1024       # Taille des écritures du faux mysqldump
+RANDOM_POOL_SIZE = 1024 * 1024
+
+# --- Modes mesurés : clés de job (voir dump_runner.DEFAULT_JOB) ---
+BENCH_MODES = {
+    "zip": {"compression": "zip"},
+    "gzip": {"compression": "gzip"},
+    "seekable": {"compression": "seekable"},
+    "zstd": {"compression": "zstd"},
+    "lz4": {"compression": "lz4"},
+    "none": {"compression": "none"},
+    "parallel": {"compression": "gzip", "parallel": True, "workers": 4},
+    "repository": {"compression": "gzip", "repository": True},
+    # Moteur intégré, lisant une base SQLite qui contient les mêmes lignes que le faux mysqldump
+    "native": {"compression": "gzip", "engine": "native"},
+    # Export CSV par table, lisant la même base SQLite avec plusieurs connexions
+    "export": {"compression": "gzip", "export_format": "csv", "workers": 4},
+    # Écriture sans copie (dump_zerocopy, Linux) : SQL brut, ou compressé par le programme zstd
+    "zero-copy": {"compression": "none", "zero_copy": True},
+    "zero-copy-zstd": {"compression": "zstd", "zero_copy": True}
+}
+
+# Écart toléré par rapport au rapport de référence avant de signaler une régression
+DEFAULT_TOLERANCE = 0.10
+DISK_POLL_INTERVAL = 0.02
+
+
+def bench_config():
+    """Configuration du dump synthétique, lue dans la variable d'environnement."""
+    config = dict(DEFAULT_BENCH)
+    config.update(json.loads(os.environ.get(BENCH_ENV, "{}")))
+    return config
+
+
+def bench_tables(config):
+    """Tables du dump synthétique : [(nom, nombre de lignes, taille des données)], de tailles croissantes."""
+    weights = range(1, config["tables"] + 1)
+    total_weight = sum(weights)
+    tables = []
+    for index, weight in enumerate(weights):
+        size = config["size"] * weight // total_weight
+        tables.append((f"t{index}", max(1, size // (config["row_width"] + 12)), size))
+    return tables
+
+
+class SyntheticRows:
+    """Générateur déterministe des lignes : une même graine produit toujours les mêmes données."""
+
+    def __init__(self, config):
+        generator = random.Random(config["seed"])
+        alphabet = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+        width = config["row_width"]
+        self.pool = bytes(generator.choice(alphabet) for _ in range(RANDOM_POOL_SIZE + width))
+        self.constant_width = int(width * config["compressibility"])
+        self.random_width = width - self.constant_width
+        self.constant = (b"lorem ipsum dolor sit amet " * (self.constant_width // 27 + 1))[:self.constant_width]
+
+    def payload(self, table_index, row_id):
+        offset = (row_id * 7919 + table_index * 104729) % RANDOM_POOL_SIZE
+        return self.constant + self.pool[offset:offset + self.random_width]
+
+    def row(self, table_index, row_id):
+        return b"(%d,'%s')" % (row_id, self.payload(table_index, row_id))
+
+
+def fake_mysqldump(args):
+    """Faux mysqldump : écrit sur la sortie standard un dump synthétique au format de mysqldump."""
+    config = bench_config()
+    positional = [arg for arg in args if not arg.startswith("-")]
+    options = [arg for arg in args if arg.startswith("--")]
+    db_name, selected = positional[0], set(positional[1:])
+    where = next((option[len("--where="):] for option in options if option.startswith("--where=")), "")
+    lower = re.search(r">= (\d+)", where)
+    upper = re.search(r"< (\d+)", where)
+    lower = int(lower.group(1)) if lower else 1
+    upper = int(upper.group(1)) if upper else None
+    extended = "--skip-extended-insert" not in options
+    rows_generator = SyntheticRows(config)
+    out = sys.stdout.buffer
+    buffer = bytearray(b"-- MySQL dump 10.13  Distrib 8.0.36, for Linux (x86_64)\n--\n"
+                       b"-- Host: localhost    Database: %s\n" % db_name.encode() +
+                       b"-- ------------------------------------------------------\n"
+                       b"/*!40101 SET NAMES utf8mb4 */;\n/*!40014 SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0 */;\n")
+
+    def flush(force=False):
+        if buffer and (force or len(buffer) >= WRITE_SIZE):
+            out.write(buffer)
+            buffer.clear()
+
+    for index, (name, rows, _) in enumerate(bench_tables(config)):
+        if selected and name not in selected:
+            continue
+        quoted = b"`" + name.encode() + b"`"
+        if "--no-create-info" not in options:
+            buffer += (b"\n--\n-- Table structure for table %s\n--\n\nDROP TABLE IF EXISTS %s;\n"
+                       b"CREATE TABLE %s (\n  `id` int NOT NULL,\n  `payload` varchar(%d) NOT NULL,\n"
+                       b"  PRIMARY KEY (`id`)\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;\n"
+                       % (quoted, quoted, quoted, config["row_width"]))
+        if "--no-data" in options:
+            continue
+        buffer += b"\n--\n-- Dumping data for table %s\n--\n\nLOCK TABLES %s WRITE;\n" % (quoted, quoted)
+        last_row = min(rows + 1, upper) if upper else rows + 1
+        # Nombre de lignes par INSERT étendu (la largeur des lignes est à peu près constante)
+        step = 1 if not extended else max(1, INSERT_SIZE // (config["row_width"] + 12))
+        for first_row in range(lower, last_row, step):
+            values = b",".join([rows_generator.row(index, row_id) for row_id in range(first_row, min(first_row + step, last_row))])
+            buffer += b"INSERT INTO %s VALUES %s;\n" % (quoted, values)
+            flush()
+        buffer += b"UNLOCK TABLES;\n"
+        flush()
+    if "--skip-routines" not in options:
+        buffer += b"\n--\n-- Dumping routines for database '%s'\n--\n" % db_name.encode()
+    buffer += b"/*!40014 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS */;\n\n-- Dump completed\n"
+    flush(force=True)
+    return 0
+
+
+def fake_mysql(args):
+    """Faux client mysql : répond aux requêtes d'information des modes parallèle, incrémental et batch."""
+    config = bench_config()
+    tables = bench_tables(config)
+    if "-e" in args:
+        sql = args[args.index("-e") + 1]
+        lines = []
+        if sql == "SHOW DATABASES":
+            lines = [BENCH_DATABASE]
+        elif "SUM(DATA_LENGTH)" in sql:
+            lines = [str(sum(size for _, _, size in tables))]
+        elif "TABLE_TYPE, ENGINE" in sql:
+            lines = [f"{name}\tBASE TABLE\tInnoDB\t{rows}\t{size}" for name, rows, size in tables]
+        elif "CREATE_TIME" in sql:
+            lines = [f"{name}\t2026-01-01 00:00:00\tNULL" for name, _, _ in tables]
+        elif sql.startswith("CHECKSUM TABLE"):
+            lines = [f"{database}.{name}\t{config['seed']}" for database, name in re.findall(r"`([^`]*)`\.`([^`]*)`", sql)]
+        elif "KEY_COLUMN_USAGE" in sql:
+            lines = [f"{name}\tid\tint" for name, _, _ in tables]
+        elif sql.startswith("SELECT MIN("):
+            name = re.findall(r"`([^`]*)`", sql)[-1]
+            lines = [f"1\t{rows}" for table_name, rows, _ in tables if table_name == name]
+        elif sql.startswith("SHOW GLOBAL STATUS"):
+            lines = [f"Threads_running\t{config.get('threads_running', 1)}"]
+        # SHOW REPLICA STATUS : résultat vide, le faux serveur n'est pas un réplica
+        for line in lines:
+            print(line)
+        return 0
+    # Session de coordination (SnapshotLock) : seuls les SELECT '<marqueur>' produisent une réponse
+    for line in sys.stdin:
+        if line.startswith("SELECT '"):
+            print(line.split("'")[1], flush=True)
+    return 0
+
+
+def write_sqlite_database(path, config):
+    """Écrit dans une base SQLite les tables et les lignes du dump synthétique (source du moteur intégré)."""
+    rows_generator = SyntheticRows(config)
+    connection = sqlite3.connect(path)
+    try:
+        for index, (name, rows, _) in enumerate(bench_tables(config)):
+            connection.execute(f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, payload VARCHAR({config['row_width']}) NOT NULL)")
+            connection.executemany(f"INSERT INTO {name} VALUES (?, ?)",
+                                   ((row_id, rows_generator.payload(index, row_id).decode()) for row_id in range(1, rows + 1)))
+        connection.commit()
+    finally:
+        connection.close()
+    return path
+
+
+def write_launchers(bin_dir):
+    """Écrit les lanceurs mysqldump et mysql qui exécutent les faux programmes ; retourne le chemin de mysqldump."""
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, command in (("mysqldump", "fake-mysqldump"), ("mysql", "fake-mysql")):
+        path = os.path.join(bin_dir, name)
+        with open(path, 'w') as f:
+            f.write(f"#!/bin/sh\nexec \"{sys.executable}\" \"{os.path.abspath(__file__)}\" {command} \"$@\"\n")
+        os.chmod(path, 0o755)
+    return os.path.join(bin_dir, "mysqldump")
+
+
+def peak_rss():
+    """Pic de mémoire résidente du processus, en octets."""
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024 # Linux compte en Kio
+
+
+def cpu_times():
+    """Temps processeur (utilisateur + système) du processus et de ses processus enfants terminés, en secondes."""
+    import resource
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+def run_mode(mode, work_dir):
+    """Exécute un mode dans le processus courant et retourne ses mesures."""
+    from dump_runner import dump_database, make_job, path_size
+
+    output_folder = os.path.join(work_dir, "output")
+    os.makedirs(output_folder)
+    job = make_job(db_name=BENCH_DATABASE, mysqldump_path=write_launchers(os.path.join(work_dir, "bin")),
+                   output_folder=output_folder, **BENCH_MODES[mode])
+    if job["engine"] == "native" or job["export_format"]:
+        # Base écrite avant la mesure : seul le dump est chronométré
+        job["native_source"] = write_sqlite_database(os.path.join(work_dir, f"{BENCH_DATABASE}.sqlite"), bench_config())
+    peak_disk = 0
+    stop_event = threading.Event()
+
+    def watch_disk():
+        nonlocal peak_disk
+        while not stop_event.is_set():
+            try:
+                peak_disk = max(peak_disk, path_size(output_folder))
+            except OSError:
+                pass # Fichier supprimé pendant le parcours
+            stop_event.wait(DISK_POLL_INTERVAL)
+
+    watcher = threading.Thread(target=watch_disk, daemon=True)
+    watcher.start()
+    cpu_before, children_before = cpu_times()
+    try:
+        result = dump_database(job)
+    finally:
+        stop_event.set()
+        watcher.join()
+    cpu_after, children_after = cpu_times()
+    return {
+        "mode": mode,
+        "status": "ok",
+        "stream_size": result["stream_size"],
+        "output_size": result["size"],
+        "ratio": round(result["stream_size"] / result["size"], 2) if result["size"] else None,
+        "duration": result["duration"],
+        "throughput": result["throughput"],
+        "peak_rss": peak_rss(),
+        "peak_disk": max(peak_disk, path_size(output_folder)),
+        # Pipeline seul (lecture, compression en Python, écriture) ; les enfants sont le faux mysqldump et les compresseurs externes
+        "cpu_time": round(cpu_after - cpu_before, 3),
+        "cpu_children": round(children_after - children_before, 3),
+        "phases": result["phases"]
+    }
+
+
+def unavailable_reason(mode):
+    """Raison pour laquelle un mode ne peut pas être mesuré ici (module ou programme optionnel absent), ou None."""
+    from dump_compression import lz4_frame, zstandard
+    from dump_pipeline import DumpError
+    from dump_zerocopy import compressor_command, zero_copy_available
+
+    compression = BENCH_MODES[mode].get("compression")
+    if BENCH_MODES[mode].get("zero_copy"):
+        # Compression par un programme externe : le module Python n'est pas nécessaire
+        if not zero_copy_available():
+            return "os.splice indisponible (Linux uniquement)"
+        try:
+            compressor_command(compression)
+        except DumpError as e:
+            return str(e)
+        return None
+    if compression == "zstd" and zstandard is None:
+        return "module 'zstandard' absent"
+    if compression == "lz4" and lz4_frame is None:
+        return "module 'lz4' absent"
+    return None
+
+
+def run_benchmark(config, modes, repeat=1, progress=print):
+    """
+    Mesure chaque mode dans un processus séparé (le pic de mémoire est propre à chaque mode).
+    Sur plusieurs répétitions, la plus rapide est retenue. Retourne le rapport.
+    """
+    env = dict(os.environ, **{BENCH_ENV: json.dumps(config)})
+    started = datetime.datetime.now()
+    results = []
+    for mode in modes:
+        reason = unavailable_reason(mode)
+        if reason:
+            progress(f"{mode} : ignoré ({reason})")
+            results.append({"mode": mode, "status": "skipped", "reason": reason})
+            continue
+        best = None
+        for _ in range(repeat):
+            work_dir = tempfile.mkdtemp(prefix="mysqldumper_bench_")
+            try:
+                process = subprocess.run([sys.executable, os.path.abspath(__file__), "run-mode", mode, work_dir],
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            if process.returncode != 0:
+                error = process.stderr.decode("utf-8", errors="replace").strip().splitlines()
+                best = {"mode": mode, "status": "error", "error": error[-1] if error else f"Code : {process.returncode}"}
+                break
+            result = json.loads(process.stdout.decode().strip().splitlines()[-1])
+            if best is None or result["duration"] < best["duration"]:
+                best = result
+        progress(format_result(best))
+        results.append(best)
+    return {
+        "format": "mysqldumper-benchmark",
+        "version": 1,
+        "started": started.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "results": results
+    }
+
+
+def format_result(result):
+    """Ligne de résultat lisible d'un mode."""
+    if result["status"] == "skipped":
+        return f"{result['mode']:<14} ignoré ({result['reason']})"
+    if result["status"] != "ok":
+        return f"{result['mode']:<14} erreur : {result['error']}"
+    mib = 1024 * 1024
+    cpu = f"  CPU {result['cpu_time']:6.2f} s (+{result['cpu_children']:.2f} s)" if "cpu_time" in result else ""
+    return (f"{result['mode']:<14} {result['throughput'] / mib:8.1f} Mo/s  ratio {result['ratio'] or 0:5.2f}  "
+            f"RSS max {result['peak_rss'] / mib:7.1f} Mo  disque max {result['peak_disk'] / mib:8.1f} Mo  "
+            f"{result['duration']:7.2f} s" + cpu)
+
+
+def compare_reports(baseline, report, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare un rapport à un rapport de référence, mode par mode. Une baisse de débit, ou une
+    hausse du pic de mémoire, d'occupation disque ou du temps processeur du pipeline, de plus
+    de tolerance est une régression (les mesures absentes de la référence sont ignorées).
+    Retourne (lignes de comparaison, nombre de régressions).
+    """
+    lines = []
+    regressions = 0
+    if baseline.get("config") != report["config"]:
+        lines.append("Attention : la configuration du dump synthétique diffère de celle de la référence.")
+    previous = {result["mode"]: result for result in baseline.get("results", []) if result.get("status") == "ok"}
+    for result in report["results"]:
+        before = previous.get(result["mode"])
+        if result["status"] != "ok" or before is None:
+            continue
+        changes = []
+        for key, label, worse_if_higher in (("throughput", "débit", False), ("peak_rss", "RSS", True),
+                                            ("peak_disk", "disque", True), ("cpu_time", "CPU", True)):
+            if not before.get(key) or key not in result:
+                continue
+            change = result[key] / before[key] - 1
+            regression = change > tolerance if worse_if_higher else change < -tolerance
+            regressions += regression
+            changes.append(f"{label} {change:+.1%}" + (" RÉGRESSION" if regression else ""))
+        lines.append(f"{result['mode']:<14} " + ", ".join(changes))
+    return lines, regressions
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Sous-commandes internes : faux programmes (dont les arguments -h, -u... sont ceux de mysqldump)
+    # et exécution d'un mode dans un processus séparé
+    if argv and argv[0] == "fake-mysqldump":
+        return fake_mysqldump(argv[1:])
+    if argv and argv[0] == "fake-mysql":
+        return fake_mysql(argv[1:])
+    if argv and argv[0] == "run-mode":
+        print(json.dumps(run_mode(argv[1], argv[2])))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Banc d'essai du pipeline de sauvegarde avec un faux mysqldump.")
+    parser.add_argument("--size", type=int, default=DEFAULT_BENCH["size"] // (1024 * 1024), help="Taille du dump synthétique en Mo (défaut : 200)")
+    parser.add_argument("--tables", type=int, default=DEFAULT_BENCH["tables"])
+    parser.add_argument("--row-width", type=int, default=DEFAULT_BENCH["row_width"], help="Octets de données par ligne")
+    parser.add_argument("--compressibility", type=float, default=DEFAULT_BENCH["compressibility"],
+                        help="Part répétitive de chaque ligne, de 0 (aléatoire) à 1 (constante)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_BENCH["seed"])
+    parser.add_argument("--modes", nargs="+", choices=list(BENCH_MODES), default=list(BENCH_MODES))
+    parser.add_argument("--repeat", type=int, default=1, help="Répétitions par mode (la plus rapide est retenue)")
+    parser.add_argument("-o", "--output", help="Rapport JSON (défaut : benchmark_<date>.json)")
+    parser.add_argument("--compare", help="Rapport de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Écart toléré (défaut : 0.10)")
+    args = parser.parse_args(argv)
+    if not 0 <= args.compressibility <= 1:
+        parser.error("--compressibility doit être compris entre 0 et 1")
+
+    config = {"size": args.size * 1024 * 1024, "tables": args.tables, "row_width": args.row_width,
+              "compressibility": args.compressibility, "seed": args.seed}
+    print(f"Dump synthétique : {args.size} Mo, {args.tables} tables, lignes de {args.row_width} octets, "
+          f"compressibilité {args.compressibility}")
+    report = run_benchmark(config, args.modes, args.repeat)
+    output = args.output or f"benchmark_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport : {output}")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare_reports(baseline, report, args.tolerance)
+        print(f"Comparaison avec {args.compare} :")
+        for line in lines:
+            print(line)
+        if regressions:
+            print(f"{regressions} régressions au-delà de {args.tolerance:.0%}.")
+            exit_code = 1
+    if any(result["status"] == "error" for result in report["results"]):
+        exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+
+from dump_integrity import INTEGRITY_SUFFIX, manifest_files
+from dump_parallel import MANIFEST_FILE
+from dump_pipeline import DumpError
+from dump_progress import RUN_RECORD_SUFFIX
+from dump_seekable import SEEKABLE_INDEX_SUFFIX
+
+# --- Catalogue des sauvegardes d'un dossier de sortie (une ligne par exécution) ---
+CATALOG_FILE = "catalog.sqlite"
+CATALOG_TIMEOUT = 30  # secondes d'attente quand une autre sauvegarde (batch) écrit dans le catalogue
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    database TEXT NOT NULL,
+    host TEXT,
+    mode TEXT,
+    status TEXT NOT NULL,
+    started TEXT NOT NULL,
+    duration REAL,
+    path TEXT,
+    size INTEGER,
+    stream_size INTEGER,
+    sha256 TEXT,
+    error TEXT,
+    run_record TEXT,
+    copies TEXT,
+    depends_on TEXT,
+    pruned TEXT
+);
+CREATE INDEX IF NOT EXISTS backups_by_database ON backups (database, status, started);
+CREATE UNIQUE INDEX IF NOT EXISTS backups_by_run_record ON backups (run_record);
+"""
+
+# --- Rétention ---
+# Sortes de sauvegarde retenues séparément ; parallèle et incrémental n'en font qu'une
+# (l'incrémental reprend leurs fichiers).
+RETENTION_RULES = ("daily", "weekly", "monthly")
+RETENTION_GROUPS = {"parallel": "per_table", "incremental": "per_table", "volumes": "archive"}
+
+
+def catalog_path(output_folder):
+    return os.path.join(output_folder, CATALOG_FILE)
+
+
+def open_catalog(output_folder):
+    """Ouvre (et crée si besoin) le catalogue d'un dossier de sortie."""
+    connection = sqlite3.connect(catalog_path(output_folder), timeout=CATALOG_TIMEOUT)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA_SQL)
+    return connection
+
+
+def _relative(output_folder, path):
+    """Chemin relatif au dossier de sortie s'il s'y trouve : le dossier reste déplaçable."""
+    if not path:
+        return path
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(output_folder))
+    return path if relative.startswith("..") else relative
+
+
+def _absolute(output_folder, path):
+    return os.path.join(output_folder, path) if path else path
+
+
+def backup_dependencies(path):
+    """
+    Sauvegardes dont une sauvegarde incrémentale reprend des fichiers (chemins "../<dossier>/..."
+    de son manifest.json) : liste de noms de dossiers, voisins de path.
+    """
+    manifest_path = os.path.join(path or "", MANIFEST_FILE)
+    if not path or not os.path.isfile(manifest_path):
+        return []
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return sorted({name.split("/")[1] for name in manifest_files(manifest) if name.startswith("../")})
+
+
+def record_backup(output_folder, result):
+    """
+    Note le résultat d'une sauvegarde (dictionnaire retourné par dump_database) dans le
+    catalogue de output_folder. Une exécution déjà notée (même compte rendu) est remplacée.
+    Retourne l'identifiant de la sauvegarde dans le catalogue.
+    """
+    path = result.get("path")
+    with open_catalog(output_folder) as connection:
+        cursor = connection.execute(
+            "INSERT OR REPLACE INTO backups (database, host, mode, status, started, duration, path, size, stream_size, "
+            "sha256, error, run_record, copies, depends_on) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (result["database"], result.get("host"), result.get("mode"), result["status"], result["started"],
+             result.get("duration"), _relative(output_folder, path), result.get("size"), result.get("stream_size"),
+             result.get("sha256"), result.get("error"), _relative(output_folder, result.get("run_record")),
+             json.dumps([os.path.abspath(copy["path"]) for copy in result.get("copies", [])]),
+             json.dumps(backup_dependencies(path) if result["status"] == "ok" else [])))
+        return cursor.lastrowid
+
+
+def _as_dict(output_folder, row):
+    backup = dict(row)
+    backup["path"] = _absolute(output_folder, backup["path"])
+    backup["run_record"] = _absolute(output_folder, backup["run_record"])
+    backup["copies"] = json.loads(backup["copies"] or "[]")
+    backup["depends_on"] = json.loads(backup["depends_on"] or "[]")
+    return backup
+
+
+def list_backups(output_folder, database=None, status=None, include_pruned=False, limit=None):
+    """
+    Sauvegardes du catalogue, de la plus récente à la plus ancienne (chemins absolus ou
+    relatifs au dossier courant, comme output_folder). Retourne une liste de dictionnaires.
+    """
+    if not os.path.isfile(catalog_path(output_folder)):
+        return []
+    conditions, parameters = [], []
+    if database is not None:
+        conditions.append("database = ?")
+        parameters.append(database)
+    if status is not None:
+        conditions.append("status = ?")
+        parameters.append(status)
+    if not include_pruned:
+        conditions.append("pruned IS NULL")
+    sql = "SELECT * FROM backups" + (" WHERE " + " AND ".join(conditions) if conditions else "")
+    sql += " ORDER BY started DESC, id DESC"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    with open_catalog(output_folder) as connection:
+        return [_as_dict(output_folder, row) for row in connection.execute(sql, parameters)]
+
+
+def latest_backup(output_folder, database):
+    """Dernière sauvegarde réussie (et non supprimée) de database, ou None."""
+    backups = list_backups(output_folder, database, status="ok", limit=1)
+    return backups[0] if backups else None
+
+
+def _period(started, rule):
+    day = datetime.date.fromisoformat(started[:10])
+    if rule == "daily":
+        return day
+    if rule == "weekly":
+        return day.isocalendar()[:2]
+    return day.year, day.month
+
+
+def retention_group(mode):
+    """Sorte de sauvegarde à laquelle s'appliquent les règles de rétention (RETENTION_GROUPS)."""
+    return RETENTION_GROUPS.get(mode, mode)
+
+
+def plan_retention(backups, keep_daily=0, keep_weekly=0, keep_monthly=0):
+    """
+    Choisit les sauvegardes à conserver parmi backups (d'une même base, de la plus récente à la plus
+    ancienne), pour chaque sorte de sauvegarde. Retourne ({id: raisons}, [sauvegardes à supprimer]).
+    """
+    limits = {"daily": keep_daily or 0, "weekly": keep_weekly or 0, "monthly": keep_monthly or 0}
+    seen = {}
+    kept = {}
+    for backup in backups:
+        group = retention_group(backup["mode"])
+        if group not in seen:
+            seen[group] = {rule: set() for rule in RETENTION_RULES}
+            kept.setdefault(backup["id"], []).append("latest")
+        for rule in RETENTION_RULES:
+            period = _period(backup["started"], rule)
+            if period not in seen[group][rule] and len(seen[group][rule]) < limits[rule]:
+                seen[group][rule].add(period)
+                kept.setdefault(backup["id"], []).append(rule)
+
+    # Une sauvegarde incrémentale conservée garde les sauvegardes dont elle reprend des fichiers
+    by_folder = {os.path.basename(os.path.normpath(backup["path"])): backup for backup in backups if backup["path"]}
+    pending = [backup for backup in backups if backup["id"] in kept]
+    while pending:
+        backup = pending.pop()
+        for name in backup["depends_on"]:
+            base = by_folder.get(name)
+            if base is not None and base["id"] not in kept:
+                kept[base["id"]] = [f"base de {os.path.basename(os.path.normpath(backup['path']))}"]
+                pending.append(base)
+    return kept, [backup for backup in backups if backup["id"] not in kept]
+
+
+def _backup_files(backup):
+    """Fichiers et dossiers d'une sauvegarde : sortie, fichiers associés, compte rendu et copies."""
+    paths = []
+    for path in [backup["path"]] + backup["copies"]:
+        if path:
+            paths.extend([path, path + INTEGRITY_SUFFIX, path + SEEKABLE_INDEX_SUFFIX])
+    if backup["run_record"]:
+        paths.append(backup["run_record"])
+    return paths
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def apply_retention(output_folder, database, keep_daily=0, keep_weekly=0, keep_monthly=0, mode=None, dry_run=False,
+                    progress=None):
+    """
+    Supprime du disque et marque supprimées dans le catalogue les sauvegardes réussies de database
+    que plan_retention ne conserve pas (de la sorte de mode s'il est indiqué) ; pour le dépôt, seul
+    l'index est supprimé. Retourne {"kept": [chemins], "deleted": [chemins]} ; rien avec dry_run.
+    """
+    if not any((keep_daily, keep_weekly, keep_monthly)):
+        raise DumpError("Indiquez au moins une règle de rétention (jours, semaines ou mois à conserver).")
+    backups = list_backups(output_folder, database, status="ok")
+    kept, deleted = plan_retention(backups, keep_daily, keep_weekly, keep_monthly)
+    if mode is not None:
+        backups = [backup for backup in backups if retention_group(backup["mode"]) == retention_group(mode)]
+        deleted = [backup for backup in deleted if retention_group(backup["mode"]) == retention_group(mode)]
+    report = {"kept": [backup["path"] for backup in backups if backup["id"] in kept],
+              "deleted": [backup["path"] for backup in deleted]}
+    if dry_run or not deleted:
+        return report
+    pruned = datetime.datetime.now().isoformat(timespec="seconds")
+    with open_catalog(output_folder) as connection:
+        for backup in deleted:
+            if progress:
+                progress(f"Rétention : suppression de '{backup['path']}'...")
+            for path in _backup_files(backup):
+                _remove(path)
+            # Marquée une fois ses fichiers supprimés : une erreur laisse la sauvegarde à supprimer au prochain passage
+            connection.execute("UPDATE backups SET pruned = ? WHERE id = ?", (pruned, backup["id"]))
+            connection.commit()
+    return report
+
+
+def import_run_records(output_folder):
+    """
+    Ajoute au catalogue les sauvegardes antérieures à sa création, d'après les comptes rendus
+    <base>_<date>.run.json du dossier (seul parcours du dossier, à faire une fois).
+    Retourne le nombre de sauvegardes ajoutées.
+    """
+    recorded = {backup["run_record"] for backup in list_backups(output_folder, include_pruned=True)}
+    added = 0
+    for name in sorted(os.listdir(output_folder)):
+        path = os.path.join(output_folder, name)
+        if not name.endswith(RUN_RECORD_SUFFIX) or path in recorded:
+            continue
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if "database" not in result or "started" not in result:
+            continue
+        result["run_record"] = path
+        if result.get("path") and not os.path.exists(result["path"]):
+            continue # Sauvegarde supprimée depuis
+        record_backup(output_folder, result)
+        added += 1
+    return added
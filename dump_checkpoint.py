@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+from dump_parallel import MANIFEST_FILE
+from dump_pipeline import DumpError
+
+# --- Points de reprise d'une sauvegarde par table ---
+# Tant que la sauvegarde n'est pas terminée, checkpoint.json liste les fichiers déjà
+# complets (avec leur SHA-256) ; le manifest.json final le remplace.
+CHECKPOINT_FILE = "checkpoint.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """SHA-256 (hexadécimal) d'un fichier, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Liste, dans output_dir/checkpoint.json, les fichiers terminés d'une sauvegarde par
+    table, pour qu'une reprise n'exporte que les parties manquantes. Les noms de fichiers
+    des tables et le découpage des grosses tables sont conservés : une reprise produit
+    exactement les mêmes fichiers que la première tentative.
+    """
+
+    def __init__(self, output_dir, database, compression):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+        self.resumed = os.path.isfile(self.path)
+        if self.resumed:
+            with open(self.path) as f:
+                self.state = json.load(f)
+            if self.state.get("format") != "mysqldumper-checkpoint":
+                raise DumpError(f"Fichier de reprise non reconnu : {self.path}")
+            if self.state["database"] != database or self.state["compression"] != compression:
+                raise DumpError(f"La sauvegarde interrompue ({output_dir}) concerne la base '{self.state['database']}' "
+                                f"au format {self.state['compression']} : reprise impossible avec ces paramètres.")
+            self.state["attempts"] += 1
+        else:
+            self.state = {
+                "format": "mysqldumper-checkpoint",
+                "version": 1,
+                "database": database,
+                "compression": compression,
+                "attempts": 1,
+                "table_files": {},
+                "chunk_plan": None,
+                "parts": {}
+            }
+
+    @property
+    def attempts(self):
+        return self.state["attempts"]
+
+    @property
+    def table_files(self):
+        """{table: chemin du fichier sans extension} de la première tentative."""
+        return self.state["table_files"]
+
+    @property
+    def chunk_plan(self):
+        """Découpage des grosses tables de la première tentative ({table: (colonne, plages)}), ou None."""
+        if self.state["chunk_plan"] is None:
+            return None
+        return {name: (column, [tuple(bounds) for bounds in ranges])
+                for name, (column, ranges) in self.state["chunk_plan"].items()}
+
+    def start(self, table_files, chunk_plan):
+        """Enregistre les noms de fichiers et le découpage de cette tentative."""
+        with self.lock:
+            self.state["table_files"] = dict(table_files)
+            self.state["chunk_plan"] = {name: [column, [list(bounds) for bounds in ranges]]
+                                        for name, (column, ranges) in chunk_plan.items()}
+            self._save()
+
+    @property
+    def parts(self):
+        """{fichier terminé: empreintes}, chemins relatifs à output_dir."""
+        with self.lock:
+            return dict(self.state["parts"])
+
+    def is_done(self, relative_path):
+        with self.lock:
+            return relative_path in self.state["parts"]
+
+    def record(self, relative_path, integrity=None):
+        """
+        Note un fichier terminé (chemin relatif à output_dir) avec sa taille et son SHA-256 ;
+        integrity (ArchiveWriter.integrity) évite de relire le fichier pour les calculer.
+        """
+        if integrity is not None:
+            entry = dict(integrity)
+        else:
+            full_path = os.path.join(self.output_dir, relative_path)
+            entry = {"size": os.path.getsize(full_path), "sha256": file_sha256(full_path)}
+        with self.lock:
+            self.state["parts"][relative_path] = entry
+            self._save()
+
+    def verify(self):
+        """
+        Vérifie les fichiers notés comme terminés. Ceux qui manquent, ou dont la taille ou
+        le SHA-256 ne correspond plus, sont retirés (et supprimés) pour être exportés à
+        nouveau. Retourne la liste de ces fichiers.
+        """
+        invalid = []
+        with self.lock:
+            for relative_path, entry in list(self.state["parts"].items()):
+                full_path = os.path.join(self.output_dir, relative_path)
+                if (os.path.isfile(full_path) and os.path.getsize(full_path) == entry["size"]
+                        and file_sha256(full_path) == entry["sha256"]):
+                    continue
+                invalid.append(relative_path)
+                del self.state["parts"][relative_path]
+                if os.path.exists(full_path):
+                    os.remove(full_path)
+            self._save()
+        return invalid
+
+    def _save(self):
+        # Écriture atomique : une interruption ne laisse jamais un fichier de reprise tronqué
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        """Supprime le fichier de reprise une fois la sauvegarde terminée."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def find_resumable_backup(output_folder, db_name):
+    """
+    Cherche dans output_folder la plus récente sauvegarde interrompue de db_name
+    (dossier <base>_<AAAAMMJJ_HHMMSS> avec un checkpoint.json mais sans manifest.json).
+    Retourne le chemin du dossier, ou None.
+    """
+    if not os.path.isdir(output_folder):
+        return None
+    pattern = re.compile(re.escape(db_name) + r"_\d{8}_\d{6}$")
+    for name in sorted((name for name in os.listdir(output_folder) if pattern.match(name)), reverse=True):
+        folder = os.path.join(output_folder, name)
+        if os.path.isfile(os.path.join(folder, CHECKPOINT_FILE)) and not os.path.exists(os.path.join(folder, MANIFEST_FILE)):
+            return folder
+    return None
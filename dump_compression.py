@@ -0,0 +1,310 @@
+import collections
+import gzip
+import os
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from dump_pipeline import TEE_BUFFER_SIZE, DumpError, HashingFile, HashingWriter, TeeWriter, stream_dump
+from dump_progress import tracked_writer
+from dump_seekable import SEEKABLE_INDEX_SUFFIX, SeekableGzipWriter
+
+# --- Dépendances optionnelles (zstd et lz4) ---
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# --- Formats de compression disponibles et extension des fichiers produits ---
+# "zip" reste le format par défaut : les anciens scripts de restauration continuent de fonctionner.
+# "seekable" produit un .sql.gz standard, en frames indépendantes, accompagné d'un index par table.
+COMPRESSION_BACKENDS = {
+    "zip": ".zip",
+    "gzip": ".sql.gz",
+    "seekable": ".sql.gz",
+    "zstd": ".sql.zst",
+    "lz4": ".sql.lz4",
+    "none": ".sql"
+}
+DEFAULT_COMPRESSION = "zip"
+
+# Taille des blocs compressés en parallèle par le backend gzip (comme pigz : 128 Kio à 1 Mio)
+GZIP_BLOCK_SIZE = 1024 * 1024
+# Taille de la fenêtre DEFLATE : chaque bloc reprend la fin du précédent comme dictionnaire
+DEFLATE_WINDOW = 32 * 1024
+
+
+def archive_extension(compression):
+    """Retourne l'extension des fichiers produits par un format de compression."""
+    if compression not in COMPRESSION_BACKENDS:
+        raise DumpError(f"Format de compression inconnu : {compression}")
+    return COMPRESSION_BACKENDS[compression]
+
+
+def default_threads():
+    """Nombre de threads de compression utilisé par défaut (un par cœur)."""
+    return os.cpu_count() or 1
+
+
+class ZipMemberWriter:
+    """
+    Writer qui compresse un flux dans le membre unique d'une nouvelle archive ZIP.
+    S'utilise comme un fichier ouvert en écriture binaire (write/close).
+    """
+
+    def __init__(self, zip_file, arcname, level=None):
+        self.file = HashingFile(zip_file)
+        self.zipf = zipfile.ZipFile(self.file, 'w', zipfile.ZIP_DEFLATED, compresslevel=level)
+        zip_info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        zip_info.compress_type = zipfile.ZIP_DEFLATED
+        zip_info.external_attr = 0o644 << 16 # Droits rw-r--r-- à l'extraction
+        # force_zip64 : la taille finale du flux n'est pas connue à l'avance
+        self.member = self.zipf.open(zip_info, 'w', force_zip64=True)
+
+    def write(self, data):
+        return self.member.write(data)
+
+    def close(self):
+        try:
+            try:
+                self.member.close()
+            finally:
+                self.zipf.close()
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _deflate_block(block, level, dictionary, last):
+    """Compresse un bloc en DEFLATE brut ; zlib libère le GIL pendant la compression."""
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # Z_SYNC_FLUSH aligne le bloc sur un octet : les blocs se concatènent en un seul flux DEFLATE
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter:
+    """
+    Writer gzip multi-thread produisant, comme pigz, un unique membre gzip standard.
+
+    Le flux est découpé en blocs compressés en parallèle, chacun amorcé avec les
+    32 derniers Kio du bloc précédent pour conserver le taux de compression. Le
+    nombre de blocs en cours est borné, donc la mémoire utilisée aussi.
+    """
+
+    def __init__(self, fileobj, level=None, threads=None, block_size=GZIP_BLOCK_SIZE):
+        self.fileobj = fileobj
+        self.level = 6 if level is None else level
+        self.threads = threads or default_threads()
+        self.block_size = block_size
+        self.executor = ThreadPoolExecutor(max_workers=self.threads)
+        self.pending = collections.deque()
+        self.buffer = bytearray()
+        self.dictionary = b""
+        self.crc = 0
+        self.size = 0
+        # En-tête gzip : méthode DEFLATE, pas de nom de fichier, système Unix
+        self.fileobj.write(b"\x1f\x8b\x08\x00" + struct.pack("<I", int(time.time())) + b"\x00\x03")
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            block = bytes(self.buffer[:self.block_size])
+            del self.buffer[:self.block_size]
+            self._submit(block, last=False)
+        return len(data)
+
+    def _submit(self, block, last):
+        self.pending.append(self.executor.submit(_deflate_block, block, self.level, self.dictionary, last))
+        self.dictionary = block[-DEFLATE_WINDOW:]
+        # Les blocs sont écrits dans l'ordre ; au-delà de 2 blocs par thread, on attend le plus ancien
+        while len(self.pending) > self.threads * 2:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def close(self):
+        try:
+            self._submit(bytes(self.buffer), last=True)
+            self.buffer.clear()
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().result())
+            self.fileobj.write(struct.pack("<II", self.crc & 0xFFFFFFFF, self.size & 0xFFFFFFFF))
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+class CompressedFileWriter:
+    """Writer qui compresse un flux dans un fichier gzip, zstd, lz4 ou brut (none)."""
+
+    def __init__(self, path, compression, level=None, threads=None):
+        if compression == "zstd" and zstandard is None:
+            raise DumpError("La compression zstd nécessite le module 'zstandard' (pip install zstandard).")
+        if compression == "lz4" and lz4_frame is None:
+            raise DumpError("La compression lz4 nécessite le module 'lz4' (pip install lz4).")
+        self.file = HashingFile(path)
+        try:
+            if compression == "gzip":
+                self.stream = ParallelGzipWriter(self.file, level, threads)
+            elif compression == "zstd":
+                compressor = zstandard.ZstdCompressor(level=3 if level is None else level,
+                                                      threads=threads or default_threads())
+                self.stream = compressor.stream_writer(self.file, closefd=False)
+            elif compression == "lz4":
+                self.stream = lz4_frame.LZ4FrameFile(self.file, mode='wb', compression_level=level or 0)
+            else:
+                self.stream = None
+        except BaseException:
+            self.file.close()
+            raise
+
+    def write(self, data):
+        if self.stream is None:
+            return self.file.write(data)
+        return self.stream.write(data)
+
+    def close(self):
+        try:
+            if self.stream is not None:
+                self.stream.close()
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ArchiveWriter(HashingWriter):
+    """
+    Writer retourné par open_archive_writer : compresse le flux SQL et calcule au passage
+    le SHA-256 du SQL et celui du fichier produit (writer.file), sans relecture.
+    """
+
+    def integrity(self):
+        """Tailles et empreintes du SQL et du fichier compressé ; à appeler après close()."""
+        return {
+            "size": self.writer.file.size,
+            "sha256": self.writer.file.digest.hexdigest(),
+            "sql_size": self.size,
+            "sql_sha256": self.digest.hexdigest(),
+            "completed": self.completed
+        }
+
+
+def open_archive_writer(path, arcname, compression=DEFAULT_COMPRESSION, level=None, threads=None):
+    """
+    Ouvre un writer (ArchiveWriter) qui compresse un flux SQL dans path avec le format demandé.
+    arcname est le nom du fichier .sql dans l'archive (utilisé par le format zip).
+    """
+    archive_extension(compression) # Vérifie que le format est connu
+    if compression == "zip":
+        return ArchiveWriter(ZipMemberWriter(path, arcname, level))
+    if compression == "seekable":
+        return ArchiveWriter(SeekableGzipWriter(path, level, threads))
+    return ArchiveWriter(CompressedFileWriter(path, compression, level, threads))
+
+
+def open_archive_reader(path, compression=None, fileobj=None):
+    """
+    Ouvre en lecture le flux SQL d'une archive produite par ce programme ; le format
+    est déduit de l'extension du fichier si compression n'est pas indiqué. fileobj, s'il
+    est fourni, est lu à la place de path (et reste ouvert). Retourne un objet fichier binaire.
+    """
+    source = path if fileobj is None else fileobj
+    lower_path = path.lower()
+    if compression is None:
+        compression = next((name for name, extension in sorted(COMPRESSION_BACKENDS.items(), key=lambda item: -len(item[1]))
+                            if lower_path.endswith(extension)), None)
+    if compression is None:
+        raise DumpError(f"Format d'archive non reconnu : {path}")
+    if compression == "zip":
+        with zipfile.ZipFile(source) as zip_file:
+            names = [name for name in zip_file.namelist() if name.endswith(".sql")] or zip_file.namelist()
+            if not names:
+                raise DumpError(f"L'archive est vide : {path}")
+            # Le membre reste lisible après la fermeture de l'archive
+            return zip_file.open(names[0])
+    if compression == "gzip":
+        return gzip.open(source, 'rb')
+    if compression == "zstd":
+        if zstandard is None:
+            raise DumpError("La lecture des archives zstd nécessite le module 'zstandard' (pip install zstandard).")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb') if fileobj is None else fileobj,
+                                                          closefd=fileobj is None)
+    if compression == "lz4":
+        if lz4_frame is None:
+            raise DumpError("La lecture des archives lz4 nécessite le module 'lz4' (pip install lz4).")
+        return lz4_frame.open(source, 'rb')
+    return open(path, 'rb') if fileobj is None else fileobj
+
+
+def dump_to_archive(command, archive_path, arcname, compression=DEFAULT_COMPRESSION, level=None, threads=None,
+                    tracker=None):
+    """
+    Exécute mysqldump et compresse sa sortie à la volée dans archive_path, sans
+    fichier .sql intermédiaire. L'archive partielle (et son index) est supprimée en cas d'échec.
+    Le flux est compté dans tracker (DumpProgress) s'il est fourni.
+    Retourne le tuple (code de retour, message d'erreur de mysqldump, empreintes de
+    l'archive (ArchiveWriter.integrity) ou None en cas d'échec).
+    """
+    returncode, stderr_output, integrity = dump_to_archives([command], [(archive_path, compression)], arcname,
+                                                            level, threads, tracker)
+    return returncode, stderr_output, integrity[0] if integrity else None
+
+
+def dump_to_archives(commands, targets, arcname, level=None, threads=None, tracker=None, buffer_size=TEE_BUFFER_SIZE):
+    """
+    Exécute les commandes mysqldump l'une après l'autre et compresse leurs sorties, à la
+    suite, dans chaque archive de targets (liste de (chemin, format de compression)).
+    Avec plusieurs archives, un seul flux alimente toutes les sorties (TeeWriter) : une
+    sortie lente prend au plus buffer_size octets de retard avant de ralentir l'export.
+    Les archives partielles sont supprimées en cas d'échec.
+    Retourne le tuple (code de retour, message d'erreur de mysqldump, liste des empreintes
+    des archives dans l'ordre de targets ou None en cas d'échec).
+    """
+    def remove_partial_archives():
+        for archive_path, _ in targets:
+            for path in (archive_path, archive_path + SEEKABLE_INDEX_SUFFIX):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    returncode, stderr_output = 0, ""
+    writers = []
+    try:
+        try:
+            for archive_path, compression in targets:
+                writers.append(open_archive_writer(archive_path, arcname, compression, level, threads))
+        except BaseException:
+            for writer in writers:
+                writer.close()
+            raise
+        writer = writers[0] if len(writers) == 1 else TeeWriter(writers, buffer_size)
+        with tracked_writer(writer, tracker) as stage:
+            for command in commands:
+                returncode, stderr_output = stream_dump(command, stage, tracker.cancellation if tracker else None)
+                if returncode != 0:
+                    break
+    except BaseException:
+        remove_partial_archives()
+        raise
+    if returncode != 0:
+        remove_partial_archives()
+        return returncode, stderr_output, None
+    return returncode, stderr_output, [writer.integrity() for writer in writers]
@@ -1,11 +1,18 @@
 import os
-import subprocess
+import argparse
 import datetime
 import getpass # Pour masquer le mot de passe à la saisie
 
-def dump_mysql_database():
+from dump_compression import COMPRESSION_BACKENDS, archive_extension, dump_to_archive
+from dump_integrity import write_integrity
+from dump_native import MySQLSource, NativeDump
+from dump_pipeline import DumpError
+
+def dump_mysql_database(compression="none", level=None, threads=None, native=False):
     """
     Demande les informations de connexion MySQL et crée un dump de la base de données.
+    La sortie est compressée à la volée avec le format demandé ("none" = fichier .sql brut).
+    Avec native, le dump est produit par le moteur intégré (dump_native) au lieu de mysqldump.
     """
     print("--- Création d'un dump de base de données MySQL avec Python ---")
     print("")
@@ -20,7 +27,7 @@ def dump_mysql_database():
     # Remplace X.X.X par ta version de MySQL, par exemple mysql5.7.26
 
     # Vérifie si le chemin mysqldump existe
-    if not os.path.exists(MYSQLDUMP_PATH):
+    if not native and not os.path.exists(MYSQLDUMP_PATH):
         print(f"Erreur : mysqldump n'a pas été trouvé à l'emplacement spécifié : {MYSQLDUMP_PATH}")
         print("Veuillez vérifier et ajuster la variable 'MYSQLDUMP_PATH' dans le script.")
         return
@@ -38,7 +45,7 @@ def dump_mysql_database():
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     # Pour un chemin multi-plateforme vers le bureau
     output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-    output_file = os.path.join(output_dir, f"{db_name}_{timestamp}.sql")
+    output_file = os.path.join(output_dir, f"{db_name}_{timestamp}{archive_extension(compression)}")
 
     # Crée le répertoire de sortie si inexistant
     os.makedirs(output_dir, exist_ok=True)
@@ -61,25 +68,29 @@ def dump_mysql_database():
     if db_port:
         print(f"Utilisation du port : {db_port}")
     print(f"Fichier de sortie : {output_file}")
+    print(f"Compression : {compression}")
     print("")
 
     # --- Exécuter la commande ---
     try:
-        # Popen permet d'exécuter la commande et de capturer la sortie/erreur
-        # et d'écrire directement dans le fichier de sortie
-        with open(output_file, 'w') as f:
-            process = subprocess.Popen(command, stdout=f, stderr=subprocess.PIPE, text=True)
-            # Attend que le processus se termine et capture les erreurs
-            stderr_output = process.communicate()[1]
+        if native:
+            # Même sortie que mysqldump, lue directement sur le serveur (module pymysql)
+            command = NativeDump(MySQLSource(db_host, db_user, db_password, db_port), db_name)
+        # La sortie de mysqldump est lue en octets bruts et compressée à la volée
+        returncode, stderr_output, integrity = dump_to_archive(command, output_file, f"{db_name}_{timestamp}.sql",
+                                                               compression, level, threads)
 
-        if process.returncode == 0:
+        if returncode == 0:
             print("✅ Dump de la base de données créé avec succès !")
             print(f"Le fichier de sauvegarde est disponible ici : {output_file}")
+            print(f"Empreintes (SHA-256) : {write_integrity(output_file, integrity)}")
         else:
-            print(f"❌ Une erreur s'est produite lors de la création du dump (Code d'erreur : {process.returncode}).")
+            print(f"❌ Une erreur s'est produite lors de la création du dump (Code d'erreur : {returncode}).")
             print(f"Message d'erreur : {stderr_output.strip()}")
             print("Veuillez vérifier vos identifiants et le chemin de mysqldump.")
 
+    except DumpError as e:
+        print(f"Erreur : {e}")
     except FileNotFoundError:
         print(f"Erreur : Le programme mysqldump n'a pas été trouvé à l'emplacement : {MYSQLDUMP_PATH}")
         print("Veuillez vous assurer que le chemin est correct et que mysqldump est installé.")
@@ -89,5 +100,12 @@ def dump_mysql_database():
     print("--- Opération terminée ---")
 
 if __name__ == "__main__":
-    dump_mysql_database()
+    parser = argparse.ArgumentParser(description="Crée un dump d'une base de données MySQL.")
+    parser.add_argument("--compression", choices=list(COMPRESSION_BACKENDS), default="none",
+                        help="Format de compression de la sortie (défaut : none, fichier .sql brut)")
+    parser.add_argument("--level", type=int, default=None, help="Niveau de compression (défaut : celui du format)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads de compression (gzip, zstd ; défaut : un par cœur)")
+    parser.add_argument("--native", action="store_true", help="Utilise le moteur intégré au lieu de mysqldump (module pymysql)")
+    args = parser.parse_args()
+    dump_mysql_database(args.compression, args.level, args.threads, args.native)
     
\ No newline at end of file
@@ -2,15 +2,33 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 import os
 import subprocess
-import datetime
 import sys
-import shutil
 import threading
-import zipfile
+import queue # File des mises à jour de l'interface envoyées par les threads de sauvegarde
 import json # Pour la persistance des préférences
 
-# --- Chemin du fichier de préférences ---
-PREFS_FILE = "mysqldumper_prefs.json"
+from dump_batch import DEFAULT_MAX_CONCURRENT, dump_batch, is_batch_pattern, parse_database_patterns
+from dump_compression import COMPRESSION_BACKENDS, DEFAULT_COMPRESSION
+from dump_export import EXPORT_FORMATS, pyarrow
+from dump_native import NATIVE_ENGINE, pymysql
+from dump_pipeline import Cancellation, DumpCancelled, DumpError
+from dump_progress import format_duration, format_size
+from dump_rewrite import parse_definer
+from dump_runner import PREFS_FILE, dump_database, make_job, parse_copy_targets
+from dump_subset import parse_sample_rule
+from dump_throttle import DEFAULT_MAX_REPLICA_LAG, DEFAULT_MAX_THREADS_RUNNING
+from dump_zerocopy import ZERO_COPY_COMPRESSIONS, zero_copy_available
+from mysql_client import find_mysql_client, find_mysqldump
+
+# --- Nombre de workers proposé par défaut pour le dump parallèle ---
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# --- File des sauvegardes ---
+DEFAULT_MAX_JOBS = 2  # Sauvegardes de la file exécutées simultanément
+UI_POLL_INTERVAL = 100  # Intervalle de lecture de la file des mises à jour de l'interface (ms)
+
+# --- Export des données pour les outils d'analyse (premier choix : dump SQL) ---
+NO_EXPORT = "non"
 
 # --- Fonction utilitaire pour les chemins des ressources (pour PyInstaller) ---
 def resource_path(relative_path):
@@ -27,47 +45,6 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
-# --- Fonctions utilitaires pour la détection de mysqldump ---
-def find_mysqldump():
-    """
-    Tente de trouver le chemin de l'exécutable mysqldump sur le système.
-    Vérifie le PATH système, puis les emplacements communs de MAMP/XAMPP.
-    """
-    # 1. Vérifier le PATH système en premier
-    mysqldump_exe = shutil.which("mysqldump")
-    if mysqldump_exe:
-        return mysqldump_exe
-
-    # 2. Vérifier les chemins communs de MAMP/XAMPP (macOS)
-    if sys.platform == 'darwin':  # macOS
-        # Chemins MAMP PRO (peut varier selon les versions de MySQL)
-        mamp_pro_paths = [
-            "/Applications/MAMP/Library/bin/mysql/bin/mysqldump", # Ancien chemin MAMP
-            "/Applications/MAMP/Library/bin/mysql80/bin/mysqldump", # MAMP Pro MySQL 8
-            "/Applications/MAMP/Library/bin/mysql57/bin/mysqldump", # MAMP Pro MySQL 5.7
-            # Ajouter d'autres chemins si nécessaire pour différentes versions MySQL de MAMP
-        ]
-        for path in mamp_pro_paths:
-            if os.path.exists(path) and os.access(path, os.X_OK):
-                return path
-
-    # 3. Vérifier les chemins communs de MAMP/XAMPP (Windows)
-    elif sys.platform.startswith('win'):  # Windows
-        xampp_path = os.path.join(os.environ.get('XAMPP_HOME', 'C:\\xampp'), 'mysql', 'bin', 'mysqldump.exe')
-        if os.path.exists(xampp_path) and os.access(xampp_path, os.X_OK):
-            return xampp_path
-
-        mamp_win_base = os.path.join('C:\\MAMP', 'bin', 'mysql')
-        if os.path.exists(mamp_win_base):
-            # Chercher les versions spécifiques (e.g., mysql5.7.X, mysql8.0.X)
-            for version_dir in os.listdir(mamp_win_base):
-                if version_dir.startswith('mysql'):
-                    specific_path_win = os.path.join(mamp_win_base, version_dir, 'bin', 'mysqldump.exe')
-                    if os.path.exists(specific_path_win) and os.access(specific_path_win, os.X_OK):
-                        return specific_path_win
-
-    return "" # Retourne une chaîne vide si mysqldump n'est pas trouvé
-
 def browse_mysqldump_path():
     """Ouvre une boîte de dialogue pour sélectionner l'exécutable mysqldump."""
     file_selected = filedialog.askopenfilename(
@@ -88,27 +65,29 @@ def select_output_folder():
         output_folder_label.config(text=f"Dossier de sortie : {folder_selected}")
         save_preferences() # Sauvegarde la préférence immédiatement
 
-def run_dump_in_thread():
-    """Lance la fonction de dump dans un thread séparé pour ne pas bloquer l'interface."""
-    # Désactive le bouton pour éviter les lancements multiples
-    dump_button.config(state=tk.DISABLED)
-    open_folder_button.config(state=tk.DISABLED) # Désactive le bouton d'ouverture de dossier
-    status_label.config(text="Démarrage du dump (peut prendre quelques instants)...", fg="orange")
-    window.update_idletasks()
-
-    # Sauvegarde les préférences (sans le mot de passe) avant de lancer le dump
-    save_preferences()
+def post(function, *args):
+    """
+    Demande l'exécution de function(*args) par la boucle principale de Tkinter.
+    Seule façon sûre, pour un thread de sauvegarde, de modifier l'interface.
+    """
+    ui_queue.put((function, args))
 
-    # Lance le dump dans un thread séparé
-    dump_thread = threading.Thread(target=dump_mysql_database_gui_logic)
-    dump_thread.start()
+def process_ui_queue():
+    """Exécute les mises à jour de l'interface envoyées par les threads de sauvegarde."""
+    # Le prochain passage est programmé d'abord : une boîte de dialogue ouverte ici ne bloque pas les suivants
+    window.after(UI_POLL_INTERVAL, process_ui_queue)
+    while True:
+        try:
+            function, args = ui_queue.get_nowait()
+        except queue.Empty:
+            return
+        function(*args)
 
-def dump_mysql_database_gui_logic():
+def collect_job():
     """
-    Récupère les informations de l'interface graphique et exécute la commande mysqldump localement.
+    Lit et valide les champs de l'interface (thread principal uniquement).
+    Retourne la description de la sauvegarde à mettre en file, ou None si un champ est invalide.
     """
-    global last_output_folder # Déclaration globale unique au début de la fonction
-
     db_user = user_entry.get()
     db_password = password_entry.get() # Récupère le mot de passe directement depuis le champ (non sauvegardé)
     db_host = host_entry.get()
@@ -116,12 +95,31 @@ def dump_mysql_database_gui_logic():
     db_name = name_entry.get()
     mysqldump_exe_path = mysqldump_path_var.get()
     output_folder = output_folder_path.get()
+    parallel = parallel_var.get()
+    incremental = incremental_var.get()
+    repository = repository_var.get()
+    checkpoint = checkpoint_var.get()
+    workers_str = workers_entry.get()
+    compression = compression_var.get()
+    level_str = level_entry.get()
+    threads_str = threads_entry.get()
+    adaptive_throttle = adaptive_var.get()
+    native_engine = native_var.get()
+    zero_copy = zero_copy_var.get()
+    export_format = "" if export_var.get() == NO_EXPORT else export_var.get()
+    volume_size_str = volume_size_entry.get()
+    insert_size_str = insert_size_entry.get().strip()
+    definer = definer_entry.get().strip()
+    rename_schema = rename_schema_entry.get().strip()
+    subset_tables = subset_tables_entry.get().strip()
+    subset_sample = subset_sample_entry.get().strip()
+    copies = parse_copy_targets(copies_entry.get())
+    keep_strs = (keep_daily_entry.get(), keep_weekly_entry.get(), keep_monthly_entry.get())
 
     # --- Validations ---
     if not db_user or not db_host or not db_name:
         messagebox.showwarning("Champs manquants", "Veuillez remplir au moins l'utilisateur, l'hôte et le nom de la base de données.")
-        reset_ui_after_completion()
-        return
+        return None
 
     # Validation du port
     db_port = None
@@ -130,95 +128,347 @@ def dump_mysql_database_gui_logic():
             db_port = int(db_port_str)
         except ValueError:
             messagebox.showwarning("Port invalide", "Le port doit être un nombre entier valide.")
-            reset_ui_after_completion()
-            return
+            return None
 
     if not output_folder or not os.path.isdir(output_folder):
         messagebox.showwarning("Dossier de sortie invalide", "Veuillez sélectionner un dossier de sortie valide.")
-        reset_ui_after_completion()
-        return
-
-    if not mysqldump_exe_path or not os.path.exists(mysqldump_exe_path) or not os.access(mysqldump_exe_path, os.X_OK):
+        return None
+
+    # Export CSV/TSV/Parquet : les tables sont lues avec PyMySQL par plusieurs connexions, sans mysqldump
+    if export_format:
+        if pymysql is None:
+            messagebox.showerror("Erreur de configuration", "L'export nécessite le module 'pymysql' (pip install pymysql).")
+            return None
+        if export_format == "parquet" and pyarrow is None:
+            messagebox.showerror("Erreur de configuration", "L'export Parquet nécessite le module 'pyarrow' (pip install pyarrow).")
+            return None
+        if parallel or incremental or checkpoint or repository or subset_tables or volume_size_str or copies:
+            messagebox.showwarning("Options incompatibles", "L'export ne se combine ni avec les modes parallèle, incrémental, "
+                                                            "dépôt et reprise, ni avec le sous-ensemble, les volumes ou les copies.\n"
+                                                            "Le nombre de workers règle ses connexions.")
+            return None
+        if compression == "seekable":
+            messagebox.showwarning("Compression invalide", "Le format seekable ne s'applique pas à l'export : utilisez gzip.")
+            return None
+    # Moteur intégré : mysqldump n'est pas utilisé, la base est lue avec PyMySQL
+    elif native_engine:
+        if pymysql is None:
+            messagebox.showerror("Erreur de configuration", "Le moteur intégré nécessite le module 'pymysql' (pip install pymysql).")
+            return None
+        if parallel or incremental or checkpoint or subset_tables:
+            messagebox.showwarning("Options incompatibles", "Le moteur intégré n'est disponible qu'avec le dump standard "
+                                                            "(archive, volumes, copies) et le dépôt dédupliqué.")
+            return None
+    elif not mysqldump_exe_path or not os.path.exists(mysqldump_exe_path) or not os.access(mysqldump_exe_path, os.X_OK):
         messagebox.showerror("Erreur de configuration",
                              "Le chemin de mysqldump est invalide ou l'exécutable n'existe pas ou n'est pas exécutable.\n"
                              "Veuillez le renseigner manuellement ou vérifier l'installation.")
-        reset_ui_after_completion()
+        return None
+
+    # Validation des options de compression (niveau et threads optionnels)
+    try:
+        level = int(level_str) if level_str else None
+        threads = int(threads_str) if threads_str else None
+        if threads is not None and threads < 1:
+            raise ValueError
+    except ValueError:
+        messagebox.showwarning("Compression invalide", "Le niveau et le nombre de threads de compression doivent être des nombres entiers.")
+        return None
+
+    # Validation de la limitation de débit (débit maximal optionnel, seuils du mode adaptatif)
+    try:
+        max_rate = float(max_rate_entry.get()) if max_rate_entry.get() else None
+        max_threads_running = int(max_threads_running_entry.get())
+        max_replica_lag = int(max_replica_lag_entry.get())
+        if (max_rate is not None and max_rate <= 0) or max_threads_running < 1 or max_replica_lag < 1:
+            raise ValueError
+    except ValueError:
+        messagebox.showwarning("Limitation invalide", "Le débit maximal doit être un nombre positif (Mo/s) et les seuils "
+                                                      "du mode adaptatif des entiers supérieurs ou égaux à 1.")
+        return None
+
+    # Validation de la taille des volumes (optionnelle, dump standard uniquement)
+    try:
+        volume_size = int(volume_size_str) if volume_size_str else None
+        if volume_size is not None and volume_size < 1:
+            raise ValueError
+    except ValueError:
+        messagebox.showwarning("Volumes invalides", "La taille des volumes doit être un entier supérieur ou égal à 1 (Mo).")
+        return None
+    if volume_size and (parallel or incremental or checkpoint or repository):
+        messagebox.showwarning("Options incompatibles", "Le découpage en volumes n'est disponible qu'avec le dump standard.")
+        return None
+
+    # Réécriture du SQL (taille des INSERT en Kio, DEFINER, nom de la base), hors export
+    try:
+        insert_size = int(insert_size_str) if insert_size_str else None
+        if insert_size is not None and insert_size < 1:
+            raise ValueError
+    except ValueError:
+        messagebox.showwarning("Réécriture invalide", "La taille des INSERT doit être un entier supérieur ou égal à 1 (Kio).")
+        return None
+    try:
+        parse_definer(definer)
+    except DumpError as e:
+        messagebox.showwarning("Réécriture invalide", str(e))
+        return None
+    if (insert_size or definer or rename_schema) and export_format:
+        messagebox.showwarning("Options incompatibles", "La réécriture du SQL ne s'applique pas à l'export.")
+        return None
+    if insert_size and repository:
+        messagebox.showwarning("Options incompatibles", "La taille des INSERT ne se règle pas avec le dépôt dédupliqué.")
+        return None
+
+    # Écriture sans copie (Linux) : dump standard par mysqldump, sans réécriture, copies du même format
+    if zero_copy:
+        if not zero_copy_available():
+            messagebox.showwarning("Zéro copie indisponible", "L'écriture sans copie nécessite Linux (os.splice, Python 3.10 ou plus).")
+            return None
+        if volume_size or parallel or incremental or checkpoint or repository or export_format or native_engine:
+            messagebox.showwarning("Options incompatibles", "L'écriture sans copie n'est disponible qu'avec le dump standard par mysqldump, sans volumes.")
+            return None
+        if compression not in ZERO_COPY_COMPRESSIONS or any((copy["compression"] or compression) != compression for copy in copies):
+            messagebox.showwarning("Options incompatibles",
+                                   f"L'écriture sans copie n'est disponible qu'avec les formats {', '.join(ZERO_COPY_COMPRESSIONS)}, "
+                                   "et les copies doivent avoir le format de la sauvegarde.")
+            return None
+        if insert_size or definer or rename_schema:
+            messagebox.showwarning("Options incompatibles", "L'écriture sans copie ne se combine pas avec la réécriture du SQL.")
+            return None
+
+    # Sous-ensemble cohérent (tables racines et règle d'échantillonnage, dump standard uniquement)
+    if subset_tables:
+        if volume_size or parallel or incremental or checkpoint or repository:
+            messagebox.showwarning("Options incompatibles", "Le sous-ensemble n'est disponible qu'avec le dump standard, sans volumes.")
+            return None
+        try:
+            parse_sample_rule(subset_sample)
+        except DumpError as e:
+            messagebox.showwarning("Échantillon invalide", str(e))
+            return None
+
+    # Copies écrites avec le même flux (dump standard uniquement) : les dossiers doivent exister
+    if copies:
+        if volume_size or parallel or incremental or checkpoint or repository:
+            messagebox.showwarning("Options incompatibles", "Les copies simultanées ne sont disponibles qu'avec le dump standard, sans volumes.")
+            return None
+        invalid = [copy["output_folder"] for copy in copies if not os.path.isdir(copy["output_folder"])]
+        if invalid:
+            messagebox.showwarning("Copies invalides", "Dossiers de copie introuvables :\n" + "\n".join(invalid))
+            return None
+
+    # Rétention (facultative) : nombre de jours, semaines et mois dont la dernière sauvegarde est conservée
+    try:
+        keep_daily, keep_weekly, keep_monthly = (int(value) if value else None for value in keep_strs)
+        if any(value is not None and value < 0 for value in (keep_daily, keep_weekly, keep_monthly)):
+            raise ValueError
+    except ValueError:
+        messagebox.showwarning("Rétention invalide", "Les nombres de jours, semaines et mois à conserver doivent être des entiers positifs.")
+        return None
+
+    if repository and (parallel or incremental or checkpoint):
+        messagebox.showwarning("Options incompatibles", "Le dépôt dédupliqué n'est disponible qu'avec le dump standard (ni parallèle, ni incrémental, ni reprise).")
+        return None
+
+    # Validation du nombre de workers (mode parallèle, connexions de l'export)
+    workers = 1
+    if parallel or incremental or checkpoint or export_format:
+        try:
+            workers = int(workers_str)
+            if workers < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Workers invalides", "Le nombre de workers doit être un entier supérieur ou égal à 1.")
+            return None
+
+    # Mode batch : plusieurs bases (liste, motif glob ou "*" pour toutes les bases)
+    batch = is_batch_pattern(db_name)
+    max_concurrent = None
+    if batch:
+        try:
+            max_concurrent = int(max_concurrent_entry.get())
+            if max_concurrent < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Limite invalide", "Le nombre de dumps simultanés doit être un entier supérieur ou égal à 1.")
+            return None
+
+    if subset_tables and batch:
+        messagebox.showwarning("Options incompatibles", "Le sous-ensemble ne porte que sur une base à la fois.")
+        return None
+    if rename_schema and batch:
+        messagebox.showwarning("Options incompatibles", "Le renommage de la base ne porte que sur une base à la fois.")
+        return None
+
+    if (parallel or incremental or checkpoint or batch or adaptive_throttle or subset_tables) and not find_mysql_client(mysqldump_exe_path):
+        messagebox.showerror("Erreur de configuration",
+                             "Le client mysql (nécessaire aux modes parallèle, incrémental, batch, adaptatif et sous-ensemble) n'a pas été trouvé à côté de mysqldump ni dans le PATH.")
+        return None
+
+    job = make_job(db_user=db_user, db_password=db_password, db_host=db_host, db_port=db_port, db_name=db_name,
+                   mysqldump_path=mysqldump_exe_path, output_folder=output_folder, compression=compression,
+                   compression_level=level, compression_threads=threads, parallel=parallel, workers=workers,
+                   incremental=incremental, repository=repository, checkpoint=checkpoint, resume=checkpoint,
+                   max_rate=max_rate, adaptive_throttle=adaptive_throttle, max_threads_running=max_threads_running,
+                   max_replica_lag=max_replica_lag, volume_size=volume_size, subset_tables=subset_tables,
+                   subset_sample=subset_sample, copies=copies, keep_daily=keep_daily, keep_weekly=keep_weekly,
+                   keep_monthly=keep_monthly, engine=NATIVE_ENGINE if native_engine else "mysqldump",
+                   insert_size=insert_size, definer=definer, rename_schema=rename_schema,
+                   export_format=export_format, zero_copy=zero_copy)
+    return {
+        "job": job,
+        "label": f"{db_name} ({db_host})",
+        "batch": batch,
+        "max_concurrent": max_concurrent
+    }
+
+def run_dump_in_thread():
+    """Ajoute une sauvegarde à la file ; elle démarre dès qu'une place se libère."""
+    # Sauvegarde les préférences (sans le mot de passe) avant de mettre le dump en file
+    save_preferences()
+    spec = collect_job()
+    if spec is None:
         return
-    
-    # --- Définir le nom du fichier de sortie ---
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file_base = f"{db_name}_{timestamp}"
-    output_sql_file = os.path.join(output_folder, f"{output_file_base}.sql")
-    zip_file = os.path.join(output_folder, f"{output_file_base}.zip")
-
-    # --- Construire la commande mysqldump ---
-    command = [
-        mysqldump_exe_path,
-        f"-h{db_host}",
-        f"-u{db_user}",
-        f"-p{db_password}", # Mot de passe directement dans la commande (non sauvegardé)
-        db_name,
-        "--single-transaction",
-        "--routines",
-        "--triggers",
-        "--events",
-        "--add-drop-database",
-        "--add-drop-table",
-        "--default-character-set=utf8mb4",
-        "--set-gtid-purged=OFF"
-    ]
-
-    if db_port: # Ajouter le port si renseigné
-        command.insert(2, f"-P{db_port}") # Insérer après -u et avant -p pour une meilleure convention
-
-    status_label.config(text=f"Sauvegarde en cours de '{db_name}' vers '{output_sql_file}'...", fg="orange")
-    window.update_idletasks()
-
-    # --- Exécuter la commande ---
+
+    entry = dict(spec, state="queued", cancellation=Cancellation())
+    entry["row"] = tk.Frame(jobs_list_frame)
+    entry["row"].pack(fill="x", pady=2)
+    tk.Label(entry["row"], text=spec["label"], width=22, anchor="w").pack(side=tk.LEFT)
+    entry["status_label"] = tk.Label(entry["row"], text="En attente...", fg="blue", anchor="w", justify="left", wraplength=400)
+    entry["status_label"].pack(side=tk.LEFT, fill="x", expand=True)
+    entry["cancel_button"] = tk.Button(entry["row"], text="Annuler", command=lambda: cancel_job(entry))
+    entry["cancel_button"].pack(side=tk.RIGHT)
+    dump_jobs.append(entry)
+    start_queued_jobs()
+
+def start_queued_jobs():
+    """Démarre les sauvegardes en attente, dans l'ordre, tant que la limite de sauvegardes simultanées le permet."""
     try:
-        with open(output_sql_file, 'w', encoding='utf-8') as f: # Spécifier l'encodage pour le fichier de sortie
-            process = subprocess.Popen(command, stdout=f, stderr=subprocess.PIPE, text=True, encoding='utf-8')
-            stderr_output = process.communicate()[1]
-
-        if process.returncode == 0:
-            # --- Compression ZIP ---
-            status_label.config(text=f"Dump terminé. Compression en cours vers '{zip_file}'...", fg="orange")
-            window.update_idletasks()
-            try:
-                with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    zipf.write(output_sql_file, os.path.basename(output_sql_file))
-                os.remove(output_sql_file) # Supprime le fichier SQL non compressé
-                messagebox.showinfo("Succès", f"Dump créé et compressé avec succès !\nFichier : {zip_file}")
-                status_label.config(text=f"Dump et compression réussis. Fichier : {os.path.basename(zip_file)}", fg="green")
-                open_folder_button.config(state=tk.NORMAL) # Active le bouton d'ouverture de dossier
-                last_output_folder = output_folder # Stocke le dernier dossier de sortie
-            except Exception as zip_err:
-                messagebox.showwarning("Avertissement", f"Dump créé, mais erreur lors de la compression ZIP : {zip_err}\n"
-                                                      f"Le fichier SQL non compressé est disponible ici : {output_sql_file}")
-                status_label.config(text="Dump réussi, compression échouée.", fg="orange")
-                open_folder_button.config(state=tk.NORMAL)
-                last_output_folder = output_folder
-        else:
-            error_message = f"Une erreur s'est produite lors du dump (Code : {process.returncode}).\n"
-            error_message += f"Message de mysqldump : {stderr_output.strip()}" if stderr_output.strip() else "Aucun message d'erreur détaillé de mysqldump."
-            messagebox.showerror("Erreur", error_message)
-            status_label.config(text="Erreur lors du dump.", fg="red")
+        max_jobs = max(1, int(max_jobs_entry.get()))
+    except ValueError:
+        max_jobs = DEFAULT_MAX_JOBS
+    running = sum(1 for entry in dump_jobs if entry["state"] == "running")
+    for entry in dump_jobs:
+        if running >= max_jobs:
+            break
+        if entry["state"] != "queued":
+            continue
+        entry["state"] = "running"
+        running += 1
+        set_job_status(entry, "Démarrage du dump (peut prendre quelques instants)...", "orange")
+        threading.Thread(target=dump_job_worker, args=(entry,), daemon=True).start()
+    update_queue_status()
+
+def set_job_status(entry, text, color):
+    """Met à jour la ligne d'une sauvegarde (thread principal uniquement)."""
+    if entry["state"] == "running" and entry["cancellation"].cancelled:
+        return # L'annulation en cours reste affichée jusqu'à la fin du thread
+    entry["status_label"].config(text=text, fg=color)
+
+def cancel_job(entry):
+    """Retire une sauvegarde de la file, ou tue les processus mysqldump d'une sauvegarde en cours."""
+    if entry["state"] == "queued":
+        entry["state"] = "cancelled"
+        entry["status_label"].config(text="Annulée avant son démarrage.", fg="red")
+        entry["cancel_button"].config(state=tk.DISABLED)
+        update_queue_status()
+    elif entry["state"] == "running":
+        entry["cancellation"].cancel()
+        entry["status_label"].config(text="Annulation en cours...", fg="red")
+        entry["cancel_button"].config(state=tk.DISABLED)
+
+def dump_job_worker(entry):
+    """
+    Exécute une sauvegarde de la file (thread de travail). L'interface n'est jamais modifiée
+    d'ici : chaque mise à jour passe par post().
+    """
+    job = entry["job"]
+    progress = lambda message: post(set_job_status, entry, message, "orange")
+    # La sortie de mysqldump est compressée à la volée dans l'archive (pas de fichier .sql intermédiaire)
+    try:
+        if entry["batch"]:
+            batch_report = dump_batch(job, parse_database_patterns(job["db_name"]), entry["max_concurrent"],
+                                      progress, entry["cancellation"])
+            summary = (f"Batch terminé : {batch_report['succeeded']} bases sauvegardées, {batch_report['failed']} en erreur, "
+                       f"{batch_report['cancelled']} annulées.\nRapport : {batch_report['report_path']}")
+            if batch_report["cancelled"]:
+                post(finish_job, entry, "cancelled", f"Batch annulé : {batch_report['succeeded']} bases sauvegardées.", "red",
+                     job["output_folder"])
+            elif batch_report["failed"]:
+                failures = [f"- {result['database']} : {result['error']}" for result in batch_report["results"] if result["status"] != "ok"]
+                post(finish_job, entry, "error", f"Batch terminé : {batch_report['failed']} bases en erreur.", "orange",
+                     job["output_folder"], ("warning", "Batch terminé avec des erreurs", summary + "\n\n" + "\n".join(failures)))
+            else:
+                post(finish_job, entry, "done", f"Batch réussi : {batch_report['succeeded']} bases sauvegardées.", "green",
+                     job["output_folder"])
+            return
 
+        result = dump_database(job, progress=progress, cancellation=entry["cancellation"])
+        timing = (f" - {format_duration(result['duration'])}, "
+                  f"{format_size(result['stream_size'])} exportés, {format_size(result['throughput'] or 0)}/s")
+        if result.get("retention", {}).get("deleted"):
+            timing += f", {len(result['retention']['deleted'])} anciennes sauvegardes supprimées"
+        if job["parallel"] or job["incremental"] or job["checkpoint"]:
+            mode = "incrémental" if job["incremental"] else "parallèle"
+            post(finish_job, entry, "done", f"Dump {mode} réussi. Dossier : {os.path.basename(result['path'])}" + timing,
+                 "green", result["path"])
+        elif job["export_format"]:
+            post(finish_job, entry, "done", f"Export {job['export_format']} réussi ({result['tables']} tables, {result['rows']} lignes). "
+                                            f"Dossier : {os.path.basename(result['path'])}" + timing, "green", result["path"])
+        elif job["volume_size"]:
+            post(finish_job, entry, "done", f"Dump découpé en {result['volumes']} volumes. Dossier : "
+                                            f"{os.path.basename(result['path'])}" + timing, "green", result["path"])
+        elif job["subset_tables"]:
+            post(finish_job, entry, "done", f"Sous-ensemble exporté ({len(result['subset_tables'])} tables). Fichier : "
+                                            f"{os.path.basename(result['path'])}" + timing, "green", job["output_folder"])
+        elif job["repository"]:
+            post(finish_job, entry, "done", f"Dump enregistré dans le dépôt : {result['new_chunks']}/{result['chunk_count']} "
+                                            f"nouveaux morceaux" + timing, "green", job["output_folder"])
+        else:
+            copies = f" (+ {len(result['copies'])} copies)" if result.get("copies") else ""
+            post(finish_job, entry, "done", f"Dump et compression réussis. Fichier : {os.path.basename(result['path'])}"
+                                            + copies + timing, "green", job["output_folder"])
+
+    except DumpCancelled:
+        post(finish_job, entry, "cancelled", "Sauvegarde annulée.", "red")
+    except DumpError as e:
+        post(finish_job, entry, "error", "Erreur lors du dump.", "red", None, ("error", "Erreur", f"{entry['label']} :\n{e}"))
     except FileNotFoundError:
-        messagebox.showerror("Erreur", f"Le programme mysqldump n'a pas été trouvé à l'emplacement : {mysqldump_exe_path}\n"
-                                       "Vérifiez que le chemin est correct.")
-        status_label.config(text="Erreur : mysqldump introuvable.", fg="red")
+        post(finish_job, entry, "error", "Erreur : mysqldump introuvable.", "red", None,
+             ("error", "Erreur", f"Le programme mysqldump n'a pas été trouvé à l'emplacement : {job['mysqldump_path']}\n"
+                                 "Vérifiez que le chemin est correct."))
     except Exception as e:
-        messagebox.showerror("Erreur inattendue", f"Une erreur inattendue s'est produite : {e}")
-        status_label.config(text="Erreur inattendue.", fg="red")
-    finally:
-        reset_ui_after_completion()
-
-def reset_ui_after_completion():
-    """Réactive le bouton de dump et réinitialise le statut."""
-    dump_button.config(state=tk.NORMAL)
-    # Le bouton open_folder_button est géré dans la section de succès/échec du dump
-    if status_label.cget("fg") not in ["green", "orange", "red"]: # Ne pas écraser les messages de succès/échec
+        post(finish_job, entry, "error", "Erreur inattendue.", "red", None,
+             ("error", "Erreur inattendue", f"Une erreur inattendue s'est produite : {e}"))
+
+def finish_job(entry, state, text, color, output_folder=None, dialog=None):
+    """Termine une sauvegarde de la file (thread principal) et démarre les suivantes."""
+    global last_output_folder
+    entry["state"] = state
+    entry["status_label"].config(text=text, fg=color)
+    entry["cancel_button"].config(state=tk.DISABLED)
+    if output_folder:
+        last_output_folder = output_folder # Stocke le dernier dossier de sortie
+        open_folder_button.config(state=tk.NORMAL)
+    start_queued_jobs()
+    if dialog:
+        kind, title, message = dialog
+        (messagebox.showwarning if kind == "warning" else messagebox.showerror)(title, message)
+
+def clear_finished_jobs():
+    """Retire de la liste les sauvegardes terminées, en erreur ou annulées."""
+    for entry in [entry for entry in dump_jobs if entry["state"] not in ("queued", "running")]:
+        entry["row"].destroy()
+        dump_jobs.remove(entry)
+    update_queue_status()
+
+def update_queue_status():
+    """Résume l'état de la file dans l'étiquette de statut."""
+    running = sum(1 for entry in dump_jobs if entry["state"] == "running")
+    queued = sum(1 for entry in dump_jobs if entry["state"] == "queued")
+    if running or queued:
+        status_label.config(text=f"{running} sauvegarde(s) en cours, {queued} en attente.", fg="orange")
+    else:
         status_label.config(text="Prêt.", fg="blue")
 
 def open_last_output_folder():
@@ -246,9 +496,44 @@ def save_preferences():
         "db_port": port_entry.get(),
         "db_name": name_entry.get(),
         "mysqldump_path": mysqldump_path_var.get(),
-        "output_folder": output_folder_path.get()
+        "engine": NATIVE_ENGINE if native_var.get() else "mysqldump",
+        "output_folder": output_folder_path.get(),
+        "parallel": parallel_var.get(),
+        "incremental": incremental_var.get(),
+        "repository": repository_var.get(),
+        "checkpoint": checkpoint_var.get(),
+        "workers": workers_entry.get(),
+        "compression": compression_var.get(),
+        "export_format": "" if export_var.get() == NO_EXPORT else export_var.get(),
+        "compression_level": level_entry.get(),
+        "compression_threads": threads_entry.get(),
+        "volume_size": volume_size_entry.get(),
+        "zero_copy": zero_copy_var.get(),
+        "insert_size": insert_size_entry.get(),
+        "definer": definer_entry.get(),
+        "rename_schema": rename_schema_entry.get(),
+        "subset_tables": subset_tables_entry.get(),
+        "subset_sample": subset_sample_entry.get(),
+        "copies": copies_entry.get(),
+        "keep_daily": keep_daily_entry.get(),
+        "keep_weekly": keep_weekly_entry.get(),
+        "keep_monthly": keep_monthly_entry.get(),
+        "max_rate": max_rate_entry.get(),
+        "adaptive_throttle": adaptive_var.get(),
+        "max_threads_running": max_threads_running_entry.get(),
+        "max_replica_lag": max_replica_lag_entry.get(),
+        "max_concurrent": max_concurrent_entry.get(),
+        "max_jobs": max_jobs_entry.get()
     }
     try:
+        # Les profils supplémentaires (clé "profiles", utilisés par la ligne de commande) sont conservés
+        try:
+            with open(PREFS_FILE, 'r') as f:
+                previous_prefs = json.load(f)
+            if "profiles" in previous_prefs:
+                prefs["profiles"] = previous_prefs["profiles"]
+        except (OSError, ValueError):
+            pass # Pas de fichier (ou fichier illisible) : il est simplement réécrit
         with open(PREFS_FILE, 'w') as f:
             json.dump(prefs, f)
     except Exception as e:
@@ -265,10 +550,45 @@ def load_preferences():
             port_entry.insert(0, prefs.get("db_port", ""))
             name_entry.insert(0, prefs.get("db_name", ""))
             mysqldump_path_var.set(prefs.get("mysqldump_path", find_mysqldump()))
+            native_var.set(prefs.get("engine") == NATIVE_ENGINE)
             
             default_output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
             output_folder_path.set(prefs.get("output_folder", default_output_dir))
             output_folder_label.config(text=f"Dossier de sortie : {output_folder_path.get()}")
+            parallel_var.set(prefs.get("parallel", False))
+            incremental_var.set(prefs.get("incremental", False))
+            repository_var.set(prefs.get("repository", False))
+            checkpoint_var.set(prefs.get("checkpoint", False))
+            workers_entry.delete(0, tk.END)
+            workers_entry.insert(0, prefs.get("workers", str(DEFAULT_WORKERS)))
+            compression_var.set(prefs.get("compression", DEFAULT_COMPRESSION))
+            export_var.set(prefs.get("export_format") or NO_EXPORT)
+            level_entry.insert(0, prefs.get("compression_level", ""))
+            threads_entry.insert(0, prefs.get("compression_threads", ""))
+            volume_size_entry.insert(0, prefs.get("volume_size", ""))
+            zero_copy_var.set(prefs.get("zero_copy", False))
+            insert_size_entry.insert(0, prefs.get("insert_size", ""))
+            definer_entry.insert(0, prefs.get("definer", ""))
+            rename_schema_entry.insert(0, prefs.get("rename_schema", ""))
+            subset_tables_entry.insert(0, prefs.get("subset_tables", ""))
+            subset_sample_entry.insert(0, prefs.get("subset_sample", ""))
+            copies = prefs.get("copies", "")
+            if not isinstance(copies, str): # Profil écrit à la main : liste de {"output_folder", "compression"}
+                copies = "; ".join(f"{copy.get('compression') or ''}:{copy['output_folder']}".lstrip(":") for copy in copies)
+            copies_entry.insert(0, copies)
+            keep_daily_entry.insert(0, prefs.get("keep_daily", ""))
+            keep_weekly_entry.insert(0, prefs.get("keep_weekly", ""))
+            keep_monthly_entry.insert(0, prefs.get("keep_monthly", ""))
+            max_rate_entry.insert(0, prefs.get("max_rate", ""))
+            adaptive_var.set(prefs.get("adaptive_throttle", False))
+            max_threads_running_entry.delete(0, tk.END)
+            max_threads_running_entry.insert(0, prefs.get("max_threads_running", str(DEFAULT_MAX_THREADS_RUNNING)))
+            max_replica_lag_entry.delete(0, tk.END)
+            max_replica_lag_entry.insert(0, prefs.get("max_replica_lag", str(DEFAULT_MAX_REPLICA_LAG)))
+            max_concurrent_entry.delete(0, tk.END)
+            max_concurrent_entry.insert(0, prefs.get("max_concurrent", str(DEFAULT_MAX_CONCURRENT)))
+            max_jobs_entry.delete(0, tk.END)
+            max_jobs_entry.insert(0, prefs.get("max_jobs", str(DEFAULT_MAX_JOBS)))
             
     except FileNotFoundError:
         # Si le fichier n'existe pas, initialiser avec les valeurs par défaut
@@ -298,8 +618,8 @@ def load_preferences():
 # --- Configuration de l'interface Tkinter ---
 window = tk.Tk()
 window.title("MySQL Database Dumper Local")
-window.geometry("650x580") # Taille initiale de la fenêtre, légèrement ajustée
-window.resizable(False, False) # Empêche le redimensionnement de la fenêtre
+window.geometry("650x1140") # Taille initiale de la fenêtre, agrandie pour la file des sauvegardes
+window.resizable(False, True) # Seule la hauteur peut changer (la file peut contenir beaucoup de sauvegardes)
 
 # --- Définir l'icône de l'application ---
 # Placez votre fichier d'icône (par exemple, 'app_icon.png') dans le même dossier que votre script Python.
@@ -335,10 +655,23 @@ name_entry = tk.Entry(main_frame, width=40)
 
 mysqldump_path_var = tk.StringVar()
 output_folder_path = tk.StringVar()
+parallel_var = tk.BooleanVar(value=False)
+incremental_var = tk.BooleanVar(value=False)
+repository_var = tk.BooleanVar(value=False)
+checkpoint_var = tk.BooleanVar(value=False)
+adaptive_var = tk.BooleanVar(value=False)
+native_var = tk.BooleanVar(value=False)
+zero_copy_var = tk.BooleanVar(value=False)
+compression_var = tk.StringVar(value=DEFAULT_COMPRESSION)
+export_var = tk.StringVar(value=NO_EXPORT)
 
 # Variable globale pour stocker le dernier dossier de sortie
 last_output_folder = None
 
+# File des sauvegardes (une entrée par sauvegarde, dans l'ordre d'ajout) et mises à jour de l'interface en attente
+dump_jobs = []
+ui_queue = queue.Queue()
+
 # Labels et champs de saisie (avec grille pour l'alignement)
 row_counter = 0
 
@@ -357,6 +690,9 @@ port_entry.grid(row=row_counter-1, column=1, pady=5)
 tk.Label(main_frame, text="Nom de la base de données:").grid(row=row_counter, column=0, sticky="w", pady=5); row_counter += 1
 name_entry.grid(row=row_counter-1, column=1, pady=5)
 
+# Mode batch : plusieurs noms séparés par des virgules, motifs glob (blog_*) ou "*" pour toutes les bases
+tk.Label(main_frame, text="(plusieurs bases : shop, blog_* ou *)", font=("Arial", 9, "italic")).grid(row=row_counter, column=1, sticky="w"); row_counter += 1
+
 # Champ pour le chemin de mysqldump local
 mysqldump_frame = tk.Frame(main_frame)
 mysqldump_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=10)
@@ -365,6 +701,9 @@ mysqldump_entry = tk.Entry(mysqldump_frame, width=35, textvariable=mysqldump_pat
 mysqldump_entry.grid(row=0, column=1, pady=5, padx=(0,5))
 mysqldump_browse_button = tk.Button(mysqldump_frame, text="Parcourir", command=browse_mysqldump_path)
 mysqldump_browse_button.grid(row=0, column=2, pady=5, padx=5)
+# Moteur intégré (dump standard et dépôt) : la base est exportée sans mysqldump
+native_check = tk.Checkbutton(mysqldump_frame, text="Moteur intégré", variable=native_var)
+native_check.grid(row=0, column=3, sticky="w", pady=5, padx=(5,0))
 row_counter += 1
 
 # Sélecteur de dossier de sortie
@@ -377,11 +716,138 @@ select_folder_button = tk.Button(output_folder_frame, text="Choisir", command=se
 select_folder_button.grid(row=0, column=2, pady=5, padx=5)
 row_counter += 1
 
+# Options du dump parallèle (un fichier par table, instantané cohérent)
+parallel_frame = tk.Frame(main_frame)
+parallel_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+parallel_check = tk.Checkbutton(parallel_frame, text="Dump parallèle (un fichier par table)", variable=parallel_var)
+parallel_check.grid(row=0, column=0, sticky="w", pady=5)
+tk.Label(parallel_frame, text="Workers:").grid(row=0, column=1, sticky="w", pady=5, padx=(15,5))
+workers_entry = tk.Entry(parallel_frame, width=5)
+workers_entry.insert(0, str(DEFAULT_WORKERS))
+workers_entry.grid(row=0, column=2, sticky="w", pady=5)
+# Mode incrémental : seules les tables modifiées depuis la dernière sauvegarde par table sont exportées
+incremental_check = tk.Checkbutton(parallel_frame, text="Incrémental", variable=incremental_var)
+incremental_check.grid(row=0, column=3, sticky="w", pady=5, padx=(15,0))
+# Dépôt dédupliqué : seuls les morceaux du dump absents du dépôt sont compressés et écrits
+repository_check = tk.Checkbutton(parallel_frame, text="Dépôt dédupliqué", variable=repository_var)
+repository_check.grid(row=0, column=4, sticky="w", pady=5, padx=(15,0))
+# Reprise : les fichiers terminés sont notés ; une sauvegarde interrompue est reprise là où elle s'est arrêtée
+checkpoint_check = tk.Checkbutton(parallel_frame, text="Reprise", variable=checkpoint_var)
+checkpoint_check.grid(row=0, column=5, sticky="w", pady=5, padx=(15,0))
+row_counter += 1
+
+# Options de compression (format, niveau et threads ; vides = valeurs par défaut du format)
+compression_frame = tk.Frame(main_frame)
+compression_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(compression_frame, text="Compression:").grid(row=0, column=0, sticky="w", pady=5)
+compression_menu = tk.OptionMenu(compression_frame, compression_var, *COMPRESSION_BACKENDS)
+compression_menu.grid(row=0, column=1, sticky="w", pady=5, padx=(0,5))
+tk.Label(compression_frame, text="Niveau:").grid(row=0, column=2, sticky="w", pady=5, padx=(10,5))
+level_entry = tk.Entry(compression_frame, width=5)
+level_entry.grid(row=0, column=3, sticky="w", pady=5)
+tk.Label(compression_frame, text="Threads:").grid(row=0, column=4, sticky="w", pady=5, padx=(10,5))
+threads_entry = tk.Entry(compression_frame, width=5)
+threads_entry.grid(row=0, column=5, sticky="w", pady=5)
+# Découpage en volumes (Mo, vide = une seule archive) : chaque volume est compressé séparément
+tk.Label(compression_frame, text="Volumes (Mo):").grid(row=0, column=6, sticky="w", pady=5, padx=(10,5))
+volume_size_entry = tk.Entry(compression_frame, width=6)
+volume_size_entry.grid(row=0, column=7, sticky="w", pady=5)
+# Zéro copie (Linux) : la sortie de mysqldump est écrite par le noyau, compressée par gzip, zstd ou lz4 externe
+zero_copy_check = tk.Checkbutton(compression_frame, text="Zéro copie", variable=zero_copy_var)
+zero_copy_check.grid(row=0, column=8, sticky="w", pady=5, padx=(10,0))
+row_counter += 1
+
+# Export pour les outils d'analyse : un fichier CSV, TSV (comme mysqldump --tab) ou Parquet par table,
+# compressé séparément, avec son schéma ; les workers règlent le nombre de connexions
+export_frame = tk.Frame(main_frame)
+export_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(export_frame, text="Export des données (table par table):").grid(row=0, column=0, sticky="w", pady=5)
+export_menu = tk.OptionMenu(export_frame, export_var, NO_EXPORT, *EXPORT_FORMATS)
+export_menu.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+row_counter += 1
+
+# Réécriture du SQL au fil du dump : INSERT regroupés ou découpés à cette taille (Kio, selon le
+# max_allowed_packet du serveur de restauration), DEFINER "strip" ou utilisateur@hôte, autre nom de base
+rewrite_frame = tk.Frame(main_frame)
+rewrite_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(rewrite_frame, text="INSERT (Kio):").grid(row=0, column=0, sticky="w", pady=5)
+insert_size_entry = tk.Entry(rewrite_frame, width=6)
+insert_size_entry.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+tk.Label(rewrite_frame, text="DEFINER:").grid(row=0, column=2, sticky="w", pady=5, padx=(10,5))
+definer_entry = tk.Entry(rewrite_frame, width=16)
+definer_entry.grid(row=0, column=3, sticky="w", pady=5)
+tk.Label(rewrite_frame, text="Renommer la base:").grid(row=0, column=4, sticky="w", pady=5, padx=(10,5))
+rename_schema_entry = tk.Entry(rewrite_frame, width=12)
+rename_schema_entry.grid(row=0, column=5, sticky="w", pady=5)
+row_counter += 1
+
+# Sous-ensemble pour un environnement de développement : tables racines (vide = base complète),
+# échantillon "10%", "1000" ou condition WHERE ; les lignes référencées par clé étrangère sont ajoutées
+subset_frame = tk.Frame(main_frame)
+subset_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(subset_frame, text="Sous-ensemble - tables:").grid(row=0, column=0, sticky="w", pady=5)
+subset_tables_entry = tk.Entry(subset_frame, width=22)
+subset_tables_entry.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+tk.Label(subset_frame, text="Échantillon:").grid(row=0, column=2, sticky="w", pady=5, padx=(10,5))
+subset_sample_entry = tk.Entry(subset_frame, width=22)
+subset_sample_entry.grid(row=0, column=3, sticky="w", pady=5)
+row_counter += 1
+
+# Copies écrites avec le même flux mysqldump : "none:/Volumes/Copie; gzip:D:\copies" (format facultatif)
+copies_frame = tk.Frame(main_frame)
+copies_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(copies_frame, text="Copies ([format:]dossier ; ...):").grid(row=0, column=0, sticky="w", pady=5)
+copies_entry = tk.Entry(copies_frame, width=45)
+copies_entry.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+row_counter += 1
+
+# Rétention après chaque sauvegarde réussie : la dernière sauvegarde de chacun des N derniers
+# jours, semaines et mois est conservée, les autres sont supprimées (vide = aucune suppression)
+retention_frame = tk.Frame(main_frame)
+retention_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(retention_frame, text="Conserver - jours:").grid(row=0, column=0, sticky="w", pady=5)
+keep_daily_entry = tk.Entry(retention_frame, width=5)
+keep_daily_entry.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+tk.Label(retention_frame, text="Semaines:").grid(row=0, column=2, sticky="w", pady=5, padx=(10,5))
+keep_weekly_entry = tk.Entry(retention_frame, width=5)
+keep_weekly_entry.grid(row=0, column=3, sticky="w", pady=5)
+tk.Label(retention_frame, text="Mois:").grid(row=0, column=4, sticky="w", pady=5, padx=(10,5))
+keep_monthly_entry = tk.Entry(retention_frame, width=5)
+keep_monthly_entry.grid(row=0, column=5, sticky="w", pady=5)
+row_counter += 1
+
+# Limitation de débit (Mo/s, vide = illimité) et mode adaptatif : pause ou ralentissement selon la charge du serveur
+throttle_frame = tk.Frame(main_frame)
+throttle_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(throttle_frame, text="Débit max (Mo/s):").grid(row=0, column=0, sticky="w", pady=5)
+max_rate_entry = tk.Entry(throttle_frame, width=6)
+max_rate_entry.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+adaptive_check = tk.Checkbutton(throttle_frame, text="Adaptatif", variable=adaptive_var)
+adaptive_check.grid(row=0, column=2, sticky="w", pady=5, padx=(15,0))
+tk.Label(throttle_frame, text="Threads_running max:").grid(row=0, column=3, sticky="w", pady=5, padx=(10,5))
+max_threads_running_entry = tk.Entry(throttle_frame, width=5)
+max_threads_running_entry.insert(0, str(DEFAULT_MAX_THREADS_RUNNING))
+max_threads_running_entry.grid(row=0, column=4, sticky="w", pady=5)
+tk.Label(throttle_frame, text="Retard max (s):").grid(row=0, column=5, sticky="w", pady=5, padx=(10,5))
+max_replica_lag_entry = tk.Entry(throttle_frame, width=5)
+max_replica_lag_entry.insert(0, str(DEFAULT_MAX_REPLICA_LAG))
+max_replica_lag_entry.grid(row=0, column=6, sticky="w", pady=5)
+row_counter += 1
+
+# Limite du mode batch (dumps simultanés)
+batch_frame = tk.Frame(main_frame)
+batch_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+tk.Label(batch_frame, text="Batch - dumps simultanés:").grid(row=0, column=0, sticky="w", pady=5)
+max_concurrent_entry = tk.Entry(batch_frame, width=5)
+max_concurrent_entry.insert(0, str(DEFAULT_MAX_CONCURRENT))
+max_concurrent_entry.grid(row=0, column=1, sticky="w", pady=5, padx=(5,0))
+row_counter += 1
+
 # Boutons d'action
 button_frame = tk.Frame(main_frame)
 button_frame.grid(row=row_counter, column=0, columnspan=3, pady=20)
 
-dump_button = tk.Button(button_frame, text="Lancer le Dump et ZIP", command=run_dump_in_thread, bg="#4CAF50", fg="black", padx=15, pady=8, font=("Arial", 10, "bold"))
+dump_button = tk.Button(button_frame, text="Ajouter à la file", command=run_dump_in_thread, bg="#4CAF50", fg="black", padx=15, pady=8, font=("Arial", 10, "bold"))
 dump_button.pack(side=tk.LEFT, padx=10)
 
 open_folder_button = tk.Button(button_frame, text="Ouvrir le dossier de sortie", command=open_last_output_folder, state=tk.DISABLED, bg="#008CBA", fg="white", padx=15, pady=8, font=("Arial", 10))
@@ -392,9 +858,26 @@ row_counter += 1
 # Étiquette de statut
 status_label = tk.Label(main_frame, text="Prêt.", fg="blue", font=("Arial", 10, "italic"))
 status_label.grid(row=row_counter, column=0, columnspan=3, pady=5)
+row_counter += 1
+
+# File des sauvegardes : une ligne par sauvegarde avec sa progression et un bouton d'annulation
+jobs_frame = tk.LabelFrame(main_frame, text="File des sauvegardes", padx=10, pady=5)
+jobs_frame.grid(row=row_counter, column=0, columnspan=3, sticky="ew", pady=5)
+jobs_header = tk.Frame(jobs_frame)
+jobs_header.pack(fill="x")
+tk.Label(jobs_header, text="Sauvegardes simultanées:").pack(side=tk.LEFT)
+max_jobs_entry = tk.Entry(jobs_header, width=5)
+max_jobs_entry.insert(0, str(DEFAULT_MAX_JOBS))
+max_jobs_entry.pack(side=tk.LEFT, padx=(5,0))
+tk.Button(jobs_header, text="Effacer les terminées", command=clear_finished_jobs).pack(side=tk.RIGHT)
+jobs_list_frame = tk.Frame(jobs_frame)
+jobs_list_frame.pack(fill="x", pady=(5,0))
 
 # Charger les préférences au démarrage de l'application
 load_preferences()
 
+# Les threads de sauvegarde ne touchent jamais aux widgets : leurs mises à jour sont lues ici
+window.after(UI_POLL_INTERVAL, process_ui_queue)
+
 # Lancer la boucle principale de Tkinter
 window.mainloop()
@@ -0,0 +1,535 @@
+import datetime
+import decimal
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from dump_compression import archive_extension, open_archive_reader, open_archive_writer
+from dump_native import DUMP_FOOTER, DUMP_HEADER, NATIVE_INSERT_SIZE
+from dump_pipeline import CHUNK_SIZE, DumpError
+from dump_volumes import VOLUMES_FILE, load_volumes
+
+# --- Différence entre deux sauvegardes (script SQL de mise à jour) ---
+# Les lignes sont appariées par clé primaire comme une fusion de deux listes triées (ordre
+# de l'index clustered) ; une clé hors d'ordre donne DELETE puis INSERT, comptés dans "unordered".
+
+# Début d'une section dans un dump (ligne qui suit "--")
+TABLE_LINE = re.compile(rb"-- Table structure for table (`(?:[^`]|``)+`)\n")
+SECTION_LINE = re.compile(rb"-- (?:Table structure for table|Temporary (?:view|table) structure for view|"
+                          rb"Final view structure for view|Dumping events for database|Dumping routines for database) ")
+TRAILER_LINE = b"-- Dump completed"
+QUOTED_NAME = re.compile(rb"`(?:[^`]|``)+`")
+COLUMN_LINE = re.compile(rb"^  (`(?:[^`]|``)+`) ", re.M)
+PRIMARY_KEY_LINE = re.compile(rb"^  PRIMARY KEY \((.*)\)", re.M)
+# Compteur d'AUTO_INCREMENT du CREATE TABLE : il change à chaque ajout, la structure non
+AUTO_INCREMENT_OPTION = re.compile(rb" AUTO_INCREMENT=\d+")
+INSERT_LINE = re.compile(rb"(?:INSERT(?: IGNORE)?|REPLACE) INTO `(?:[^`]|``)+`(?: \(((?:[^`)]|`(?:[^`]|``)*`)*)\))? VALUES ")
+# Valeur d'un INSERT : chaîne (binaire ou non), littéral b'0101' / x'0a', nombre, NULL ou 0x...
+VALUE = rb"(?:_binary )?'[^'\\]*(?:\\.[^'\\]*)*'|[bxX]'[^']*'|[^,()']+"
+VALUE_PATTERN = re.compile(VALUE)
+# Ligne d'un INSERT : texte entre les parenthèses et premier littéral (la clé primaire le plus souvent)
+ROW_PATTERN = re.compile(rb"\(((" + VALUE + rb")(?:,(?:" + VALUE + rb"))*)\)")
+STRING_ESCAPE = re.compile(rb"\\(.)", re.S)
+UNESCAPED = {b"0": b"\0", b"n": b"\n", b"r": b"\r", b"Z": b"\x1a", b"b": b"\b", b"t": b"\t"}
+
+
+def backup_lines(source):
+    """
+    Lignes (bytes, avec leur fin de ligne) du flux SQL d'une archive ou d'une sauvegarde
+    découpée en volumes (dossier ou volumes.json), lues par blocs de CHUNK_SIZE.
+    """
+    if os.path.basename(source) == VOLUMES_FILE:
+        source = os.path.dirname(source)
+    if os.path.isdir(source):
+        manifest = load_volumes(source)
+        if manifest is None:
+            raise DumpError(f"Seules les archives et les sauvegardes en volumes peuvent être comparées : {source}")
+        if not manifest["complete"]:
+            raise DumpError(f"La sauvegarde découpée en volumes est incomplète (dump interrompu ou en cours) : {source}")
+        paths = [os.path.join(source, entry["file"]) for entry in manifest["volumes"]]
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        raise DumpError(f"Sauvegarde introuvable : {source}")
+    # Les volumes sont coupés en fin de ligne : leurs lignes s'enchaînent
+    for path in paths:
+        with open_archive_reader(path) as reader:
+            pending = b""
+            while True:
+                data = reader.read(CHUNK_SIZE)
+                if not data:
+                    break
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line + b"\n"
+            if pending:
+                yield pending
+
+
+def key_value(literal):
+    """
+    Valeur d'un littéral de clé primaire pour la comparaison des clés : nombres par valeur,
+    chaînes sans distinction de casse (comme les collations _ci), chaînes binaires octet
+    par octet. Deux littéraux différents ne sont jamais égaux.
+    """
+    if literal[:1] == b"'":
+        text = STRING_ESCAPE.sub(lambda match: UNESCAPED.get(match.group(1), match.group(1)), literal[1:-1])
+        text = text.decode("utf-8", errors="surrogateescape")
+        return 1, text.casefold(), text
+    if literal[:9] == b"_binary '":
+        return 2, STRING_ESCAPE.sub(lambda match: UNESCAPED.get(match.group(1), match.group(1)), literal[9:-1])
+    if literal[:2] in (b"0x", b"0X"):
+        return 2, bytes.fromhex(literal[2:].decode())
+    try:
+        return 0, int(literal)
+    except ValueError:
+        pass
+    try:
+        return 0, decimal.Decimal(literal.decode())
+    except (decimal.InvalidOperation, UnicodeDecodeError):
+        return 3, literal
+
+
+def split_values(row):
+    """Littéraux d'une ligne d'INSERT (texte entre les parenthèses), recopiés tels quels."""
+    return VALUE_PATTERN.findall(row)
+
+
+def _leading_values(row, count):
+    """Les count premiers littéraux d'une ligne, sans découper la suite."""
+    values, position = [], 0
+    for _ in range(count):
+        match = VALUE_PATTERN.match(row, position)
+        values.append(match.group())
+        position = match.end() + 1
+    return values
+
+
+class DumpTable:
+    """Table lue dans un dump : nom (entre backquotes), CREATE TABLE, colonnes et clé primaire."""
+
+    def __init__(self, reader, name, create):
+        self.reader = reader
+        self.name = name
+        self.create = create
+        self.columns = COLUMN_LINE.findall(create)
+        match = PRIMARY_KEY_LINE.search(create)
+        self.primary_key = QUOTED_NAME.findall(match.group(1)) if match else []
+
+    @property
+    def label(self):
+        return self.name[1:-1].replace(b"``", b"`").decode("utf-8", errors="replace")
+
+    def structure(self):
+        """CREATE TABLE sans le compteur d'AUTO_INCREMENT."""
+        return AUTO_INCREMENT_OPTION.sub(b"", self.create)
+
+    def batches(self):
+        """Lignes des INSERT de la table, en flux, par INSERT : (colonnes, [(texte de la ligne, premier littéral)])."""
+        return self.reader.batches(self)
+
+    def rows(self):
+        """Lignes des INSERT de la table, en flux : (colonnes de l'INSERT, texte de la ligne)."""
+        for columns, batch in self.batches():
+            for row, _ in batch:
+                yield columns, row
+
+
+class DumpReader:
+    """
+    Parcours d'un dump table par table. Les lignes d'une table (DumpTable.rows) sont lues
+    avant de passer à la table suivante ; celles qui n'ont pas été lues sont ignorées.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.line = None
+        self.completed = False
+        self._advance()
+
+    def _advance(self):
+        self.line = next(self.lines, None)
+        if self.line is not None and self.line.startswith(TRAILER_LINE):
+            self.completed = True
+
+    def _section_start(self):
+        return self.line is not None and SECTION_LINE.match(self.line) is not None
+
+    def next_table(self):
+        """Table suivante du dump, ou None à la fin du dump (vues, routines et événements sont ignorés)."""
+        while self.line is not None and TABLE_LINE.match(self.line) is None:
+            self._advance()
+        if self.line is None:
+            return None
+        name = TABLE_LINE.match(self.line).group(1)
+        self._advance()
+        create = []
+        while self.line is not None and not self._section_start():
+            if create or self.line.startswith(b"CREATE TABLE "):
+                create.append(self.line)
+                if self.line.rstrip().endswith(b";"):
+                    break
+            self._advance()
+        return DumpTable(self, name, b"".join(create))
+
+    def batches(self, table):
+        columns_by_list = {}
+        while self.line is not None and not self._section_start():
+            line = self.line
+            if line.startswith(b"DELIMITER ;;"):
+                # Triggers de la table : leur corps peut contenir des INSERT
+                while self.line is not None and not self.line.startswith(b"DELIMITER ;\n"):
+                    self._advance()
+            else:
+                match = INSERT_LINE.match(line)
+                if match:
+                    column_list = match.group(1)
+                    if column_list is None:
+                        columns = table.columns
+                    else:
+                        columns = columns_by_list.get(column_list)
+                        if columns is None:
+                            columns = columns_by_list[column_list] = QUOTED_NAME.findall(column_list)
+                    yield columns, ROW_PATTERN.findall(line, match.end())
+            self._advance()
+
+
+class StatementSpool:
+    """
+    Instructions d'un même type dans un fichier temporaire, regroupées comme les INSERT
+    étendus de mysqldump : prefix, éléments séparés par separator, suffix, d'au plus
+    NATIVE_INSERT_SIZE octets.
+    """
+
+    def __init__(self, prefix, separator=b",", suffix=b";\n", temp_dir=None):
+        self.prefix = prefix
+        self.separator = separator
+        self.suffix = suffix
+        self.file = tempfile.TemporaryFile(dir=temp_dir)
+        self.batch = bytearray()
+        self.count = 0
+
+    def add(self, item):
+        if self.batch and len(self.batch) + len(item) + len(self.suffix) > NATIVE_INSERT_SIZE:
+            self._flush()
+        self.batch += self.separator if self.batch else self.prefix
+        self.batch += item
+        self.count += 1
+
+    def _flush(self):
+        if self.batch:
+            self.file.write(self.batch + self.suffix)
+            self.batch.clear()
+
+    def copy_to(self, writer):
+        self._flush()
+        self.file.seek(0)
+        while True:
+            data = self.file.read(CHUNK_SIZE)
+            if not data:
+                break
+            writer.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+def insert_prefix(table, columns):
+    return b"INSERT INTO " + table.name + b" (" + b",".join(columns) + b") VALUES "
+
+
+def _where_key(key_columns, key_values):
+    return b" AND ".join(column + b"=" + value for column, value in zip(key_columns, key_values))
+
+
+def _delete_spool(table, temp_dir):
+    key = table.primary_key
+    if len(key) == 1:
+        return StatementSpool(b"DELETE FROM " + table.name + b" WHERE " + key[0] + b" IN (", suffix=b");\n",
+                              temp_dir=temp_dir)
+    return StatementSpool(b"DELETE FROM " + table.name + b" WHERE (" + b",".join(key) + b") IN (", suffix=b");\n",
+                          temp_dir=temp_dir)
+
+
+class TableDiff:
+    """Instructions de mise à jour d'une table, par type, et leur nombre."""
+
+    def __init__(self, table, temp_dir=None):
+        self.table = table
+        self.temp_dir = temp_dir
+        self.deletes = None
+        self.updates = None
+        self.inserts = None
+        self.emptied = None # Table vidée avant d'être rechargée : nombre de lignes supprimées
+        self.unordered = 0
+
+    def counts(self):
+        deleted = self.emptied if self.emptied is not None else self.deletes.count if self.deletes else 0
+        return {"inserted": self.inserts.count if self.inserts else 0,
+                "updated": self.updates.count if self.updates else 0,
+                "deleted": deleted}
+
+    def write_to(self, writer):
+        if self.emptied is not None:
+            writer.write(b"DELETE FROM " + self.table.name + b";\n")
+        for spool in (self.deletes, self.updates, self.inserts):
+            if spool is not None and spool.count:
+                spool.copy_to(writer)
+
+    def close(self):
+        for spool in (self.deletes, self.updates, self.inserts):
+            if spool is not None:
+                spool.close()
+
+
+def _key_reader(table, state):
+    """
+    Lignes d'un côté de la comparaison avec leur clé : (clé, colonnes, ligne, littéraux de la clé).
+    Les clés qui ne croissent pas sont comptées dans state["unordered"].
+    """
+    previous = None
+    last_columns = None
+    for columns, batch in table.batches():
+        if columns is not last_columns:
+            if last_columns is not None and columns != last_columns:
+                raise DumpError(f"Les INSERT de la table '{table.label}' ne nomment pas toujours les mêmes colonnes.")
+            last_columns = columns
+            if any(column not in columns for column in table.primary_key):
+                raise DumpError(f"La clé primaire de la table '{table.label}' n'est pas dans ses INSERT.")
+            positions = [columns.index(column) for column in table.primary_key]
+            count = max(positions) + 1
+            # Clé sur la première colonne : son littéral est lu avec la ligne
+            first_only = positions == [0]
+        for row, first in batch:
+            if first_only:
+                literals = [first]
+                key = (key_value(first),)
+            else:
+                leading = _leading_values(row, count)
+                literals = [leading[position] for position in positions]
+                key = tuple([key_value(literal) for literal in literals])
+            if previous is not None and key <= previous:
+                state["unordered"] += 1
+            previous = key
+            yield key, columns, row, literals
+
+
+def diff_rows(old_table, new_table, temp_dir=None):
+    """
+    Compare les lignes d'une table de même structure dans les deux dumps, appariées par clé
+    primaire (fusion des deux flux). Retourne un TableDiff.
+    """
+    diff = TableDiff(new_table, temp_dir)
+    key_columns = new_table.primary_key
+    old_state = {"unordered": 0}
+    new_state = {"unordered": 0}
+    old_rows = _key_reader(old_table, old_state)
+    new_rows = _key_reader(new_table, new_state)
+    try:
+        old = next(old_rows, None)
+        new = next(new_rows, None)
+        while old is not None or new is not None:
+            if new is None or (old is not None and old[0] < new[0]):
+                if diff.deletes is None:
+                    diff.deletes = _delete_spool(old_table, temp_dir)
+                literals = old[3]
+                diff.deletes.add(literals[0] if len(literals) == 1 else b"(" + b",".join(literals) + b")")
+                old = next(old_rows, None)
+            elif old is None or new[0] < old[0]:
+                if diff.inserts is None:
+                    diff.inserts = StatementSpool(insert_prefix(new_table, new[1]), temp_dir=temp_dir)
+                diff.inserts.add(b"(" + new[2] + b")")
+                new = next(new_rows, None)
+            else:
+                if old[2] != new[2]:
+                    if old[1] != new[1]:
+                        raise DumpError(f"Les INSERT de la table '{new_table.label}' ne nomment pas les mêmes "
+                                        "colonnes dans les deux sauvegardes (options de mysqldump différentes ?).")
+                    changes = [column + b"=" + value
+                               for column, before, value in zip(new[1], split_values(old[2]), split_values(new[2]))
+                               if before != value]
+                    if changes:
+                        if diff.updates is None:
+                            diff.updates = StatementSpool(b"", separator=b"", suffix=b"", temp_dir=temp_dir)
+                        diff.updates.add(b"UPDATE " + new_table.name + b" SET " + b",".join(changes) +
+                                         b" WHERE " + _where_key(key_columns, new[3]) + b";\n")
+                old = next(old_rows, None)
+                new = next(new_rows, None)
+    except BaseException:
+        diff.close()
+        raise
+    diff.unordered = old_state["unordered"] + new_state["unordered"]
+    return diff
+
+
+def reload_rows(old_table, new_table, temp_dir=None):
+    """
+    Table sans clé primaire : les lignes ne peuvent pas être appariées. Si son contenu a
+    changé (empreinte des lignes), la table est vidée puis rechargée. Retourne un TableDiff.
+    """
+    diff = TableDiff(new_table, temp_dir)
+    old_digest, old_count = hashlib.sha256(), 0
+    for _, row in old_table.rows():
+        old_digest.update(row + b"\n")
+        old_count += 1
+    new_digest = hashlib.sha256()
+    try:
+        for columns, row in new_table.rows():
+            if diff.inserts is None:
+                diff.inserts = StatementSpool(insert_prefix(new_table, columns), temp_dir=temp_dir)
+            new_digest.update(row + b"\n")
+            diff.inserts.add(b"(" + row + b")")
+    except BaseException:
+        diff.close()
+        raise
+    if old_digest.digest() == new_digest.digest():
+        diff.close()
+        return TableDiff(new_table, temp_dir)
+    diff.emptied = old_count
+    return diff
+
+
+def write_table(writer, table, temp_dir=None):
+    """Recrée une table du nouveau dump avec toutes ses lignes. Retourne le nombre de lignes."""
+    writer.write(b"DROP TABLE IF EXISTS " + table.name + b";\n" + table.create)
+    spool = None
+    for columns, row in table.rows():
+        if spool is None:
+            spool = StatementSpool(insert_prefix(table, columns), temp_dir=temp_dir)
+        spool.add(b"(" + row + b")")
+    if spool is None:
+        return 0
+    try:
+        spool.copy_to(writer)
+        return spool.count
+    finally:
+        spool.close()
+
+
+def _table_comment(table, text):
+    return b"\n-- Table " + table.name + f" : {text}\n".encode("utf-8")
+
+
+def diff_streams(old_reader, new_reader, writer, temp_dir=None, progress=None):
+    """
+    Écrit dans writer les instructions qui font passer les tables du dump old_reader à
+    celles de new_reader (DumpReader). Retourne la liste des tables modifiées :
+    [{"table", "status", "inserted", "updated", "deleted"}] ; status vaut "changed",
+    "added", "dropped", "recreated" (structure modifiée) ou "reloaded" (table sans clé primaire).
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    def name_order(table):
+        return table.name.lower(), table.name
+
+    tables = []
+    created = set()
+    old_table = old_reader.next_table()
+    new_table = new_reader.next_table()
+    while old_table is not None or new_table is not None:
+        if new_table is None or (old_table is not None and name_order(old_table) < name_order(new_table)):
+            # Une table déjà recréée (dumps dans un ordre différent) n'est pas supprimée
+            if old_table.name not in created:
+                writer.write(_table_comment(old_table, "supprimée") + b"DROP TABLE IF EXISTS " + old_table.name + b";\n")
+                tables.append({"table": old_table.label, "status": "dropped", "inserted": 0, "updated": 0, "deleted": 0})
+            old_table = old_reader.next_table()
+            continue
+        if old_table is None or name_order(new_table) < name_order(old_table) or \
+                old_table.structure() != new_table.structure():
+            status = "added" if old_table is None or old_table.name != new_table.name else "recreated"
+            report(f"Table '{new_table.label}' : {'ajoutée' if status == 'added' else 'structure modifiée'}, "
+                   "recréée avec toutes ses lignes...")
+            writer.write(_table_comment(new_table, "ajoutée" if status == "added" else "structure modifiée, table recréée"))
+            inserted = write_table(writer, new_table, temp_dir)
+            tables.append({"table": new_table.label, "status": status, "inserted": inserted, "updated": 0,
+                           "deleted": 0})
+            created.add(new_table.name)
+            if status == "recreated":
+                old_table = old_reader.next_table()
+            new_table = new_reader.next_table()
+            continue
+
+        report(f"Comparaison de la table '{new_table.label}'...")
+        if new_table.primary_key:
+            diff = diff_rows(old_table, new_table, temp_dir)
+        else:
+            diff = reload_rows(old_table, new_table, temp_dir)
+        try:
+            counts = diff.counts()
+            if any(counts.values()):
+                entry = {"table": new_table.label, "status": "changed" if new_table.primary_key else "reloaded"}
+                entry.update(counts)
+                if diff.unordered:
+                    entry["unordered"] = diff.unordered
+                    report(f"Table '{new_table.label}' : {diff.unordered} lignes hors de l'ordre de la clé primaire, "
+                           "le script n'est pas minimal pour cette table.")
+                tables.append(entry)
+                writer.write(_table_comment(new_table, f"{counts['inserted']} lignes ajoutées, {counts['updated']} "
+                                                       f"modifiées, {counts['deleted']} supprimées"))
+                diff.write_to(writer)
+        finally:
+            diff.close()
+        old_table = old_reader.next_table()
+        new_table = new_reader.next_table()
+    return tables
+
+
+def diff_backups(old_source, new_source, output_path, compression="none", level=None, threads=None, temp_dir=None,
+                 progress=None):
+    """
+    Écrit dans output_path le script SQL qui fait passer une base restaurée depuis old_source à
+    l'état de new_source ; les deux sauvegardes sont lues en flux, en mémoire constante.
+    Retourne {"old", "new", "path", "tables", "inserted", "updated", "deleted", "size", "duration"}.
+    """
+    started = time.time()
+    archive_extension(compression) # Vérifie que le format est connu
+    old_lines = backup_lines(os.path.abspath(old_source))
+    new_lines = backup_lines(os.path.abspath(new_source))
+    arcname = os.path.basename(output_path)
+    if compression == "zip" and arcname.lower().endswith(".zip"):
+        arcname = arcname[:-len(".zip")] + ".sql"
+    writer = None
+    try:
+        old_reader = DumpReader(old_lines)
+        new_reader = DumpReader(new_lines)
+        writer = open_archive_writer(output_path, arcname, compression, level, threads)
+        writer.write(f"-- Script de mise à jour MySQLDumper\n--\n-- De : {old_source}\n-- Vers : {new_source}\n"
+                     "-- Tables et données seulement (vues, routines, triggers et événements non compris)\n"
+                     "-- ------------------------------------------------------\n\n".encode("utf-8") +
+                     DUMP_HEADER.encode("utf-8"))
+        tables = diff_streams(old_reader, new_reader, writer, temp_dir, progress)
+        for source, reader in ((old_source, old_reader), (new_source, new_reader)):
+            if not reader.completed:
+                raise DumpError(f"La sauvegarde ne se termine pas par la ligne '-- Dump completed' de mysqldump "
+                                f"(sauvegarde tronquée) : {source}")
+        writer.write(("\n" + DUMP_FOOTER + f"\n-- Delta completed on {datetime.datetime.now():%Y-%m-%d %H:%M:%S}\n")
+                     .encode("utf-8"))
+        writer.close()
+    except BaseException:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    finally:
+        old_lines.close()
+        new_lines.close()
+    return {
+        "old": os.path.abspath(old_source),
+        "new": os.path.abspath(new_source),
+        "path": output_path,
+        "tables": tables,
+        "inserted": sum(table["inserted"] for table in tables),
+        "updated": sum(table["updated"] for table in tables),
+        "deleted": sum(table["deleted"] for table in tables),
+        "size": os.path.getsize(output_path),
+        "duration": round(time.time() - started, 3)
+    }
@@ -0,0 +1,460 @@
+import datetime
+import decimal
+import itertools
+import json
+import os
+import re
+import shutil
+import threading
+
+from dump_compression import archive_extension, open_archive_writer
+from dump_native import FETCH_SIZE, time_text
+from dump_parallel import table_file_name
+from dump_pipeline import CHUNK_SIZE, DumpError, HashingFile
+from dump_progress import tracked_writer
+
+# --- Dépendance optionnelle (export Parquet) ---
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# --- Export des données pour les outils d'analyse ---
+# <base>_<date>/ : un fichier de données et un <fichier>.schema.json par table, et export.json.
+EXPORT_FILE = "export.json"
+SCHEMA_SUFFIX = ".schema.json"
+EXPORT_FORMATS = ("csv", "tsv", "parquet")
+EXPORT_EXTENSIONS = {"csv": ".csv", "tsv": ".tsv", "parquet": ".parquet"}
+
+# Conventions des formats texte, recopiées dans export.json et dans chaque schéma
+DIALECTS = {
+    # RFC 4180 : champ entre guillemets s'il contient un séparateur, un guillemet ou une fin de ligne ;
+    # NULL est un champ vide, une chaîne vide un champ "" ; données binaires en hexadécimal
+    "csv": {"delimiter": ",", "quote": '"', "escape": None, "null": "", "line_terminator": "\n", "header": True,
+            "binary": "hex", "encoding": "utf-8"},
+    # Format de mysqldump --tab et de SELECT ... INTO OUTFILE (options par défaut de LOAD DATA) :
+    # caractères spéciaux protégés par un antislash, NULL écrit \N, données binaires telles quelles
+    "tsv": {"delimiter": "\t", "quote": None, "escape": "\\", "null": "\\N", "line_terminator": "\n", "header": False,
+            "binary": "raw", "encoding": "utf-8"}
+}
+
+# Codec Parquet (compression interne au fichier) correspondant au format de compression du job
+PARQUET_CODECS = {"none": "none", "gzip": "gzip", "zstd": "zstd", "lz4": "lz4"}
+DEFAULT_PARQUET_CODEC = "snappy"
+PARQUET_ROW_GROUP = 128 * 1024  # Lignes par groupe de lignes Parquet
+
+TSV_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"}
+TSV_SPECIAL = re.compile(r"[\\\t\n\r\0]")
+
+
+# Les tests "in" (recherche d'un octet en C) coûtent beaucoup moins qu'une expression régulière
+# sur des champs qui, pour la plupart, n'ont rien à protéger
+def csv_string(value):
+    if value and '"' not in value and "," not in value and "\n" not in value and "\r" not in value:
+        return value
+    return '"' + value.replace('"', '""') + '"'
+
+
+def tsv_string(value):
+    if "\\" not in value and "\t" not in value and "\n" not in value and "\r" not in value and "\0" not in value:
+        return value
+    return TSV_SPECIAL.sub(lambda match: TSV_ESCAPES[match.group()], value)
+
+
+def _field_formats(string, null, binary):
+    """Fonctions qui écrivent un champ selon le type Python de la valeur (comme dump_native.LITERALS)."""
+    return {
+        type(None): lambda value: null,
+        bool: lambda value: "1" if value else "0",
+        int: str,
+        float: repr,
+        decimal.Decimal: str,
+        str: string,
+        bytes: binary,
+        bytearray: binary,
+        datetime.datetime: str,
+        datetime.date: str,
+        datetime.time: str,
+        datetime.timedelta: time_text,
+        set: lambda value: string(",".join(sorted(value)))
+    }
+
+
+FIELD_FORMATS = {
+    # Une donnée binaire vide s'écrit "" comme une chaîne vide, pour ne pas être lue comme NULL
+    "csv": _field_formats(csv_string, "", lambda value: value.hex() or '""'),
+    # Les octets non UTF-8 passent par des caractères de substitution, réencodés à l'identique à l'écriture
+    "tsv": _field_formats(tsv_string, "\\N", lambda value: tsv_string(bytes(value).decode("utf-8", "surrogateescape")))
+}
+
+
+def export_extension(export_format, compression):
+    """Extension des fichiers de données : .csv.gz, .tsv.zst, .zip, .parquet..."""
+    if export_format not in EXPORT_FORMATS:
+        raise DumpError(f"Format d'export inconnu : {export_format} (formats : {', '.join(EXPORT_FORMATS)})")
+    if export_format == "parquet":
+        return EXPORT_EXTENSIONS["parquet"]
+    if compression == "seekable":
+        raise DumpError("Le format seekable (index par table du SQL) ne s'applique pas à l'export : utilisez gzip.")
+    return archive_extension(compression).replace(".sql", EXPORT_EXTENSIONS[export_format])
+
+
+class DelimitedTableWriter:
+    """
+    Fichier CSV ou TSV d'une table, compressé avec le format demandé (open_archive_writer)
+    et compté dans tracker. Les lignes sont formatées par lots et écrites par blocs
+    d'environ CHUNK_SIZE octets.
+    """
+
+    def __init__(self, path, arcname, export_format, column_names, compression, level=None, threads=None, tracker=None):
+        self.archive = open_archive_writer(path, arcname, compression, level, threads)
+        self.writer = tracked_writer(self.archive, tracker)
+        self.separator = DIALECTS[export_format]["delimiter"]
+        self.formats = FIELD_FORMATS[export_format]
+        string = self.formats[str]
+        self.other = lambda value: string(str(value))
+        self.text = []
+        self.size = 0
+        if DIALECTS[export_format]["header"]:
+            self.write_text(self.separator.join(string(name) for name in column_names) + "\n")
+
+    def write_rows(self, rows):
+        get = self.formats.get
+        other = self.other
+        join = self.separator.join
+        lines = [join([get(type(value), other)(value) for value in row]) for row in rows]
+        if lines:
+            self.write_text("\n".join(lines) + "\n")
+
+    def write_text(self, text):
+        self.text.append(text)
+        self.size += len(text)
+        if self.size >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.text:
+            self.writer.write("".join(self.text).encode("utf-8", "surrogateescape"))
+            self.text.clear()
+            self.size = 0
+
+    def close(self):
+        """Termine le fichier ; retourne ses empreintes (tailles et SHA-256 du fichier et du texte)."""
+        try:
+            self.flush()
+        finally:
+            self.writer.close()
+        integrity = self.archive.integrity()
+        del integrity["completed"] # Propre aux dumps SQL
+        return integrity
+
+    def abort(self):
+        self.text.clear()
+        self.writer.close()
+
+
+def arrow_type(mysql_type):
+    """Type Arrow (colonne Parquet) d'une colonne, d'après son type MySQL (COLUMN_TYPE)."""
+    mysql_type = mysql_type.lower()
+    name = re.match(r"[a-z]*", mysql_type).group()
+    unsigned = "unsigned" in mysql_type
+    integers = {"tinyint": (pyarrow.int8, pyarrow.uint8), "smallint": (pyarrow.int16, pyarrow.uint16),
+                "mediumint": (pyarrow.int32, pyarrow.uint32), "int": (pyarrow.int32, pyarrow.uint32),
+                "integer": (pyarrow.int32, pyarrow.uint32), "bigint": (pyarrow.int64, pyarrow.uint64)}
+    if name in integers:
+        return integers[name][unsigned]()
+    if name == "year":
+        return pyarrow.int16()
+    if name == "float":
+        return pyarrow.float32()
+    if name in ("double", "real"):
+        return pyarrow.float64()
+    if name in ("decimal", "numeric"):
+        match = re.search(r"\((\d+)(?:,\s*(\d+))?\)", mysql_type)
+        precision, scale = (int(match.group(1)), int(match.group(2) or 0)) if match else (10, 0)
+        return pyarrow.decimal128(precision, scale) if precision <= 38 else pyarrow.decimal256(precision, scale)
+    if name == "date":
+        return pyarrow.date32()
+    if name in ("datetime", "timestamp"):
+        return pyarrow.timestamp("us")
+    if name == "time":
+        return pyarrow.duration("us")
+    if name in ("binary", "varbinary", "bit") or name.endswith("blob") or name in (
+            "geometry", "point", "linestring", "polygon", "multipoint", "multilinestring", "multipolygon",
+            "geometrycollection"):
+        return pyarrow.binary()
+    return pyarrow.string()
+
+
+def _arrow_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode("utf-8", "replace")
+    if isinstance(value, set):
+        return ",".join(sorted(value))
+    return str(value)
+
+
+def _arrow_converter(arrow_column_type):
+    """Conversion des valeurs lues vers le type Arrow de la colonne, ou None si elles conviennent telles quelles."""
+    if pyarrow.types.is_string(arrow_column_type):
+        return _arrow_text
+    if pyarrow.types.is_binary(arrow_column_type):
+        return lambda value: value.encode("utf-8") if isinstance(value, str) else value
+    if pyarrow.types.is_decimal(arrow_column_type):
+        quantum = decimal.Decimal(1).scaleb(-arrow_column_type.scale)
+        return lambda value: (value if value is None or isinstance(value, decimal.Decimal)
+                              else decimal.Decimal(str(value)).quantize(quantum))
+    if pyarrow.types.is_temporal(arrow_column_type):
+        # Dates zéro de MySQL (0000-00-00), lues comme des chaînes par PyMySQL : NULL
+        return lambda value: None if isinstance(value, str) else value
+    return None
+
+
+class _ParquetSink:
+    """Fichier de sortie du ParquetWriter : empreinte calculée et débit compté (et limité) comme les autres flux."""
+
+    def __init__(self, path, tracker=None):
+        self.file = HashingFile(path)
+        self.writer = tracked_writer(self.file, tracker)
+
+    def write(self, data):
+        self.writer.write(data)
+        return len(data)
+
+    def tell(self):
+        return self.file.tell()
+
+    def flush(self):
+        self.file.flush()
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+    def close(self):
+        self.writer.close()
+
+
+class ParquetTableWriter:
+    """
+    Fichier Parquet d'une table. Les lignes sont converties en colonnes Arrow par groupes
+    de PARQUET_ROW_GROUP lignes, compressés avec le codec Parquet du format demandé.
+    """
+
+    def __init__(self, path, columns, compression, tracker=None):
+        if pyarrow is None:
+            raise DumpError("L'export Parquet nécessite le module 'pyarrow' (pip install pyarrow).")
+        self.schema = pyarrow.schema([pyarrow.field(name, arrow_type(mysql_type), nullable)
+                                      for name, mysql_type, nullable in columns])
+        self.converters = [_arrow_converter(field.type) for field in self.schema]
+        self.sink = _ParquetSink(path, tracker)
+        try:
+            self.writer = pyarrow.parquet.ParquetWriter(
+                self.sink, self.schema, compression=PARQUET_CODECS.get(compression, DEFAULT_PARQUET_CODEC))
+        except BaseException:
+            self.sink.close()
+            raise
+        self.rows = []
+
+    def write_rows(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= PARQUET_ROW_GROUP:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        arrays = []
+        for values, converter, field in zip(zip(*self.rows), self.converters, self.schema):
+            if converter is not None:
+                values = [converter(value) for value in values]
+            arrays.append(pyarrow.array(values, type=field.type))
+        self.rows = []
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        """Termine le fichier ; retourne sa taille et son SHA-256."""
+        try:
+            try:
+                self.flush()
+            finally:
+                self.writer.close()
+        finally:
+            self.sink.close()
+        return {"size": self.sink.file.size, "sha256": self.sink.file.digest.hexdigest()}
+
+    def abort(self):
+        self.rows = []
+        try:
+            self.writer.close()
+        finally:
+            self.sink.close()
+
+
+class _Stopped(Exception):
+    """Arrêt d'un worker quand un autre a échoué."""
+
+
+def export_database(open_source, db_name, output_dir, export_format, workers=1, compression="gzip", level=None,
+                    threads=None, tracker=None, progress=None):
+    """
+    Exporte les tables de db_name dans output_dir, un fichier par table (CSV, TSV ou Parquet), par
+    workers connexions open_source() sur le même instantané. Retourne le contenu de export.json ;
+    lève DumpError en cas d'échec (le dossier partiel est alors supprimé).
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    extension = export_extension(export_format, compression)
+    cancellation = tracker.cancellation if tracker else None
+    os.makedirs(output_dir)
+    sources = []
+    try:
+        sources = [open_source() for _ in range(max(1, workers))]
+        source_errors = sources[0].errors
+        try:
+            if len(sources) > 1:
+                report(f"Ouverture de {len(sources)} connexions sur un instantané cohérent...")
+                with sources[0].snapshot_lock():
+                    for source in sources:
+                        source.open()
+            else:
+                sources[0].open()
+            tables = [name for name, kind in sources[0].list_tables(db_name) if kind == "BASE TABLE"]
+            sizes = sources[0].table_sizes(db_name)
+            server_version = sources[0].server_version()
+        except source_errors as e:
+            raise DumpError(f"Connexion à la source impossible : {type(e).__name__}: {e}")
+
+        used_names = set()
+        files = {name: table_file_name(name, used_names) for name in tables}
+        pending = sorted(tables, key=lambda name: sizes.get(name, 0), reverse=True)
+        entries = {}
+        file_integrity = {}
+        errors = []
+        lock = threading.Lock()
+        stopped = threading.Event()
+
+        def check():
+            if cancellation:
+                cancellation.check()
+            if stopped.is_set():
+                raise _Stopped()
+
+        def export_table(source, name):
+            columns = source.column_types(db_name, name)
+            data_file = files[name] + extension
+            path = os.path.join(output_dir, data_file)
+            if export_format == "parquet":
+                writer = ParquetTableWriter(path, columns, compression, tracker)
+            else:
+                writer = DelimitedTableWriter(path, files[name] + EXPORT_EXTENSIONS[export_format], export_format,
+                                              [column for column, _, _ in columns], compression, level, threads, tracker)
+            if tracker:
+                tracker.set_table(name)
+            rows = 0
+            reader = source.rows(db_name, name, [column for column, _, _ in columns])
+            try:
+                while True:
+                    batch = list(itertools.islice(reader, FETCH_SIZE))
+                    if not batch:
+                        break
+                    writer.write_rows(batch)
+                    rows += len(batch)
+                    check()
+            except BaseException:
+                writer.abort()
+                raise
+            integrity = writer.close()
+            generated = {column for column, is_generated in source.columns(db_name, name) if is_generated}
+            schema = {
+                "format": "mysqldumper-export-schema",
+                "version": 1,
+                "database": db_name,
+                "table": name,
+                "file": data_file,
+                "export_format": export_format,
+                "dialect": DIALECTS.get(export_format),
+                "rows": rows,
+                "columns": [{"name": column, "type": mysql_type, "nullable": nullable, "generated": column in generated}
+                            for column, mysql_type, nullable in columns],
+                "create_table": source.create_table(db_name, name)
+            }
+            with open(os.path.join(output_dir, files[name] + SCHEMA_SUFFIX), 'w') as f:
+                json.dump(schema, f, indent=2)
+            with lock:
+                file_integrity[data_file] = integrity
+                entries[name] = {"name": name, "file": data_file, "schema": files[name] + SCHEMA_SUFFIX, "rows": rows}
+                report(f"Export de '{db_name}' : {len(entries)}/{len(tables)} tables exportées...")
+
+        def run_worker(source):
+            try:
+                while True:
+                    with lock:
+                        if not pending or stopped.is_set():
+                            return
+                        name = pending.pop(0)
+                    export_table(source, name)
+            except _Stopped:
+                pass
+            except source_errors as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                stopped.set()
+            except BaseException as e:
+                with lock:
+                    errors.append(e)
+                stopped.set()
+
+        report(f"Export {export_format} de {len(tables)} tables avec {len(sources)} connexions...")
+        worker_threads = [threading.Thread(target=run_worker, args=(source,)) for source in sources]
+        for thread in worker_threads:
+            thread.start()
+        for thread in worker_threads:
+            thread.join()
+        if cancellation:
+            cancellation.check()
+        # Erreur inattendue (écriture, annulation) : levée telle quelle, comme dans le thread qui l'a rencontrée
+        for error in errors:
+            if isinstance(error, BaseException):
+                raise error
+        if errors:
+            raise DumpError("Une erreur s'est produite lors de l'export :\n" + "\n".join(errors))
+
+        manifest = {
+            "format": "mysqldumper-export",
+            "version": 1,
+            "database": db_name,
+            "server_version": server_version,
+            "export_format": export_format,
+            "compression": compression,
+            "dialect": DIALECTS.get(export_format),
+            "workers": len(sources),
+            "tables": [entries[name] for name in tables],
+            "files": {path: file_integrity[path] for path in sorted(file_integrity)}
+        }
+        with open(os.path.join(output_dir, EXPORT_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+    except BaseException:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        raise
+    finally:
+        for source in sources:
+            source.close()
+
+
+def load_export(directory):
+    """Lit le export.json d'un export ; retourne None s'il n'existe pas."""
+    path = os.path.join(directory, EXPORT_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != "mysqldumper-export":
+        raise DumpError(f"Description d'export non reconnue : {path}")
+    return manifest
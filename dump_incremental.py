@@ -0,0 +1,129 @@
+import json
+import os
+import re
+
+from dump_parallel import MANIFEST_FILE, dump_parallel, list_tables
+from mysql_client import quote_identifier, quote_string, run_query
+
+# --- Méthodes de calcul de l'empreinte d'une table ---
+# "update_time" (par défaut) : UPDATE_TIME de information_schema, immédiat. Si le serveur ne
+# le connaît pas pour une table (NULL, par exemple après un redémarrage), on se rabat sur
+# CHECKSUM TABLE pour cette table seulement ;
+# "checksum" : CHECKSUM TABLE pour toutes les tables, exact mais lit chaque table en entier.
+FINGERPRINT_METHODS = ("checksum", "update_time")
+DEFAULT_FINGERPRINT_METHOD = "update_time"
+
+# Nombre de tables par requête CHECKSUM TABLE
+CHECKSUM_BATCH = 50
+
+
+def _checksum_tables(mysql_exe_path, conn_args, db_name, table_names):
+    """Retourne {table: valeur de CHECKSUM TABLE} (None si le serveur n'a pas pu la calculer)."""
+    checksums = {}
+    prefix = f"{db_name}."
+    for start in range(0, len(table_names), CHECKSUM_BATCH):
+        batch = table_names[start:start + CHECKSUM_BATCH]
+        sql = "CHECKSUM TABLE " + ", ".join(f"{quote_identifier(db_name)}.{quote_identifier(name)}" for name in batch)
+        for qualified_name, checksum in run_query(mysql_exe_path, conn_args, sql):
+            name = qualified_name[len(prefix):] if qualified_name.startswith(prefix) else qualified_name
+            checksums[name] = checksum
+    return checksums
+
+
+def table_fingerprints(mysql_exe_path, conn_args, db_name, table_names, method=DEFAULT_FINGERPRINT_METHOD):
+    """
+    Calcule l'empreinte de chaque table. L'heure de création (CREATE_TIME) est toujours
+    incluse pour détecter les modifications de structure. Une table sans empreinte
+    fiable est absente du résultat : elle sera toujours exportée.
+    """
+    sql = ("SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME FROM information_schema.TABLES "
+           f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND TABLE_TYPE = 'BASE TABLE'")
+    times = {name: (create_time, update_time) for name, create_time, update_time in run_query(mysql_exe_path, conn_args, sql)}
+
+    fingerprints = {}
+    to_checksum = []
+    for name in table_names:
+        create_time, update_time = times.get(name, (None, None))
+        if method == "update_time" and update_time:
+            fingerprints[name] = f"update:{update_time}|create:{create_time}"
+        else:
+            to_checksum.append(name)
+
+    for name, checksum in _checksum_tables(mysql_exe_path, conn_args, db_name, to_checksum).items():
+        if checksum is not None and name in times:
+            fingerprints[name] = f"checksum:{checksum}|create:{times[name][0]}"
+    return fingerprints
+
+
+def find_previous_backup(output_folder, db_name):
+    """
+    Cherche dans output_folder la plus récente sauvegarde par table de db_name
+    (dossier <base>_<AAAAMMJJ_HHMMSS> avec un manifest.json).
+    Retourne (nom du dossier, manifeste) ou (None, None).
+    """
+    pattern = re.compile(re.escape(db_name) + r"_\d{8}_\d{6}$")
+    candidates = sorted((name for name in os.listdir(output_folder) if pattern.match(name)), reverse=True)
+    for name in candidates:
+        manifest_path = os.path.join(output_folder, name, MANIFEST_FILE)
+        if os.path.isfile(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("database") == db_name:
+                return name, manifest
+    return None, None
+
+
+def _rebase_entry(entry, previous_dir):
+    """
+    Recopie une entrée de manifeste en rendant ses chemins relatifs au nouveau dossier.
+    Les sauvegardes étant rangées dans le même dossier, un chemin déjà de la forme
+    "../<sauvegarde>/..." reste valable tel quel.
+    """
+    def rebase(path):
+        return path if path.startswith("../") else f"../{previous_dir}/{path}"
+
+    rebased = dict(entry)
+    if "file" in rebased:
+        rebased["file"] = rebase(rebased["file"])
+    if "chunks" in rebased:
+        rebased["chunks"] = [dict(chunk, file=rebase(chunk["file"])) for chunk in rebased["chunks"]]
+    if "triggers" in rebased:
+        rebased["triggers"] = rebase(rebased["triggers"])
+    rebased.setdefault("reused_from", previous_dir)
+    return rebased
+
+
+def dump_incremental(mysqldump_exe_path, mysql_exe_path, conn_args, db_name, output_dir, workers, progress=None,
+                     method=DEFAULT_FINGERPRINT_METHOD, **parallel_options):
+    """
+    Sauvegarde incrémentale : seules les tables dont l'empreinte a changé depuis la dernière
+    sauvegarde par table sont exportées, les autres reprennent ses fichiers.
+    Retourne le manifeste ; les options restantes sont transmises à dump_parallel.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    report(f"Lecture de la liste des tables de '{db_name}'...")
+    tables = list_tables(mysql_exe_path, conn_args, db_name)
+    table_names = [table["name"] for table in tables if table["type"] == "BASE TABLE"]
+    # Les empreintes sont prises avant l'instantané de dump_parallel : une table modifiée entre
+    # les deux est reprise dans son état précédent, mais avec l'empreinte d'avant la modification,
+    # si bien qu'elle sera exportée à la sauvegarde suivante ; aucune modification n'est perdue.
+    report(f"Calcul des empreintes de {len(table_names)} tables ({method})...")
+    fingerprints = table_fingerprints(mysql_exe_path, conn_args, db_name, table_names, method)
+
+    output_folder = os.path.dirname(os.path.abspath(output_dir))
+    previous_dir, previous_manifest = find_previous_backup(output_folder, db_name)
+    reuse = {}
+    if previous_manifest:
+        for entry in previous_manifest.get("tables", []):
+            fingerprint = fingerprints.get(entry["name"])
+            if fingerprint is not None and entry.get("fingerprint") == fingerprint:
+                reuse[entry["name"]] = _rebase_entry(entry, previous_dir)
+    report(f"Incrémental : {len(table_names) - len(reuse)} tables modifiées, {len(reuse)} inchangées.")
+
+    return dump_parallel(mysqldump_exe_path, mysql_exe_path, conn_args, db_name, output_dir, workers, progress=progress,
+                         tables=tables, reuse=reuse, fingerprints=fingerprints,
+                         manifest_extra={"incremental": {"base": previous_dir, "method": method}},
+                         **parallel_options)
@@ -0,0 +1,226 @@
+import json
+import os
+import time
+
+from dump_checkpoint import file_sha256
+from dump_compression import open_archive_reader
+from dump_export import EXPORT_FILE, load_export
+from dump_parallel import MANIFEST_FILE
+from dump_pipeline import DumpError, HashingReader, HashingWriter, NullWriter, pump
+from dump_repository import SNAPSHOTS_DIR, load_snapshot, restore_snapshot
+from dump_volumes import VOLUMES_FILE, load_volumes
+
+# --- Empreintes d'une sauvegarde (calculées pendant l'écriture, dump_compression.ArchiveWriter) ---
+INTEGRITY_SUFFIX = ".sha256.json"
+
+
+def write_integrity(archive_path, integrity):
+    """Écrit le fichier d'empreintes d'une archive (integrity : ArchiveWriter.integrity)."""
+    path = archive_path + INTEGRITY_SUFFIX
+    sidecar = {"format": "mysqldumper-integrity", "version": 1, "file": os.path.basename(archive_path)}
+    sidecar.update(integrity)
+    with open(path, 'w') as f:
+        json.dump(sidecar, f, indent=2)
+    return path
+
+
+def load_integrity(archive_path):
+    """Lit le fichier d'empreintes d'une archive ; retourne None s'il n'existe pas."""
+    path = archive_path + INTEGRITY_SUFFIX
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        integrity = json.load(f)
+    if integrity.get("format") != "mysqldumper-integrity":
+        raise DumpError(f"Fichier d'empreintes non reconnu : {path}")
+    return integrity
+
+
+def verify_file(path, expected):
+    """Vérifie la présence, la taille et le SHA-256 d'un fichier d'après expected. Retourne la liste des erreurs."""
+    if not os.path.isfile(path):
+        return [f"Fichier manquant : {path}"]
+    if "size" in expected and os.path.getsize(path) != expected["size"]:
+        return [f"Taille inattendue : {os.path.getsize(path)} octets au lieu de {expected['size']}"]
+    if "sha256" in expected and file_sha256(path) != expected["sha256"]:
+        return ["Le SHA-256 du fichier ne correspond pas à l'empreinte enregistrée"]
+    return []
+
+
+def verify_archive(path, expected=None, require_trailer=True, compression=None):
+    """
+    Vérifie une archive en une seule lecture : taille du fichier, puis décompression en flux
+    (mémoire constante) avec le SHA-256 du fichier et du SQL et la dernière ligne de mysqldump
+    ("-- Dump completed").
+    expected contient les empreintes enregistrées (clés de ArchiveWriter.integrity) ; les
+    absentes ne sont pas contrôlées. compression est déduit de l'extension s'il n'est pas
+    indiqué. Retourne la liste des erreurs (vide si l'archive est intègre).
+    """
+    expected = expected or {}
+    errors = verify_file(path, {key: value for key, value in expected.items() if key != "sha256"})
+    if errors:
+        return errors # Fichier manquant ou de taille inattendue : inutile de le décompresser
+
+    # Le fichier n'est lu qu'une fois : son SHA-256 est calculé sur les octets que lit le décompresseur
+    checker = HashingWriter(NullWriter())
+    error = None
+    with HashingReader(path) as source:
+        try:
+            with open_archive_reader(path, compression, source) as reader:
+                pump(reader, checker)
+                digest = source.finish()
+        except DumpError:
+            raise # Format inconnu ou module de décompression absent : la vérification est impossible
+        except Exception as e:
+            error = f"Décompression impossible : {e}"
+            digest = source.finish()
+    if "sha256" in expected and digest != expected["sha256"]:
+        return ["Le SHA-256 du fichier ne correspond pas à l'empreinte enregistrée"]
+    if error:
+        return [error]
+    if "sql_size" in expected and checker.size != expected["sql_size"]:
+        errors.append(f"Taille du SQL inattendue : {checker.size} octets au lieu de {expected['sql_size']}")
+    elif "sql_sha256" in expected and checker.digest.hexdigest() != expected["sql_sha256"]:
+        errors.append("Le SHA-256 du SQL ne correspond pas à l'empreinte enregistrée")
+    if expected.get("completed", require_trailer) and not checker.completed:
+        errors.append("Le dump ne se termine pas par la ligne '-- Dump completed' de mysqldump (sauvegarde tronquée)")
+    return errors
+
+
+def manifest_files(manifest):
+    """Fichiers listés par le manifest.json d'une sauvegarde par table antérieure aux empreintes."""
+    files = [manifest["schema"]]
+    if manifest.get("views"):
+        files.append(manifest["views"])
+    for table in manifest["tables"]:
+        if "chunks" in table:
+            files.extend(chunk["file"] for chunk in table["chunks"])
+            files.append(table["triggers"])
+        else:
+            files.append(table["file"])
+    return files
+
+
+def verify_directory(directory, progress=None):
+    """
+    Vérifie les fichiers d'une sauvegarde par table d'après les empreintes de son manifest.json.
+    Les fichiers d'une sauvegarde incrémentale repris d'une sauvegarde précédente (chemins
+    en ../) sont vérifiés avec celle-ci. Retourne {fichier: liste des erreurs}.
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        raise DumpError(f"Le dossier ne contient pas de {MANIFEST_FILE} : {directory}")
+    with open(path) as f:
+        manifest = json.load(f)
+    if "files" in manifest:
+        files = manifest["files"]
+    else:
+        # Sauvegarde sans empreintes : seules la décompression et la présence des fichiers sont vérifiées
+        files = {name: {"completed": False} for name in manifest_files(manifest) if not name.startswith("../")}
+    results = {}
+    for name, expected in files.items():
+        if progress:
+            progress(f"Vérification de '{name}'...")
+        results[name] = verify_archive(os.path.join(directory, name), expected, require_trailer=False)
+    return results
+
+
+def verify_volumes(directory, progress=None):
+    """
+    Vérifie chaque volume d'une sauvegarde découpée d'après son volumes.json ; le dernier
+    doit se terminer par la ligne '-- Dump completed'. Retourne {volume: liste des erreurs}.
+    """
+    manifest = load_volumes(directory)
+    if manifest is None:
+        raise DumpError(f"Le dossier ne contient pas de {VOLUMES_FILE} : {directory}")
+    results = {}
+    volumes = manifest["volumes"]
+    for number, entry in enumerate(volumes, 1):
+        if progress:
+            progress(f"Vérification du volume {number}/{len(volumes)} '{entry['file']}'...")
+        expected = {key: value for key, value in entry.items() if key in ("size", "sha256", "sql_size", "sql_sha256")}
+        # Les volumes sont coupés en fin de ligne : seul le dernier contient la fin du dump
+        expected["completed"] = number == len(volumes)
+        results[entry["file"]] = verify_archive(os.path.join(directory, entry["file"]), expected)
+    if not manifest["complete"]:
+        results[VOLUMES_FILE] = ["La sauvegarde découpée en volumes est incomplète (dump interrompu ou en cours)"]
+    return results
+
+
+def verify_export(directory, progress=None):
+    """
+    Vérifie les fichiers d'un export CSV, TSV ou Parquet d'après les empreintes de son
+    export.json : les fichiers texte sont décompressés, les fichiers Parquet (compressés
+    en interne) contrôlés d'après leur taille et leur SHA-256. Retourne {fichier: liste des erreurs}.
+    """
+    manifest = load_export(directory)
+    if manifest is None:
+        raise DumpError(f"Le dossier ne contient pas de {EXPORT_FILE} : {directory}")
+    results = {}
+    for name, expected in manifest["files"].items():
+        if progress:
+            progress(f"Vérification de '{name}'...")
+        path = os.path.join(directory, name)
+        if manifest["export_format"] == "parquet":
+            results[name] = verify_file(path, expected)
+        else:
+            results[name] = verify_archive(path, expected, require_trailer=False, compression=manifest["compression"])
+    return results
+
+
+def verify_snapshot(repository, snapshot_name):
+    """
+    Vérifie une sauvegarde du dépôt dédupliqué : chaque morceau est relu et contrôlé, puis
+    l'empreinte du flux reconstitué et sa dernière ligne. Retourne la liste des erreurs.
+    """
+    checker = HashingWriter(NullWriter())
+    try:
+        restore_snapshot(repository, snapshot_name, checker)
+    except DumpError as e:
+        return [str(e)]
+    if not checker.completed:
+        return ["Le dump ne se termine pas par la ligne '-- Dump completed' de mysqldump (sauvegarde tronquée)"]
+    return []
+
+
+def verify_backup(source, progress=None):
+    """
+    Vérifie une sauvegarde produite par ce programme, sans la restaurer : source est une
+    archive, le dossier d'une sauvegarde par table, en volumes ou d'un export (ou son
+    manifest.json / volumes.json / export.json) ou l'index d'une sauvegarde du dépôt
+    (repository/snapshots/<nom>.json). Retourne {"source", "ok", "files": [{"file", "errors"}],
+    "duration"} ; lève DumpError si la sauvegarde est introuvable ou illisible.
+    """
+    started = time.time()
+    source = os.path.abspath(source)
+    if os.path.basename(source) in (MANIFEST_FILE, VOLUMES_FILE, EXPORT_FILE):
+        source = os.path.dirname(source)
+
+    if os.path.isdir(source) and load_volumes(source) is not None:
+        results = verify_volumes(source, progress)
+    elif os.path.isdir(source) and load_export(source) is not None:
+        results = verify_export(source, progress)
+    elif os.path.isdir(source):
+        results = verify_directory(source, progress)
+    elif source.endswith(".json") and os.path.basename(os.path.dirname(source)) == SNAPSHOTS_DIR:
+        repository = os.path.dirname(os.path.dirname(source))
+        snapshot = os.path.basename(source)[:-len(".json")]
+        load_snapshot(repository, snapshot)
+        if progress:
+            progress(f"Vérification de la sauvegarde '{snapshot}' du dépôt...")
+        results = {os.path.basename(source): verify_snapshot(repository, snapshot)}
+    elif os.path.isfile(source):
+        if progress:
+            progress(f"Vérification de '{source}'...")
+        # Sans fichier d'empreintes (archive antérieure), seules la décompression et la fin du dump sont vérifiées
+        results = {os.path.basename(source): verify_archive(source, load_integrity(source))}
+    else:
+        raise DumpError(f"Sauvegarde introuvable : {source}")
+
+    files = [{"file": name, "errors": errors} for name, errors in results.items()]
+    return {
+        "source": source,
+        "ok": not any(entry["errors"] for entry in files),
+        "files": files,
+        "duration": round(time.time() - started, 3)
+    }
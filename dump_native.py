@@ -0,0 +1,578 @@
+import contextlib
+import datetime
+import decimal
+import os
+import pathlib
+import queue
+import re
+import sqlite3
+import threading
+
+from dump_pipeline import CHUNK_SIZE, DumpError
+from mysql_client import quote_identifier, quote_string
+
+# --- Dépendance optionnelle (moteur intégré sur un serveur MySQL) ---
+try:
+    import pymysql
+    import pymysql.cursors
+except ImportError:
+    pymysql = None
+
+# --- Moteur de dump intégré ---
+# Flux au format de mysqldump (mêmes sections et marqueurs, "-- Dump completed"), lu par
+# un curseur côté serveur et écrit en INSERT étendus.
+NATIVE_ENGINE = "native"
+DUMP_ENGINES = ("mysqldump", NATIVE_ENGINE)
+NATIVE_INSERT_SIZE = 1024 * 1024  # Taille maximale d'un INSERT étendu, comme net_buffer_length de mysqldump
+FETCH_SIZE = 1000                 # Lignes lues à chaque appel au curseur
+NATIVE_ERROR_CODE = 2             # Code de retour de mysqldump pour une erreur de connexion ou de requête
+QUEUE_BLOCKS = 4                  # Blocs d'avance de la lecture de la base sur l'écriture
+QUEUE_POLL_INTERVAL = 0.1
+
+DUMP_HEADER = """/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;
+/*!40101 SET @OLD_CHARACTER_SET_RESULTS=@@CHARACTER_SET_RESULTS */;
+/*!40101 SET @OLD_COLLATION_CONNECTION=@@COLLATION_CONNECTION */;
+/*!50503 SET NAMES utf8mb4 */;
+/*!40103 SET @OLD_TIME_ZONE=@@TIME_ZONE */;
+/*!40103 SET TIME_ZONE='+00:00' */;
+/*!40014 SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0 */;
+/*!40014 SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0 */;
+/*!40101 SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='NO_AUTO_VALUE_ON_ZERO' */;
+/*!40111 SET @OLD_SQL_NOTES=@@SQL_NOTES, SQL_NOTES=0 */;
+"""
+
+DUMP_FOOTER = """/*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
+
+/*!40101 SET SQL_MODE=@OLD_SQL_MODE */;
+/*!40014 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS */;
+/*!40014 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS */;
+/*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;
+/*!40101 SET CHARACTER_SET_RESULTS=@OLD_CHARACTER_SET_RESULTS */;
+/*!40101 SET COLLATION_CONNECTION=@OLD_COLLATION_CONNECTION */;
+/*!40111 SET SQL_NOTES=@OLD_SQL_NOTES */;
+"""
+
+# Caractères protégés dans les chaînes, comme mysql_real_escape_string
+STRING_ESCAPES = {"\0": "\\0", "\n": "\\n", "\r": "\\r", "\\": "\\\\", "'": "\\'", '"': '\\"', "\x1a": "\\Z"}
+SPECIAL_CHARACTERS = re.compile(r"[\0\n\r\\'\"\x1a]")
+
+
+def escape_string(value):
+    """Chaîne littérale SQL ; la plupart des valeurs n'ont rien à protéger et sont recopiées telles quelles."""
+    if SPECIAL_CHARACTERS.search(value) is None:
+        return "'" + value + "'"
+    return "'" + SPECIAL_CHARACTERS.sub(lambda match: STRING_ESCAPES[match.group()], value) + "'"
+
+
+def time_text(value):
+    """Valeur d'une colonne TIME, lue comme une durée (peut être négative ou dépasser 24 heures)."""
+    seconds = int(value.total_seconds())
+    sign = "-" if seconds < 0 else ""
+    seconds = abs(seconds)
+    literal = f"{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if value.microseconds:
+        literal += f".{abs(value).microseconds:06d}"
+    return literal
+
+
+LITERALS = {
+    type(None): lambda value: "NULL",
+    bool: lambda value: "1" if value else "0",
+    int: str,
+    float: repr,
+    decimal.Decimal: str,
+    str: escape_string,
+    # Données binaires en hexadécimal (comme --hex-blob) : aucun octet n'a à être protégé
+    bytes: lambda value: "0x" + value.hex() if value else "''",
+    bytearray: lambda value: "0x" + value.hex() if value else "''",
+    datetime.datetime: lambda value: f"'{value}'",
+    datetime.date: lambda value: f"'{value}'",
+    datetime.time: lambda value: f"'{value}'",
+    datetime.timedelta: lambda value: f"'{time_text(value)}'",
+    set: lambda value: escape_string(",".join(sorted(value)))
+}
+
+
+def sql_literal(value):
+    """Valeur d'une colonne écrite comme dans un INSERT de mysqldump."""
+    literal = LITERALS.get(type(value))
+    if literal is None:
+        return escape_string(str(value))
+    return literal(value)
+
+
+class DumpSource:
+    """
+    Source de données du moteur intégré : une connexion qui voit un état cohérent de la
+    base pendant tout le dump. Les méthodes retournent le DDL au format MySQL ; rows()
+    lit les lignes en flux. errors contient les exceptions de la source (connexion,
+    requête) : le dump se termine alors en erreur comme mysqldump.
+    """
+
+    errors = ()
+    name = ""
+
+    def open(self):
+        """Ouvre la connexion et l'instantané cohérent."""
+
+    def close(self):
+        """Ferme la connexion (l'instantané est abandonné, rien n'est écrit)."""
+
+    def server_version(self):
+        raise NotImplementedError
+
+    def list_tables(self, db_name):
+        """Tables et vues de la base : [(nom, "BASE TABLE" ou "VIEW")] par ordre alphabétique."""
+        raise NotImplementedError
+
+    def create_table(self, db_name, table_name):
+        raise NotImplementedError
+
+    def create_view(self, db_name, view_name):
+        raise NotImplementedError
+
+    def columns(self, db_name, table_name):
+        """Colonnes d'une table ou d'une vue : [(nom, colonne générée)] dans l'ordre de la table."""
+        raise NotImplementedError
+
+    def column_types(self, db_name, table_name):
+        """Colonnes d'une table : [(nom, type MySQL, accepte NULL)] dans l'ordre de columns()."""
+        raise NotImplementedError
+
+    def rows(self, db_name, table_name, columns):
+        """Lignes de la table (tuples des valeurs de columns), lues en flux."""
+        raise NotImplementedError
+
+    def table_sizes(self, db_name):
+        """Taille estimée des tables ({nom: octets}) ; vide si la source n'en donne pas."""
+        return {}
+
+    def snapshot_lock(self):
+        """
+        Contexte tenu pendant l'ouverture de plusieurs connexions à la source (export
+        parallèle) pour qu'elles voient toutes le même instantané.
+        """
+        return contextlib.nullcontext()
+
+    def triggers(self, db_name, table_name):
+        """Instructions CREATE TRIGGER des triggers de la table."""
+        return []
+
+    def routines(self, db_name):
+        """Instructions CREATE PROCEDURE / CREATE FUNCTION de la base."""
+        return []
+
+    def events(self, db_name):
+        """Instructions CREATE EVENT de la base."""
+        return []
+
+
+class MySQLSource(DumpSource):
+    """
+    Serveur MySQL lu avec PyMySQL. Le dump se fait dans une transaction REPEATABLE READ
+    ouverte WITH CONSISTENT SNAPSHOT (comme --single-transaction) ; les lignes sont lues
+    avec un curseur côté serveur (SSCursor), FETCH_SIZE à la fois. Sans mot de passe, la
+    connexion utilise la section [client] de ~/.my.cnf, comme le client mysql.
+    """
+
+    def __init__(self, db_host, db_user, db_password="", db_port=None):
+        if pymysql is None:
+            raise DumpError("Le moteur intégré nécessite le module 'pymysql' (pip install pymysql).")
+        self.errors = (pymysql.err.Error,)
+        self.name = db_host
+        self.options = {"host": db_host, "user": db_user, "port": int(db_port or 3306), "charset": "utf8mb4"}
+        if db_password:
+            self.options["password"] = db_password
+        elif os.path.isfile(os.path.expanduser("~/.my.cnf")):
+            self.options["read_default_file"] = os.path.expanduser("~/.my.cnf")
+        self.connection = None
+
+    def open(self):
+        self.connection = pymysql.connect(**self.options)
+        for sql in ("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ",
+                    "START TRANSACTION /*!40100 WITH CONSISTENT SNAPSHOT */",
+                    "SET SESSION TIME_ZONE = '+00:00'"):
+            self.execute(sql)
+
+    def close(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.close()
+
+    def execute(self, sql):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def server_version(self):
+        return self.execute("SELECT VERSION()")[0][0]
+
+    def table_ref(self, db_name, name):
+        return f"{quote_identifier(db_name)}.{quote_identifier(name)}"
+
+    def list_tables(self, db_name):
+        return sorted((row[0], row[1]) for row in self.execute(f"SHOW FULL TABLES FROM {quote_identifier(db_name)}"))
+
+    def create_table(self, db_name, table_name):
+        return self.execute(f"SHOW CREATE TABLE {self.table_ref(db_name, table_name)}")[0][1]
+
+    def create_view(self, db_name, view_name):
+        return self.execute(f"SHOW CREATE VIEW {self.table_ref(db_name, view_name)}")[0][1]
+
+    def columns(self, db_name, table_name):
+        return [(row[0], "GENERATED" in (row[1] or "").upper()) for row in self.execute(
+            "SELECT COLUMN_NAME, EXTRA FROM information_schema.COLUMNS "
+            f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND TABLE_NAME = {quote_string(table_name)} "
+            "ORDER BY ORDINAL_POSITION")]
+
+    def column_types(self, db_name, table_name):
+        return [(row[0], row[1], row[2] == "YES") for row in self.execute(
+            "SELECT COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE FROM information_schema.COLUMNS "
+            f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND TABLE_NAME = {quote_string(table_name)} "
+            "ORDER BY ORDINAL_POSITION")]
+
+    def rows(self, db_name, table_name, columns):
+        sql = f"SELECT {', '.join(quote_identifier(column) for column in columns)} FROM {self.table_ref(db_name, table_name)}"
+        with self.connection.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+
+    def table_sizes(self, db_name):
+        return {row[0]: int(row[1] or 0) for row in self.execute(
+            "SELECT TABLE_NAME, DATA_LENGTH FROM information_schema.TABLES "
+            f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND TABLE_TYPE = 'BASE TABLE'")}
+
+    @contextlib.contextmanager
+    def snapshot_lock(self):
+        # Comme dump_parallel : aucune écriture ne peut être validée tant que la session tient le verrou
+        connection = pymysql.connect(**self.options)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("FLUSH TABLES WITH READ LOCK")
+            yield
+        finally:
+            connection.close()
+
+    def triggers(self, db_name, table_name):
+        names = self.execute(f"SHOW TRIGGERS FROM {quote_identifier(db_name)} LIKE {quote_string(table_name)}")
+        return [self.execute(f"SHOW CREATE TRIGGER {self.table_ref(db_name, row[0])}")[0][2] for row in names]
+
+    def routines(self, db_name):
+        statements = []
+        for kind in ("PROCEDURE", "FUNCTION"):
+            for row in self.execute(f"SHOW {kind} STATUS WHERE Db = {quote_string(db_name)}"):
+                statements.append(self.execute(f"SHOW CREATE {kind} {self.table_ref(db_name, row[1])}")[0][2])
+        return statements
+
+    def events(self, db_name):
+        return [self.execute(f"SHOW CREATE EVENT {self.table_ref(db_name, row[1])}")[0][3]
+                for row in self.execute(f"SHOW EVENTS FROM {quote_identifier(db_name)}")]
+
+
+class SQLiteSource(DumpSource):
+    """
+    Base SQLite lue comme une base MySQL, pour essayer et mesurer le moteur intégré sans
+    serveur (dump_benchmark). Le DDL est traduit en MySQL d'après les types déclarés
+    (affinités SQLite) ; les vues gardent leur SELECT d'origine. Les colonnes générées,
+    dont l'expression n'est pas accessible, et les triggers SQLite, dont la syntaxe
+    diffère, ne sont pas exportés. db_name n'est qu'un libellé.
+    """
+
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.connection = None
+
+    def open(self):
+        if not os.path.isfile(self.path):
+            raise DumpError(f"Base SQLite introuvable : {self.path}")
+        # Lecture seule ; la transaction garde le même état de la base pendant tout le dump.
+        # La connexion peut être ouverte par un thread et lue par un autre (export parallèle), jamais par deux à la fois
+        self.connection = sqlite3.connect(pathlib.Path(os.path.abspath(self.path)).as_uri() + "?mode=ro", uri=True,
+                                          isolation_level=None, check_same_thread=False)
+        self.connection.execute("BEGIN")
+        self.connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchall()
+
+    def close(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.close()
+
+    def server_version(self):
+        return f"SQLite {sqlite3.sqlite_version}"
+
+    def list_tables(self, db_name):
+        return sorted((name, "VIEW" if kind == "view" else "BASE TABLE") for name, kind in self.connection.execute(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"))
+
+    def _pragma(self, pragma, name):
+        quoted = "'" + name.replace("'", "''") + "'" # Pas d'échappement par antislash en SQLite
+        return self.connection.execute(f"PRAGMA {pragma}({quoted})").fetchall()
+
+    def _primary_key(self, table_name):
+        return [row[1] for row in sorted(self._pragma("table_info", table_name), key=lambda row: row[5]) if row[5]]
+
+    @staticmethod
+    def _mysql_type(declared, indexed):
+        # Règles d'affinité de SQLite (section 3.1 de sa documentation sur les types)
+        declared = declared.upper()
+        if "INT" in declared:
+            return "bigint"
+        if any(word in declared for word in ("CHAR", "CLOB", "TEXT")):
+            return "varchar(255)" if indexed else "longtext"
+        if not declared or "BLOB" in declared:
+            return "varbinary(255)" if indexed else "longblob"
+        if any(word in declared for word in ("REAL", "FLOA", "DOUB")):
+            return "double"
+        return "decimal(65,10)"
+
+    def _indexes(self, table_name):
+        """Index de la table hors clé primaire : [(nom, unique, colonnes)]."""
+        return [(index_name, unique, [row[2] for row in self._pragma("index_info", index_name)])
+                for _, index_name, unique, origin, _ in self._pragma("index_list", table_name) if origin != "pk"]
+
+    def create_table(self, db_name, table_name):
+        columns = [row for row in self._pragma("table_xinfo", table_name) if row[6] == 0]
+        indexes = self._indexes(table_name)
+        indexed = {column for _, _, index_columns in indexes for column in index_columns}
+        primary_key = self._primary_key(table_name)
+        lines = []
+        for _, name, declared, not_null, default, pk, _ in columns:
+            line = f"  {quote_identifier(name)} {self._mysql_type(declared, pk or name in indexed)}"
+            if not_null or pk:
+                line += " NOT NULL"
+            if default is not None and (default.lstrip("-").replace(".", "", 1).isdigit() or default.startswith("'")):
+                line += f" DEFAULT {default}"
+            lines.append(line)
+        if primary_key:
+            lines.append(f"  PRIMARY KEY ({', '.join(quote_identifier(column) for column in primary_key)})")
+        for index_name, unique, index_columns in indexes:
+            kind = "UNIQUE KEY" if unique else "KEY"
+            lines.append(f"  {kind} {quote_identifier(index_name)} ({', '.join(quote_identifier(column) for column in index_columns)})")
+        foreign_keys = {}
+        for row in self._pragma("foreign_key_list", table_name):
+            foreign_keys.setdefault(row[0], (row[2], []))[1].append((row[3], row[4]))
+        for number, (parent, pairs) in sorted(foreign_keys.items()):
+            columns_sql = ", ".join(quote_identifier(column) for column, _ in pairs)
+            # Sans colonnes indiquées, la clé étrangère référence la clé primaire de la table parente
+            parent_key = [column for _, column in pairs] if pairs[0][1] else self._primary_key(parent)
+            parent_columns = ", ".join(quote_identifier(column) for column in parent_key)
+            lines.append(f"  CONSTRAINT {quote_identifier(f'{table_name}_ibfk_{number + 1}')} FOREIGN KEY ({columns_sql}) "
+                         f"REFERENCES {quote_identifier(parent)} ({parent_columns})")
+        return (f"CREATE TABLE {quote_identifier(table_name)} (\n" + ",\n".join(lines) +
+                "\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+
+    def create_view(self, db_name, view_name):
+        return self.connection.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = ?",
+                                       (view_name,)).fetchone()[0]
+
+    def columns(self, db_name, table_name):
+        # hidden 2 ou 3 : colonne générée (virtuelle ou stockée)
+        return [(row[1], row[6] in (2, 3)) for row in self._pragma("table_xinfo", table_name) if row[6] != 1]
+
+    def column_types(self, db_name, table_name):
+        indexed = {column for _, _, index_columns in self._indexes(table_name) for column in index_columns}
+        return [(name, self._mysql_type(declared, pk or name in indexed), not (not_null or pk))
+                for _, name, declared, not_null, _, pk, hidden in self._pragma("table_xinfo", table_name) if hidden != 1]
+
+    def table_sizes(self, db_name):
+        # Table virtuelle dbstat : présente seulement si SQLite a été compilé avec SQLITE_ENABLE_DBSTAT_VTAB
+        try:
+            return dict(self.connection.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+        except sqlite3.Error:
+            return {}
+
+    def rows(self, db_name, table_name, columns):
+        cursor = self.connection.execute(f"SELECT {', '.join(quote_identifier(column) for column in columns)} "
+                                         f"FROM {quote_identifier(table_name)}")
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+
+
+class NativeDump:
+    """
+    Dump d'une base par le moteur intégré. Un NativeDump remplace la commande mysqldump
+    dans dump_pipeline.stream_dump (méthode stream) : les archives, volumes, copies et
+    le dépôt dédupliqué l'utilisent sans changement. Chaque INSERT étendu contient au plus
+    batch_rows lignes (None : pas de limite) et insert_size octets ; batch_rows=1 produit
+    une ligne par INSERT, comme --skip-extended-insert.
+    """
+
+    def __init__(self, source, db_name, batch_rows=None, insert_size=NATIVE_INSERT_SIZE, routines=True, triggers=True,
+                 events=True):
+        if batch_rows is not None and batch_rows < 1:
+            raise DumpError("Le nombre de lignes par INSERT doit être supérieur ou égal à 1.")
+        self.source = source
+        self.db_name = db_name
+        self.batch_rows = batch_rows
+        self.insert_size = insert_size
+        self.with_routines = routines
+        self.with_triggers = triggers
+        self.with_events = events
+        self.buffer = bytearray()
+        self.blocks = None
+        self.stopped = None
+        self.cancellation = None
+
+    def stream(self, writer, cancellation=None):
+        """
+        Écrit le dump dans writer, par blocs d'environ CHUNK_SIZE octets. La base est lue
+        par un thread qui garde au plus QUEUE_BLOCKS blocs d'avance : lecture et formatage
+        des lignes se font pendant la compression, comme avec le processus mysqldump.
+        Retourne le tuple (code de retour, message d'erreur) de dump_pipeline.stream_dump :
+        une erreur de la source donne le code de mysqldump (2) et son message.
+        """
+        self.cancellation = cancellation
+        self.blocks = queue.Queue(QUEUE_BLOCKS)
+        self.stopped = threading.Event()
+        errors = []
+
+        def produce():
+            try:
+                self.source.open()
+                try:
+                    self.dump()
+                finally:
+                    self.source.close()
+                self.flush()
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                self.buffer.clear()
+            self.put(None)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                block = self.blocks.get()
+                if block is None:
+                    break
+                writer.write(block)
+                if cancellation:
+                    cancellation.check()
+        finally:
+            # Le writer a échoué ou la sauvegarde est annulée : le thread de lecture s'arrête au bloc suivant
+            self.stopped.set()
+            thread.join()
+        if errors:
+            if isinstance(errors[0], self.source.errors):
+                return NATIVE_ERROR_CODE, f"{type(errors[0]).__name__}: {errors[0]}"
+            raise errors[0]
+        return 0, ""
+
+    def put(self, block):
+        while not self.stopped.is_set():
+            try:
+                self.blocks.put(block, timeout=QUEUE_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+        if block is not None:
+            raise _Stopped()
+
+    def write(self, text):
+        self.buffer += text.encode("utf-8")
+        if len(self.buffer) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.cancellation:
+            self.cancellation.check()
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def dump(self):
+        db_name = self.db_name
+        self.write(f"-- MySQL dump (moteur intégré de MySQLDumper)\n--\n-- Host: {self.source.name}    Database: {db_name}\n"
+                   f"-- ------------------------------------------------------\n"
+                   f"-- Server version\t{self.source.server_version()}\n\n" + DUMP_HEADER)
+        tables = self.source.list_tables(db_name)
+        views = [name for name, kind in tables if kind == "VIEW"]
+        for name, kind in tables:
+            if kind == "VIEW":
+                self.dump_view_placeholder(name)
+            else:
+                self.dump_table(name)
+        if self.with_events:
+            self.write(f"\n--\n-- Dumping events for database '{db_name}'\n--\n")
+            self.dump_delimited(self.source.events(db_name))
+        if self.with_routines:
+            self.write(f"\n--\n-- Dumping routines for database '{db_name}'\n--\n")
+            self.dump_delimited(self.source.routines(db_name))
+        for name in views:
+            self.write(f"\n--\n-- Final view structure for view {quote_identifier(name)}\n--\n\n"
+                       f"/*!50001 DROP VIEW IF EXISTS {quote_identifier(name)}*/;\n"
+                       f"{self.source.create_view(db_name, name)};\n")
+        self.write("\n" + DUMP_FOOTER + f"\n-- Dump completed on {datetime.datetime.now():%Y-%m-%d %H:%M:%S}\n")
+
+    def dump_delimited(self, statements):
+        """Routines, triggers ou événements : corps avec des points-virgules, d'où DELIMITER."""
+        if statements:
+            self.write("DELIMITER ;;\n" + "".join(f"{statement} ;;\n" for statement in statements) + "DELIMITER ;\n")
+
+    def dump_view_placeholder(self, name):
+        # Structure temporaire (comme mysqldump) : les vues qui se référencent se chargent dans n'importe quel ordre
+        quoted = quote_identifier(name)
+        columns = ",\n ".join(f"1 AS {quote_identifier(column)}" for column, _ in self.source.columns(self.db_name, name))
+        self.write(f"\n--\n-- Temporary view structure for view {quoted}\n--\n\n"
+                   f"DROP TABLE IF EXISTS {quoted};\n/*!50001 DROP VIEW IF EXISTS {quoted}*/;\n"
+                   f"/*!50001 CREATE VIEW {quoted} AS SELECT \n {columns}*/;\n")
+
+    def dump_table(self, name):
+        quoted = quote_identifier(name)
+        self.write(f"\n--\n-- Table structure for table {quoted}\n--\n\n"
+                   f"DROP TABLE IF EXISTS {quoted};\n"
+                   "/*!40101 SET @saved_cs_client     = @@character_set_client */;\n"
+                   "/*!50503 SET character_set_client = utf8mb4 */;\n"
+                   f"{self.source.create_table(self.db_name, name)};\n"
+                   "/*!40101 SET character_set_client = @saved_cs_client */;\n")
+        columns = self.source.columns(self.db_name, name)
+        stored = [column for column, generated in columns if not generated]
+        self.write(f"\n--\n-- Dumping data for table {quoted}\n--\n\n"
+                   f"LOCK TABLES {quoted} WRITE;\n/*!40000 ALTER TABLE {quoted} DISABLE KEYS */;\n")
+        # Les colonnes générées sont calculées par le serveur : elles sont nommées seulement si la table en a
+        prefix = f"INSERT INTO {quoted} VALUES " if len(stored) == len(columns) else (
+            f"INSERT INTO {quoted} ({', '.join(quote_identifier(column) for column in stored)}) VALUES ")
+        prefix = prefix.encode("utf-8")
+        batch, size = [], len(prefix)
+        for row in self.source.rows(self.db_name, name, stored):
+            values = ("(" + ",".join([sql_literal(value) for value in row]) + ")").encode("utf-8")
+            if batch and (size + len(values) + 1 > self.insert_size or len(batch) == self.batch_rows):
+                self.write_insert(prefix, batch)
+                batch, size = [], len(prefix)
+            batch.append(values)
+            size += len(values) + 1
+        if batch:
+            self.write_insert(prefix, batch)
+        self.write(f"/*!40000 ALTER TABLE {quoted} ENABLE KEYS */;\nUNLOCK TABLES;\n")
+        if self.with_triggers:
+            self.dump_delimited(self.source.triggers(self.db_name, name))
+
+    def write_insert(self, prefix, values):
+        self.buffer += prefix
+        self.buffer += b",".join(values)
+        self.buffer += b";\n"
+        if len(self.buffer) >= CHUNK_SIZE:
+            self.flush()
+
+
+class _Stopped(Exception):
+    """Arrêt du thread de lecture quand l'écriture a échoué ou que la sauvegarde est annulée."""
+
+
+def native_source(db_host, db_user, db_password="", db_port=None, sqlite_path=None):
+    """Source du moteur intégré : la base SQLite sqlite_path si elle est indiquée, sinon le serveur MySQL."""
+    if sqlite_path:
+        return SQLiteSource(sqlite_path)
+    return MySQLSource(db_host, db_user, db_password, db_port)
@@ -0,0 +1,530 @@
+import json
+import os
+import re
+import shutil
+import threading
+
+from dump_compression import DEFAULT_COMPRESSION, archive_extension, dump_to_archive, open_archive_writer
+from dump_pipeline import TABLE_MARKER, DumpError, build_mysqldump_command, stream_dump
+from dump_progress import tracked_writer
+from mysql_client import SnapshotLock, quote_identifier, quote_string, run_query
+
+# --- Fichier décrivant le contenu d'une sauvegarde parallèle ---
+MANIFEST_FILE = "manifest.json"
+
+# Les routines et événements sont exportés une seule fois, dans le fichier de schéma
+WORKER_OPTIONS = ["--skip-routines", "--skip-events"]
+SCHEMA_OPTIONS = ["--no-data", "--no-create-info", "--skip-triggers"]
+VIEW_OPTIONS = ["--skip-routines", "--skip-events", "--skip-triggers"]
+# Les morceaux d'une table découpée sont chargés avant ses triggers (exportés à part)
+CHUNK_OPTIONS = ["--skip-routines", "--skip-events", "--skip-triggers"]
+TRIGGER_OPTIONS = ["--skip-routines", "--skip-events", "--no-data", "--no-create-info"]
+
+# --- Découpage des grosses tables en plages de clé primaire ---
+MIN_CHUNK_BYTES = 256 * 1024 * 1024  # Taille minimale d'un morceau : 256 Mio
+INTEGER_TYPES = ("tinyint", "smallint", "mediumint", "int", "integer", "bigint")
+
+
+def list_tables(mysql_exe_path, conn_args, db_name):
+    """
+    Liste les tables et vues d'une base avec les estimations de information_schema.
+    Retourne une liste de dictionnaires (name, type, engine, rows, data_length).
+    """
+    sql = ("SELECT TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_ROWS, DATA_LENGTH "
+           "FROM information_schema.TABLES "
+           f"WHERE TABLE_SCHEMA = {quote_string(db_name)} ORDER BY TABLE_NAME")
+    tables = []
+    for name, table_type, engine, table_rows, data_length in run_query(mysql_exe_path, conn_args, sql):
+        tables.append({
+            "name": name,
+            "type": table_type,
+            "engine": engine,
+            "rows": int(table_rows or 0),
+            "data_length": int(data_length or 0)
+        })
+    return tables
+
+
+def plan_workers(tables, workers):
+    """
+    Répartit les tables entre les workers, les plus volumineuses d'abord,
+    en donnant toujours la table suivante au worker le moins chargé.
+    """
+    groups = [[] for _ in range(max(1, min(workers, len(tables))))]
+    loads = [0] * len(groups)
+    for table in sorted(tables, key=lambda t: t["data_length"], reverse=True):
+        index = loads.index(min(loads))
+        groups[index].append(table)
+        loads[index] += table["data_length"]
+    return [group for group in groups if group]
+
+
+def table_file_name(table_name, used_names):
+    """Construit un nom de fichier sûr (et unique, sans tenir compte de la casse) pour une table."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", table_name) or "table"
+    candidate = safe_name
+    suffix = 1
+    while candidate.lower() in used_names:
+        suffix += 1
+        candidate = f"{safe_name}_{suffix}"
+    used_names.add(candidate.lower())
+    return candidate
+
+
+class TableSplitter:
+    """
+    Writer qui découpe la sortie d'un mysqldump multi-tables en un flux par table.
+
+    L'en-tête du dump (jeu de caractères, désactivation des contrôles de clés, etc.)
+    est recopié au début de chaque fichier de table, qui reste ainsi chargeable seul.
+    """
+
+    def __init__(self, open_table_writer, on_table_start=None, on_table_end=None):
+        self.open_table_writer = open_table_writer
+        self.on_table_start = on_table_start
+        self.on_table_end = on_table_end
+        self.header = bytearray()
+        self.pending = bytearray()
+        self.current = None
+        self.current_name = None
+
+    def write(self, data):
+        self.pending += data
+        end = self.pending.rfind(b"\n") + 1
+        # Un "--" en fin de bloc peut être la première ligne d'un marqueur coupé entre deux lectures
+        if end >= 3 and self.pending[end - 3:end] == b"--\n" and (end == 3 or self.pending[end - 4] == 0x0A):
+            end -= 3
+        if end == 0:
+            return len(data)
+        block = bytes(self.pending[:end])
+        del self.pending[:end]
+        self._process(block)
+        return len(data)
+
+    def _process(self, block):
+        position = 0
+        for match in TABLE_MARKER.finditer(block):
+            self._emit(block[position:match.start()])
+            self._start_table(match.group(1).replace(b"``", b"`").decode("utf-8", errors="replace"))
+            position = match.start()
+        self._emit(block[position:])
+
+    def _emit(self, data):
+        if not data:
+            return
+        if self.current is None:
+            self.header += data
+        else:
+            self.current.write(data)
+
+    def _start_table(self, table_name):
+        self._end_table()
+        self.current = self.open_table_writer(table_name)
+        self.current_name = table_name
+        self.current.write(bytes(self.header))
+        if self.on_table_start:
+            self.on_table_start(table_name)
+
+    def _end_table(self):
+        if self.current is None:
+            return
+        self.current.close()
+        self.current = None
+        if self.on_table_end:
+            self.on_table_end(self.current_name)
+
+    def close(self):
+        if self.pending:
+            self._process(bytes(self.pending))
+            self.pending.clear()
+        self._end_table()
+
+
+class ReadySignalWriter:
+    """
+    Writer transparent qui appelle on_ready dès qu'une section de table apparaît
+    dans le flux (la transaction de mysqldump est alors ouverte).
+    """
+
+    MARKERS = (b"-- Table structure for table `", b"-- Dumping data for table `")
+
+    def __init__(self, writer, on_ready):
+        self.writer = writer
+        self.on_ready = on_ready
+        self.tail = b""
+
+    def write(self, data):
+        if self.on_ready is not None:
+            # On garde la fin du bloc précédent pour détecter un marqueur coupé en deux
+            window = self.tail + bytes(data)
+            if any(marker in window for marker in self.MARKERS):
+                self.on_ready()
+                self.on_ready = None
+            self.tail = window[-64:]
+        return self.writer.write(data)
+
+    def close(self):
+        self.writer.close()
+
+
+def list_integer_primary_keys(mysql_exe_path, conn_args, db_name):
+    """
+    Retourne {table: colonne} pour les tables dont la clé primaire porte sur
+    une seule colonne de type entier (les seules découpées en plages).
+    """
+    sql = ("SELECT k.TABLE_NAME, k.COLUMN_NAME, c.DATA_TYPE "
+           "FROM information_schema.KEY_COLUMN_USAGE k "
+           "JOIN information_schema.COLUMNS c ON c.TABLE_SCHEMA = k.TABLE_SCHEMA "
+           "AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME "
+           f"WHERE k.TABLE_SCHEMA = {quote_string(db_name)} AND k.CONSTRAINT_NAME = 'PRIMARY' "
+           "ORDER BY k.TABLE_NAME, k.ORDINAL_POSITION")
+    columns = {}
+    for table_name, column_name, data_type in run_query(mysql_exe_path, conn_args, sql):
+        columns.setdefault(table_name, []).append((column_name, (data_type or "").lower()))
+    return {table_name: key[0][0] for table_name, key in columns.items()
+            if len(key) == 1 and key[0][1] in INTEGER_TYPES}
+
+
+def split_key_range(min_value, max_value, count):
+    """
+    Découpe l'intervalle [min_value, max_value] en count plages de largeur égale.
+    La première et la dernière plage sont ouvertes (None) : elles couvrent aussi les
+    lignes insérées hors de l'intervalle entre la planification et l'instantané.
+    """
+    count = max(1, min(count, max_value - min_value + 1)) # Pas de plage vide : au plus une par clé
+    step = (max_value - min_value + 1) / count
+    bounds = sorted({min_value + round(step * i) for i in range(1, count)})
+    lowers = [None] + bounds
+    uppers = bounds + [None]
+    return list(zip(lowers, uppers))
+
+
+def range_where_clause(column, lower, upper):
+    """Construit la clause --where d'une plage [lower, upper[ sur la colonne de clé."""
+    conditions = []
+    if lower is not None:
+        conditions.append(f"{quote_identifier(column)} >= {lower}")
+    if upper is not None:
+        conditions.append(f"{quote_identifier(column)} < {upper}")
+    return " AND ".join(conditions) or "1=1"
+
+
+def limit_chunk_counts(counts, sizes, workers, other_tables):
+    """
+    Réduit le nombre de plages voulu par table ({table: nombre}) pour que le dump ne lance
+    jamais plus de workers processus : un worker est réservé aux tables non découpées
+    (other_tables, ou celles qui ne peuvent plus l'être), chaque table découpée garde au
+    moins deux plages et les plus petites cessent d'être découpées si le budget ne suffit pas.
+    Le budget est partagé au prorata de sizes ({table: DATA_LENGTH}). Retourne {table: nombre}.
+    """
+    split = sorted(counts, key=lambda name: sizes[name], reverse=True)
+    while split:
+        budget = workers - (1 if other_tables or len(split) < len(counts) else 0)
+        if 2 * len(split) <= budget:
+            break
+        split.pop() # La plus petite table est exportée entière
+    if not split:
+        return {}
+    if sum(counts[name] for name in split) <= budget:
+        return {name: counts[name] for name in split}
+    total = sum(sizes[name] for name in split) or 1
+    limited = {name: min(counts[name], max(2, budget * sizes[name] // total)) for name in split}
+    while sum(limited.values()) > budget:
+        name = max((name for name in split if limited[name] > 2), key=lambda name: limited[name])
+        limited[name] -= 1
+    return limited
+
+
+def plan_jobs(mysql_exe_path, conn_args, db_name, tables, workers, chunk_bytes=None):
+    """
+    Prépare les travaux du dump parallèle : plages de clé des grosses tables InnoDB à clé entière
+    (limit_chunk_counts) et groupes des autres tables pour les workers restants.
+    Retourne ({table: (colonne, plages)}, [groupes de tables]).
+    """
+    total_bytes = sum(table["data_length"] for table in tables)
+    target_bytes = chunk_bytes or max(MIN_CHUNK_BYTES, total_bytes // max(1, workers))
+    candidates = [table for table in tables
+                  if (table["engine"] or "").lower() == "innodb" and table["data_length"] > target_bytes]
+
+    # Un seul processus : rien à découper
+    keys = {}
+    if candidates and workers >= 2:
+        primary_keys = list_integer_primary_keys(mysql_exe_path, conn_args, db_name)
+        for table in candidates:
+            column = primary_keys.get(table["name"])
+            if not column:
+                continue
+            sql = (f"SELECT MIN({quote_identifier(column)}), MAX({quote_identifier(column)}) "
+                   f"FROM {quote_identifier(db_name)}.{quote_identifier(table['name'])}")
+            min_value, max_value = run_query(mysql_exe_path, conn_args, sql)[0]
+            if min_value is None or max_value is None:
+                continue
+            count = min(-(-table["data_length"] // target_bytes), int(max_value) - int(min_value) + 1)
+            if count >= 2:
+                keys[table["name"]] = (column, int(min_value), int(max_value), count)
+
+    sizes = {table["name"]: table["data_length"] for table in tables}
+    counts = limit_chunk_counts({name: key[3] for name, key in keys.items()}, sizes, workers,
+                                any(table["name"] not in keys for table in tables))
+    chunk_plan = {name: (keys[name][0], split_key_range(keys[name][1], keys[name][2], count))
+                  for name, count in counts.items()}
+    remaining = [table for table in tables if table["name"] not in chunk_plan]
+    chunk_jobs = sum(len(ranges) for _, ranges in chunk_plan.values())
+    groups = plan_workers(remaining, max(1, workers - chunk_jobs)) if remaining else []
+    return chunk_plan, groups
+
+
+def dump_parallel(mysqldump_exe_path, mysql_exe_path, conn_args, db_name, output_dir, workers, progress=None,
+                  chunk_bytes=None, compression=DEFAULT_COMPRESSION, level=None, threads=None,
+                  tables=None, reuse=None, fingerprints=None, manifest_extra=None, tracker=None, checkpoint=None):
+    """
+    Exporte une base table par table avec au plus workers processus mysqldump à la fois, tous
+    sur le même instantané (SnapshotLock) ; les grosses tables sont découpées en plages de clé.
+    reuse (incrémental) reprend les fichiers de tables inchangées, checkpoint note chaque fichier
+    terminé pour la reprise. Retourne le manifeste ; lève DumpError en cas d'échec.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    extension = archive_extension(compression)
+    reuse = reuse or {}
+    fingerprints = fingerprints or {}
+    if tables is None:
+        report(f"Lecture de la liste des tables de '{db_name}'...")
+        tables = list_tables(mysql_exe_path, conn_args, db_name)
+    base_tables = [table for table in tables if table["type"] == "BASE TABLE"]
+    views = [table for table in tables if table["type"] == "VIEW"]
+    dumped_tables = [table for table in base_tables if table["name"] not in reuse]
+
+    # Une reprise garde les noms de fichiers et le découpage de la première tentative
+    if checkpoint and checkpoint.chunk_plan is not None:
+        dumped_names = {table["name"] for table in dumped_tables}
+        chunk_plan = {name: plan for name, plan in checkpoint.chunk_plan.items() if name in dumped_names}
+    else:
+        chunk_plan, _ = plan_jobs(mysql_exe_path, conn_args, db_name, dumped_tables, workers, chunk_bytes) if dumped_tables else ({}, [])
+    table_files = dict(checkpoint.table_files) if checkpoint else {}
+    used_names = {os.path.basename(path).lower() for path in table_files.values()}
+    for table in dumped_tables:
+        if table["name"] not in table_files:
+            table_files[table["name"]] = "tables/" + table_file_name(table["name"], used_names)
+
+    def is_done(relative_path):
+        return checkpoint is not None and checkpoint.is_done(relative_path + extension)
+
+    chunk_jobs = []
+    for table_name, (column, ranges) in chunk_plan.items():
+        for index, (lower, upper) in enumerate(ranges):
+            chunk_jobs.append({
+                "table": table_name,
+                "index": index,
+                "where": range_where_clause(column, lower, upper),
+                "file": f"{table_files[table_name]}.part{index:04d}"
+            })
+    pending_chunk_jobs = [job for job in chunk_jobs if not is_done(job["file"])]
+    pending_tables = [table for table in dumped_tables
+                      if table["name"] not in chunk_plan and not is_done(table_files[table["name"]])]
+    groups = plan_workers(pending_tables, max(1, workers - len(pending_chunk_jobs))) if pending_tables else []
+    jobs = [{"tables": group} for group in groups] + pending_chunk_jobs
+    total_parts = len(pending_tables) + len(pending_chunk_jobs)
+    if checkpoint and checkpoint.resumed:
+        report(f"Reprise de '{db_name}' : {total_parts} tables ou morceaux restant à exporter.")
+
+    os.makedirs(os.path.join(output_dir, "tables"), exist_ok=checkpoint is not None)
+    if checkpoint:
+        checkpoint.start(table_files, chunk_plan)
+
+    results = [None] * len(jobs)
+    ready = [threading.Event() for _ in jobs]
+    done_lock = threading.Lock()
+    done_parts = []
+    # Empreintes des fichiers écrits (taille et SHA-256 du fichier et du SQL), calculées au fil de l'écriture
+    archive_writers = {}
+    file_integrity = dict(checkpoint.parts) if checkpoint else {}
+
+    def open_file_writer(relative_path):
+        # relative_path est le chemin du fichier sans extension, relatif à output_dir
+        writer = open_archive_writer(os.path.join(output_dir, relative_path + extension),
+                                     os.path.basename(relative_path) + ".sql", compression, level, threads)
+        with done_lock:
+            archive_writers[relative_path + extension] = writer
+        return writer
+
+    def record_file(path):
+        # Appelé une fois le fichier fermé
+        with done_lock:
+            file_integrity[path] = archive_writers[path].integrity()
+        if checkpoint:
+            checkpoint.record(path, file_integrity[path])
+
+    def dump_file(command, relative_path):
+        if is_done(relative_path):
+            return 0, ""
+        returncode, stderr_output, integrity = dump_to_archive(
+            command, os.path.join(output_dir, relative_path + extension), os.path.basename(relative_path) + ".sql",
+            compression, level, threads, tracker)
+        if returncode == 0:
+            file_integrity[relative_path + extension] = integrity
+            if checkpoint:
+                checkpoint.record(relative_path + extension, integrity)
+        return returncode, stderr_output
+
+    def open_table_writer(table_name):
+        if table_name not in table_files:
+            table_files[table_name] = "tables/" + table_file_name(table_name, used_names)
+        return open_file_writer(table_files[table_name])
+
+    def part_done(part_name):
+        with done_lock:
+            done_parts.append(part_name)
+            report(f"Dump parallèle de '{db_name}' : {len(done_parts)}/{total_parts} tables ou morceaux exportés...")
+
+    def record_tables(table_names):
+        for table_name in table_names:
+            record_file(table_files[table_name] + extension)
+        table_names.clear()
+
+    def run_job(index, job):
+        # Tables dont le fichier est fermé : complètes dès que mysqldump passe à la table suivante,
+        # la dernière seulement si mysqldump se termine sans erreur
+        ended_tables = []
+
+        def table_start(table_name):
+            # Dès la première section de table, la transaction du processus est ouverte : il peut libérer la barrière
+            ready[index].set()
+            record_tables(ended_tables)
+
+        def table_end(table_name):
+            ended_tables.append(table_name)
+            part_done(table_name)
+
+        if "tables" in job:
+            command = build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, WORKER_OPTIONS,
+                                              tables=[table["name"] for table in job["tables"]])
+            writer = TableSplitter(open_table_writer, on_table_start=table_start, on_table_end=table_end)
+        else:
+            extra_args = CHUNK_OPTIONS + [f"--where={job['where']}"]
+            if job["index"] > 0:
+                extra_args.append("--no-create-info") # Seul le premier morceau recrée la table
+            command = build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, extra_args, tables=[job["table"]])
+            writer = ReadySignalWriter(open_file_writer(job["file"]), ready[index].set)
+        writer = tracked_writer(writer, tracker)
+        try:
+            try:
+                results[index] = stream_dump(command, writer, tracker.cancellation if tracker else None)
+            finally:
+                writer.close()
+            if results[index][0] == 0:
+                record_tables(ended_tables)
+                if "table" in job:
+                    record_file(job["file"] + extension)
+            if "table" in job:
+                part_done(f"{job['table']} #{job['index']}")
+        except Exception as e:
+            results[index] = (None, str(e))
+        finally:
+            ready[index].set()
+
+    try:
+        # plan_jobs ne prévoit jamais plus de workers processus ; une reprise avec moins de workers
+        # que la première tentative exporte ses morceaux restants en plusieurs vagues
+        waves = [range(start, min(start + workers, len(jobs))) for start in range(0, len(jobs), max(1, workers))]
+        for wave in waves:
+            if len(waves) > 1:
+                report(f"Démarrage de {len(wave)} processus mysqldump sur un instantané cohérent "
+                       f"(vague {wave.start // workers + 1}/{len(waves)})...")
+            else:
+                report(f"Démarrage de {len(wave)} processus mysqldump sur un instantané cohérent...")
+            job_threads = [threading.Thread(target=run_job, args=(index, jobs[index])) for index in wave]
+            with SnapshotLock(mysql_exe_path, conn_args):
+                for thread in job_threads:
+                    thread.start()
+                for index in wave:
+                    ready[index].wait()
+            for thread in job_threads:
+                thread.join()
+            if any(results[index][0] != 0 for index in wave):
+                break
+            if tracker and tracker.cancellation:
+                tracker.cancellation.check()
+        if tracker and tracker.cancellation:
+            tracker.cancellation.check()
+
+        errors = []
+        for returncode, stderr_output in filter(None, results):
+            if returncode != 0:
+                errors.append(stderr_output.strip() or f"Code de retour : {returncode}")
+
+        # Triggers, routines, événements et vues sont exportés après la libération de l'instantané :
+        # le DDL n'est pas transactionnel dans MySQL, une transaction ouverte plus tôt lirait de toute
+        # façon le dictionnaire courant. Une modification de schéma pendant le dump n'y est donc pas figée.
+        if not errors and chunk_plan:
+            # Les triggers des tables découpées sont recréés après le chargement de tous les morceaux
+            report("Export des triggers des tables découpées...")
+            for table_name in chunk_plan:
+                command = build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, TRIGGER_OPTIONS, tables=[table_name])
+                returncode, stderr_output = dump_file(command, table_files[table_name] + ".triggers")
+                if returncode != 0:
+                    errors.append(stderr_output.strip() or f"Code de retour : {returncode}")
+
+        if not errors:
+            report("Export du schéma (routines, événements)...")
+            command = build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, SCHEMA_OPTIONS)
+            returncode, stderr_output = dump_file(command, "schema")
+            if returncode != 0:
+                errors.append(stderr_output.strip() or f"Code de retour : {returncode}")
+
+        if not errors and views:
+            report("Export des vues...")
+            command = build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, VIEW_OPTIONS,
+                                              tables=[view["name"] for view in views])
+            returncode, stderr_output = dump_file(command, "views")
+            if returncode != 0:
+                errors.append(stderr_output.strip() or f"Code de retour : {returncode}")
+
+        if errors:
+            if checkpoint:
+                errors.append("Les fichiers terminés sont conservés : relancez la sauvegarde avec la reprise (--resume) "
+                              "pour n'exporter que les parties manquantes.")
+            raise DumpError("Une erreur s'est produite lors du dump parallèle :\n" + "\n".join(errors))
+
+        manifest_tables = []
+        for table in base_tables:
+            if table["name"] in reuse:
+                manifest_tables.append(reuse[table["name"]])
+                continue
+            entry = {"name": table["name"], "rows": table["rows"], "data_length": table["data_length"]}
+            if table["name"] in fingerprints:
+                entry["fingerprint"] = fingerprints[table["name"]]
+            if table["name"] in chunk_plan:
+                entry["chunks"] = [{"file": job["file"] + extension, "where": job["where"]}
+                                   for job in chunk_jobs if job["table"] == table["name"]]
+                entry["triggers"] = table_files[table["name"]] + ".triggers" + extension
+            else:
+                entry["file"] = table_files[table["name"]] + extension
+            manifest_tables.append(entry)
+
+        manifest = {
+            "format": "mysqldumper-parallel",
+            "version": 1,
+            "database": db_name,
+            "workers": min(len(jobs), workers),
+            "compression": compression,
+            "schema": "schema" + extension,
+            "views": "views" + extension if views else None,
+            "tables": manifest_tables,
+            "files": {path: file_integrity[path] for path in sorted(file_integrity)}
+        }
+        if checkpoint and checkpoint.resumed:
+            # Les parties de chaque tentative viennent d'instantanés différents
+            manifest["attempts"] = checkpoint.attempts
+        manifest.update(manifest_extra or {})
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        if checkpoint:
+            checkpoint.remove()
+        return manifest
+    except BaseException:
+        if checkpoint is None:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        raise
@@ -0,0 +1,383 @@
+import collections
+import hashlib
+import io
+import re
+import subprocess
+import threading
+
+# --- Taille des blocs lus sur la sortie de mysqldump ---
+# Les lectures se font par blocs de taille fixe : la mémoire utilisée par le
+# pipeline reste bornée quelle que soit la taille de la base.
+CHUNK_SIZE = 1024 * 1024  # 1 Mio
+TEE_BUFFER_SIZE = 64 * 1024 * 1024  # Données en attente au plus par sortie d'un TeeWriter
+
+# --- Options mysqldump utilisées par défaut ---
+DEFAULT_DUMP_OPTIONS = [
+    "--single-transaction",
+    "--routines",
+    "--triggers",
+    "--events",
+    "--add-drop-database",
+    "--add-drop-table",
+    "--default-character-set=utf8mb4",
+    "--set-gtid-purged=OFF"
+]
+
+
+# --- Marqueurs des sections dans la sortie de mysqldump ---
+# Début de la section d'une table
+TABLE_MARKER = re.compile(rb"^--\n-- Table structure for table `((?:[^`]|``)+)`", re.M)
+# Début d'une section chargeable indépendamment : table ou structure temporaire de vue
+SECTION_MARKER = re.compile(
+    rb"^--\n-- (?:Table structure for table|Temporary (?:view|table) structure for view) `((?:[^`]|``)+)`", re.M)
+# Début de la partie finale (vues définitives, routines, événements), qui dépend de toutes les tables
+TAIL_MARKER = re.compile(
+    rb"^--\n-- (?:Final view structure for view|Dumping events for database|Dumping routines for database) ", re.M)
+# Dernière ligne écrite par mysqldump quand l'export est allé jusqu'au bout
+DUMP_TRAILER = re.compile(rb"(?:^|\n)-- Dump completed[^\n]*\n*$")
+TRAILER_WINDOW = 256  # Fin du flux conservée pour y chercher DUMP_TRAILER
+
+
+class DumpError(RuntimeError):
+    """Erreur levée lorsqu'une étape du pipeline de sauvegarde échoue."""
+
+
+class DumpCancelled(DumpError):
+    """Erreur levée lorsqu'une sauvegarde est annulée."""
+
+
+class Cancellation:
+    """
+    Demande d'annulation partagée par tous les processus d'une sauvegarde (ou d'un batch).
+    cancel() tue les processus mysqldump en cours ; ceux démarrés ensuite sont tués aussitôt.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.cancelled = False
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            processes = list(self.processes)
+        for process in processes:
+            process.kill()
+
+    def register(self, process):
+        with self.lock:
+            self.processes.add(process)
+            if not self.cancelled:
+                return
+        process.kill()
+
+    def unregister(self, process):
+        with self.lock:
+            self.processes.discard(process)
+
+    def check(self):
+        """Lève DumpCancelled si l'annulation a été demandée."""
+        if self.cancelled:
+            raise DumpCancelled("Sauvegarde annulée.")
+
+
+class HashingFile:
+    """
+    Fichier ouvert en écriture qui calcule au passage la taille et le SHA-256 des octets
+    écrits, sans relecture. Il n'est pas positionnable : zipfile écrit alors la taille et
+    le CRC d'un membre après ses données au lieu de revenir sur son en-tête, si bien que
+    l'empreinte calculée est bien celle du fichier final.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def tell(self):
+        return self.size
+
+    def seekable(self):
+        return False
+
+    def seek(self, offset, whence=0):
+        raise io.UnsupportedOperation("seek")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+
+class HashingReader:
+    """
+    Fichier ouvert en lecture qui calcule le SHA-256 du fichier d'après les octets lus par
+    son utilisateur (un décompresseur), dans l'ordre du fichier : une lecture en arrière ou
+    au-delà de la partie déjà parcourue n'est pas comptée. finish() lit seulement le reste
+    (le répertoire central d'un zip, par exemple) et retourne l'empreinte.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.digest = hashlib.sha256()
+        self.size = 0  # Octets parcourus depuis le début du fichier
+
+    def _hash(self, position, data):
+        if position <= self.size < position + len(data):
+            self.digest.update(memoryview(data)[self.size - position:])
+            self.size = position + len(data)
+
+    def read(self, size=-1):
+        position = self.file.tell()
+        data = self.file.read(size)
+        self._hash(position, data)
+        return data
+
+    def readinto(self, buffer):
+        position = self.file.tell()
+        count = self.file.readinto(buffer)
+        self._hash(position, memoryview(buffer)[:count])
+        return count
+
+    def tell(self):
+        return self.file.tell()
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=0):
+        return self.file.seek(offset, whence)
+
+    def readable(self):
+        return True
+
+    def finish(self):
+        """Parcourt la fin du fichier non encore lue ; retourne le SHA-256 (hexadécimal) du fichier."""
+        self.file.seek(self.size)
+        while self.read(CHUNK_SIZE):
+            pass
+        return self.digest.hexdigest()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class HashingWriter:
+    """
+    Writer transparent qui calcule la taille et le SHA-256 du flux qui le traverse, et
+    vérifie qu'il se termine par la dernière ligne de mysqldump ("-- Dump completed").
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.tail = b""
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        self.tail = (self.tail + bytes(data[-TRAILER_WINDOW:]))[-TRAILER_WINDOW:]
+        return self.writer.write(data)
+
+    @property
+    def completed(self):
+        return DUMP_TRAILER.search(self.tail) is not None
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NullWriter:
+    """Writer qui ignore les données (vérification d'une sauvegarde sans rien écrire)."""
+
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        pass
+
+
+class _TeeSink:
+    """Sortie d'un TeeWriter : un thread écrit dans writer les blocs mis en attente par put()."""
+
+    def __init__(self, writer, buffer_size):
+        self.writer = writer
+        self.buffer_size = buffer_size
+        self.condition = threading.Condition()
+        self.blocks = collections.deque()
+        self.buffered = 0
+        self.finished = False
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def put(self, data):
+        with self.condition:
+            # Un bloc plus gros que la file passe quand elle est vide : la sortie ne reste jamais bloquée
+            while self.buffered and self.buffered + len(data) > self.buffer_size and self.error is None:
+                self.condition.wait()
+            if self.error is not None:
+                raise self.error
+            self.blocks.append(data)
+            self.buffered += len(data)
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.blocks and not self.finished:
+                    self.condition.wait()
+                if not self.blocks:
+                    break
+                data = self.blocks.popleft()
+            try:
+                if self.error is None:
+                    self.writer.write(data)
+            except BaseException as e:
+                self.error = e
+            with self.condition:
+                self.buffered -= len(data)
+                self.condition.notify_all()
+        try:
+            self.writer.close() # Les sorties sont fermées (compresseurs vidés) en parallèle
+        except BaseException as e:
+            self.error = self.error or e
+
+    def finish(self):
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+        self.thread.join()
+
+
+class TeeWriter:
+    """
+    Writer qui recopie un flux vers plusieurs writers, chacun alimenté par son propre
+    thread : une sortie lente n'arrête pas les autres tant que sa file d'attente (au plus
+    buffer_size octets) n'est pas pleine ; au-delà, write attend qu'elle se vide, ce qui
+    ralentit la lecture de mysqldump. L'erreur d'une sortie est levée au write suivant ou à close().
+    """
+
+    def __init__(self, writers, buffer_size=TEE_BUFFER_SIZE):
+        self.sinks = [_TeeSink(writer, buffer_size) for writer in writers]
+
+    def write(self, data):
+        data = bytes(data) # Le bloc est partagé par les threads : il ne doit plus changer
+        for sink in self.sinks:
+            sink.put(data)
+        return len(data)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.finish()
+        for sink in self.sinks:
+            if sink.error is not None:
+                raise sink.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def connection_args(db_host, db_user, db_password, db_port=None):
+    """Construit les arguments de connexion communs à mysqldump et au client mysql."""
+    args = [f"-h{db_host}", f"-u{db_user}"]
+    if db_port: # Ajouter le port si renseigné
+        args.append(f"-P{db_port}")
+    # Sans mot de passe, le client utilise ses fichiers d'options (~/.my.cnf) au lieu d'en demander un :
+    # indispensable pour les exécutions sans terminal (cron, démon)
+    if db_password:
+        args.append(f"-p{db_password}") # Mot de passe directement dans la commande (non sauvegardé)
+    return args
+
+
+def build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, extra_args=None, tables=None):
+    """
+    Construit la commande mysqldump complète pour une base de données.
+    Si tables est renseigné, seules ces tables (ou vues) sont exportées.
+    """
+    command = [mysqldump_exe_path] + list(conn_args) + [db_name] + list(tables or []) + DEFAULT_DUMP_OPTIONS
+    if extra_args:
+        command.extend(extra_args)
+    return command
+
+
+def pump(source, writer, chunk_size=CHUNK_SIZE):
+    """
+    Copie un flux binaire vers un objet writer, bloc par bloc.
+    Retourne le nombre d'octets copiés.
+    """
+    total = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        writer.write(chunk)
+        total += len(chunk)
+    return total
+
+
+def stream_dump(command, writer, cancellation=None):
+    """
+    Exécute mysqldump et envoie sa sortie standard, en octets bruts, vers writer.
+    La sortie d'erreur est lue dans un thread séparé pour éviter tout blocage.
+    Avec cancellation (Cancellation), le processus peut être tué à tout moment :
+    DumpCancelled est alors levée. command peut aussi être un dump du moteur intégré
+    (dump_native.NativeDump), qui écrit lui-même dans writer, sans processus.
+    Retourne le tuple (code de retour, message d'erreur de mysqldump).
+    """
+    if cancellation:
+        cancellation.check()
+    if hasattr(command, "stream"):
+        return command.stream(writer, cancellation)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    if cancellation:
+        cancellation.register(process)
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()))
+    stderr_thread.start()
+    try:
+        pump(process.stdout, writer)
+    except BaseException:
+        # Le writer a échoué (disque plein, etc.) : on arrête mysqldump proprement
+        process.kill()
+        raise
+    finally:
+        process.stdout.close()
+        process.wait()
+        stderr_thread.join()
+        if cancellation:
+            cancellation.unregister(process)
+    if cancellation:
+        cancellation.check()
+    stderr_output = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+    return process.returncode, stderr_output
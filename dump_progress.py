@@ -0,0 +1,216 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+from dump_pipeline import TABLE_MARKER
+from dump_throttle import ThrottleWriter
+from mysql_client import quote_string, run_query
+
+# --- Suivi d'une sauvegarde en cours ---
+PROGRESS_INTERVAL = 1.0  # Intervalle minimal entre deux messages de progression (secondes)
+RUN_RECORD_SUFFIX = ".run.json"  # Compte rendu d'exécution écrit à côté de la sauvegarde
+# Fin du bloc précédent conservée pour détecter un marqueur de table coupé entre deux lectures
+MARKER_WINDOW = 1024
+
+
+def estimate_dump_size(mysql_exe_path, conn_args, db_name):
+    """
+    Estime la taille du flux de mysqldump d'après information_schema (DATA_LENGTH :
+    les index ne sont pas exportés). Retourne None si la base ne renvoie aucune estimation.
+    """
+    sql = ("SELECT SUM(DATA_LENGTH) FROM information_schema.TABLES "
+           f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND TABLE_TYPE = 'BASE TABLE'")
+    rows = run_query(mysql_exe_path, conn_args, sql)
+    if not rows or rows[0][0] is None:
+        return None
+    return int(rows[0][0]) or None
+
+
+def format_size(size):
+    """Taille lisible (Ko, Mo, Go)."""
+    for unit in ("octets", "Ko", "Mo", "Go"):
+        if size < 1024 or unit == "Go":
+            return f"{size:.0f} {unit}" if unit == "octets" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    """Durée au format H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class PhaseTimer:
+    """Mesure la durée des phases d'une sauvegarde (connexion, dump, compression, fsync...)."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        return {name: round(seconds, 3) for name, seconds in self.phases.items()}
+
+
+class DumpProgress:
+    """
+    Compteurs d'une sauvegarde en cours (octets, instructions SQL, table courante),
+    partagés par tous les flux d'une même sauvegarde. report(message) est appelé au
+    plus une fois par interval secondes avec le débit et le temps restant estimé.
+    La demande d'annulation de la sauvegarde (cancellation), sa limite de débit
+    (throttle, dump_throttle.RateLimiter) et la réécriture de son SQL (rewrite,
+    dump_rewrite.SqlRewrite) voyagent avec ces compteurs.
+    """
+
+    def __init__(self, label, estimated_size=None, report=None, interval=PROGRESS_INTERVAL, cancellation=None,
+                 throttle=None, rewrite=None):
+        self.label = label
+        self.cancellation = cancellation  # Cancellation transmise à chaque processus mysqldump
+        self.throttle = throttle
+        self.rewrite = rewrite
+        self.estimated_size = estimated_size
+        self.report = report
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last_report = self.started
+        self.bytes = 0
+        self.statements = 0
+        self.table = None
+        self.compress_time = 0.0
+
+    def set_table(self, table_name):
+        with self.lock:
+            self.table = table_name
+
+    def add(self, size, statements, compress_time):
+        with self.lock:
+            self.bytes += size
+            self.statements += statements
+            self.compress_time += compress_time
+            now = time.time()
+            if self.report is None or now - self.last_report < self.interval:
+                return
+            self.last_report = now
+            message = self.message(now)
+        self.report(message)
+
+    def rate(self, now=None):
+        """Débit moyen depuis le début, en octets par seconde."""
+        elapsed = (now or time.time()) - self.started
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, now=None):
+        """Temps restant estimé en secondes, ou None si l'estimation de taille est dépassée ou absente."""
+        rate = self.rate(now)
+        if not self.estimated_size or not rate or self.bytes >= self.estimated_size:
+            return None
+        return (self.estimated_size - self.bytes) / rate
+
+    def message(self, now=None):
+        now = now or time.time()
+        text = f"Sauvegarde de '{self.label}' : {format_size(self.bytes)}"
+        if self.estimated_size:
+            text += f" / ~{format_size(self.estimated_size)}"
+        text += f" ({format_size(self.rate(now))}/s, {self.statements} instructions)"
+        if self.table:
+            text += f", table `{self.table}`"
+        eta = self.eta(now)
+        if eta is not None:
+            text += f", reste ~{format_duration(eta)}"
+        return text + "..."
+
+
+class ProgressWriter:
+    """
+    Writer transparent qui alimente un DumpProgress : octets et instructions SQL
+    (lignes terminées par ";") transmis, table en cours d'export, et temps passé
+    dans le writer suivant (compression et écriture).
+    """
+
+    def __init__(self, writer, progress):
+        self.writer = writer
+        self.progress = progress
+        self.tail = b""
+
+    def write(self, data):
+        data = bytes(data)
+        window = self.tail + data
+        statements = data.count(b";\n") + (1 if self.tail.endswith(b";") and data.startswith(b"\n") else 0)
+        # Seuls les marqueurs qui se terminent dans le nouveau bloc n'ont pas encore été vus
+        for match in TABLE_MARKER.finditer(window):
+            if match.end() > len(self.tail):
+                self.progress.set_table(match.group(1).replace(b"``", b"`").decode("utf-8", errors="replace"))
+        # La fenêtre conservée commence en début de ligne, pour que "^" du marqueur ne s'applique qu'à une vraie ligne
+        tail = window[-MARKER_WINDOW:]
+        self.tail = tail[tail.find(b"\n") + 1:] if len(window) > MARKER_WINDOW else window
+        started = time.perf_counter()
+        result = self.writer.write(data)
+        self.progress.add(len(data), statements, time.perf_counter() - started)
+        return result
+
+    def close(self):
+        started = time.perf_counter()
+        try:
+            self.writer.close()
+        finally:
+            self.progress.add(0, 0, time.perf_counter() - started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def tracked_writer(writer, tracker):
+    """
+    Étages communs à chaque flux d'une sauvegarde suivie par tracker (DumpProgress) :
+    réécriture du SQL si tracker.rewrite est défini, limitation de débit si tracker.throttle
+    l'est, puis comptage (ProgressWriter). La limitation est placée avant le comptage pour que
+    ses attentes ne soient pas comptées comme compression ; débit et volumes portent sur le SQL réécrit.
+    """
+    if tracker is None:
+        return writer
+    writer = ProgressWriter(writer, tracker)
+    if tracker.throttle:
+        writer = ThrottleWriter(writer, tracker.throttle, tracker.cancellation)
+    if tracker.rewrite:
+        writer = tracker.rewrite.wrap(writer)
+    return writer
+
+
+def fsync_path(path):
+    """Force l'écriture sur disque d'un fichier, ou des fichiers d'un dossier et du dossier lui-même."""
+    paths = [path]
+    if os.path.isdir(path):
+        paths = [os.path.join(folder, name) for folder, _, names in os.walk(path) for name in names] + [path]
+    for file_path in paths:
+        # Un dossier ne peut être synchronisé que sous Unix ; sous Windows, fsync exige un fichier ouvert en écriture
+        if os.path.isdir(file_path):
+            if os.name == "nt":
+                continue
+            fd = os.open(file_path, os.O_RDONLY)
+        else:
+            fd = os.open(file_path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def write_run_record(path, record):
+    """Écrit le compte rendu d'exécution (JSON) d'une sauvegarde."""
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
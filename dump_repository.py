@@ -0,0 +1,426 @@
+import argparse
+import collections
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from dump_compression import default_threads
+from dump_pipeline import DumpError, stream_dump
+from dump_progress import tracked_writer
+
+# --- Dépendance optionnelle (compression zstd des morceaux) ---
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # Windows : pas de verrou partagé, seules les sauvegardes en cours notées protègent leurs morceaux
+
+# --- Dépôt dédupliqué : chunks/ab/<sha256> (morceaux), snapshots/<nom>.json (index) ---
+# snapshots/<nom>.writing note une sauvegarde en cours ; lock est partagé par elles, exclusif pendant prune
+REPOSITORY_DIR = "repository"
+CHUNKS_DIR = "chunks"
+SNAPSHOTS_DIR = "snapshots"
+WRITING_SUFFIX = ".writing"
+LOCK_FILE = "lock"
+MTIME_RESOLUTION = 2  # Secondes : précision des dates de modification (FAT)
+
+# Une ligne par INSERT : la modification d'une ligne ne décale pas le découpage des suivantes
+# (avec les INSERT étendus, mysqldump regroupe les lignes par taille et tout le reste de la table changerait).
+REPOSITORY_DUMP_OPTIONS = ["--skip-extended-insert"]
+
+# --- Découpage en morceaux définis par le contenu ---
+# Une ligne termine un morceau si crc32(ligne) < longueur * CDC_THRESHOLD : la probabilité est
+# proportionnelle à la taille de la ligne, d'où des morceaux d'environ CDC_MIN_SIZE + CDC_AVG_SIZE
+# quelle que soit la largeur des lignes. Ces constantes ne doivent pas changer : la
+# déduplication entre sauvegardes repose sur un découpage identique.
+CDC_MIN_SIZE = 256 * 1024
+CDC_AVG_SIZE = 1024 * 1024
+CDC_MAX_SIZE = 4 * 1024 * 1024
+CDC_THRESHOLD = (1 << 32) // CDC_AVG_SIZE
+
+# Préfixe d'un morceau stocké : format de compression utilisé
+CHUNK_CODECS = {"zlib": b"z", "zstd": b"s", "none": b"n"}
+
+
+def repository_codec(compression):
+    """Format de compression des morceaux correspondant au format choisi pour les archives."""
+    if compression == "zstd" and zstandard is not None:
+        return "zstd"
+    if compression == "none":
+        return "none"
+    return "zlib"
+
+
+def _chunk_path(repository, chunk_hash):
+    return os.path.join(repository, CHUNKS_DIR, chunk_hash[:2], chunk_hash)
+
+
+def _store_chunk(repository, chunk_hash, data, codec, level):
+    """Compresse et écrit un morceau s'il n'est pas déjà présent. Retourne la taille écrite."""
+    path = _chunk_path(repository, chunk_hash)
+    try:
+        # Morceau réutilisé : sa date le protège de prune_repository tant que la sauvegarde est en cours
+        os.utime(path)
+        return 0
+    except FileNotFoundError:
+        pass
+    if codec == "zstd":
+        payload = zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    elif codec == "zlib":
+        payload = zlib.compress(data, 6 if level is None else level)
+    else:
+        payload = data
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Écriture atomique : un morceau présent est toujours complet
+    temp_path = f"{path}.{os.getpid()}.{id(data)}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(CHUNK_CODECS[codec])
+        f.write(payload)
+    os.replace(temp_path, path)
+    return len(payload) + 1
+
+
+def _load_chunk(repository, chunk_hash):
+    """Lit, décompresse et vérifie un morceau."""
+    try:
+        with open(_chunk_path(repository, chunk_hash), 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        raise DumpError(f"Morceau manquant dans le dépôt : {chunk_hash}")
+    codec, payload = raw[:1], raw[1:]
+    if codec == CHUNK_CODECS["zstd"]:
+        if zstandard is None:
+            raise DumpError("Ce dépôt contient des morceaux zstd : installez le module 'zstandard'.")
+        data = zstandard.ZstdDecompressor().decompress(payload)
+    elif codec == CHUNK_CODECS["zlib"]:
+        data = zlib.decompress(payload)
+    else:
+        data = payload
+    if hashlib.sha256(data).hexdigest() != chunk_hash:
+        raise DumpError(f"Morceau corrompu dans le dépôt : {chunk_hash}")
+    return data
+
+
+class RepositoryLock:
+    """
+    Verrou du dépôt (<dépôt>/lock, flock) : partagé par les sauvegardes en cours d'écriture,
+    exclusif pour prune_repository, qui échoue s'il ne peut pas l'obtenir aussitôt.
+    Sans fcntl (Windows), le verrou n'a pas d'effet.
+    """
+
+    def __init__(self, repository, exclusive=False):
+        self.file = None
+        if fcntl is None:
+            return
+        self.file = open(os.path.join(repository, LOCK_FILE), 'a')
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB if exclusive else fcntl.LOCK_SH)
+        except BlockingIOError:
+            self.release()
+            raise DumpError(f"Une sauvegarde est en cours d'écriture dans le dépôt '{repository}' : "
+                            f"relancez le nettoyage une fois qu'elle est terminée.")
+
+    @property
+    def effective(self):
+        return self.file is not None
+
+    def release(self):
+        if self.file is not None:
+            self.file.close() # Libère le verrou
+            self.file = None
+
+
+class RepositoryWriter:
+    """
+    Writer qui découpe un flux de dump en morceaux définis par le contenu et range dans le dépôt
+    ceux qui n'y sont pas encore. commit() écrit l'index de la sauvegarde, abort() l'abandonne ;
+    jusque-là, le verrou partagé du dépôt est tenu.
+    """
+
+    def __init__(self, repository, snapshot_name, database, compression="zip", level=None, threads=None):
+        self.repository = repository
+        self.snapshot_name = snapshot_name
+        self.database = database
+        self.codec = repository_codec(compression)
+        self.level = level
+        self.threads = threads or default_threads()
+        os.makedirs(os.path.join(repository, CHUNKS_DIR), exist_ok=True)
+        os.makedirs(os.path.join(repository, SNAPSHOTS_DIR), exist_ok=True)
+        self.lock = RepositoryLock(repository)
+        self.writing_path = os.path.join(repository, SNAPSHOTS_DIR, f"{snapshot_name}{WRITING_SUFFIX}")
+        with open(self.writing_path, 'w') as f:
+            f.write(str(os.getpid()))
+        self.executor = ThreadPoolExecutor(max_workers=self.threads)
+        self.pending = collections.deque()
+        self.carry = b""
+        self.chunk = bytearray()
+        self.chunks = []
+        self.stream_hash = hashlib.sha256()
+        self.size = 0
+        self.stored_bytes = 0
+        self.new_chunks = 0
+
+    def write(self, data):
+        self.stream_hash.update(data)
+        self.size += len(data)
+        data = self.carry + bytes(data)
+        lines = data.split(b"\n")
+        self.carry = lines.pop()
+        if lines:
+            lengths = [len(line) + 1 for line in lines]
+            ends = list(itertools.accumulate(lengths))
+            # Seules les lignes candidates (rares) sont parcourues en Python
+            cuts = [index for index, (crc, length) in enumerate(zip(map(zlib.crc32, lines), lengths))
+                    if crc < length * CDC_THRESHOLD]
+            position = 0
+            for index in cuts:
+                end = ends[index]
+                if len(self.chunk) + end - position < CDC_MIN_SIZE:
+                    continue
+                self._append(data, position, end)
+                self._emit()
+                position = end
+            self._append(data, position, ends[-1])
+            data = self.carry
+        if len(self.carry) > CDC_MAX_SIZE:
+            # Ligne géante (BLOB) : découpage à taille fixe
+            self._append(self.carry, 0, len(self.carry))
+            self.carry = b""
+        return self.size
+
+    def _append(self, data, start, end):
+        while len(self.chunk) + end - start > CDC_MAX_SIZE:
+            take = CDC_MAX_SIZE - len(self.chunk)
+            self.chunk += data[start:start + take]
+            self._emit()
+            start += take
+        self.chunk += data[start:end]
+
+    def _emit(self):
+        if not self.chunk:
+            return
+        data = bytes(self.chunk)
+        self.chunk = bytearray()
+        chunk_hash = hashlib.sha256(data).hexdigest()
+        self.chunks.append((chunk_hash, len(data)))
+        self.pending.append(self.executor.submit(_store_chunk, self.repository, chunk_hash, data, self.codec, self.level))
+        while len(self.pending) > self.threads * 2:
+            self._collect()
+
+    def _collect(self):
+        written = self.pending.popleft().result()
+        if written:
+            self.stored_bytes += written
+            self.new_chunks += 1
+
+    def close(self):
+        """Termine le découpage et attend l'écriture de tous les morceaux."""
+        try:
+            self._append(self.carry, 0, len(self.carry))
+            self.carry = b""
+            self._emit()
+            while self.pending:
+                self._collect()
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def commit(self):
+        """Écrit l'index de la sauvegarde et le retourne."""
+        self.close()
+        index = {
+            "snapshot": self.snapshot_name,
+            "database": self.database,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "size": self.size,
+            "sha256": self.stream_hash.hexdigest(),
+            "chunk_count": len(self.chunks),
+            "new_chunks": self.new_chunks,
+            "stored_bytes": self.stored_bytes,
+            "chunks": self.chunks
+        }
+        index_path = os.path.join(self.repository, SNAPSHOTS_DIR, f"{self.snapshot_name}.json")
+        with open(index_path + ".tmp", 'w') as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+        self._finish()
+        index["path"] = index_path
+        return index
+
+    def abort(self):
+        """Abandonne la sauvegarde sans écrire d'index."""
+        try:
+            self.close()
+        except Exception:
+            pass
+        self._finish()
+
+    def _finish(self):
+        if os.path.exists(self.writing_path):
+            os.remove(self.writing_path)
+        self.lock.release()
+
+
+def dump_to_repository(command, repository, snapshot_name, database, compression="zip", level=None, threads=None,
+                       tracker=None):
+    """
+    Exécute mysqldump et range sa sortie dans le dépôt dédupliqué.
+    Le flux est compté dans tracker (DumpProgress) s'il est fourni.
+    Retourne le tuple (code de retour, message d'erreur de mysqldump, index ou None).
+    """
+    writer = RepositoryWriter(repository, snapshot_name, database, compression, level, threads)
+    try:
+        returncode, stderr_output = stream_dump(command, tracked_writer(writer, tracker),
+                                                tracker.cancellation if tracker else None)
+    except BaseException:
+        writer.abort()
+        raise
+    if returncode != 0:
+        writer.abort()
+        return returncode, stderr_output, None
+    return returncode, stderr_output, writer.commit()
+
+
+def load_snapshot(repository, snapshot_name):
+    """Charge l'index d'une sauvegarde du dépôt."""
+    index_path = os.path.join(repository, SNAPSHOTS_DIR, f"{snapshot_name}.json")
+    try:
+        with open(index_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise DumpError(f"Sauvegarde introuvable dans le dépôt : {snapshot_name}")
+
+
+def list_snapshots(repository):
+    """Liste les index des sauvegardes du dépôt, de la plus ancienne à la plus récente."""
+    snapshots_dir = os.path.join(repository, SNAPSHOTS_DIR)
+    if not os.path.isdir(snapshots_dir):
+        return []
+    names = sorted(name[:-len(".json")] for name in os.listdir(snapshots_dir) if name.endswith(".json"))
+    return [load_snapshot(repository, name) for name in names]
+
+
+def restore_snapshot(repository, snapshot_name, writer, threads=None):
+    """
+    Reconstitue le flux SQL d'une sauvegarde dans writer. Les morceaux sont lus,
+    décompressés et vérifiés en parallèle, puis écrits dans l'ordre ; le nombre de
+    morceaux en mémoire reste borné. Retourne le nombre d'octets écrits.
+    """
+    index = load_snapshot(repository, snapshot_name)
+    threads = threads or default_threads()
+    stream_hash = hashlib.sha256()
+    size = 0
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for chunk_hash, _ in index["chunks"]:
+            pending.append(executor.submit(_load_chunk, repository, chunk_hash))
+            while len(pending) > threads * 2:
+                data = pending.popleft().result()
+                stream_hash.update(data)
+                writer.write(data)
+                size += len(data)
+        while pending:
+            data = pending.popleft().result()
+            stream_hash.update(data)
+            writer.write(data)
+            size += len(data)
+    if stream_hash.hexdigest() != index["sha256"]:
+        raise DumpError(f"Le flux reconstitué de '{snapshot_name}' ne correspond pas à l'empreinte enregistrée.")
+    return size
+
+
+def _writing_since(repository, lock):
+    """
+    Date à partir de laquelle les morceaux sont conservés : début de la plus ancienne sauvegarde
+    notée en cours d'écriture, sinon celui du nettoyage. Avec le verrou exclusif, aucune ne l'est
+    réellement (None) : les notes laissées par un arrêt brutal sont supprimées.
+    """
+    snapshots_dir = os.path.join(repository, SNAPSHOTS_DIR)
+    started = [] if lock.effective else [time.time()]
+    if not os.path.isdir(snapshots_dir):
+        return min(started, default=None)
+    for name in os.listdir(snapshots_dir):
+        if name.endswith(WRITING_SUFFIX):
+            path = os.path.join(snapshots_dir, name)
+            if lock.effective:
+                os.remove(path)
+            else:
+                started.append(os.path.getmtime(path))
+    return min(started, default=None)
+
+
+def prune_repository(repository):
+    """
+    Supprime les morceaux qui ne sont référencés par aucune sauvegarde (sauvegardes
+    supprimées ou interrompues). Échoue (DumpError) si une sauvegarde est en cours d'écriture
+    dans le dépôt ; sans verrou (Windows), les morceaux écrits ou réutilisés depuis le début
+    de la plus ancienne sauvegarde en cours (ou du nettoyage) sont conservés.
+    Retourne le tuple (morceaux supprimés, octets libérés).
+    """
+    if not os.path.isdir(repository):
+        raise DumpError(f"Dépôt introuvable : {repository}")
+    lock = RepositoryLock(repository, exclusive=True)
+    try:
+        since = _writing_since(repository, lock)
+        referenced = set()
+        for index in list_snapshots(repository):
+            referenced.update(chunk_hash for chunk_hash, _ in index["chunks"])
+        removed = 0
+        freed = 0
+        chunks_dir = os.path.join(repository, CHUNKS_DIR)
+        for folder, _, names in os.walk(chunks_dir):
+            for name in names:
+                if name in referenced:
+                    continue
+                path = os.path.join(folder, name)
+                stat = os.stat(path)
+                if since is not None and stat.st_mtime >= since - MTIME_RESOLUTION:
+                    continue
+                os.remove(path)
+                freed += stat.st_size
+                removed += 1
+        return removed, freed
+    finally:
+        lock.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestion d'un dépôt de sauvegardes dédupliqué.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="Liste les sauvegardes du dépôt")
+    list_parser.add_argument("repository")
+    restore_parser = subparsers.add_parser("restore", help="Reconstitue le flux SQL d'une sauvegarde")
+    restore_parser.add_argument("repository")
+    restore_parser.add_argument("snapshot")
+    restore_parser.add_argument("-o", "--output", help="Fichier .sql de sortie (défaut : sortie standard)")
+    prune_parser = subparsers.add_parser("prune", help="Supprime les morceaux non référencés "
+                                         "(refusé pendant l'écriture d'une sauvegarde dans le dépôt)")
+    prune_parser.add_argument("repository")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "list":
+            for index in list_snapshots(args.repository):
+                print(f"{index['snapshot']}\t{index['created']}\t{index['size']} octets\t"
+                      f"{index['new_chunks']}/{index['chunk_count']} nouveaux morceaux")
+        elif args.command == "restore":
+            if args.output:
+                with open(args.output, 'wb') as f:
+                    restore_snapshot(args.repository, args.snapshot, f)
+            else:
+                restore_snapshot(args.repository, args.snapshot, sys.stdout.buffer)
+        elif args.command == "prune":
+            removed, freed = prune_repository(args.repository)
+            print(f"{removed} morceaux supprimés, {freed} octets libérés.")
+    except DumpError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
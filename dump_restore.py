@@ -0,0 +1,702 @@
+import argparse
+import datetime
+import getpass
+import heapq
+import itertools
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from dump_compression import open_archive_reader
+from dump_parallel import MANIFEST_FILE, TableSplitter
+from dump_pipeline import SECTION_MARKER, TAIL_MARKER, DumpError, connection_args, pump
+from dump_progress import format_size
+from dump_repository import SNAPSHOTS_DIR, load_snapshot, restore_snapshot
+from dump_rewrite import SqlRewrite
+from dump_seekable import FrameReader, load_seekable_index, section_frames, section_size
+from dump_volumes import VOLUMES_FILE, load_volumes, read_volumes
+from mysql_client import find_mysql_client, quote_identifier, run_query
+
+# --- Réglages de chaque session de chargement ---
+# Contrôles d'unicité et de clés étrangères désactivés, transactions longues
+# (validées tous les COMMIT_BYTES octets, entre deux INSERT).
+BULK_SESSION_SQL = (b"SET SESSION foreign_key_checks = 0;\n"
+                    b"SET SESSION unique_checks = 0;\n"
+                    b"SET SESSION autocommit = 0;\n")
+# Optionnel : nécessite le privilège SUPER (ou SYSTEM_VARIABLES_ADMIN)
+NO_BINLOG_SQL = b"SET SESSION sql_log_bin = 0;\n"
+COMMIT_BYTES = 64 * 1024 * 1024
+
+DEFAULT_RESTORE_WORKERS = 4
+
+# Volume maximal de sections d'un dump en un seul flux mises en attente sur disque (--spool-limit),
+# réduit à la moitié de l'espace libre du dossier temporaire
+SPOOL_LIMIT = 4 * 1024 * 1024 * 1024
+
+# --- Index secondaires créés après le chargement des données ---
+# Une définition par ligne, indentée de deux espaces ; les tables partitionnées ne sont pas modifiées.
+# Les index FULLTEXT et SPATIAL restent dans le CREATE TABLE : InnoDB n'en crée qu'un par ALTER TABLE,
+# et le premier FULLTEXT ajouté après coup reconstruit la table (colonne FTS_DOC_ID)
+CREATE_TABLE = re.compile(rb"^CREATE TABLE (`(?:[^`]|``)+`) \(\n((?:  [^\n]*\n)+)\)([^\n]*;)$", re.M)
+SECONDARY_KEY = re.compile(rb"^\s*(?:UNIQUE )?KEY `(?:[^`]|``)+` \((.*)")
+FOREIGN_KEY = re.compile(rb"^\s*CONSTRAINT .*?FOREIGN KEY \(`((?:[^`]|``)+)`")
+AUTO_INCREMENT_COLUMN = re.compile(rb"^\s*`((?:[^`]|``)+)` .*\bAUTO_INCREMENT\b")
+FIRST_COLUMN = re.compile(rb"`((?:[^`]|``)+)`")
+# Taille maximale de l'en-tête d'une section examiné pour trouver le CREATE TABLE
+HEAD_LIMIT = 1024 * 1024
+
+# Lignes supprimées du flux (LOCK TABLES sérialiserait le chargement des morceaux d'une table),
+# changements de délimiteur (corps de triggers et de routines, jamais modifiés) et début des INSERT
+LOAD_LINE = re.compile(rb"^(?:(LOCK TABLES `(?:[^`\n]|``)+` WRITE;\n|UNLOCK TABLES;\n)|DELIMITER ([^\n]*)\n|INSERT INTO )", re.M)
+# Une ligne plus courte que cette limite est gardée en attente jusqu'à sa fin
+LINE_HOLD = 512
+
+
+def defer_secondary_indexes(create_statement):
+    """
+    Retire les index secondaires d'une instruction CREATE TABLE de mysqldump.
+    Retourne (CREATE TABLE sans ces index, ALTER TABLE qui les recrée ou b"").
+    Les index nécessaires aux clés étrangères et à la colonne AUTO_INCREMENT, ainsi que les
+    index FULLTEXT et SPATIAL, sont conservés.
+    """
+    match = CREATE_TABLE.match(create_statement)
+    if not match:
+        return create_statement, b""
+    table, body, options = match.groups()
+    definitions = [line.rstrip(b",") for line in body.rstrip(b"\n").split(b"\n")]
+    protected = set()
+    for definition in definitions:
+        foreign_key = FOREIGN_KEY.match(definition)
+        if foreign_key:
+            protected.add(foreign_key.group(1))
+        elif not SECONDARY_KEY.match(definition):
+            auto_increment = AUTO_INCREMENT_COLUMN.match(definition)
+            if auto_increment:
+                protected.add(auto_increment.group(1))
+
+    kept = []
+    deferred = []
+    for definition in definitions:
+        key = SECONDARY_KEY.match(definition)
+        first_column = FIRST_COLUMN.match(key.group(1)) if key else None
+        if key and not (first_column and first_column.group(1) in protected):
+            deferred.append(b"ADD " + definition.strip())
+        else:
+            kept.append(definition)
+    if not deferred:
+        return create_statement, b""
+    statement = b"CREATE TABLE " + table + b" (\n" + b",\n".join(kept) + b"\n)" + options
+    return statement, b"ALTER TABLE " + table + b" " + b", ".join(deferred) + b";\n"
+
+
+class DeferredIndexWriter:
+    """
+    Writer qui retire les index secondaires du CREATE TABLE en tête du flux et les
+    recrée en fin de flux (ALTER TABLE unique, après le chargement des données).
+    Si on_deferred est renseigné, l'ALTER TABLE lui est transmis au lieu d'être écrit
+    (table découpée en morceaux : les index sont créés après le dernier morceau).
+    """
+
+    def __init__(self, writer, on_deferred=None):
+        self.writer = writer
+        self.on_deferred = on_deferred
+        self.head = bytearray()
+        self.alter = b""
+        self.passthrough = False
+
+    def write(self, data):
+        if self.passthrough:
+            return self.writer.write(data)
+        self.head += data
+        # Les données commencent après la structure de la table
+        if b"\nINSERT INTO " in self.head or len(self.head) > HEAD_LIMIT:
+            self._flush_head()
+        return len(data)
+
+    def _flush_head(self):
+        head = bytes(self.head)
+        self.head.clear()
+        self.passthrough = True
+        match = CREATE_TABLE.search(head)
+        if match:
+            statement, self.alter = defer_secondary_indexes(match.group(0))
+            head = head[:match.start()] + statement + head[match.end():]
+        self.writer.write(head)
+
+    def close(self):
+        if not self.passthrough:
+            self._flush_head()
+        if self.alter:
+            if self.on_deferred:
+                self.on_deferred(self.alter)
+            else:
+                self.writer.write(self.alter)
+        self.writer.close()
+
+
+class BulkLoadWriter:
+    """
+    Writer qui prépare un flux de mysqldump pour un chargement en masse : les
+    LOCK/UNLOCK TABLES sont retirés et un COMMIT est inséré avant un INSERT
+    tous les commit_bytes octets. Le flux est terminé par un COMMIT.
+    """
+
+    def __init__(self, writer, commit_bytes=COMMIT_BYTES):
+        self.writer = writer
+        self.commit_bytes = commit_bytes
+        self.pending = b""
+        self.at_line_start = True
+        self.in_routine = False
+        self.uncommitted = 0
+
+    def write(self, data):
+        buffer = self.pending + bytes(data)
+        self.pending = b""
+        last_line = buffer.rfind(b"\n") + 1
+        line_start = last_line if last_line else (0 if self.at_line_start else None)
+        if line_start is not None and len(buffer) - line_start < LINE_HOLD:
+            # Début de ligne trop court pour être reconnu : on attend la suite
+            self.pending = buffer[line_start:]
+            self._process(buffer[:line_start])
+            self.at_line_start = True
+        else:
+            self._process(buffer)
+            self.at_line_start = buffer.endswith(b"\n")
+        return len(data)
+
+    def _process(self, block):
+        position = 0
+        for match in LOAD_LINE.finditer(block):
+            if match.start() == 0 and not self.at_line_start:
+                continue
+            if match.group(2) is not None:
+                self.in_routine = match.group(2).strip() != b";"
+            elif self.in_routine:
+                continue
+            elif match.group(1):
+                self._output(block[position:match.start()])
+                position = match.end()
+            elif self.uncommitted >= self.commit_bytes:
+                self._output(block[position:match.start()])
+                self.writer.write(b"COMMIT;\n")
+                self.uncommitted = 0
+                position = match.start()
+        self._output(block[position:])
+
+    def _output(self, data):
+        if data:
+            self.writer.write(data)
+            self.uncommitted += len(data)
+
+    def close(self):
+        self._process(self.pending)
+        self.pending = b""
+        self.writer.write(b"\nCOMMIT;\n")
+        self.writer.close()
+
+
+class MysqlLoader:
+    """Writer qui envoie un flux SQL à une session du client mysql sur la base cible."""
+
+    def __init__(self, mysql_exe_path, conn_args, db_name, label, session_sql=BULK_SESSION_SQL):
+        self.label = label
+        command = [mysql_exe_path] + list(conn_args) + ["--default-character-set=utf8mb4", db_name]
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                            stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise DumpError(f"Le client mysql n'a pas été trouvé à l'emplacement : {mysql_exe_path}")
+        self.stderr_chunks = []
+        self.stderr_thread = threading.Thread(target=lambda: self.stderr_chunks.append(self.process.stderr.read()))
+        self.stderr_thread.start()
+        self.write(session_sql)
+
+    def write(self, data):
+        try:
+            self.process.stdin.write(data)
+        except OSError:
+            # Le client s'est arrêté sur une erreur SQL : close() remonte son message
+            self.close()
+            raise DumpError(f"Échec du chargement de {self.label} : la session mysql a été fermée.")
+        return len(data)
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        returncode = self.process.wait()
+        self.stderr_thread.join()
+        self.process = None
+        if returncode != 0:
+            stderr_output = b"".join(self.stderr_chunks).decode("utf-8", errors="replace").strip()
+            raise DumpError(f"Échec du chargement de {self.label} (Code : {returncode}) : {stderr_output}")
+
+    def abort(self):
+        """Interrompt la session (le chargement en cours est annulé par le serveur)."""
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.wait()
+        self.stderr_thread.join()
+        self.process = None
+
+
+class RestoreTarget:
+    """
+    Base cible d'une restauration et réglages communs à toutes les sessions de chargement.
+    rewrite (dump_rewrite.SqlRewrite) réécrit le SQL de chaque session avant son chargement.
+    """
+
+    def __init__(self, mysql_exe_path, conn_args, db_name, defer_indexes=True, disable_binlog=False, rewrite=None):
+        self.mysql_exe_path = mysql_exe_path
+        self.conn_args = list(conn_args)
+        self.db_name = db_name
+        self.defer_indexes = defer_indexes
+        self.rewrite = rewrite
+        self.session_sql = (NO_BINLOG_SQL if disable_binlog else b"") + BULK_SESSION_SQL
+
+    def load(self, open_source, label, on_deferred=None, trailer=b""):
+        """
+        Charge dans la base cible le flux SQL ouvert par open_source (None : aucun flux),
+        suivi de trailer, dans une nouvelle session mysql.
+        """
+        loader = MysqlLoader(self.mysql_exe_path, self.conn_args, self.db_name, label, self.session_sql)
+        try:
+            writer = BulkLoadWriter(loader)
+            if self.defer_indexes:
+                writer = DeferredIndexWriter(writer, on_deferred)
+            if self.rewrite:
+                writer = self.rewrite.wrap(writer)
+            if open_source is not None:
+                with open_source() as source:
+                    pump(source, writer)
+            if trailer:
+                writer.write(trailer)
+            writer.close()
+        except BaseException:
+            loader.abort()
+            raise
+
+
+class LoadScheduler:
+    """
+    Exécute des chargements dans un nombre fixe de threads, les plus prioritaires
+    (plus gros) d'abord. Une tâche peut en soumettre d'autres (fonction then) ;
+    après la première erreur, les tâches en attente sont abandonnées.
+    """
+
+    def __init__(self, workers):
+        self.condition = threading.Condition()
+        self.queue = []
+        self.order = itertools.count()
+        self.running = 0
+        self.closed = False
+        self.errors = []
+        self.threads = [threading.Thread(target=self._worker) for _ in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, size, function, *args, then=None):
+        with self.condition:
+            if not self.errors:
+                heapq.heappush(self.queue, (-size, next(self.order), function, args, then))
+                self.condition.notify()
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.errors and not (self.closed and self.running == 0):
+                    self.condition.wait()
+                if self.errors or not self.queue:
+                    self.condition.notify_all()
+                    return
+                _, _, function, args, then = heapq.heappop(self.queue)
+                self.running += 1
+            try:
+                function(*args)
+                if then:
+                    then()
+            except BaseException as e:
+                with self.condition:
+                    self.errors.append(e)
+            finally:
+                with self.condition:
+                    self.running -= 1
+                    self.condition.notify_all()
+
+    def wait(self):
+        """Attend la fin de toutes les tâches ; relève la première erreur."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+
+class DumpSectionSplitter(TableSplitter):
+    """
+    Découpe un dump en un seul flux en sections chargeables indépendamment : une par
+    table (ou structure temporaire de vue), puis une section finale (name=None) avec
+    les vues définitives, routines et événements. L'en-tête est recopié dans chacune.
+    """
+
+    def __init__(self, open_section_writer, on_section_end):
+        super().__init__(open_section_writer, on_table_end=on_section_end)
+        self.in_tail = False
+
+    def _process(self, block):
+        if self.in_tail:
+            self._emit(block)
+            return
+        tail = TAIL_MARKER.search(block)
+        limit = tail.start() if tail else len(block)
+        position = 0
+        for match in SECTION_MARKER.finditer(block, 0, limit):
+            self._emit(block[position:match.start()])
+            self._start_table(match.group(1).replace(b"``", b"`").decode("utf-8", errors="replace"))
+            position = match.start()
+        self._emit(block[position:limit])
+        if tail:
+            self.in_tail = True
+            self._start_table(None)
+            self._emit(block[limit:])
+
+
+def check_selected_tables(selected, available):
+    """Lève DumpError si des tables demandées sont absentes de la sauvegarde."""
+    missing = set(selected or ()) - set(available)
+    if missing:
+        raise DumpError("Tables absentes de la sauvegarde : " + ", ".join(sorted(missing)))
+
+
+def restore_directory(target, directory, workers, progress=None, tables=None):
+    """
+    Restaure une sauvegarde par table, les plus grosses tables d'abord ; pour une table découpée,
+    le premier morceau passe avant les autres, triggers et index après le dernier.
+    Retourne le nombre de tables chargées.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != "mysqldumper-parallel":
+        raise DumpError(f"Manifeste non reconnu : {os.path.join(directory, MANIFEST_FILE)}")
+
+    def opener(relative_path):
+        # Les chemins "../<sauvegarde>/..." d'une sauvegarde incrémentale restent relatifs au dossier
+        path = os.path.normpath(os.path.join(directory, relative_path))
+        return lambda: open_archive_reader(path)
+
+    entries = manifest["tables"]
+    if tables:
+        check_selected_tables(tables, [entry["name"] for entry in entries])
+        entries = [entry for entry in entries if entry["name"] in tables]
+    done = []
+    done_lock = threading.Lock()
+
+    def table_done(name):
+        with done_lock:
+            done.append(name)
+            report(f"Restauration : {len(done)}/{len(entries)} tables chargées...")
+
+    scheduler = LoadScheduler(workers)
+
+    def schedule_chunked(entry):
+        name = entry["name"]
+        chunks = entry["chunks"]
+        size = entry.get("data_length", 0)
+        deferred = []
+        remaining = [len(chunks) - 1]
+
+        def finalize():
+            trailer = b"".join(deferred)
+            if entry.get("triggers"):
+                target.load(opener(entry["triggers"]), f"{name} (triggers)", trailer=trailer)
+            elif trailer:
+                target.load(None, f"{name} (index)", trailer=trailer)
+            table_done(name)
+
+        def chunk_done():
+            with done_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                scheduler.submit(size, finalize)
+
+        def first_done():
+            if len(chunks) == 1:
+                scheduler.submit(size, finalize)
+            for chunk in chunks[1:]:
+                scheduler.submit(size // len(chunks), target.load, opener(chunk["file"]), name, then=chunk_done)
+
+        scheduler.submit(size, target.load, opener(chunks[0]["file"]), name, deferred.append, then=first_done)
+
+    report(f"Restauration de {len(entries)} tables ({workers} sessions en parallèle)...")
+    for entry in entries:
+        if "chunks" in entry:
+            schedule_chunked(entry)
+        else:
+            scheduler.submit(entry.get("data_length", 0), target.load, opener(entry["file"]), entry["name"],
+                             then=lambda name=entry["name"]: table_done(name))
+    scheduler.wait()
+
+    if not tables:
+        report("Restauration des routines et événements...")
+        target.load(opener(manifest["schema"]), "routines et événements")
+        if manifest.get("views"):
+            report("Restauration des vues...")
+            target.load(opener(manifest["views"]), "vues")
+    return len(entries)
+
+
+def restore_seekable(target, archive_path, index, workers, progress=None, tables=None):
+    """
+    Restaure une archive seekable : chaque section (en-tête du dump + table) est lue
+    directement dans ses frames, sans fichier temporaire, et les sections sont chargées
+    en parallèle. La partie finale (vues, routines, événements) est chargée ensuite,
+    sauf si seules quelques tables (tables) sont demandées.
+    Retourne le nombre de sections chargées.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    sections = [section for section in index["sections"] if section["kind"] in ("table", "view")]
+    if tables:
+        check_selected_tables(tables, [section["name"] for section in sections if section["kind"] == "table"])
+        sections = [section for section in sections if section["kind"] == "table" and section["name"] in tables]
+    done = []
+    done_lock = threading.Lock()
+
+    def section_done(name):
+        with done_lock:
+            done.append(name)
+            report(f"Restauration : {len(done)}/{len(sections)} tables chargées...")
+
+    report(f"Restauration de {len(sections)} tables ({workers} sessions en parallèle)...")
+    scheduler = LoadScheduler(workers)
+    for section in sections:
+        scheduler.submit(section_size(index, section), target.load,
+                         lambda section=section: FrameReader(archive_path, index, section_frames(index, [section])),
+                         section["name"], then=lambda name=section["name"]: section_done(name))
+    scheduler.wait()
+
+    tail = [section for section in index["sections"] if section["kind"] == "tail"]
+    if tail and not tables:
+        report("Restauration des vues, routines et événements...")
+        target.load(lambda: FrameReader(archive_path, index, section_frames(index, tail)), "vues, routines et événements")
+    return len(sections)
+
+
+def restore_stream(target, feed, workers, progress=None, temp_dir=None, spool_limit=SPOOL_LIMIT, tables=None):
+    """
+    Restaure un dump en un seul flux écrit par feed(writer) : chaque section de table est mise
+    en attente dans temp_dir (au plus spool_limit octets) et chargée dès qu'elle est complète.
+    Retourne le nombre de sections chargées.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    spool_dir = tempfile.mkdtemp(prefix="mysqldumper_restore_", dir=temp_dir)
+    free = shutil.disk_usage(spool_dir).free
+    if free // 2 < spool_limit:
+        spool_limit = free // 2
+        report(f"Attention : {format_size(free)} libres dans '{spool_dir}', la mise en attente est limitée "
+               f"à {format_size(spool_limit)} (--temp-dir pour un autre dossier).")
+    report(f"Archive en un seul flux : chaque table est mise en attente dans '{spool_dir}' avant son chargement "
+           f"(au plus {format_size(spool_limit)} à la fois ; --temp-dir, --spool-limit).")
+    spool_condition = threading.Condition()
+    state = {"spooled": 0, "sections": 0, "loaded": 0, "path": None, "tail": None}
+    seen = set()
+    scheduler = LoadScheduler(workers)
+
+    def open_section_writer(name):
+        with spool_condition:
+            if state["spooled"] > spool_limit and not scheduler.errors:
+                report(f"Lecture suspendue : {format_size(state['spooled'])} en attente de chargement "
+                       f"(limite {format_size(spool_limit)}).")
+            while state["spooled"] > spool_limit and not scheduler.errors:
+                spool_condition.wait(0.5)
+        if scheduler.errors:
+            raise scheduler.errors[0]
+        state["sections"] += 1
+        state["path"] = os.path.join(spool_dir, f"section_{state['sections']:06d}.sql")
+        return open(state["path"], 'wb')
+
+    def load_section(path, name, size):
+        try:
+            target.load(lambda: open(path, 'rb'), name)
+        finally:
+            os.remove(path)
+            with spool_condition:
+                state["spooled"] -= size
+                state["loaded"] += 1
+                spool_condition.notify_all()
+        report(f"Restauration : {state['loaded']} tables chargées ({name})...")
+
+    def section_end(name):
+        path = state["path"]
+        if name is None:
+            state["tail"] = path
+            return
+        seen.add(name)
+        if tables and name not in tables:
+            os.remove(path)
+            return
+        size = os.path.getsize(path)
+        with spool_condition:
+            state["spooled"] += size
+        scheduler.submit(size, load_section, path, name, size)
+
+    try:
+        splitter = DumpSectionSplitter(open_section_writer, section_end)
+        try:
+            try:
+                feed(splitter)
+            finally:
+                splitter.close()
+        except BaseException:
+            # Les sections en attente sont abandonnées ; l'erreur d'un chargement, qui a pu
+            # provoquer l'interruption de la lecture, prime sur celle de la lecture
+            with scheduler.condition:
+                scheduler.queue.clear()
+            scheduler.wait()
+            raise
+        scheduler.wait()
+        check_selected_tables(tables, seen)
+        if state["tail"] and not tables:
+            report("Restauration des vues, routines et événements...")
+            target.load(lambda: open(state["tail"], 'rb'), "vues, routines et événements")
+        return state["loaded"]
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def restore_backup(source, mysql_exe_path, conn_args, db_name=None, workers=DEFAULT_RESTORE_WORKERS, progress=None,
+                   defer_indexes=True, disable_binlog=False, temp_dir=None, tables=None, rewrite=None,
+                   spool_limit=SPOOL_LIMIT):
+    """
+    Restaure une sauvegarde produite par ce programme (archive, dossier par table ou en volumes,
+    index du dépôt) dans db_name, ou dans la base d'origine. tables limite la restauration à ces
+    tables ; rewrite (dump_rewrite.SqlRewrite) adapte le SQL au serveur cible.
+    Retourne un dictionnaire décrivant la restauration ; lève DumpError en cas d'échec.
+    """
+    started = time.time()
+    source = os.path.abspath(source)
+    if os.path.basename(source) in (MANIFEST_FILE, VOLUMES_FILE):
+        source = os.path.dirname(source)
+
+    snapshot = None
+    volumes = load_volumes(source) if os.path.isdir(source) else None
+    if volumes:
+        origin_name = volumes.get("database")
+    elif os.path.isdir(source):
+        if not os.path.isfile(os.path.join(source, MANIFEST_FILE)):
+            raise DumpError(f"Le dossier ne contient pas de {MANIFEST_FILE} : {source}")
+        with open(os.path.join(source, MANIFEST_FILE)) as f:
+            origin_name = json.load(f).get("database")
+    elif source.endswith(".json") and os.path.basename(os.path.dirname(source)) == SNAPSHOTS_DIR:
+        repository = os.path.dirname(os.path.dirname(source))
+        snapshot = os.path.basename(source)[:-len(".json")]
+        origin_name = load_snapshot(repository, snapshot).get("database")
+    elif os.path.isfile(source):
+        origin_name = None
+    else:
+        raise DumpError(f"Sauvegarde introuvable : {source}")
+
+    db_name = db_name or origin_name
+    if not db_name:
+        raise DumpError("Précisez la base de données cible (la sauvegarde ne l'indique pas).")
+
+    if progress:
+        progress(f"Création de la base '{db_name}' si nécessaire...")
+    run_query(mysql_exe_path, conn_args, f"CREATE DATABASE IF NOT EXISTS {quote_identifier(db_name)}")
+    target = RestoreTarget(mysql_exe_path, conn_args, db_name, defer_indexes, disable_binlog, rewrite)
+
+    if volumes:
+        loaded = restore_stream(target, lambda writer: read_volumes(source, writer), workers, progress, temp_dir,
+                                spool_limit, tables)
+    elif os.path.isdir(source):
+        loaded = restore_directory(target, source, workers, progress, tables)
+    elif snapshot:
+        loaded = restore_stream(target, lambda writer: restore_snapshot(repository, snapshot, writer),
+                                workers, progress, temp_dir, spool_limit, tables)
+    elif load_seekable_index(source) is not None:
+        loaded = restore_seekable(target, source, load_seekable_index(source), workers, progress, tables)
+    else:
+        def feed(writer):
+            with open_archive_reader(source) as reader:
+                pump(reader, writer)
+        loaded = restore_stream(target, feed, workers, progress, temp_dir, spool_limit, tables)
+
+    return {
+        "database": db_name,
+        "source": source,
+        "tables": loaded,
+        "started": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "duration": round(time.time() - started, 3)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Restaure en parallèle une sauvegarde MySQL produite par ce programme.")
+    parser.add_argument("source", help="Archive, dossier de sauvegarde par table ou en volumes, ou index du dépôt dédupliqué")
+    parser.add_argument("-d", "--database", help="Base cible (défaut : base d'origine si la sauvegarde l'indique)")
+    parser.add_argument("-H", "--host", default="localhost")
+    parser.add_argument("-u", "--user", default="root")
+    parser.add_argument("-P", "--port", type=int)
+    parser.add_argument("-p", "--password", help="Mot de passe (demandé s'il n'est pas fourni)")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_RESTORE_WORKERS,
+                        help="Nombre de sessions de chargement en parallèle")
+    parser.add_argument("--mysql", help="Chemin du client mysql (défaut : client trouvé dans le PATH)")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="Créer les index secondaires avec les tables plutôt qu'après les données")
+    parser.add_argument("--no-binlog", action="store_true",
+                        help="Ne pas écrire la restauration dans le binlog (privilège SUPER requis)")
+    parser.add_argument("--temp-dir", help="Dossier des fichiers temporaires (archives en un seul flux)")
+    parser.add_argument("--spool-limit", type=int, metavar="MO",
+                        help=f"Volume maximal mis en attente dans ce dossier (défaut : {SPOOL_LIMIT // (1024 * 1024)} Mo)")
+    parser.add_argument("-t", "--table", action="append", dest="tables",
+                        help="Ne restaurer que cette table (option répétable)")
+    parser.add_argument("--insert-size", type=int, metavar="KIO",
+                        help="Regroupe ou découpe les INSERT en instructions de cette taille (selon max_allowed_packet du serveur cible)")
+    parser.add_argument("--definer", metavar="strip|UTILISATEUR@HOTE",
+                        help="Retire les DEFINER des vues, triggers et routines, ou les remplace par ce compte")
+    parser.add_argument("--from-schema", metavar="BASE",
+                        help="Base d'origine dont les références (noms qualifiés, USE) désignent la base cible")
+    args = parser.parse_args()
+
+    mysql_exe_path = args.mysql or find_mysql_client("")
+    if not mysql_exe_path:
+        print("Erreur : le client mysql est introuvable, précisez-le avec --mysql.", file=sys.stderr)
+        sys.exit(1)
+    password = args.password if args.password is not None else getpass.getpass("Mot de passe MySQL : ")
+    try:
+        if args.from_schema and not args.database:
+            raise DumpError("--from-schema nécessite la base cible (-d).")
+        rewrite = SqlRewrite(args.insert_size * 1024 if args.insert_size is not None else None, args.definer,
+                             (args.from_schema, args.database) if args.from_schema else None)
+        result = restore_backup(args.source, mysql_exe_path, connection_args(args.host, args.user, password, args.port),
+                                args.database, max(1, args.workers), progress=print,
+                                defer_indexes=not args.keep_indexes, disable_binlog=args.no_binlog,
+                                temp_dir=args.temp_dir, tables=args.tables,
+                                rewrite=rewrite if rewrite.active() else None,
+                                spool_limit=args.spool_limit * 1024 * 1024 if args.spool_limit else SPOOL_LIMIT)
+    except DumpError as e:
+        print(f"❌ Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Base '{result['database']}' restaurée ({result['tables']} tables) en {result['duration']} s.")
@@ -0,0 +1,228 @@
+import re
+
+from dump_diff import INSERT_LINE, VALUE
+from dump_pipeline import DumpError
+
+# --- Réécriture du flux SQL (entre mysqldump et l'archive, ou entre l'archive et mysql) ---
+# Taille des INSERT, DEFINER et nom de la base, ligne par ligne en mémoire bornée ; les valeurs
+# des lignes et les blocs DELIMITER ne sont jamais modifiés.
+DEFINER_CLAUSE = re.compile(rb"DEFINER=(?:`(?:[^`]|``)*`|'[^']*'|\w+)@(?:`(?:[^`]|``)*`|'[^']*'|[\w.%-]+) ?")
+# Ligne d'un INSERT (découpage ligne par ligne, quand une coupe rapide n'est pas possible)
+ROW_PATTERN = re.compile(rb"\((?:" + VALUE + rb")(?:,(?:" + VALUE + rb"))*\)")
+DELIMITER_LINE = re.compile(rb"^DELIMITER ([^\n]*)\n", re.M)
+STRIP_DEFINER = "strip"
+
+
+def quote_name(name):
+    """Identifiant MySQL entre accents graves (bytes)."""
+    return b"`" + name.encode("utf-8").replace(b"`", b"``") + b"`"
+
+
+def parse_definer(text):
+    """
+    Interprète le réglage du DEFINER : vide (conservé), "strip" (retiré : l'objet appartient
+    au compte qui restaure) ou "utilisateur@hôte" (les guillemets sont facultatifs).
+    Retourne None, b"" ou la clause de remplacement ; lève DumpError si le compte est invalide.
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    if text == STRIP_DEFINER:
+        return b""
+    user, separator, host = text.rpartition("@")
+    user, host = user.strip("`'\""), host.strip("`'\"")
+    if not separator or not user or not host:
+        raise DumpError(f"DEFINER invalide : {text!r} (attendu : '{STRIP_DEFINER}' ou utilisateur@hôte)")
+    return b"DEFINER=" + quote_name(user) + b"@" + quote_name(host) + b" "
+
+
+def outside_strings(values):
+    """
+    Vrai si le texte values d'un INSERT se termine hors d'une chaîne : mysqldump échappe
+    les apostrophes et les barres obliques des chaînes, les autres ouvrent ou ferment une chaîne.
+    """
+    values = values.replace(b"\\\\", b"")
+    return (values.count(b"'") - values.count(b"\\'")) % 2 == 0
+
+
+def schema_pattern(old_name):
+    """
+    Références à la base old_name dans les lignes qui ne sont pas des données : nom qualifié
+    (`base`.), USE, CREATE/ALTER DATABASE, "-- Current Database:" et les commentaires
+    "Database: base" et "database 'base'" de mysqldump et du moteur intégré.
+    """
+    quoted = re.escape(quote_name(old_name))
+    plain = re.escape(old_name.encode("utf-8"))
+    return re.compile(rb"(?:(?<=USE )|(?<=DATABASE )|(?<=EXISTS\*/ )|(?<=Database: ))" + quoted + rb"|" + quoted +
+                      rb"(?=\.)|(?<=Database: )" + plain + rb"(?=\n)|(?<=database ')" + plain + rb"(?=')")
+
+
+class SqlRewrite:
+    """
+    Réglages de la réécriture d'un flux SQL : insert_size (octets par INSERT, None : pas de
+    regroupement), definer (parse_definer) et rename_schema ((ancienne base, nouvelle base)
+    ou None). wrap(writer) retourne l'étape de réécriture d'un flux vers writer.
+    """
+
+    def __init__(self, insert_size=None, definer=None, rename_schema=None):
+        if insert_size is not None and insert_size < 1:
+            raise DumpError("La taille des INSERT doit être supérieure ou égale à 1.")
+        self.insert_size = insert_size
+        self.definer_clause = parse_definer(definer)
+        self.schema = schema_pattern(rename_schema[0]) if rename_schema else None
+        self.new_schema = rename_schema[1] if rename_schema else None
+        # Sans regroupement, un bloc qui ne contient aucun de ces mots est transmis tel quel
+        self.tokens = []
+        if self.definer_clause is not None:
+            self.tokens.append(b"DEFINER=")
+        if rename_schema:
+            self.tokens.append(rename_schema[0].encode("utf-8"))
+
+    def active(self):
+        return bool(self.insert_size or self.tokens)
+
+    def wrap(self, writer):
+        return SqlRewriteWriter(writer, self)
+
+    def rewrite_line(self, line):
+        """Applique le DEFINER et le renommage de la base à une ligne qui n'est pas une ligne de données."""
+        if self.definer_clause is not None and b"DEFINER=" in line:
+            line = DEFINER_CLAUSE.sub(lambda match: self.definer_clause, line)
+        if self.schema is not None:
+            line = self.schema.sub(self._schema_name, line)
+        return line
+
+    def _schema_name(self, match):
+        if match.group(0).startswith(b"`"):
+            return quote_name(self.new_schema)
+        return self.new_schema.encode("utf-8")
+
+
+class SqlRewriteWriter:
+    """
+    Writer qui réécrit un flux SQL d'après un SqlRewrite avant de le transmettre. Le lot
+    d'INSERT en cours est écrit dès qu'arrive une ligne qui n'en fait pas partie : la fin
+    d'un dump (commentaires) le vide, même quand le writer n'est pas fermé.
+    """
+
+    def __init__(self, writer, rewrite):
+        self.writer = writer
+        self.rewrite = rewrite
+        self.pending = []  # Début de la ligne incomplète, en morceaux (une ligne d'INSERT dépasse souvent un bloc)
+        self.in_delimiter = False
+        self.prefix = None
+        self.batch = []
+        self.batch_size = 0
+
+    def write(self, data):
+        data = bytes(data)
+        end = data.rfind(b"\n") + 1
+        if not end:
+            self.pending.append(data)
+            return len(data)
+        block = b"".join(self.pending + [data[:end]]) if self.pending else data[:end]
+        self.pending = [data[end:]] if end < len(data) else []
+        self._process(block)
+        return len(data)
+
+    def _process(self, block):
+        if not self.rewrite.insert_size and not any(token in block for token in self.rewrite.tokens):
+            # Rien à réécrire dans ce bloc : seul l'état des blocs DELIMITER est suivi
+            if b"DELIMITER " in block:
+                for match in DELIMITER_LINE.finditer(block):
+                    self.in_delimiter = match.group(1).strip() != b";"
+            self.writer.write(block)
+            return
+        output = []
+        position = 0
+        while position < len(block):
+            # Découpage sur "\n" seulement : les valeurs peuvent contenir d'autres caractères de contrôle
+            end = block.find(b"\n", position) + 1 or len(block)
+            line = block[position:end]
+            position = end
+            if self.in_delimiter or not line.startswith((b"INSERT", b"REPLACE")):
+                if line.startswith(b"DELIMITER "):
+                    self.in_delimiter = line[len(b"DELIMITER "):].strip() != b";"
+                if self.batch:
+                    output.append(self._batch_statement())
+                output.append(self.rewrite.rewrite_line(line))
+                continue
+            match = INSERT_LINE.match(line)
+            if not self.rewrite.insert_size or match is None or not line.endswith(b");\n"):
+                if self.batch:
+                    output.append(self._batch_statement())
+                output.append(line)
+                continue
+            output.extend(self._add_insert(match.group(0), line[match.end():-2]))
+        self.writer.write(b"".join(output))
+
+    def _add_insert(self, prefix, values):
+        """Ajoute les lignes d'un INSERT (values : "(...),(...)") au lot ; retourne les instructions terminées."""
+        statements = []
+        if prefix != self.prefix and self.batch:
+            statements.append(self._batch_statement())
+        self.prefix = prefix
+        limit = max(self.rewrite.insert_size - len(prefix) - 2, 0)
+        if len(values) <= limit:
+            # L'instruction entière tient dans un INSERT : elle est ajoutée sans être analysée
+            if self.batch and self.batch_size + 1 + len(values) > limit:
+                statements.append(self._batch_statement())
+            self._append(values)
+            return statements
+        if self.batch:
+            statements.append(self._batch_statement())
+        # Instruction trop grande : coupée avant le dernier "),(" qui tient dans la limite, s'il
+        # se trouve hors d'une chaîne (outside_strings) ; la suite est mise en lot
+        start = 0
+        while len(values) - start > limit:
+            cut = values.rfind(b"),(", start, start + limit)
+            if cut < 0:
+                # Une seule ligne dépasse la limite : elle forme une instruction à elle seule
+                cut = values.find(b"),(", start + limit)
+                if cut < 0:
+                    break
+            if not outside_strings(values[start:cut + 1]):
+                return statements + self._add_rows(prefix, values[start:], limit)
+            statements.append(prefix + values[start:cut + 1] + b";\n")
+            start = cut + 2
+        self._append(values[start:])
+        return statements
+
+    def _add_rows(self, prefix, values, limit):
+        """Découpe ligne par ligne les valeurs d'un INSERT dont les parenthèses se trouvent aussi dans des chaînes."""
+        rows = [match.group(0) for match in ROW_PATTERN.finditer(values)]
+        if sum(len(row) for row in rows) + len(rows) - 1 != len(values):
+            # Valeurs non reconnues : l'instruction est transmise telle quelle
+            return [prefix + values + b";\n"]
+        statements = []
+        for row in rows:
+            if self.batch and self.batch_size + 1 + len(row) > limit:
+                statements.append(self._batch_statement())
+            self._append(row)
+        return statements
+
+    def _append(self, values):
+        self.batch_size += len(values) + (1 if self.batch else 0)
+        self.batch.append(values)
+
+    def _batch_statement(self):
+        statement = self.prefix + b",".join(self.batch) + b";\n"
+        self.batch = []
+        self.batch_size = 0
+        return statement
+
+    def close(self):
+        try:
+            if self.pending:
+                self._process(b"".join(self.pending))
+                self.pending = []
+            if self.batch:
+                self.writer.write(self._batch_statement())
+        finally:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
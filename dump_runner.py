@@ -0,0 +1,575 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dump_catalog import apply_retention, record_backup
+from dump_checkpoint import Checkpoint, find_resumable_backup
+from dump_export import export_database
+from dump_compression import COMPRESSION_BACKENDS, DEFAULT_COMPRESSION, archive_extension, dump_to_archives
+from dump_incremental import DEFAULT_FINGERPRINT_METHOD, dump_incremental
+from dump_integrity import write_integrity
+from dump_native import DUMP_ENGINES, NATIVE_ENGINE, NativeDump, native_source
+from dump_parallel import dump_parallel
+from dump_pipeline import DumpCancelled, DumpError, build_mysqldump_command, connection_args
+from dump_progress import RUN_RECORD_SUFFIX, DumpProgress, PhaseTimer, estimate_dump_size, fsync_path, write_run_record
+from dump_repository import REPOSITORY_DIR, REPOSITORY_DUMP_OPTIONS, dump_to_repository, prune_repository
+from dump_rewrite import SqlRewrite
+from dump_subset import parse_sample_rule, parse_table_list, plan_subset, subset_commands
+from dump_throttle import DEFAULT_MAX_REPLICA_LAG, DEFAULT_MAX_THREADS_RUNNING, LoadMonitor, RateLimiter
+from dump_volumes import dump_to_volumes, load_volumes
+from dump_zerocopy import ZERO_COPY_COMPRESSIONS, dump_zero_copy, zero_copy_available
+from mysql_client import find_mysql_client
+
+# --- Fichier de préférences partagé par l'interface et la ligne de commande ---
+PREFS_FILE = "mysqldumper_prefs.json"
+
+# --- Paramètres d'une sauvegarde ---
+# Un "job" est un dictionnaire qui reprend les clés du fichier de préférences
+# (le mot de passe en plus, qui n'est jamais enregistré).
+DEFAULT_JOB = {
+    "db_user": "root",
+    "db_password": "",
+    "db_host": "localhost",
+    "db_port": None,
+    "db_name": "",
+    "mysqldump_path": "",
+    "output_folder": "",
+    "compression": DEFAULT_COMPRESSION,
+    "compression_level": None,
+    "compression_threads": None,
+    "parallel": False,
+    "workers": 1,
+    "incremental": False,
+    "fingerprint_method": DEFAULT_FINGERPRINT_METHOD,
+    "repository": False,
+    "checkpoint": False,
+    "resume": False,
+    "max_rate": None,  # Débit maximal en Mo/s (None : illimité)
+    "adaptive_throttle": False,
+    "max_threads_running": DEFAULT_MAX_THREADS_RUNNING,
+    "max_replica_lag": DEFAULT_MAX_REPLICA_LAG,
+    "volume_size": None,  # Taille des volumes en Mo (None : une seule archive)
+    "subset_tables": "",  # Tables racines d'un sous-ensemble ("orders, customers" ; vide : base complète)
+    "subset_sample": "",  # Règle d'échantillonnage des tables racines : "10%", "1000" ou une condition WHERE
+    "copies": [],  # Autres sorties du dump standard, écrites avec le même flux : [{"output_folder", "compression"}]
+    "keep_daily": None,  # Rétention après chaque sauvegarde réussie (None partout : aucune suppression)
+    "keep_weekly": None,
+    "keep_monthly": None,
+    "engine": "mysqldump",  # "native" : moteur intégré (dump_native), sans mysqldump
+    "native_source": "",  # Moteur intégré : base SQLite lue à la place du serveur (essais, banc d'essai)
+    "batch_rows": None,  # Moteur intégré : lignes par INSERT étendu au plus (None : limite de taille seulement)
+    "insert_size": None,  # Taille des INSERT étendus en Kio (None : celle de mysqldump ou du moteur intégré)
+    "definer": "",  # DEFINER des vues, triggers, routines et événements : "strip", "utilisateur@hôte" (vide : conservé)
+    "rename_schema": "",  # Base désignée dans le SQL à la place de db_name (vide : base d'origine)
+    "zero_copy": False,  # Dump standard : sortie de mysqldump écrite par le noyau (dump_zerocopy), sans passer par Python
+    "export_format": ""  # "csv", "tsv" ou "parquet" : export des données par table (dump_export) au lieu du SQL
+}
+
+
+def make_job(**values):
+    """Construit un job complet à partir des valeurs par défaut."""
+    job = dict(DEFAULT_JOB)
+    job.update(values)
+    return job
+
+
+def load_profiles(prefs_file=PREFS_FILE):
+    """
+    Lit les profils du fichier de préférences. Les préférences enregistrées par
+    l'interface forment le profil "default" ; d'autres profils peuvent être ajoutés
+    sous la clé "profiles" et reprennent les valeurs du profil "default" qu'ils ne
+    redéfinissent pas. Retourne {nom: préférences}.
+    """
+    try:
+        with open(prefs_file) as f:
+            prefs = json.load(f)
+    except FileNotFoundError:
+        raise DumpError(f"Fichier de préférences introuvable : {prefs_file}")
+    except ValueError as e:
+        raise DumpError(f"Fichier de préférences illisible ({prefs_file}) : {e}")
+    default = {key: value for key, value in prefs.items() if key != "profiles"}
+    profiles = {"default": default}
+    for name, values in prefs.get("profiles", {}).items():
+        profiles[name] = dict(default, **values)
+    return profiles
+
+
+def _profile_int(profile, key):
+    """Valeur entière facultative d'un profil (les champs de l'interface sont enregistrés en texte)."""
+    value = profile.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise DumpError(f"Valeur invalide pour '{key}' dans le profil : {value!r}")
+
+
+def _profile_float(profile, key):
+    """Valeur décimale facultative d'un profil."""
+    value = profile.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise DumpError(f"Valeur invalide pour '{key}' dans le profil : {value!r}")
+
+
+def profile_copies(profile):
+    """Copies d'un profil : texte saisi dans l'interface (parse_copy_targets) ou liste de {"output_folder", "compression"}."""
+    copies = profile.get("copies") or []
+    if isinstance(copies, str):
+        return parse_copy_targets(copies)
+    return [{"output_folder": copy["output_folder"], "compression": copy.get("compression")} for copy in copies]
+
+
+def job_from_profile(profile, **values):
+    """Construit un job à partir d'un profil du fichier de préférences ; values complète ou remplace ses valeurs."""
+    job = make_job(
+        db_user=profile.get("db_user") or DEFAULT_JOB["db_user"],
+        db_host=profile.get("db_host") or DEFAULT_JOB["db_host"],
+        db_port=_profile_int(profile, "db_port"),
+        db_name=profile.get("db_name", ""),
+        mysqldump_path=profile.get("mysqldump_path", ""),
+        output_folder=profile.get("output_folder", ""),
+        compression=profile.get("compression") or DEFAULT_COMPRESSION,
+        compression_level=_profile_int(profile, "compression_level"),
+        compression_threads=_profile_int(profile, "compression_threads"),
+        parallel=bool(profile.get("parallel")),
+        workers=_profile_int(profile, "workers") or 1,
+        incremental=bool(profile.get("incremental")),
+        fingerprint_method=profile.get("fingerprint_method") or DEFAULT_FINGERPRINT_METHOD,
+        repository=bool(profile.get("repository")),
+        checkpoint=bool(profile.get("checkpoint")),
+        max_rate=_profile_float(profile, "max_rate"),
+        adaptive_throttle=bool(profile.get("adaptive_throttle")),
+        max_threads_running=_profile_int(profile, "max_threads_running") or DEFAULT_MAX_THREADS_RUNNING,
+        max_replica_lag=_profile_int(profile, "max_replica_lag") or DEFAULT_MAX_REPLICA_LAG,
+        volume_size=_profile_int(profile, "volume_size"),
+        subset_tables=profile.get("subset_tables", ""),
+        subset_sample=profile.get("subset_sample", ""),
+        copies=profile_copies(profile),
+        keep_daily=_profile_int(profile, "keep_daily"),
+        keep_weekly=_profile_int(profile, "keep_weekly"),
+        keep_monthly=_profile_int(profile, "keep_monthly"),
+        engine=profile.get("engine") or DEFAULT_JOB["engine"],
+        native_source=profile.get("native_source", ""),
+        batch_rows=_profile_int(profile, "batch_rows"),
+        insert_size=_profile_int(profile, "insert_size"),
+        definer=profile.get("definer", ""),
+        rename_schema=profile.get("rename_schema", ""),
+        zero_copy=bool(profile.get("zero_copy")),
+        export_format=profile.get("export_format", "")
+    )
+    job.update(values)
+    return job
+
+
+def job_connection_args(job):
+    """Arguments de connexion mysqldump/mysql d'un job."""
+    return connection_args(job["db_host"], job["db_user"], job["db_password"], job["db_port"])
+
+
+def job_dump_command(job, conn_args, extra_args=None):
+    """
+    Commande qui exporte la base d'un job en dump standard : mysqldump avec extra_args, ou
+    le moteur intégré (job["engine"] = "native"), qui remplace la commande dans
+    stream_dump. Le seul réglage de extra_args repris par le moteur intégré est
+    --skip-extended-insert (une ligne par INSERT, utilisé par le dépôt dédupliqué) ;
+    job["insert_size"] règle directement la taille de ses INSERT.
+    """
+    if job["engine"] != NATIVE_ENGINE:
+        return build_mysqldump_command(job["mysqldump_path"], conn_args, job["db_name"], extra_args)
+    batch_rows = 1 if "--skip-extended-insert" in (extra_args or []) else job["batch_rows"]
+    if job["insert_size"]:
+        return NativeDump(job_native_source(job), job["db_name"], batch_rows, job["insert_size"] * 1024)
+    return NativeDump(job_native_source(job), job["db_name"], batch_rows)
+
+
+def job_rewrite(job):
+    """
+    Réécriture du SQL d'un job (dump_rewrite.SqlRewrite) : taille des INSERT, DEFINER et
+    nom de la base, ou None si le SQL est écrit tel quel. Le moteur intégré produit
+    lui-même des INSERT de la taille demandée : ils ne sont pas regroupés une seconde fois.
+    """
+    insert_size = job["insert_size"] * 1024 if job["insert_size"] and job["engine"] != NATIVE_ENGINE else None
+    rename_schema = (job["db_name"], job["rename_schema"]) if job["rename_schema"] else None
+    rewrite = SqlRewrite(insert_size, job["definer"], rename_schema)
+    return rewrite if rewrite.active() else None
+
+
+def job_native_source(job):
+    """Nouvelle connexion à la source du moteur intégré d'un job (serveur MySQL ou base SQLite)."""
+    return native_source(job["db_host"], job["db_user"], job["db_password"], job["db_port"], job["native_source"])
+
+
+def job_mysql_client(job):
+    """Retourne le client mysql à utiliser pour un job, ou lève DumpError s'il est introuvable."""
+    mysql_exe_path = find_mysql_client(job["mysqldump_path"])
+    if not mysql_exe_path:
+        raise DumpError("Le client mysql n'a pas été trouvé à côté de mysqldump ni dans le PATH.")
+    return mysql_exe_path
+
+
+def job_throttle(job, conn_args, progress=None):
+    """
+    Limite de débit d'un job : (RateLimiter, LoadMonitor du mode adaptatif ou None),
+    ou (None, None) si le job n'est ni limité ni adaptatif. Le LoadMonitor n'est pas démarré.
+    """
+    if not job["max_rate"] and not job["adaptive_throttle"]:
+        return None, None
+    limiter = RateLimiter(job["max_rate"] * 1024 * 1024 if job["max_rate"] else None)
+    monitor = None
+    if job["adaptive_throttle"]:
+        monitor = LoadMonitor(job_mysql_client(job), conn_args, limiter, job["max_threads_running"],
+                              job["max_replica_lag"], report=progress)
+    return limiter, monitor
+
+
+def path_size(path):
+    """Taille d'un fichier, ou taille totale des fichiers d'un dossier."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(folder, name))
+                   for folder, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def dump_error(returncode, stderr_output):
+    """Construit l'erreur levée quand mysqldump se termine avec un code non nul."""
+    error_message = f"Une erreur s'est produite lors du dump (Code : {returncode}).\n"
+    error_message += f"Message de mysqldump : {stderr_output.strip()}" if stderr_output.strip() else "Aucun message d'erreur détaillé de mysqldump."
+    return DumpError(error_message)
+
+
+def parse_copy_targets(text):
+    """
+    Interprète la liste des copies d'une sauvegarde : "none:/mnt/copie; gzip:D:\\copies"
+    (entrées séparées par des points-virgules, format de compression facultatif devant le
+    dossier). Retourne [{"output_folder", "compression"}] (compression None : celle du job).
+    """
+    copies = []
+    for item in (text or "").split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        compression, separator, folder = item.partition(":")
+        if not separator or compression not in COMPRESSION_BACKENDS:
+            compression, folder = None, item
+        copies.append({"output_folder": folder.strip(), "compression": compression})
+    return copies
+
+
+def write_archives(job, commands, output_path, output_file_base, tracker, result, progress=None):
+    """
+    Écrit la sortie d'un dump standard dans output_path et dans chaque copie de job["copies"],
+    avec leurs fichiers d'empreintes ; result est complété. Lève DumpError en cas d'échec.
+    """
+    targets = [(output_path, job["compression"])]
+    for copy in job["copies"]:
+        compression = copy["compression"] or job["compression"]
+        os.makedirs(copy["output_folder"], exist_ok=True)
+        targets.append((os.path.join(copy["output_folder"], output_file_base + archive_extension(compression)), compression))
+    paths = [os.path.normcase(os.path.abspath(path)) for path, _ in targets]
+    if len(set(paths)) != len(paths):
+        raise DumpError("Deux sorties de la sauvegarde écriraient le même fichier : changez le dossier ou le format d'une copie.")
+    if progress and len(targets) > 1:
+        progress(("Copies écrites après l'archive : " if job["zero_copy"] else "Copies écrites en même temps : ") + ", ".join(f"'{path}' ({compression})" for path, compression in targets[1:]))
+    if job["zero_copy"]:
+        # Le SQL ne passe pas par Python : pas d'empreinte SHA-256, seulement les tailles
+        returncode, stderr_output, integrity = dump_zero_copy(commands, targets, job["compression_level"],
+                                                              job["compression_threads"], tracker)
+        result["zero_copy"] = True
+    else:
+        returncode, stderr_output, integrity = dump_to_archives(commands, targets, f"{output_file_base}.sql",
+                                                                job["compression_level"], job["compression_threads"], tracker)
+    if returncode != 0:
+        raise dump_error(returncode, stderr_output)
+    for (path, _), archive_integrity in zip(targets, integrity):
+        write_integrity(path, archive_integrity)
+    if "sha256" in integrity[0]:
+        result["sha256"] = integrity[0]["sha256"]
+    if len(targets) > 1:
+        result["copies"] = [{"path": path, "compression": compression, "size": archive_integrity["size"],
+                             "sha256": archive_integrity.get("sha256")}
+                            for (path, compression), archive_integrity in zip(targets[1:], integrity[1:])]
+
+
+def job_retention(job):
+    """Règles de rétention d'un job (arguments de dump_catalog.apply_retention), ou None sans rétention."""
+    rules = {key: job[key] for key in ("keep_daily", "keep_weekly", "keep_monthly")}
+    return rules if any(rules.values()) else None
+
+
+def prune_after_retention(job, result, progress=None):
+    """Supprime les morceaux du dépôt libérés par la rétention ; reporté si une sauvegarde y écrit encore."""
+    try:
+        removed, freed = prune_repository(os.path.join(job["output_folder"], REPOSITORY_DIR))
+    except DumpError as e:
+        if progress:
+            progress(f"Nettoyage du dépôt reporté : {e}")
+        return
+    result["retention"].update(pruned_chunks=removed, freed_bytes=freed)
+
+
+def update_catalog(job, result, progress=None):
+    """
+    Note la sauvegarde dans le catalogue du dossier de sortie (dump_catalog) puis, si elle
+    a réussi et que le job a des règles de rétention, supprime les sauvegardes de la base,
+    de la même sorte, qui ne sont plus à conserver (et, pour le dépôt, les morceaux libérés). result est complété (catalog_id, retention) ; une erreur
+    du catalogue est notée dans result sans masquer le résultat de la sauvegarde.
+    """
+    try:
+        result["catalog_id"] = record_backup(job["output_folder"], result)
+        rules = job_retention(job)
+        if result["status"] == "ok" and rules:
+            report = apply_retention(job["output_folder"], job["db_name"], mode=result["mode"], progress=progress, **rules)
+            result["retention"] = {"kept": len(report["kept"]), "deleted": report["deleted"]}
+            if result["mode"] == "repository" and report["deleted"]:
+                prune_after_retention(job, result, progress)
+    except (sqlite3.Error, OSError, DumpError) as e:
+        result["catalog_error"] = str(e)
+        if progress:
+            progress(f"Catalogue des sauvegardes : {e}")
+
+
+def job_mode(job):
+    """Mode de sauvegarde d'un job, tel qu'il est noté dans le compte rendu d'exécution."""
+    if job["export_format"]:
+        return "export"
+    for mode in ("repository", "incremental", "parallel"):
+        if job[mode]:
+            return mode
+    # Les points de reprise n'existent que pour les sauvegardes par table
+    if job["checkpoint"] or job["resume"]:
+        return "parallel"
+    if job["subset_tables"]:
+        return "subset"
+    return "volumes" if job["volume_size"] else "archive"
+
+
+def per_table_output(job, output_file_base, progress=None):
+    """
+    Dossier d'une sauvegarde par table et ses points de reprise (None sans job["checkpoint"]).
+    Avec job["resume"], la dernière sauvegarde interrompue de la base est reprise, si elle
+    existe, après vérification de ses fichiers terminés. Retourne (dossier, Checkpoint ou None).
+    """
+    output_path = os.path.join(job["output_folder"], output_file_base)
+    if not (job["checkpoint"] or job["resume"]):
+        return output_path, None
+    if job["resume"]:
+        resumable = find_resumable_backup(job["output_folder"], job["db_name"])
+        if resumable:
+            checkpoint = Checkpoint(resumable, job["db_name"], job["compression"])
+            if progress:
+                progress(f"Vérification des fichiers terminés de la sauvegarde interrompue '{resumable}'...")
+            invalid = checkpoint.verify()
+            if invalid and progress:
+                progress(f"{len(invalid)} fichiers endommagés seront exportés à nouveau : {', '.join(invalid)}")
+            return resumable, checkpoint
+    return output_path, Checkpoint(output_path, job["db_name"], job["compression"])
+
+
+def estimate_in_background(job, conn_args, tracker, timer):
+    """
+    Estime la taille du dump (information_schema) dans un thread, pendant que mysqldump démarre :
+    l'estimation complète tracker dès qu'elle est connue, sans retarder le premier octet exporté.
+    La durée de la requête est notée comme phase "connect". Retourne le thread lancé, ou None
+    si le client mysql est introuvable (la sauvegarde se fait alors sans temps restant estimé).
+    """
+    mysql_exe_path = find_mysql_client(job["mysqldump_path"])
+    if not mysql_exe_path:
+        return None
+
+    def estimate():
+        with timer.phase("connect"):
+            try:
+                tracker.estimated_size = estimate_dump_size(mysql_exe_path, conn_args, job["db_name"])
+            except DumpError:
+                pass # mysqldump signalera lui-même une erreur de connexion
+
+    thread = threading.Thread(target=estimate, daemon=True)
+    thread.start()
+    return thread
+
+
+def dump_database(job, timestamp=None, progress=None, cancellation=None, throttle=None):
+    """
+    Sauvegarde la base job["db_name"] selon le mode du job (options : README, mysqldumper.py dump --help),
+    puis écrit le compte rendu et note la sauvegarde au catalogue. Retourne un dictionnaire décrivant
+    le résultat ; lève DumpError en cas d'échec, DumpCancelled si cancellation l'interrompt.
+    """
+    if cancellation:
+        cancellation.check()
+    if job["volume_size"] and job_mode(job) != "volumes":
+        raise DumpError("Le découpage en volumes n'est disponible qu'avec le dump standard.")
+    if job["subset_tables"] and job_mode(job) != "subset":
+        raise DumpError("Le sous-ensemble n'est disponible qu'avec le dump standard.")
+    if job["copies"] and job_mode(job) not in ("archive", "subset"):
+        raise DumpError("Les copies simultanées ne sont disponibles qu'avec le dump standard, sans volumes.")
+    for copy in job["copies"]:
+        archive_extension(copy["compression"] or job["compression"]) # Vérifie que le format est connu
+    if job["engine"] not in DUMP_ENGINES:
+        raise DumpError(f"Moteur de dump inconnu : {job['engine']} (moteurs : {', '.join(DUMP_ENGINES)})")
+    if job["export_format"] and any(job[key] for key in ("repository", "incremental", "parallel", "checkpoint", "resume")):
+        raise DumpError("L'export CSV/TSV/Parquet ne se combine pas avec le dépôt, l'incrémental, "
+                        "le mode parallèle ou la reprise : le nombre de connexions suffit à le paralléliser.")
+    if job["engine"] == NATIVE_ENGINE and job_mode(job) not in ("archive", "volumes", "repository", "export"):
+        raise DumpError("Le moteur intégré n'est disponible qu'avec le dump standard (archive, volumes, copies) "
+                        "et le dépôt dédupliqué.")
+    if job["insert_size"] is not None and job["insert_size"] < 1:
+        raise DumpError("La taille des INSERT doit être un entier supérieur ou égal à 1 (Kio).")
+    if job["export_format"] and (job["insert_size"] or job["definer"] or job["rename_schema"]):
+        raise DumpError("La réécriture du SQL (taille des INSERT, DEFINER, nom de la base) ne s'applique pas à l'export.")
+    if job["repository"] and job["insert_size"]:
+        raise DumpError("La taille des INSERT ne se règle pas avec le dépôt dédupliqué : il a besoin d'une ligne par INSERT.")
+    if job["zero_copy"]:
+        if not zero_copy_available():
+            raise DumpError("L'écriture sans copie nécessite Linux (os.splice, Python 3.10 ou plus).")
+        if job_mode(job) not in ("archive", "subset") or job["engine"] == NATIVE_ENGINE:
+            raise DumpError("L'écriture sans copie n'est disponible qu'avec le dump standard par mysqldump, sans volumes.")
+        if job["compression"] not in ZERO_COPY_COMPRESSIONS:
+            raise DumpError(f"L'écriture sans copie n'est disponible qu'avec les formats {', '.join(ZERO_COPY_COMPRESSIONS)}.")
+        if any((copy["compression"] or job["compression"]) != job["compression"] for copy in job["copies"]):
+            raise DumpError("Avec l'écriture sans copie, les copies doivent avoir le format de la sauvegarde.")
+        if job["insert_size"] or job["definer"] or job["rename_schema"]:
+            raise DumpError("L'écriture sans copie ne se combine pas avec la réécriture du SQL : le SQL ne passe pas par le programme.")
+    rewrite = job_rewrite(job)
+    timestamp = timestamp or datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    db_name = job["db_name"]
+    output_file_base = f"{db_name}_{timestamp}"
+    conn_args = job_connection_args(job)
+    started = time.time()
+    timer = PhaseTimer()
+    monitor = None
+    shared_throttle = throttle is not None
+    if not shared_throttle:
+        throttle, monitor = job_throttle(job, conn_args, progress)
+    tracker = DumpProgress(db_name, report=progress, cancellation=cancellation, throttle=throttle, rewrite=rewrite)
+    # La taille de la base entière ne donnerait pas le temps restant d'un sous-ensemble ; une base SQLite n'a pas de serveur
+    estimate_thread = (None if job["subset_tables"] or job["native_source"]
+                       else estimate_in_background(job, conn_args, tracker, timer))
+    result = {
+        "database": db_name,
+        "host": job["db_host"],
+        "mode": job_mode(job),
+        "status": "ok",
+        "started": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds")
+    }
+    rewrite_settings = {key: job[key] for key in ("insert_size", "definer", "rename_schema") if job[key]}
+    if rewrite_settings:
+        result["rewrite"] = rewrite_settings
+
+    if monitor:
+        monitor.start()
+    try:
+        with timer.phase("dump"):
+            if job["repository"]:
+                repository = os.path.join(job["output_folder"], REPOSITORY_DIR)
+                if progress:
+                    progress(f"Sauvegarde de '{db_name}' dans le dépôt dédupliqué '{repository}'...")
+                command = job_dump_command(job, conn_args, REPOSITORY_DUMP_OPTIONS)
+                returncode, stderr_output, snapshot = dump_to_repository(command, repository, output_file_base, db_name,
+                                                                         job["compression"], job["compression_level"],
+                                                                         job["compression_threads"], tracker)
+                if returncode != 0:
+                    raise dump_error(returncode, stderr_output)
+                output_path = snapshot["path"]
+                result.update(size=snapshot["stored_bytes"], new_chunks=snapshot["new_chunks"],
+                              chunk_count=snapshot["chunk_count"])
+            elif job["incremental"]:
+                output_path, checkpoint = per_table_output(job, output_file_base, progress)
+                if progress:
+                    progress(f"Dump incrémental de '{db_name}' vers '{output_path}'...")
+                dump_incremental(job["mysqldump_path"], job_mysql_client(job), conn_args, db_name, output_path, job["workers"],
+                                 progress=progress, method=job["fingerprint_method"], compression=job["compression"],
+                                 level=job["compression_level"], threads=job["compression_threads"], tracker=tracker,
+                                 checkpoint=checkpoint)
+            elif job["parallel"] or job["checkpoint"] or job["resume"]:
+                output_path, checkpoint = per_table_output(job, output_file_base, progress)
+                if progress:
+                    progress(f"Dump parallèle de '{db_name}' vers '{output_path}'...")
+                dump_parallel(job["mysqldump_path"], job_mysql_client(job), conn_args, db_name, output_path, job["workers"],
+                              progress=progress, compression=job["compression"], level=job["compression_level"],
+                              threads=job["compression_threads"], tracker=tracker, checkpoint=checkpoint)
+            elif job["subset_tables"]:
+                output_path = os.path.join(job["output_folder"], output_file_base + archive_extension(job["compression"]))
+                rule = parse_sample_rule(job["subset_sample"])
+                with timer.phase("subset"):
+                    selection = plan_subset(job_mysql_client(job), conn_args, db_name,
+                                            parse_table_list(job["subset_tables"]), rule, progress)
+                if progress:
+                    progress(f"Sauvegarde du sous-ensemble de '{db_name}' ({len(selection)} tables) vers '{output_path}'...")
+                commands = subset_commands(job["mysqldump_path"], conn_args, db_name, selection)
+                write_archives(job, commands, output_path, output_file_base, tracker, result, progress)
+                result.update(subset_tables=sorted(selection),
+                              subset_keys=sum(len(entry["keys"]) for entry in selection.values()))
+            elif job["export_format"]:
+                output_path = os.path.join(job["output_folder"], output_file_base)
+                if progress:
+                    progress(f"Export {job['export_format']} de '{db_name}' vers '{output_path}'...")
+                manifest = export_database(lambda: job_native_source(job), db_name, output_path, job["export_format"],
+                                           job["workers"], job["compression"], job["compression_level"],
+                                           job["compression_threads"], tracker, progress)
+                result.update(export_format=job["export_format"], tables=len(manifest["tables"]),
+                              rows=sum(table["rows"] for table in manifest["tables"]))
+            elif job["volume_size"]:
+                output_path = os.path.join(job["output_folder"], output_file_base)
+                if progress:
+                    progress(f"Sauvegarde de '{db_name}' en volumes de {job['volume_size']} Mo ({job['compression']}) "
+                             f"vers '{output_path}'...")
+                command = job_dump_command(job, conn_args)
+                returncode, stderr_output = dump_to_volumes(command, output_path, output_file_base, db_name,
+                                                            job["compression"], job["volume_size"] * 1024 * 1024,
+                                                            job["compression_level"], job["compression_threads"], tracker)
+                if returncode != 0:
+                    raise dump_error(returncode, stderr_output)
+                result["volumes"] = len(load_volumes(output_path)["volumes"])
+            else:
+                output_path = os.path.join(job["output_folder"], output_file_base + archive_extension(job["compression"]))
+                if progress:
+                    progress(f"Sauvegarde et compression ({job['compression']}) en cours de '{db_name}' vers '{output_path}'...")
+                command = job_dump_command(job, conn_args)
+                write_archives(job, [command], output_path, output_file_base, tracker, result, progress)
+        # Compression et écriture se font au fil de l'export : leur durée est comprise dans celle du dump
+        timer.add("compress", tracker.compress_time)
+        with timer.phase("fsync"):
+            fsync_path(output_path)
+            for copy in result.get("copies", []):
+                fsync_path(copy["path"])
+        result["path"] = output_path
+        result.setdefault("size", path_size(output_path))
+    except DumpCancelled as e:
+        result.update(status="cancelled", error=str(e))
+        raise
+    except Exception as e:
+        result.update(status="error", error=str(e))
+        raise
+    finally:
+        if monitor:
+            monitor.stop()
+        if estimate_thread is not None:
+            estimate_thread.join()
+        if throttle and not shared_throttle:
+            # Attentes cumulées de tous les flux, comme la compression
+            timer.add("throttle", throttle.waited)
+            result["throttle"] = throttle.as_dict()
+        duration = time.time() - started
+        result.update(
+            stream_size=tracker.bytes,
+            statements=tracker.statements,
+            estimated_size=tracker.estimated_size,
+            throughput=round(tracker.bytes / duration) if duration > 0 else None,
+            phases=timer.as_dict(),
+            duration=round(duration, 3),
+            run_record=os.path.join(job["output_folder"], output_file_base + RUN_RECORD_SUFFIX)
+        )
+        update_catalog(job, result, progress)
+        try:
+            write_run_record(result["run_record"], result)
+        except OSError:
+            result["run_record"] = None # Le compte rendu ne doit pas masquer le résultat de la sauvegarde
+    return result
@@ -0,0 +1,124 @@
+import datetime
+import json
+import threading
+
+from dump_pipeline import DumpError
+
+# --- Raccourcis acceptés à la place d'une expression cron ---
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *"
+}
+
+# Bornes des cinq champs : minute, heure, jour du mois, mois, jour de la semaine (0 = dimanche)
+CRON_FIELDS = ((0, 59), (0, 23),(1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(field, low, high):
+    """Retourne l'ensemble des valeurs d'un champ cron ("*", "1-5", "*/15", "1,15,30"...)."""
+    values = set()
+    for part in field.split(","):
+        range_part, _, step = part.partition("/")
+        if range_part == "*":
+            start, end = low, high
+        elif "-" in range_part:
+            start, end = (int(bound) for bound in range_part.split("-", 1))
+        else:
+            start = end = int(range_part)
+        step = int(step) if step else 1
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(part)
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Expression cron à cinq champs (minute heure jour mois jour-de-la-semaine) ou raccourci @daily, etc."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise DumpError(f"Expression cron invalide (5 champs attendus) : {expression}")
+        try:
+            parsed = [_parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)]
+        except ValueError:
+            raise DumpError(f"Expression cron invalide : {expression}")
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays} # 7 et 0 désignent tous deux le dimanche
+        # Comme cron : si le jour du mois et le jour de la semaine sont restreints, l'un ou l'autre suffit
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches(self, moment):
+        """Indique si la minute de moment correspond à l'expression."""
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        day_match = moment.day in self.days
+        weekday_match = (moment.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+
+def load_schedule(config_path):
+    """
+    Lit le fichier de configuration du démon : {"jobs": [{"name", "schedule", ...}]}.
+    Chaque job doit avoir un nom unique et une expression cron (schedule) ; ses autres
+    clés sont transmises telles quelles. Retourne (configuration, [(job, CronSchedule)]).
+    """
+    try:
+        with open(config_path) as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        raise DumpError(f"Fichier de configuration introuvable : {config_path}")
+    except ValueError as e:
+        raise DumpError(f"Fichier de configuration illisible ({config_path}) : {e}")
+    scheduled = []
+    names = set()
+    for job in config.get("jobs", []):
+        if not job.get("name") or not job.get("schedule"):
+            raise DumpError("Chaque job du démon doit avoir un nom (name) et une planification (schedule).")
+        if job["name"] in names:
+            raise DumpError(f"Nom de job en double dans la configuration : {job['name']}")
+        names.add(job["name"])
+        scheduled.append((job, CronSchedule(job["schedule"])))
+    if not scheduled:
+        raise DumpError(f"Aucun job planifié dans {config_path}.")
+    return config, scheduled
+
+
+def run_daemon(scheduled, run_job, log=print, stop_event=None, now=datetime.datetime.now):
+    """
+    Exécute run_job(job) à chaque minute où la planification d'un job correspond,
+    chacun dans son propre thread. Un job encore en cours n'est pas relancé (l'exécution
+    manquée est signalée). S'arrête quand stop_event est positionné, après la fin des
+    jobs en cours.
+    """
+    stop_event = stop_event or threading.Event()
+    running = {}
+    last_minute = None
+    log(f"Démon démarré : {len(scheduled)} jobs planifiés.")
+    while not stop_event.is_set():
+        minute = now().replace(second=0, microsecond=0)
+        if minute != last_minute:
+            last_minute = minute
+            for job, schedule in scheduled:
+                if not schedule.matches(minute):
+                    continue
+                thread = running.get(job["name"])
+                if thread is not None and thread.is_alive():
+                    log(f"[{job['name']}] exécution de {minute:%H:%M} ignorée : l'exécution précédente n'est pas terminée.")
+                    continue
+                thread = threading.Thread(target=run_job, args=(job,), name=job["name"])
+                running[job["name"]] = thread
+                thread.start()
+        # Réveil au début de la minute suivante
+        current = now()
+        stop_event.wait(60 - current.second - current.microsecond / 1000000)
+    log("Arrêt du démon : attente de la fin des jobs en cours...")
+    for thread in running.values():
+        thread.join()
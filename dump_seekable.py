@@ -0,0 +1,266 @@
+import argparse
+import collections
+import gzip
+import json
+import os
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from dump_pipeline import SECTION_MARKER, TAIL_MARKER, DumpError, HashingFile
+
+# --- Archive "seekable" : un .sql.gz standard fait de membres gzip indépendants (les "frames") ---
+# L'index <archive>.index.json donne les frames de chaque section du dump.
+SEEKABLE_FRAME_SIZE = 4 * 1024 * 1024  # Taille maximale (non compressée) d'une frame
+SEEKABLE_INDEX_SUFFIX = ".index.json"
+
+
+def _compress_frame(data, level):
+    """Compresse une frame en un membre gzip complet ; zlib libère le GIL pendant la compression."""
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class SeekableGzipWriter:
+    """
+    Writer qui compresse un flux de mysqldump en frames gzip indépendantes.
+
+    Une nouvelle frame commence à chaque section (en-tête, table, structure temporaire
+    de vue, partie finale) et au plus tous les frame_size octets : une section occupe
+    donc des frames qui lui sont propres. Les frames sont compressées en parallèle ;
+    l'index est écrit à la fermeture.
+    """
+
+    def __init__(self, path, level=None, threads=None, frame_size=SEEKABLE_FRAME_SIZE):
+        self.file = HashingFile(path)
+        self.index_path = path + SEEKABLE_INDEX_SUFFIX
+        self.level = 6 if level is None else level
+        self.threads = threads or os.cpu_count() or 1
+        self.frame_size = frame_size
+        self.executor = ThreadPoolExecutor(max_workers=self.threads)
+        self.pending = collections.deque()
+        self.text = bytearray()
+        self.buffer = bytearray()
+        self.frames = []
+        self.frame_count = 0
+        self.raw_offset = 0
+        self.offset = 0
+        self.crc = 0
+        self.sections = [{"name": None, "kind": "header", "first_frame": 0}]
+        self.in_tail = False
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.text += data
+        end = self.text.rfind(b"\n") + 1
+        # Un "--" en fin de bloc peut être la première ligne d'un marqueur coupé entre deux lectures
+        if end >= 3 and self.text[end - 3:end] == b"--\n" and (end == 3 or self.text[end - 4] == 0x0A):
+            end -= 3
+        if end:
+            block = bytes(self.text[:end])
+            del self.text[:end]
+            self._process(block)
+        # Une très longue ligne (INSERT étendu) n'a pas besoin d'attendre sa fin
+        if len(self.text) > self.frame_size:
+            self._append(bytes(self.text))
+            self.text.clear()
+        return len(data)
+
+    def _process(self, block):
+        if self.in_tail:
+            self._append(block)
+            return
+        tail = TAIL_MARKER.search(block)
+        limit = tail.start() if tail else len(block)
+        position = 0
+        for match in SECTION_MARKER.finditer(block, 0, limit):
+            self._append(block[position:match.start()])
+            name = match.group(1).replace(b"``", b"`").decode("utf-8", errors="replace")
+            self._start_section(name, "view" if b"Temporary" in match.group(0) else "table")
+            position = match.start()
+        self._append(block[position:limit])
+        if tail:
+            self.in_tail = True
+            self._start_section(None, "tail")
+            self._append(block[limit:])
+
+    def _start_section(self, name, kind):
+        self._cut_frame()
+        self.sections.append({"name": name, "kind": kind, "first_frame": self.frame_count})
+
+    def _append(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.frame_size:
+            frame = bytes(self.buffer[:self.frame_size])
+            del self.buffer[:self.frame_size]
+            self._submit(frame)
+
+    def _cut_frame(self):
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+            self.buffer.clear()
+
+    def _submit(self, frame):
+        self.pending.append((self.executor.submit(_compress_frame, frame, self.level), self.raw_offset, len(frame)))
+        self.raw_offset += len(frame)
+        self.frame_count += 1
+        # Les frames sont écrites dans l'ordre ; au-delà de 2 frames par thread, on attend la plus ancienne
+        while len(self.pending) > self.threads * 2:
+            self._write_frame()
+
+    def _write_frame(self):
+        future, raw_offset, raw_length = self.pending.popleft()
+        member = future.result()
+        self.file.write(member)
+        self.frames.append([self.offset, len(member), raw_offset, raw_length])
+        self.offset += len(member)
+
+    def close(self):
+        try:
+            if self.text:
+                self._process(bytes(self.text))
+                self.text.clear()
+            self._cut_frame()
+            while self.pending:
+                self._write_frame()
+        finally:
+            self.executor.shutdown(wait=True)
+            self.file.close()
+        sections = []
+        for position, section in enumerate(self.sections):
+            last_frame = self.sections[position + 1]["first_frame"] if position + 1 < len(self.sections) else self.frame_count
+            if last_frame > section["first_frame"]:
+                sections.append({"name": section["name"], "kind": section["kind"],
+                                 "frames": [section["first_frame"], last_frame - section["first_frame"]]})
+        index = {
+            "format": "mysqldumper-seekable",
+            "version": 1,
+            "compression": "gzip",
+            "frame_size": self.frame_size,
+            "size": self.raw_offset,
+            "crc32": self.crc & 0xFFFFFFFF,
+            "frames": self.frames,
+            "sections": sections
+        }
+        with open(self.index_path, 'w') as f:
+            json.dump(index, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_seekable_index(archive_path):
+    """Retourne l'index d'une archive seekable, ou None si l'archive n'en a pas."""
+    try:
+        with open(archive_path + SEEKABLE_INDEX_SUFFIX) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    if index.get("format") != "mysqldumper-seekable":
+        raise DumpError(f"Index non reconnu : {archive_path + SEEKABLE_INDEX_SUFFIX}")
+    return index
+
+
+def section_size(index, section):
+    """Taille non compressée d'une section."""
+    first, count = section["frames"]
+    return sum(frame[3] for frame in index["frames"][first:first + count])
+
+
+class FrameReader:
+    """
+    Objet fichier en lecture qui décompresse, dans l'ordre, une liste de frames
+    d'une archive seekable : seules ces frames sont lues sur le disque.
+    """
+
+    def __init__(self, archive_path, index, frame_numbers):
+        self.file = open(archive_path, 'rb')
+        self.frames = [index["frames"][number] for number in frame_numbers]
+        self.position = 0
+        self.buffer = b""
+
+    def read(self, size=-1):
+        while (size < 0 or len(self.buffer) < size) and self.position < len(self.frames):
+            offset, length, _, raw_length = self.frames[self.position]
+            self.position += 1
+            self.file.seek(offset)
+            data = gzip.decompress(self.file.read(length))
+            if len(data) != raw_length:
+                raise DumpError(f"Frame corrompue dans l'archive (position {offset}).")
+            self.buffer += data
+        if size < 0:
+            data, self.buffer = self.buffer, b""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def section_frames(index, sections):
+    """Numéros des frames des sections données, précédées de celles de l'en-tête du dump."""
+    numbers = []
+    for section in [section for section in index["sections"] if section["kind"] == "header"] + list(sections):
+        first, count = section["frames"]
+        numbers.extend(range(first, first + count))
+    return numbers
+
+
+def open_table_reader(archive_path, table_names, index=None):
+    """
+    Ouvre en lecture le SQL de quelques tables d'une archive seekable : l'en-tête du
+    dump suivi des sections de ces tables, sans décompresser le reste de l'archive.
+    """
+    index = index or load_seekable_index(archive_path)
+    if index is None:
+        raise DumpError(f"L'archive n'a pas d'index ({SEEKABLE_INDEX_SUFFIX}) : {archive_path}")
+    sections = [section for section in index["sections"] if section["kind"] == "table" and section["name"] in table_names]
+    missing = set(table_names) - {section["name"] for section in sections}
+    if missing:
+        raise DumpError("Tables absentes de l'archive : " + ", ".join(sorted(missing)))
+    return FrameReader(archive_path, index, section_frames(index, sections))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lecture sélective d'une archive seekable (.sql.gz + .index.json).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="Liste les tables de l'archive")
+    list_parser.add_argument("archive")
+    extract_parser = subparsers.add_parser("extract", help="Extrait le SQL de quelques tables")
+    extract_parser.add_argument("archive")
+    extract_parser.add_argument("tables", nargs="+")
+    extract_parser.add_argument("-o", "--output", help="Fichier .sql de sortie (défaut : sortie standard)")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "list":
+            index = load_seekable_index(args.archive)
+            if index is None:
+                raise DumpError(f"L'archive n'a pas d'index ({SEEKABLE_INDEX_SUFFIX}) : {args.archive}")
+            for section in index["sections"]:
+                if section["kind"] in ("table", "view"):
+                    print(f"{section['name']}\t{section['kind']}\t{section_size(index, section)} octets")
+        else:
+            output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+            try:
+                with open_table_reader(args.archive, args.tables) as reader:
+                    while True:
+                        data = reader.read(1024 * 1024)
+                        if not data:
+                            break
+                        output.write(data)
+            finally:
+                if args.output:
+                    output.close()
+    except DumpError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,236 @@
+import collections
+import re
+
+from dump_parallel import TRIGGER_OPTIONS
+from dump_pipeline import DumpError, build_mysqldump_command
+from mysql_client import quote_identifier, quote_string, run_query
+
+# --- Sous-ensemble cohérent d'une base (jeu de données de développement) ---
+# Données des tables du sous-ensemble, sans triggers (chargés après toutes les données)
+SUBSET_DATA_OPTIONS = ["--skip-routines", "--skip-events", "--skip-triggers"]
+# Structure des autres tables, vues, routines et événements
+SUBSET_SCHEMA_OPTIONS = ["--no-data", "--skip-triggers"]
+
+# Longueur maximale d'une clause --where : au-delà, les clés sont exportées en plusieurs
+# passes (la ligne de commande est limitée à 32 767 caractères sous Windows)
+MAX_WHERE_LENGTH = 8000
+# Nombre de clés relues par requête pendant le parcours des clés étrangères
+KEY_BATCH = 1000
+# Échantillon en pourcentage : une ligne est retenue d'après le CRC32 de sa clé primaire,
+# le même d'une exécution à l'autre
+PERCENT_SCALE = 10000
+
+
+def parse_table_list(text):
+    """Découpe une saisie du type "orders, customers" en liste de noms de tables."""
+    return [name for name in re.split(r"[,\s]+", (text or "").strip()) if name]
+
+
+def parse_sample_rule(text):
+    """
+    Interprète une règle d'échantillonnage : "10%" (pourcentage des lignes), "1000"
+    (nombre de lignes, dans l'ordre de la clé primaire) ou une condition WHERE.
+    Retourne (type, valeur) avec type "percent", "limit" ou "where".
+    """
+    text = (text or "").strip()
+    if not text:
+        raise DumpError("Indiquez la règle d'échantillonnage du sous-ensemble (10%, 1000 ou une condition WHERE).")
+    match = re.fullmatch(r"(\d+(?:[.,]\d+)?)\s*%", text)
+    if match:
+        percent = float(match.group(1).replace(",", "."))
+        if not 0 < percent <= 100:
+            raise DumpError(f"Le pourcentage de l'échantillon doit être compris entre 0 et 100 : {text}")
+        return "percent", percent
+    if text.isdigit():
+        if int(text) < 1:
+            raise DumpError("Le nombre de lignes de l'échantillon doit être supérieur ou égal à 1.")
+        return "limit", int(text)
+    if re.match(r"(?i)where\s", text):
+        text = text[len("where"):].strip()
+    return "where", text
+
+
+def list_foreign_keys(mysql_exe_path, conn_args, db_name):
+    """
+    Lit les clés étrangères de la base dans information_schema.KEY_COLUMN_USAGE (celles qui
+    référencent une autre base sont ignorées). Retourne {table: [{"name", "columns",
+    "parent", "parent_columns"}]}.
+    """
+    sql = ("SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+           "FROM information_schema.KEY_COLUMN_USAGE "
+           f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND REFERENCED_TABLE_SCHEMA = {quote_string(db_name)} "
+           "AND REFERENCED_TABLE_NAME IS NOT NULL "
+           "ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION")
+    constraints = {}
+    for table_name, constraint_name, column_name, parent, parent_column in run_query(mysql_exe_path, conn_args, sql):
+        constraint = constraints.setdefault((table_name, constraint_name), {
+            "name": constraint_name, "columns": [], "parent": parent, "parent_columns": []})
+        constraint["columns"].append(column_name)
+        constraint["parent_columns"].append(parent_column)
+    foreign_keys = {}
+    for (table_name, _), constraint in constraints.items():
+        foreign_keys.setdefault(table_name, []).append(constraint)
+    return foreign_keys
+
+
+def list_primary_keys(mysql_exe_path, conn_args, db_name):
+    """Retourne {table: [colonnes de la clé primaire]}."""
+    sql = ("SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE "
+           f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND CONSTRAINT_NAME = 'PRIMARY' "
+           "ORDER BY TABLE_NAME, ORDINAL_POSITION")
+    primary_keys = {}
+    for table_name, column_name in run_query(mysql_exe_path, conn_args, sql):
+        primary_keys.setdefault(table_name, []).append(column_name)
+    return primary_keys
+
+
+def column_list(columns):
+    """`a` ou (`a`, `b`) : membre gauche d'une comparaison sur une ou plusieurs colonnes."""
+    quoted = [quote_identifier(column) for column in columns]
+    return quoted[0] if len(quoted) == 1 else "(" + ", ".join(quoted) + ")"
+
+
+def key_values_clause(columns, keys):
+    """Condition `col` IN (...) qui sélectionne les lignes dont la clé est dans keys."""
+    if len(columns) == 1:
+        values = ", ".join(quote_string(key[0]) for key in keys)
+    else:
+        values = ", ".join("(" + ", ".join(quote_string(value) for value in key) + ")" for key in keys)
+    return f"{column_list(columns)} IN ({values})"
+
+
+def key_batches(columns, keys, max_length=MAX_WHERE_LENGTH):
+    """Découpe keys (triées) en conditions IN d'au plus max_length caractères (une clé au moins par condition)."""
+    batch = []
+    length = 0
+    for key in sorted(keys):
+        size = sum(len(value) + 4 for value in key) + 4
+        if batch and length + size > max_length:
+            yield key_values_clause(columns, batch)
+            batch, length = [], 0
+        batch.append(key)
+        length += size
+    if batch:
+        yield key_values_clause(columns, batch)
+
+
+def sample_clause(rule, primary_key):
+    """Condition SQL d'une règle "percent" ou "where" sur une table racine."""
+    kind, value = rule
+    if kind == "where":
+        return f"({value})"
+    columns = ", ".join(quote_identifier(column) for column in primary_key)
+    return f"CRC32(CONCAT_WS(0x1f, {columns})) % {PERCENT_SCALE} < {round(value * PERCENT_SCALE / 100)}"
+
+
+def plan_subset(mysql_exe_path, conn_args, db_name, root_tables, rule, progress=None):
+    """
+    Calcule le sous-ensemble : les lignes des tables racines retenues par rule
+    (parse_sample_rule), plus, de proche en proche, toutes les lignes qu'elles référencent.
+    Retourne {table: {"clause": condition de la règle ou None, "key": colonnes de la clé,
+    "keys": ensemble des clés ajoutées}} ; une ligne appartient au sous-ensemble si elle
+    vérifie la condition ou si sa clé est dans l'ensemble. Les requêtes sont exécutées
+    avec le client mysql ; les clés sont relues par lots de KEY_BATCH.
+    """
+    def report(message):
+        if progress:
+            progress(message)
+
+    def table_ref(table_name):
+        return f"{quote_identifier(db_name)}.{quote_identifier(table_name)}"
+
+    report(f"Lecture des clés étrangères de '{db_name}'...")
+    foreign_keys = list_foreign_keys(mysql_exe_path, conn_args, db_name)
+    primary_keys = list_primary_keys(mysql_exe_path, conn_args, db_name)
+    existing = {row[0] for row in run_query(mysql_exe_path, conn_args,
+                                            "SELECT TABLE_NAME FROM information_schema.TABLES "
+                                            f"WHERE TABLE_SCHEMA = {quote_string(db_name)} AND TABLE_TYPE = 'BASE TABLE'")}
+    missing = [table_name for table_name in root_tables if table_name not in existing]
+    if missing:
+        raise DumpError(f"Tables introuvables dans '{db_name}' : " + ", ".join(missing))
+
+    selection = {}
+    pending = collections.deque() # (table, condition sur les lignes ajoutées dont il faut suivre les clés)
+
+    def selected(table_name, key):
+        if table_name not in selection:
+            selection[table_name] = {"clause": None, "key": key, "keys": set()}
+        elif selection[table_name]["key"] is None:
+            selection[table_name]["key"] = key # Table racine sans clé primaire, référencée par une autre
+        return selection[table_name]
+
+    def add_keys(table_name, keys):
+        entry = selection[table_name]
+        new_keys = sorted(set(keys) - entry["keys"])
+        entry["keys"].update(new_keys)
+        for start in range(0, len(new_keys), KEY_BATCH):
+            pending.append((table_name, key_values_clause(entry["key"], new_keys[start:start + KEY_BATCH])))
+
+    kind, value = rule
+    for table_name in root_tables:
+        primary_key = primary_keys.get(table_name)
+        if kind != "where" and not primary_key:
+            raise DumpError(f"La table '{table_name}' n'a pas de clé primaire : utilisez une condition WHERE "
+                            "comme règle d'échantillonnage.")
+        entry = selected(table_name, primary_key)
+        if kind == "limit":
+            # Les premières lignes dans l'ordre de la clé primaire : le même échantillon d'une exécution à l'autre
+            sql = (f"SELECT {', '.join(quote_identifier(column) for column in primary_key)} FROM {table_ref(table_name)} "
+                   f"ORDER BY {', '.join(quote_identifier(column) for column in primary_key)} LIMIT {value}")
+            add_keys(table_name, [tuple(row) for row in run_query(mysql_exe_path, conn_args, sql)])
+        else:
+            entry["clause"] = sample_clause(rule, primary_key)
+            pending.append((table_name, entry["clause"]))
+
+    while pending:
+        table_name, condition = pending.popleft()
+        for foreign_key in foreign_keys.get(table_name, []):
+            parent = foreign_key["parent"]
+            # Une table référencée est identifiée par sa clé primaire, à défaut par les colonnes référencées (uniques)
+            parent_entry = selected(parent, primary_keys.get(parent) or foreign_key["parent_columns"])
+            key = ", ".join(quote_identifier(column) for column in parent_entry["key"])
+            sql = (f"SELECT DISTINCT {key} FROM {table_ref(parent)} "
+                   f"WHERE {column_list(foreign_key['parent_columns'])} IN "
+                   f"(SELECT {', '.join(quote_identifier(column) for column in foreign_key['columns'])} "
+                   f"FROM {table_ref(table_name)} WHERE {condition})")
+            add_keys(parent, [tuple(row) for row in run_query(mysql_exe_path, conn_args, sql)])
+        report(f"Sous-ensemble de '{db_name}' : {len(selection)} tables, "
+               f"{sum(len(entry['keys']) for entry in selection.values())} lignes référencées...")
+    return selection
+
+
+def subset_where_clauses(entry, max_length=MAX_WHERE_LENGTH):
+    """
+    Clauses --where qui exportent une table du sous-ensemble sans doublon : la condition de
+    la règle avec le premier lot de clés, puis les lots suivants privés des lignes déjà exportées.
+    Une condition qui vaut NULL (colonne NULL) n'a pas retenu la ligne : COALESCE la compte
+    comme fausse, sinon NOT (NULL) écarterait aussi la ligne des lots suivants.
+    """
+    batches = list(key_batches(entry["key"], entry["keys"], max_length)) if entry["keys"] else []
+    clause = entry["clause"]
+    if clause is None:
+        return batches
+    if not batches:
+        return [clause]
+    return [f"{clause} OR {batches[0]}"] + [f"({batch}) AND NOT COALESCE(({clause}), FALSE)" for batch in batches[1:]]
+
+
+def subset_commands(mysqldump_exe_path, conn_args, db_name, selection):
+    """
+    Commandes mysqldump qui produisent le sous-ensemble, à enchaîner dans un même flux
+    (dump_compression.dump_to_archives) :
+    les tables du sous-ensemble avec leurs lignes, la structure des autres tables, les vues,
+    routines et événements, puis les triggers de toutes les tables.
+    """
+    commands = []
+    for table_name in sorted(selection):
+        for index, where in enumerate(subset_where_clauses(selection[table_name])):
+            extra_args = SUBSET_DATA_OPTIONS + [f"--where={where}"]
+            if index > 0:
+                extra_args.append("--no-create-info") # Seule la première passe recrée la table
+            commands.append(build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, extra_args, tables=[table_name]))
+    ignored = [f"--ignore-table={db_name}.{table_name}" for table_name in sorted(selection)]
+    commands.append(build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, SUBSET_SCHEMA_OPTIONS + ignored))
+    commands.append(build_mysqldump_command(mysqldump_exe_path, conn_args, db_name, TRIGGER_OPTIONS))
+    return commands
+
@@ -0,0 +1,249 @@
+import threading
+import time
+
+from dump_pipeline import DumpError
+from mysql_client import run_query
+
+# --- Limitation du débit d'une sauvegarde ---
+# Ralentir l'écriture ralentit aussi la lecture : quand le pipeline attend, le tube se
+# remplit et mysqldump cesse de lire les résultats du serveur.
+BURST = 0.25  # Avance maximale accordée à un flux après une période calme (secondes de débit)
+WAIT_SLICE = 0.5  # Une attente est découpée en tranches pour réagir vite à une annulation
+
+# --- Mode adaptatif ---
+DEFAULT_MAX_THREADS_RUNNING = 32
+DEFAULT_MAX_REPLICA_LAG = 60  # secondes
+DEFAULT_POLL_INTERVAL = 5.0  # secondes entre deux relevés de charge
+SLOWDOWN_RATIO = 0.75  # Au-delà de 75 % d'un seuil, le flux est ralenti ; au-delà du seuil, il est suspendu
+SLOWDOWN_FACTOR = 0.5  # Débit conservé en mode ralenti, par rapport à la limite configurée
+SLOW_RATE = 5 * 1024 * 1024  # Débit en mode ralenti quand aucune limite n'est configurée (octets/s)
+# Un client qui ne lit plus est déconnecté par le serveur au bout de net_write_timeout (60 s par
+# défaut) : une pause plus longue ferait échouer mysqldump. Passé ce délai, le flux repart au
+# débit ralenti, même si la charge reste au-dessus du seuil.
+MAX_PAUSE = 30.0
+
+LOAD_STATES = ("normal", "slow", "paused")
+
+
+class RateLimiter:
+    """
+    Limite de débit partagée par tous les flux d'une sauvegarde (ou d'un batch), en octets
+    par seconde (rate=None : pas de limite). L'état "slow" réduit le débit, "paused"
+    suspend les flux pendant au plus MAX_PAUSE secondes ; l'état est fixé par un LoadMonitor.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.state = "normal"
+        self.paused_since = None
+        self.next_slot = time.monotonic()
+        self.waited = 0.0
+        self.pauses = 0
+        self.slowdowns = 0
+
+    def set_state(self, state):
+        with self.lock:
+            if state == self.state:
+                return
+            if state == "paused":
+                self.paused_since = time.monotonic()
+                self.pauses += 1
+            elif state == "slow":
+                self.slowdowns += 1
+            self.state = state
+
+    def current_rate(self, now):
+        """Débit autorisé à l'instant now (None : illimité, 0 : en pause) ; appelé sous self.lock."""
+        if self.state == "normal":
+            return self.rate
+        if self.state == "paused" and now - self.paused_since < MAX_PAUSE:
+            return 0
+        return self.rate * SLOWDOWN_FACTOR if self.rate else SLOW_RATE
+
+    def consume(self, size, cancellation=None):
+        """
+        Attend que size octets puissent passer. Les flux réservent tour à tour leur créneau :
+        leur débit cumulé ne dépasse pas la limite. Lève DumpCancelled si cancellation
+        (dump_pipeline.Cancellation) est annulée pendant l'attente.
+        """
+        started = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                rate = self.current_rate(now)
+                if rate is None:
+                    self.next_slot = now
+                    return
+                if rate:
+                    self.next_slot = max(self.next_slot, now - BURST) + size / rate
+                    deadline = self.next_slot
+                    break
+            self._sleep(WAIT_SLICE, cancellation) # En pause : l'état est relu à chaque tranche
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._sleep(min(remaining, WAIT_SLICE), cancellation)
+        with self.lock:
+            self.waited += time.monotonic() - started
+
+    @staticmethod
+    def _sleep(seconds, cancellation):
+        if cancellation:
+            cancellation.check()
+        time.sleep(seconds)
+        if cancellation:
+            cancellation.check()
+
+    def as_dict(self):
+        """Résumé de la limitation, pour le compte rendu d'exécution."""
+        return {
+            "max_rate": self.rate,
+            "waited": round(self.waited, 3),
+            "pauses": self.pauses,
+            "slowdowns": self.slowdowns
+        }
+
+
+class ThrottleWriter:
+    """Writer transparent qui fait passer chaque bloc par un RateLimiter avant de le transmettre."""
+
+    def __init__(self, writer, limiter, cancellation=None):
+        self.writer = writer
+        self.limiter = limiter
+        self.cancellation = cancellation
+
+    def write(self, data):
+        self.limiter.consume(len(data), self.cancellation)
+        return self.writer.write(data)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_threads_running(mysql_exe_path, conn_args):
+    """Nombre de requêtes en cours d'exécution sur le serveur (Threads_running)."""
+    rows = run_query(mysql_exe_path, conn_args, "SHOW GLOBAL STATUS LIKE 'Threads_running'")
+    return int(rows[0][1]) if rows else None
+
+
+def read_replica_lag(mysql_exe_path, conn_args):
+    """
+    Retard de réplication du serveur en secondes, ou None s'il n'est pas un réplica ou si la
+    réplication est arrêtée. SHOW REPLICA STATUS (MySQL 8.0.22+) est essayé avant SHOW SLAVE STATUS.
+    """
+    try:
+        rows = run_query(mysql_exe_path, conn_args, "SHOW REPLICA STATUS", column_names=True)
+    except DumpError:
+        rows = run_query(mysql_exe_path, conn_args, "SHOW SLAVE STATUS", column_names=True)
+    if len(rows) < 2:
+        return None
+    status = dict(zip(rows[0], rows[1]))
+    lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+    return int(lag) if lag is not None else None
+
+
+def evaluate_load(load, max_threads_running=None, max_replica_lag=None):
+    """
+    État à appliquer au flux d'après une mesure de charge ({"threads_running", "replica_lag"}) :
+    retourne (état, raison) ; un seuil à None n'est pas surveillé.
+    """
+    state, reason = "normal", None
+    for key, label, threshold in (("threads_running", "Threads_running", max_threads_running),
+                                  ("replica_lag", "retard de réplication (s)", max_replica_lag)):
+        value = load.get(key)
+        if threshold is None or value is None:
+            continue
+        if value >= threshold:
+            metric_state = "paused"
+        elif value >= threshold * SLOWDOWN_RATIO:
+            metric_state = "slow"
+        else:
+            continue
+        if LOAD_STATES.index(metric_state) > LOAD_STATES.index(state):
+            state, reason = metric_state, f"{label} = {value}, seuil {threshold}"
+    return state, reason
+
+
+class LoadMonitor:
+    """
+    Relève la charge du serveur (Threads_running, retard de réplication) toutes les
+    interval secondes dans un thread, et ralentit ou suspend les flux du RateLimiter
+    quand un seuil est approché ou dépassé. report(message) est appelé à chaque changement d'état.
+    """
+
+    def __init__(self, mysql_exe_path, conn_args, limiter, max_threads_running=DEFAULT_MAX_THREADS_RUNNING,
+                 max_replica_lag=DEFAULT_MAX_REPLICA_LAG, interval=DEFAULT_POLL_INTERVAL, report=None):
+        self.mysql_exe_path = mysql_exe_path
+        self.conn_args = list(conn_args)
+        self.limiter = limiter
+        self.max_threads_running = max_threads_running
+        self.max_replica_lag = max_replica_lag
+        self.interval = interval
+        self.report = report
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _report(self, message):
+        if self.report:
+            self.report(message)
+
+    def read_load(self):
+        load = {}
+        if self.max_threads_running is not None:
+            load["threads_running"] = read_threads_running(self.mysql_exe_path, self.conn_args)
+        if self.max_replica_lag is not None:
+            try:
+                load["replica_lag"] = read_replica_lag(self.mysql_exe_path, self.conn_args)
+            except DumpError as e:
+                # Le privilège REPLICATION CLIENT manque sans doute : le retard n'est plus surveillé
+                self.max_replica_lag = None
+                self._report(f"Retard de réplication non surveillé : {e}")
+        return load
+
+    def poll(self):
+        """Relève la charge une fois et applique l'état correspondant au RateLimiter."""
+        try:
+            state, reason = evaluate_load(self.read_load(), self.max_threads_running, self.max_replica_lag)
+        except DumpError as e:
+            self._report(f"Relevé de charge impossible, débit inchangé : {e}")
+            return
+        if state == self.limiter.state:
+            return
+        self.limiter.set_state(state)
+        if state == "paused":
+            self._report(f"Charge du serveur trop élevée ({reason}) : sauvegarde suspendue...")
+        elif state == "slow":
+            self._report(f"Charge du serveur en hausse ({reason}) : sauvegarde ralentie...")
+        else:
+            self._report("Charge du serveur revenue à la normale : reprise de la sauvegarde...")
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.poll()
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.limiter.set_state("normal")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,192 @@
+import json
+import os
+import shutil
+
+from dump_checkpoint import file_sha256
+from dump_compression import DEFAULT_COMPRESSION, archive_extension, open_archive_reader, open_archive_writer
+from dump_pipeline import DumpError, pump, stream_dump
+from dump_progress import tracked_writer
+from dump_seekable import SEEKABLE_INDEX_SUFFIX
+
+# --- Sauvegarde découpée en volumes ---
+# volumes.json et SHA256SUMS sont complétés à la fermeture de chaque volume : un volume listé est terminé.
+VOLUMES_FILE = "volumes.json"
+CHECKSUMS_FILE = "SHA256SUMS"
+MIN_VOLUME_SIZE = 1024 * 1024  # Un volume contient au moins un bloc lu sur la sortie de mysqldump
+
+
+def volume_name(base_name, number, extension):
+    return f"{base_name}.vol{number:04d}{extension}"
+
+
+class VolumeWriter:
+    """
+    Writer qui compresse un flux dans des volumes successifs d'environ volume_size octets
+    (taille compressée). Un volume est fermé à la première fin de ligne qui suit le
+    dépassement de la taille : aucune ligne SQL n'est coupée entre deux volumes. Les
+    compresseurs multi-thread gardent des blocs en mémoire : la taille d'un volume est
+    estimée d'après le taux de compression des volumes précédents, et le premier peut
+    dépasser la limite de ces quelques blocs.
+    """
+
+    def __init__(self, output_dir, base_name, database, compression=DEFAULT_COMPRESSION, volume_size=None,
+                 level=None, threads=None):
+        if not volume_size or volume_size < MIN_VOLUME_SIZE:
+            raise DumpError(f"La taille des volumes doit être d'au moins {MIN_VOLUME_SIZE // (1024 * 1024)} Mo.")
+        self.output_dir = output_dir
+        self.base_name = base_name
+        self.compression = compression
+        self.extension = archive_extension(compression)
+        self.volume_size = volume_size
+        self.level = level
+        self.threads = threads
+        self.manifest = {
+            "format": "mysqldumper-volumes",
+            "version": 1,
+            "database": database,
+            "compression": compression,
+            "volume_size": volume_size,
+            "complete": False,
+            "volumes": []
+        }
+        os.makedirs(output_dir)
+        self.writer = None
+        self._open_volume()
+
+    def _open_volume(self):
+        number = len(self.manifest["volumes"]) + 1
+        self.volume_file = volume_name(self.base_name, number, self.extension)
+        self.volume_path = os.path.join(self.output_dir, self.volume_file)
+        self.writer = open_archive_writer(self.volume_path, f"{self.base_name}.vol{number:04d}.sql",
+                                          self.compression, self.level, self.threads)
+
+    def _close_volume(self):
+        writer, self.writer = self.writer, None
+        writer.close()
+        entry = {"file": self.volume_file}
+        entry.update(writer.integrity()) # Empreintes calculées pendant l'écriture, sans relire le volume
+        checksums = [(entry["sha256"], entry["file"])]
+        if os.path.isfile(self.volume_path + SEEKABLE_INDEX_SUFFIX):
+            # Chaque volume seekable a son propre index de frames
+            entry["index"] = self.volume_file + SEEKABLE_INDEX_SUFFIX
+            checksums.append((file_sha256(self.volume_path + SEEKABLE_INDEX_SUFFIX), entry["index"]))
+        self.manifest["volumes"].append(entry)
+        with open(os.path.join(self.output_dir, CHECKSUMS_FILE), 'a') as f:
+            for digest, name in checksums:
+                f.write(f"{digest}  {name}\n")
+        self._save()
+
+    def _volume_full(self):
+        size = os.path.getsize(self.volume_path)
+        volumes = self.manifest["volumes"]
+        sql_size = sum(entry["sql_size"] for entry in volumes)
+        if sql_size:
+            size = max(size, self.writer.size * sum(entry["size"] for entry in volumes) / sql_size)
+        return size >= self.volume_size
+
+    def _save(self):
+        # Écriture atomique : un lecteur ne voit jamais un volumes.json tronqué
+        path = os.path.join(self.output_dir, VOLUMES_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def write(self, data):
+        data = bytes(data)
+        size = len(data)
+        if self.writer is None:
+            self._open_volume() # Le volume suivant n'est créé qu'avec ses premières données
+        if self._volume_full():
+            cut = data.find(b"\n") + 1
+            if cut:
+                self.writer.write(data[:cut])
+                self._close_volume()
+                data = data[cut:]
+                if not data:
+                    return size
+                self._open_volume()
+        self.writer.write(data)
+        return size
+
+    def close(self):
+        if self.manifest["complete"]:
+            return
+        if self.writer is not None:
+            self._close_volume()
+        self.manifest["complete"] = True
+        self._save()
+
+    def abort(self):
+        """Ferme le volume en cours sans l'enregistrer (le dossier est ensuite supprimé)."""
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def dump_to_volumes(command, output_dir, base_name, database, compression=DEFAULT_COMPRESSION, volume_size=None,
+                    level=None, threads=None, tracker=None):
+    """
+    Exécute mysqldump et compresse sa sortie à la volée dans des volumes de output_dir.
+    Le dossier partiel est supprimé en cas d'échec. Le flux est compté dans tracker
+    (DumpProgress) s'il est fourni.
+    Retourne le tuple (code de retour, message d'erreur de mysqldump).
+    """
+    try:
+        writer = VolumeWriter(output_dir, base_name, database, compression, volume_size, level, threads)
+        try:
+            returncode, stderr_output = stream_dump(command, tracked_writer(writer, tracker),
+                                                    tracker.cancellation if tracker else None)
+        except BaseException:
+            writer.abort()
+            raise
+        if returncode == 0:
+            writer.close()
+        else:
+            writer.abort()
+    except BaseException:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        raise
+    if returncode != 0:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return returncode, stderr_output
+
+
+def load_volumes(directory):
+    """Lit le volumes.json d'une sauvegarde découpée en volumes ; retourne None s'il n'existe pas."""
+    path = os.path.join(directory, VOLUMES_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != "mysqldumper-volumes":
+        raise DumpError(f"Liste de volumes non reconnue : {path}")
+    return manifest
+
+
+def read_volumes(directory, writer):
+    """
+    Reconstitue dans writer le flux SQL d'une sauvegarde découpée en volumes, volume par
+    volume dans l'ordre du volumes.json. Retourne le nombre d'octets écrits.
+    """
+    manifest = load_volumes(directory)
+    if manifest is None:
+        raise DumpError(f"Le dossier ne contient pas de {VOLUMES_FILE} : {directory}")
+    if not manifest["complete"]:
+        raise DumpError(f"La sauvegarde découpée en volumes est incomplète (dump interrompu ou en cours) : {directory}")
+    total = 0
+    for entry in manifest["volumes"]:
+        path = os.path.join(directory, entry["file"])
+        if not os.path.isfile(path) or os.path.getsize(path) != entry["size"]:
+            raise DumpError(f"Volume manquant ou de taille inattendue : {path}")
+        with open_archive_reader(path) as reader:
+            total += pump(reader, writer)
+    return total
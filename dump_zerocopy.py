@@ -0,0 +1,313 @@
+import errno
+import os
+import shutil
+import subprocess
+import threading
+
+from dump_pipeline import DUMP_TRAILER, TRAILER_WINDOW, DumpError
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # Windows : pas de tubes réglables ni de splice
+
+# --- Écriture sans copie (Linux) ---
+# Le SQL ne traverse pas Python : ni empreinte SHA-256, ni réécriture, ni comptage des
+# instructions ; le volume compté est celui de la sortie de mysqldump, que le noyau déplace
+# vers le fichier ou vers l'entrée du compresseur.
+PIPE_BUFFER_SIZE = 1024 * 1024  # Taille demandée pour les tubes (F_SETPIPE_SZ, plafonnée par fs.pipe-max-size)
+SPLICE_SIZE = 1024 * 1024  # Octets déplacés par appel à os.splice
+SENDFILE_SIZE = 64 * 1024 * 1024  # Octets copiés par appel à os.sendfile (copies)
+
+# Compresseurs externes par format, dans l'ordre de préférence : (programme, option du nombre de threads)
+EXTERNAL_COMPRESSORS = {
+    "gzip": [("pigz", "-p"), ("gzip", None)],
+    "zstd": [("zstd", "-T")],
+    "lz4": [("lz4", None)]
+}
+ZERO_COPY_COMPRESSIONS = ("none",) + tuple(EXTERNAL_COMPRESSORS)
+
+
+def zero_copy_available():
+    """Vrai si le système permet l'écriture sans copie (os.splice : Linux, Python 3.10 ou plus)."""
+    return hasattr(os, "splice")
+
+
+def compressor_command(compression, level=None, threads=None):
+    """
+    Commande du compresseur externe d'un format (None pour "none"), qui lit le SQL sur son
+    entrée standard ; lève DumpError si le format n'est pas pris en charge ou si aucun
+    compresseur n'est installé.
+    """
+    if compression not in ZERO_COPY_COMPRESSIONS:
+        raise DumpError(f"L'écriture sans copie n'est disponible qu'avec les formats {', '.join(ZERO_COPY_COMPRESSIONS)}.")
+    if compression == "none":
+        return None
+    for program, threads_option in EXTERNAL_COMPRESSORS[compression]:
+        path = shutil.which(program)
+        if not path:
+            continue
+        command = [path, "-q", "-c"]
+        if level is not None:
+            command.append(f"-{level}")
+        if threads_option == "-T":
+            command.append(f"-T{threads or 0}") # 0 : un thread par cœur
+        elif threads_option and threads:
+            command += [threads_option, str(threads)]
+        return command
+    programs = " ou ".join(program for program, _ in EXTERNAL_COMPRESSORS[compression])
+    raise DumpError(f"L'écriture sans copie au format {compression} nécessite le programme {programs} dans le PATH.")
+
+
+def set_pipe_size(fd, size=PIPE_BUFFER_SIZE):
+    """Agrandit le tampon d'un tube (moins de réveils entre mysqldump et le noyau) ; retourne sa taille ou None."""
+    if fcntl is None or not hasattr(fcntl, "F_SETPIPE_SZ"):
+        return None
+    try:
+        return fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, size)
+    except OSError:
+        return None # Au-delà de fs.pipe-max-size : la taille par défaut est conservée
+
+
+class SpliceFile:
+    """
+    Fichier de sortie écrit par le noyau : splice_from() y déplace le contenu d'un tube,
+    copy_from() celui d'un autre fichier. Quand la taille à écrire est connue, l'espace est
+    réservé d'avance (posix_fallocate) ; close() ramène le fichier à la taille écrite.
+    """
+
+    def __init__(self, path, expected_size=None):
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644) # Lecture : fin du dump (completed)
+        self.size = 0
+        self.allocated = 0
+        self.preallocate = hasattr(os, "posix_fallocate")
+        if expected_size:
+            self.reserve(expected_size)
+
+    def reserve(self, size):
+        if not self.preallocate or size <= self.allocated:
+            return
+        try:
+            os.posix_fallocate(self.fd, self.allocated, size - self.allocated)
+            self.allocated = size
+        except OSError:
+            # Disque presque plein ou système de fichiers sans préallocation : l'écriture continue sans
+            self.preallocate = False
+
+    def splice_from(self, source_fd, on_data=None, expected_size=None):
+        """Déplace dans le fichier le contenu du tube source_fd jusqu'à sa fermeture. on_data(octets) suit l'écriture."""
+        while True:
+            # L'estimation peut arriver en cours d'export ; au-delà, le fichier grandit sans réservation
+            if expected_size and self.size + SPLICE_SIZE > self.allocated:
+                self.reserve(expected_size())
+            try:
+                moved = os.splice(source_fd, self.fd, SPLICE_SIZE)
+            except OSError as e:
+                if e.errno not in (errno.EINVAL, errno.ENOSYS) or self.size:
+                    raise
+                # Système de fichiers sans splice : copie classique, par le même tube
+                return self._copy_from_pipe(source_fd, on_data)
+            if not moved:
+                return self.size
+            self.size += moved
+            if on_data:
+                on_data(moved)
+
+    def _copy_from_pipe(self, source_fd, on_data):
+        while True:
+            data = os.read(source_fd, SPLICE_SIZE)
+            if not data:
+                return self.size
+            view = memoryview(data)
+            while view:
+                written = os.write(self.fd, view)
+                view = view[written:]
+            self.size += len(data)
+            if on_data:
+                on_data(len(data))
+
+    def copy_from(self, path):
+        """Copie le fichier path, de fichier à fichier dans le noyau (os.sendfile)."""
+        with open(path, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            self.reserve(size)
+            while self.size < size:
+                copied = os.sendfile(self.fd, source.fileno(), self.size, min(SENDFILE_SIZE, size - self.size))
+                if not copied:
+                    raise DumpError(f"Copie interrompue de '{path}' : le fichier a raccourci pendant la copie.")
+                self.size += copied
+        return self.size
+
+    def completed(self):
+        """Vrai si le fichier (SQL non compressé) se termine par la dernière ligne de mysqldump."""
+        # Lecture bornée à la taille écrite : la suite du fichier est la préallocation
+        window = min(TRAILER_WINDOW, self.size)
+        tail = os.pread(self.fd, window, self.size - window) if window else b""
+        return DUMP_TRAILER.search(tail) is not None
+
+    def close(self):
+        if self.fd is None:
+            return
+        try:
+            os.ftruncate(self.fd, self.size) # La préallocation a pu allonger le fichier
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+def splice_pipe(source_fd, target_fd, on_data=None):
+    """Déplace le contenu du tube source_fd dans le tube target_fd jusqu'à sa fermeture ; retourne le nombre d'octets."""
+    total = 0
+    while True:
+        moved = os.splice(source_fd, target_fd, SPLICE_SIZE)
+        if not moved:
+            return total
+        total += moved
+        if on_data:
+            on_data(moved)
+
+
+def dump_zero_copy(commands, targets, level=None, threads=None, tracker=None):
+    """
+    Écrit dans l'archive targets[0] la sortie des commandes mysqldump sans qu'elle traverse le
+    programme (os.splice) ; les autres sorties en sont ensuite des copies (os.sendfile).
+    Retourne le tuple (code de retour, message d'erreur, empreintes dans l'ordre de targets ou None).
+    """
+    archive_path, compression = targets[0]
+    if any(copy_compression != compression for _, copy_compression in targets[1:]):
+        raise DumpError("Avec l'écriture sans copie, les copies doivent avoir le format de la sauvegarde.")
+    compressor = compressor_command(compression, level, threads)
+    cancellation = tracker.cancellation if tracker else None
+    throttle = tracker.throttle if tracker else None
+
+    def on_data(size):
+        if throttle:
+            throttle.consume(size, cancellation)
+        if tracker:
+            tracker.add(size, 0, 0)
+
+    def remove_partial_files():
+        for path, _ in targets:
+            if os.path.exists(path):
+                os.remove(path)
+
+    if cancellation:
+        cancellation.check()
+    processes = []
+    errors = []
+    returncode, stderr_output = 0, ""
+    pipe_read, write_fd = os.pipe()
+    compressor_write = None
+    set_pipe_size(write_fd)
+    sql_size = []
+    try:
+        output = SpliceFile(archive_path)
+        try:
+            def worker(target):
+                def run():
+                    try:
+                        target()
+                    except BaseException as e:
+                        errors.append(e)
+                        for running in list(processes):
+                            running.kill() # mysqldump ne doit pas rester bloqué sur un tube plein
+                return threading.Thread(target=run)
+
+            workers = []
+            if compressor:
+                compressor_read, compressor_write = os.pipe()
+                set_pipe_size(compressor_write)
+                try:
+                    process = subprocess.Popen(compressor, stdin=compressor_read, stdout=subprocess.PIPE,
+                                               stderr=subprocess.PIPE)
+                finally:
+                    os.close(compressor_read)
+                processes.append(process)
+                set_pipe_size(process.stdout.fileno())
+                # Messages du compresseur lus à part : sa sortie standard est réservée à splice
+                compressor_stderr = []
+                stderr_reader = threading.Thread(target=lambda: compressor_stderr.append(process.stderr.read()))
+                stderr_reader.start()
+
+                # Le SQL passe de tube à tube dans le noyau : le volume compté (progression,
+                # estimation, débit limité) est celui de mysqldump, pas celui de l'archive
+                def feed():
+                    nonlocal compressor_write
+                    try:
+                        sql_size.append(splice_pipe(pipe_read, compressor_write, on_data))
+                    finally:
+                        os.close(compressor_write) # Fin de l'entrée : le compresseur termine l'archive
+                        compressor_write = None
+
+                workers.append(worker(feed))
+                workers.append(worker(lambda: output.splice_from(process.stdout.fileno())))
+            else:
+                # Estimation (information_schema) : taille du SQL, réservée dès qu'elle est connue
+                expected_size = (lambda: tracker.estimated_size or 0) if tracker else None
+                workers.append(worker(lambda: output.splice_from(pipe_read, on_data, expected_size)))
+            for thread in workers:
+                thread.start()
+            try:
+                for command in commands:
+                    if errors:
+                        break
+                    process = subprocess.Popen(command, stdout=write_fd, stderr=subprocess.PIPE)
+                    processes.append(process)
+                    if cancellation:
+                        cancellation.register(process)
+                    try:
+                        _, stderr = process.communicate()
+                    finally:
+                        if cancellation:
+                            cancellation.unregister(process)
+                    returncode = process.returncode
+                    stderr_output = stderr.decode("utf-8", errors="replace")
+                    if returncode != 0:
+                        break
+            finally:
+                os.close(write_fd)
+                write_fd = None
+                for thread in workers:
+                    thread.join()
+                if compressor:
+                    processes[0].wait()
+                    stderr_reader.join()
+                    # Compresseur arrêté en cours de route : son message plutôt que le tube rompu
+                    broken_pipe = errors and all(isinstance(e, BrokenPipeError) for e in errors)
+                    if processes[0].returncode != 0 and (broken_pipe or not errors and returncode == 0):
+                        errors.insert(0, DumpError(f"Le compresseur {os.path.basename(compressor[0])} a échoué "
+                                                f"(Code : {processes[0].returncode}) : "
+                                                f"{b''.join(compressor_stderr).decode('utf-8', errors='replace').strip()}"))
+            if errors:
+                raise errors[0]
+            if cancellation:
+                cancellation.check()
+            integrity = {"size": output.size}
+            if compressor:
+                integrity["sql_size"] = sql_size[0]
+            else:
+                integrity.update(sql_size=output.size, completed=output.completed())
+        finally:
+            output.close()
+        if returncode == 0:
+            for path, _ in targets[1:]:
+                copy = SpliceFile(path)
+                try:
+                    copy.copy_from(archive_path)
+                finally:
+                    copy.close()
+    except BaseException:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        remove_partial_files()
+        raise
+    finally:
+        for fd in (write_fd, compressor_write, pipe_read):
+            if fd is not None:
+                os.close(fd)
+    if returncode != 0:
+        remove_partial_files()
+        return returncode, stderr_output, None
+    return returncode, stderr_output, [dict(integrity) for _ in targets]
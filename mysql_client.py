@@ -0,0 +1,166 @@
+import os
+import shutil
+import subprocess
+import sys
+
+from dump_pipeline import DumpError
+
+
+def find_mysqldump():
+    """
+    Tente de trouver le chemin de l'exécutable mysqldump sur le système.
+    Vérifie le PATH système, puis les emplacements communs de MAMP/XAMPP.
+    """
+    # 1. Vérifier le PATH système en premier
+    mysqldump_exe = shutil.which("mysqldump")
+    if mysqldump_exe:
+        return mysqldump_exe
+
+    # 2. Vérifier les chemins communs de MAMP/XAMPP (macOS)
+    if sys.platform == 'darwin':  # macOS
+        # Chemins MAMP PRO (peut varier selon les versions de MySQL)
+        mamp_pro_paths = [
+            "/Applications/MAMP/Library/bin/mysql/bin/mysqldump", # Ancien chemin MAMP
+            "/Applications/MAMP/Library/bin/mysql80/bin/mysqldump", # MAMP Pro MySQL 8
+            "/Applications/MAMP/Library/bin/mysql57/bin/mysqldump", # MAMP Pro MySQL 5.7
+            # Ajouter d'autres chemins si nécessaire pour différentes versions MySQL de MAMP
+        ]
+        for path in mamp_pro_paths:
+            if os.path.exists(path) and os.access(path, os.X_OK):
+                return path
+
+    # 3. Vérifier les chemins communs de MAMP/XAMPP (Windows)
+    elif sys.platform.startswith('win'):  # Windows
+        xampp_path = os.path.join(os.environ.get('XAMPP_HOME', 'C:\\xampp'), 'mysql', 'bin', 'mysqldump.exe')
+        if os.path.exists(xampp_path) and os.access(xampp_path, os.X_OK):
+            return xampp_path
+
+        mamp_win_base = os.path.join('C:\\MAMP', 'bin', 'mysql')
+        if os.path.exists(mamp_win_base):
+            # Chercher les versions spécifiques (e.g., mysql5.7.X, mysql8.0.X)
+            for version_dir in os.listdir(mamp_win_base):
+                if version_dir.startswith('mysql'):
+                    specific_path_win = os.path.join(mamp_win_base, version_dir, 'bin', 'mysqldump.exe')
+                    if os.path.exists(specific_path_win) and os.access(specific_path_win, os.X_OK):
+                        return specific_path_win
+
+    return "" # Retourne une chaîne vide si mysqldump n'est pas trouvé
+
+
+def find_mysql_client(mysqldump_exe_path):
+    """
+    Tente de trouver le client mysql associé à mysqldump.
+    Cherche d'abord dans le même dossier que mysqldump (MAMP/XAMPP), puis dans le PATH.
+    """
+    if mysqldump_exe_path:
+        exe_name = "mysql.exe" if mysqldump_exe_path.lower().endswith(".exe") else "mysql"
+        candidate = os.path.join(os.path.dirname(mysqldump_exe_path), exe_name)
+        if os.path.exists(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return shutil.which("mysql") or ""
+
+
+def quote_identifier(name):
+    """Protège un identifiant MySQL (table, base) avec des backquotes."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def quote_string(value):
+    """Protège une chaîne littérale pour l'inclure dans une requête SQL."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _unescape_batch_field(field):
+    """Décode un champ de la sortie --batch du client mysql (\\t, \\n, \\\\, \\0)."""
+    if "\\" not in field:
+        return field
+    result = []
+    i = 0
+    while i < len(field):
+        char = field[i]
+        if char == "\\" and i + 1 < len(field):
+            result.append({"t": "\t", "n": "\n", "0": "\0", "\\": "\\"}.get(field[i + 1], field[i + 1]))
+            i += 2
+        else:
+            result.append(char)
+            i += 1
+    return "".join(result)
+
+
+def run_query(mysql_exe_path, conn_args, sql, db_name=None, column_names=False):
+    """
+    Exécute une requête avec le client mysql en mode batch et retourne les lignes
+    du résultat sous forme de listes de chaînes (None pour les valeurs NULL).
+    Avec column_names, la première ligne contient les noms des colonnes (sauf résultat vide).
+    """
+    command = [mysql_exe_path] + list(conn_args) + ([] if column_names else ["-N"]) + [
+        "-B", "--default-character-set=utf8mb4", "-e", sql]
+    if db_name:
+        command.append(db_name)
+    try:
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise DumpError(f"Le client mysql n'a pas été trouvé à l'emplacement : {mysql_exe_path}")
+    if process.returncode != 0:
+        stderr_output = process.stderr.decode("utf-8", errors="replace").strip()
+        raise DumpError(f"Erreur du client mysql (Code : {process.returncode}) : {stderr_output}")
+    rows = []
+    for line in process.stdout.decode("utf-8", errors="replace").splitlines():
+        rows.append([None if field == "NULL" else _unescape_batch_field(field) for field in line.split("\t")])
+    return rows
+
+
+class SnapshotLock:
+    """
+    Verrou global FLUSH TABLES WITH READ LOCK tenu par une session du client mysql.
+
+    Tant que le verrou est tenu, aucune écriture ne peut être validée sur le serveur :
+    toutes les transactions --single-transaction ouvertes pendant ce temps voient
+    donc exactement le même état des données.
+    """
+
+    MARKER = b"mysqldumper_snapshot_locked"
+
+    def __init__(self, mysql_exe_path, conn_args):
+        self.mysql_exe_path = mysql_exe_path
+        self.conn_args = list(conn_args)
+        self.process = None
+
+    def acquire(self):
+        """Ouvre la session de coordination et attend que le verrou soit obtenu."""
+        command = [self.mysql_exe_path] + self.conn_args + ["-N", "-B", "--unbuffered"]
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE, bufsize=0)
+        except FileNotFoundError:
+            raise DumpError(f"Le client mysql n'a pas été trouvé à l'emplacement : {self.mysql_exe_path}")
+        self.process.stdin.write(b"FLUSH TABLES WITH READ LOCK;\nSELECT '" + self.MARKER + b"';\n")
+        self.process.stdin.flush()
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                # La session s'est terminée avant d'obtenir le verrou (droits RELOAD manquants, etc.)
+                self.process.wait()
+                stderr_output = self.process.stderr.read().decode("utf-8", errors="replace").strip()
+                self.process = None
+                raise DumpError(f"Impossible d'obtenir le verrou de cohérence (FLUSH TABLES WITH READ LOCK) : {stderr_output}")
+            if line.strip() == self.MARKER:
+                return
+
+    def release(self):
+        """Libère le verrou et ferme la session de coordination."""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.write(b"UNLOCK TABLES;\n")
+        except OSError:
+            pass # La session est déjà fermée : le verrou est libéré par le serveur
+        self.process.communicate() # Ferme l'entrée standard et attend la fin de la session
+        self.process = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
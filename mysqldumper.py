@@ -0,0 +1,374 @@
+"""
+Point d'entrée en ligne de commande de MySQLDumper, sans interface graphique.
+
+    mysqldumper dump [--profile NOM] [options]   sauvegarde une base (ou un batch de bases)
+    mysqldumper daemon CONFIG                    exécute les sauvegardes planifiées de CONFIG
+    mysqldumper profiles                         liste les profils du fichier de préférences
+    mysqldumper verify SOURCE                    vérifie les empreintes et la fin d'une sauvegarde
+    mysqldumper diff ANCIENNE NOUVELLE -o DELTA  script SQL qui fait passer d'une sauvegarde à l'autre
+    mysqldumper catalog list|latest|prune|import consulte le catalogue des sauvegardes, applique la rétention
+
+Les profils sont ceux de mysqldumper_prefs.json (le fichier de l'interface). Le mot de
+passe n'y est jamais enregistré : il est lu dans --password ou la variable d'environnement
+MYSQLDUMPER_PASSWORD ; à défaut, le client MySQL utilise sa configuration (~/.my.cnf).
+Ce module n'importe pas tkinter : le démarrage reste rapide.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from dump_batch import DEFAULT_MAX_CONCURRENT, dump_batch, is_batch_pattern, parse_database_patterns
+from dump_catalog import apply_retention, import_run_records, latest_backup, list_backups
+from dump_diff import diff_backups
+from dump_export import EXPORT_FORMATS
+from dump_integrity import verify_backup
+from dump_native import DUMP_ENGINES, NATIVE_ENGINE
+from dump_pipeline import DumpError
+from dump_runner import DEFAULT_JOB, PREFS_FILE, dump_database, job_from_profile, load_profiles, parse_copy_targets
+from dump_throttle import DEFAULT_MAX_REPLICA_LAG, DEFAULT_MAX_THREADS_RUNNING
+from mysql_client import find_mysqldump
+
+PASSWORD_ENV = "MYSQLDUMPER_PASSWORD"
+
+# Codes de sortie
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_PARTIAL = 2  # Batch terminé avec au moins une base en erreur
+
+# Clés d'un job du démon qui ne sont pas des paramètres de sauvegarde
+DAEMON_SETTINGS = ("name", "schedule", "profile", "password_env", "max_concurrent")
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def profile_job(profiles, profile_name, password="", **values):
+    """Construit le job d'un profil ; values (valeurs non nulles) remplace celles du profil."""
+    if profile_name not in profiles:
+        raise DumpError(f"Profil inconnu : {profile_name} (profils : {', '.join(sorted(profiles))})")
+    job = job_from_profile(profiles[profile_name], db_password=password,
+                           **{key: value for key, value in values.items() if value is not None})
+    unknown = set(job) - set(DEFAULT_JOB)
+    if unknown:
+        raise DumpError("Paramètres inconnus : " + ", ".join(sorted(unknown)))
+    if not job["db_name"]:
+        raise DumpError("Aucune base de données indiquée (option -d ou clé db_name du profil).")
+    if not job["output_folder"]:
+        raise DumpError("Aucun dossier de sortie indiqué (option -o ou clé output_folder du profil).")
+    if not job["mysqldump_path"] and job["engine"] != NATIVE_ENGINE and not job["export_format"]:
+        job["mysqldump_path"] = find_mysqldump()
+        if not job["mysqldump_path"]:
+            raise DumpError("mysqldump est introuvable : indiquez son chemin (--mysqldump ou clé mysqldump_path du profil).")
+    return job
+
+
+def run_job(job, profile, progress=log):
+    """
+    Exécute un job : une base, ou un batch si db_name désigne plusieurs bases (liste ou motif).
+    Retourne (code de sortie, résultat).
+    """
+    os.makedirs(job["output_folder"], exist_ok=True)
+    if not is_batch_pattern(job["db_name"]):
+        return EXIT_OK, dump_database(job, progress=progress)
+    max_concurrent = int(profile.get("max_concurrent") or DEFAULT_MAX_CONCURRENT)
+    batch_report = dump_batch(job, parse_database_patterns(job["db_name"]), max_concurrent, progress)
+    for result in batch_report["results"]:
+        if result["status"] != "ok":
+            progress(f"Erreur sur '{result['database']}' : {result['error']}")
+    return (EXIT_PARTIAL if batch_report["failed"] else EXIT_OK), batch_report
+
+
+def check_retention(job):
+    for key in ("keep_daily", "keep_weekly", "keep_monthly"):
+        if job[key] is not None and job[key] < 0:
+            raise DumpError("Le nombre de sauvegardes à conserver doit être un entier positif.")
+
+
+def command_dump(args):
+    profiles = load_profiles(args.prefs)
+    job = profile_job(profiles, args.profile, args.password or os.environ.get(PASSWORD_ENV, ""),
+                      db_name=args.database, db_host=args.host, db_user=args.user, db_port=args.port,
+                      output_folder=args.output, mysqldump_path=args.mysqldump, compression=args.compression,
+                      compression_level=args.level, compression_threads=args.threads, workers=args.workers,
+                      parallel=args.parallel, incremental=args.incremental, repository=args.repository,
+                      checkpoint=args.checkpoint or args.resume, resume=args.resume, max_rate=args.max_rate,
+                      adaptive_throttle=args.adaptive, max_threads_running=args.max_threads_running,
+                      max_replica_lag=args.max_replica_lag, volume_size=args.volume_size,
+                      subset_tables=args.subset, subset_sample=args.sample,
+                      copies=parse_copy_targets(";".join(args.copies)) if args.copies else None,
+                      keep_daily=args.keep_daily, keep_weekly=args.keep_weekly, keep_monthly=args.keep_monthly,
+                      engine=NATIVE_ENGINE if args.sqlite else args.engine, native_source=args.sqlite,
+                      batch_rows=args.batch_rows, insert_size=args.insert_size, definer=args.definer,
+                      rename_schema=args.rename_schema, export_format=args.export, zero_copy=args.zero_copy)
+    if sum(1 for mode in ("parallel", "incremental", "repository") if job[mode]) > 1:
+        raise DumpError("Les modes parallèle, incrémental et dépôt ne peuvent pas être combinés.")
+    if job["repository"] and (job["checkpoint"] or job["resume"]):
+        raise DumpError("La reprise n'est pas disponible pour le dépôt dédupliqué.")
+    if job["volume_size"] is not None and job["volume_size"] < 1:
+        raise DumpError("La taille des volumes doit être un entier supérieur ou égal à 1 (Mo).")
+    if job["subset_tables"] and is_batch_pattern(job["db_name"]):
+        raise DumpError("Le sous-ensemble ne porte que sur une base à la fois.")
+    if job["rename_schema"] and is_batch_pattern(job["db_name"]):
+        raise DumpError("Le renommage de la base ne porte que sur une base à la fois.")
+    check_retention(job)
+    if job["batch_rows"] is not None and job["batch_rows"] < 1:
+        raise DumpError("Le nombre de lignes par INSERT doit être supérieur ou égal à 1.")
+    exit_code, result = run_job(job, profiles[args.profile])
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif "results" in result:
+        print(f"Batch terminé : {result['succeeded']} bases sauvegardées, {result['failed']} en erreur. Rapport : {result['report_path']}")
+    else:
+        print(result["path"])
+    return exit_code
+
+
+def command_daemon(args):
+    # Le planificateur n'est utile qu'au démon
+    from dump_scheduler import load_schedule, run_daemon
+
+    config, scheduled = load_schedule(args.config)
+    profiles = load_profiles(config.get("prefs", PREFS_FILE))
+
+    def scheduled_job(job, password=""):
+        """Job de sauvegarde et profil (limite du batch comprise) d'une entrée de la configuration."""
+        profile_name = job.get("profile", "default")
+        dump_job = profile_job(profiles, profile_name, password,
+                               **{key: value for key, value in job.items() if key not in DAEMON_SETTINGS})
+        profile = dict(profiles[profile_name])
+        if "max_concurrent" in job:
+            profile["max_concurrent"] = job["max_concurrent"]
+        return dump_job, profile
+
+    # Vérification des jobs au démarrage plutôt qu'à leur première exécution
+    for job, _ in scheduled:
+        scheduled_job(job)
+
+    def run_scheduled(job):
+        name = job["name"]
+        try:
+            dump_job, profile = scheduled_job(job, os.environ.get(job.get("password_env", PASSWORD_ENV), ""))
+            exit_code, result = run_job(dump_job, profile, progress=lambda message: log(f"[{name}] {message}"))
+            if exit_code == EXIT_OK:
+                log(f"[{name}] Sauvegarde réussie ({result.get('path') or result.get('report_path')}).")
+            else:
+                log(f"[{name}] Batch terminé avec {result['failed']} bases en erreur.")
+        except Exception as e:
+            log(f"[{name}] Erreur : {e}")
+
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    run_daemon(scheduled, run_scheduled, log, stop_event)
+    return EXIT_OK
+
+
+def command_profiles(args):
+    for name, profile in load_profiles(args.prefs).items():
+        target = f"{profile.get('db_user') or DEFAULT_JOB['db_user']}@{profile.get('db_host') or DEFAULT_JOB['db_host']}"
+        print(f"{name}\t{target}\t{profile.get('db_name', '')}\t{profile.get('output_folder', '')}")
+    return EXIT_OK
+
+
+def command_verify(args):
+    report = verify_backup(args.source, progress=None if args.json else log)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for entry in report["files"]:
+            for error in entry["errors"]:
+                print(f"❌ {entry['file']} : {error}")
+        failed = sum(1 for entry in report["files"] if entry["errors"])
+        if report["ok"]:
+            print(f"✅ Sauvegarde intègre ({len(report['files'])} fichiers vérifiés en {report['duration']} s).")
+        else:
+            print(f"Sauvegarde corrompue ou incomplète : {failed}/{len(report['files'])} fichiers en erreur.")
+    return EXIT_OK if report["ok"] else EXIT_ERROR
+
+
+def command_diff(args):
+    report = diff_backups(args.old, args.new, args.output, args.compression, args.level, args.threads, args.temp_dir,
+                          progress=None if args.json else log)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return EXIT_OK
+    for table in report["tables"]:
+        print(f"{table['table']}\t{table['status']}\t+{table['inserted']}\t~{table['updated']}\t-{table['deleted']}")
+    print(f"✅ {len(report['tables'])} tables modifiées : {report['inserted']} lignes ajoutées, {report['updated']} modifiées, "
+          f"{report['deleted']} supprimées. Script : {report['path']} ({report['size'] / (1024 * 1024):.1f} Mo)")
+    return EXIT_OK
+
+
+def command_catalog(args):
+    output_folder = args.output or load_profiles(args.prefs).get(args.profile, {}).get("output_folder")
+    if not output_folder:
+        raise DumpError("Aucun dossier de sortie indiqué (option -o ou clé output_folder du profil).")
+    if args.action == "import":
+        print(f"{import_run_records(output_folder)} sauvegardes ajoutées au catalogue.")
+        return EXIT_OK
+    if args.action == "prune":
+        if not args.database:
+            raise DumpError("Indiquez la base dont les sauvegardes sont à supprimer (option -d).")
+        check_retention({"keep_daily": args.keep_daily, "keep_weekly": args.keep_weekly, "keep_monthly": args.keep_monthly})
+        report = apply_retention(output_folder, args.database, args.keep_daily, args.keep_weekly, args.keep_monthly,
+                                 mode=args.mode, dry_run=args.dry_run, progress=None if args.json else log)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            for path in report["deleted"]:
+                print(f"{'À supprimer' if args.dry_run else 'Supprimée'} : {path}")
+            print(f"{len(report['kept'])} sauvegardes conservées, {len(report['deleted'])} "
+                  f"{'à supprimer' if args.dry_run else 'supprimées'}.")
+        return EXIT_OK
+    if args.action == "latest":
+        if not args.database:
+            raise DumpError("Indiquez la base (option -d).")
+        backup = latest_backup(output_folder, args.database)
+        if backup is None:
+            raise DumpError(f"Aucune sauvegarde réussie de '{args.database}' dans le catalogue de '{output_folder}'.")
+        print(json.dumps(backup, indent=2) if args.json else backup["path"])
+        return EXIT_OK
+    backups = list_backups(output_folder, args.database, args.status, include_pruned=args.all, limit=args.limit)
+    if args.json:
+        print(json.dumps(backups, indent=2))
+    else:
+        for backup in backups:
+            size = f"{backup['size'] / (1024 * 1024):.1f} Mo" if backup["size"] is not None else "-"
+            state = "supprimée" if backup["pruned"] else backup["status"]
+            print(f"{backup['started']}\t{backup['database']}\t{backup['mode']}\t{state}\t{size}\t{backup['path'] or backup['error']}")
+    return EXIT_OK
+
+
+def add_retention_arguments(parser):
+    parser.add_argument("--keep-daily", type=int, help="Rétention : nombre de jours dont la dernière sauvegarde est conservée")
+    parser.add_argument("--keep-weekly", type=int, help="Rétention : nombre de semaines dont la dernière sauvegarde est conservée")
+    parser.add_argument("--keep-monthly", type=int, help="Rétention : nombre de mois dont la dernière sauvegarde est conservée")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mysqldumper", description="Sauvegarde de bases MySQL sans interface graphique.")
+    parser.add_argument("--prefs", default=PREFS_FILE, help=f"Fichier de préférences (défaut : {PREFS_FILE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = subparsers.add_parser("dump", help="Sauvegarde une base, une liste de bases ou un motif ('shop_*')")
+    dump_parser.add_argument("--profile", default="default", help="Profil du fichier de préférences (défaut : default)")
+    dump_parser.add_argument("-d", "--database", help="Base(s) à sauvegarder")
+    dump_parser.add_argument("-H", "--host")
+    dump_parser.add_argument("-u", "--user")
+    dump_parser.add_argument("-P", "--port", type=int)
+    dump_parser.add_argument("-p", "--password", help=f"Mot de passe (sinon variable {PASSWORD_ENV} ou ~/.my.cnf)")
+    dump_parser.add_argument("-o", "--output", help="Dossier de sortie")
+    dump_parser.add_argument("--mysqldump", help="Chemin de mysqldump")
+    dump_parser.add_argument("--compression", help="zip, gzip, seekable, zstd, lz4 ou none")
+    dump_parser.add_argument("--level", type=int, help="Niveau de compression")
+    dump_parser.add_argument("--threads", type=int, help="Threads de compression")
+    dump_parser.add_argument("-j", "--workers", type=int, help="Workers des modes parallèle et incrémental, connexions de l'export")
+    mode = dump_parser.add_mutually_exclusive_group()
+    mode.add_argument("--parallel", action="store_true", default=None, help="Dump parallèle (un fichier par table)")
+    mode.add_argument("--incremental", action="store_true", default=None, help="Dump incrémental")
+    mode.add_argument("--repository", action="store_true", default=None, help="Dépôt dédupliqué")
+    mode.add_argument("--export", choices=EXPORT_FORMATS,
+                      help="Exporte les données table par table pour les outils d'analyse : csv, tsv (comme mysqldump --tab) "
+                           "ou parquet (module pyarrow) ; -j : connexions en parallèle (module pymysql)")
+    dump_parser.add_argument("--checkpoint", action="store_true", default=None,
+                             help="Sauvegarde par table avec points de reprise (fichiers terminés et leur SHA-256)")
+    dump_parser.add_argument("--resume", action="store_true", default=None,
+                             help="Reprend la dernière sauvegarde interrompue de la base (implique --checkpoint)")
+    dump_parser.add_argument("--volume-size", type=int,
+                             help="Découpe l'archive en volumes de cette taille en Mo (dump standard)")
+    dump_parser.add_argument("--copy", action="append", dest="copies", metavar="[FORMAT:]DOSSIER",
+                             help="Écrit aussi le dump dans ce dossier, avec le même flux mysqldump "
+                                  "(ex. none:/mnt/copie ; option répétable, dump standard)")
+    dump_parser.add_argument("--engine", choices=DUMP_ENGINES,
+                             help="mysqldump, ou native : moteur intégré, sans mysqldump (module pymysql ; dump standard et dépôt)")
+    dump_parser.add_argument("--sqlite", metavar="FICHIER",
+                             help="Moteur intégré : lit cette base SQLite au lieu du serveur (essais sans serveur MySQL)")
+    dump_parser.add_argument("--batch-rows", type=int,
+                             help="Moteur intégré : nombre maximal de lignes par INSERT étendu (défaut : INSERT d'au plus 1 Mo)")
+    dump_parser.add_argument("--insert-size", type=int, metavar="KIO",
+                             help="Regroupe ou découpe les INSERT étendus en instructions de cette taille "
+                                  "(selon max_allowed_packet du serveur de restauration ; pas avec le dépôt ni l'export)")
+    dump_parser.add_argument("--definer", metavar="strip|UTILISATEUR@HOTE",
+                             help="Retire les DEFINER des vues, triggers, routines et événements, ou les remplace par ce compte")
+    dump_parser.add_argument("--rename-schema", metavar="BASE",
+                             help="Fait désigner cette base aux références à la base sauvegardée (noms qualifiés, USE)")
+    dump_parser.add_argument("--zero-copy", action="store_true", default=None,
+                             help="Écrit la sortie de mysqldump par le noyau, sans la faire passer par le programme "
+                                  "(Linux ; none, ou gzip, zstd, lz4 par le programme externe ; pas d'empreinte SHA-256)")
+    dump_parser.add_argument("--subset", help="Tables racines d'un sous-ensemble cohérent ('orders, customers')")
+    dump_parser.add_argument("--sample",
+                             help="Lignes retenues dans les tables racines : '10%%', '1000' (premières lignes) ou une condition WHERE")
+    dump_parser.add_argument("--max-rate", type=float, help="Débit maximal de la sauvegarde en Mo/s")
+    dump_parser.add_argument("--adaptive", action="store_true", default=None,
+                             help="Ralentit ou suspend la sauvegarde quand le serveur est chargé")
+    dump_parser.add_argument("--max-threads-running", type=int,
+                             help=f"Seuil de Threads_running du mode adaptatif (défaut : {DEFAULT_MAX_THREADS_RUNNING})")
+    dump_parser.add_argument("--max-replica-lag", type=int,
+                             help=f"Seuil de retard de réplication du mode adaptatif, en secondes (défaut : {DEFAULT_MAX_REPLICA_LAG})")
+    add_retention_arguments(dump_parser)
+    dump_parser.add_argument("--json", action="store_true", help="Affiche le résultat en JSON")
+    dump_parser.set_defaults(handler=command_dump)
+
+    daemon_parser = subparsers.add_parser("daemon", help="Exécute les sauvegardes planifiées d'un fichier de configuration")
+    daemon_parser.add_argument("config", help="Fichier JSON : {\"prefs\": ..., \"jobs\": [{\"name\", \"schedule\", \"profile\", ...}]}")
+    daemon_parser.set_defaults(handler=command_daemon)
+
+    profiles_parser = subparsers.add_parser("profiles", help="Liste les profils du fichier de préférences")
+    profiles_parser.set_defaults(handler=command_profiles)
+
+    verify_parser = subparsers.add_parser("verify", help="Vérifie une sauvegarde (empreintes SHA-256 et fin du dump) sans la restaurer")
+    verify_parser.add_argument("source", help="Archive, dossier de sauvegarde par table, en volumes ou d'export, "
+                                              "ou index du dépôt dédupliqué")
+    verify_parser.add_argument("--json", action="store_true", help="Affiche le rapport en JSON")
+    verify_parser.set_defaults(handler=command_verify)
+
+    diff_parser = subparsers.add_parser("diff", help="Compare deux sauvegardes et écrit le script SQL (DELETE, UPDATE, "
+                                                     "INSERT) qui fait passer de la première à la seconde")
+    diff_parser.add_argument("old", help="Sauvegarde de référence : archive ou dossier en volumes")
+    diff_parser.add_argument("new", help="Sauvegarde plus récente de la même base")
+    diff_parser.add_argument("-o", "--output", required=True, help="Fichier du script SQL produit")
+    diff_parser.add_argument("--compression", default="none", help="Compression du script : none (défaut), gzip, zstd, lz4 ou zip")
+    diff_parser.add_argument("--level", type=int, help="Niveau de compression")
+    diff_parser.add_argument("--threads", type=int, help="Threads de compression")
+    diff_parser.add_argument("--temp-dir", help="Dossier des fichiers temporaires (instructions d'une table)")
+    diff_parser.add_argument("--json", action="store_true", help="Affiche le rapport en JSON")
+    diff_parser.set_defaults(handler=command_diff)
+
+    catalog_parser = subparsers.add_parser("catalog", help="Consulte le catalogue des sauvegardes d'un dossier, applique la rétention")
+    catalog_parser.add_argument("action", choices=("list", "latest", "prune", "import"),
+                                help="list : sauvegardes ; latest : dernière sauvegarde réussie ; prune : rétention ; "
+                                     "import : ajoute les sauvegardes antérieures au catalogue")
+    catalog_parser.add_argument("--profile", default="default", help="Profil dont le dossier de sortie est utilisé")
+    catalog_parser.add_argument("-o", "--output", help="Dossier de sortie (remplace celui du profil)")
+    catalog_parser.add_argument("-d", "--database", help="Base de données")
+    catalog_parser.add_argument("--status", choices=("ok", "error", "cancelled"), help="list : statut des sauvegardes")
+    catalog_parser.add_argument("--limit", type=int, help="list : nombre maximal de sauvegardes")
+    catalog_parser.add_argument("--all", action="store_true", help="list : inclut les sauvegardes supprimées")
+    add_retention_arguments(catalog_parser)
+    catalog_parser.add_argument("--mode", choices=("archive", "volumes", "subset", "parallel", "incremental", "repository"),
+                                help="prune : limite la rétention à cette sorte de sauvegarde")
+    catalog_parser.add_argument("--dry-run", action="store_true", help="prune : affiche les sauvegardes à supprimer sans les supprimer")
+    catalog_parser.add_argument("--json", action="store_true", help="Affiche le résultat en JSON")
+    catalog_parser.set_defaults(handler=command_catalog)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except DumpError as e:
+        log(f"Erreur : {e}")
+        return EXIT_ERROR
+    except FileNotFoundError as e:
+        log(f"Erreur : exécutable introuvable ({e.filename}).")
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
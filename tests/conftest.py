@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeMysql:
+    """Lanceur du client mysql de substitution (fake_mysql.py) et lecture de ce qu'il a reçu."""
+
+    def __init__(self, directory):
+        self.log_dir = os.path.join(directory, "log")
+        os.makedirs(self.log_dir)
+        self.results_path = os.path.join(directory, "results.json")
+        self.path = os.path.join(directory, "mysql")
+        with open(self.path, 'w') as f:
+            f.write(f"#!/bin/sh\nexec \"{sys.executable}\" \"{os.path.join(TESTS_DIR, 'fake_mysql.py')}\" \"$@\"\n")
+        os.chmod(self.path, 0o755)
+
+    def set_results(self, results):
+        """results : liste de (fragment de requête, lignes) ; la première entrée qui correspond répond."""
+        with open(self.results_path, 'w') as f:
+            json.dump([[fragment, rows] for fragment, rows in results], f)
+
+    def queries(self):
+        path = os.path.join(self.log_dir, "queries.log")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return f.read().splitlines()
+
+    def sessions(self):
+        """Sessions de chargement, dans l'ordre de leur début : dictionnaires (database, started, ended, sql)."""
+        sessions = []
+        for name in os.listdir(self.log_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.log_dir, name)) as f:
+                    session = json.load(f)
+                with open(os.path.join(self.log_dir, name[:-len(".json")] + ".sql"), 'rb') as f:
+                    session["sql"] = f.read()
+                sessions.append(session)
+        return sorted(sessions, key=lambda session: session["started"])
+
+
+@pytest.fixture
+def fake_mysql(tmp_path, monkeypatch):
+    if sys.platform == "win32":
+        pytest.skip("lanceur shell du client mysql de substitution")
+    fake = FakeMysql(str(tmp_path / "fake_mysql"))
+    monkeypatch.setenv("FAKE_MYSQL_LOG", fake.log_dir)
+    monkeypatch.setenv("FAKE_MYSQL_RESULTS", fake.results_path)
+    monkeypatch.delenv("FAKE_MYSQL_FAIL", raising=False)
+    return fake
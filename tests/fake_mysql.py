@@ -0,0 +1,57 @@
+"""
+Client mysql de substitution pour les tests de restauration, sans serveur MySQL.
+
+Les requêtes passées par -e sont notées dans queries.log ; leur résultat est celui de la première
+entrée [fragment, lignes] de FAKE_MYSQL_RESULTS (fichier JSON) dont le fragment figure dans la
+requête, vide sinon. Chaque session de chargement
+(SQL reçu sur l'entrée standard) est enregistrée dans session_<pid>.sql, avec ses instants
+de début et de fin dans session_<pid>.json. Le dossier est donné par FAKE_MYSQL_LOG.
+Si le SQL reçu contient FAKE_MYSQL_FAIL, la session échoue comme le ferait mysql.
+"""
+import json
+import os
+import sys
+import time
+
+LOG_ENV = "FAKE_MYSQL_LOG"
+FAIL_ENV = "FAKE_MYSQL_FAIL"
+RESULTS_ENV = "FAKE_MYSQL_RESULTS"
+
+
+def query_result(query):
+    """Lignes du résultat de query, au format de mysql -N -B (NULL pour None)."""
+    path = os.environ.get(RESULTS_ENV)
+    if not path or not os.path.exists(path):
+        return ""
+    with open(path) as f:
+        results = json.load(f)
+    for fragment, rows in results:
+        if fragment in query:
+            return "".join("\t".join("NULL" if value is None else str(value) for value in row) + "\n" for row in rows)
+    return ""
+
+
+def main(args):
+    log_dir = os.environ[LOG_ENV]
+    if "-e" in args:
+        with open(os.path.join(log_dir, "queries.log"), 'a') as f:
+            f.write(args[args.index("-e") + 1] + "\n")
+        sys.stdout.write(query_result(args[args.index("-e") + 1]))
+        return 0
+    started = time.monotonic_ns()
+    data = sys.stdin.buffer.read()
+    ended = time.monotonic_ns()
+    base = os.path.join(log_dir, f"session_{os.getpid()}")
+    with open(base + ".sql", 'wb') as f:
+        f.write(data)
+    with open(base + ".json", 'w') as f:
+        json.dump({"database": args[-1], "started": started, "ended": ended}, f)
+    fail = os.environ.get(FAIL_ENV)
+    if fail and fail.encode() in data:
+        sys.stderr.write(f"ERROR 1064 (42000) at line 1: erreur simulée ({fail})\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
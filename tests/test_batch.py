@@ -0,0 +1,30 @@
+import threading
+import time
+
+from dump_batch import parse_database_patterns, schedule_jobs
+
+
+def test_schedule_jobs_caps_concurrency_and_starts_largest_first():
+    jobs = [{"db_name": f"db{index}", "size": size} for index, size in enumerate([10, 50, 30, 40, 20])]
+    started = []
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def run_job(job):
+        with lock:
+            started.append(job["db_name"])
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return job["db_name"]
+
+    results = schedule_jobs(jobs, run_job, max_concurrent=2)
+    assert results == [job["db_name"] for job in jobs]
+    assert running["peak"] == 2
+    assert set(started[:2]) == {"db1", "db3"}
+
+
+def test_parse_database_patterns():
+    assert parse_database_patterns(" shop, blog_*  wiki ") == ["shop", "blog_*", "wiki"]
@@ -0,0 +1,45 @@
+from dump_catalog import plan_retention
+
+
+def backup(backup_id, started, mode="archive", folder=None, depends_on=()):
+    return {"id": backup_id, "started": started, "mode": mode,
+            "path": f"/sauvegardes/{folder or f'shop_{backup_id}.sql.gz'}", "depends_on": list(depends_on)}
+
+
+def test_plan_retention_keeps_latest_of_each_period():
+    backups = [backup(5, "2026-03-10T02:00:00"), backup(4, "2026-03-10T01:00:00"), backup(3, "2026-03-09T02:00:00"),
+               backup(2, "2026-02-27T02:00:00"), backup(1, "2026-01-15T02:00:00")]
+    kept, deleted = plan_retention(backups, keep_daily=2, keep_monthly=3)
+    assert kept == {5: ["latest", "daily", "monthly"], 3: ["daily"], 2: ["monthly"], 1: ["monthly"]}
+    assert [item["id"] for item in deleted] == [4]
+
+
+def test_plan_retention_keeps_each_sort_of_backup_separately():
+    backups = [backup(3, "2026-03-10T03:00:00", mode="subset"), backup(2, "2026-03-10T02:00:00", mode="volumes"),
+               backup(1, "2026-03-10T01:00:00", mode="archive")]
+    kept, deleted = plan_retention(backups, keep_daily=1)
+    # volumes et archive forment une seule sorte ; un sous-ensemble ne remplace pas une archive
+    assert set(kept) == {3, 2} and [item["id"] for item in deleted] == [1]
+
+
+def test_plan_retention_keeps_the_whole_incremental_chain():
+    backups = [
+        backup(4, "2026-03-04T02:00:00", "incremental", "shop_4", depends_on=["shop_3", "shop_1"]),
+        backup(3, "2026-03-03T02:00:00", "incremental", "shop_3", depends_on=["shop_2"]),
+        backup(2, "2026-03-02T02:00:00", "parallel", "shop_2"),
+        backup(1, "2026-03-01T02:00:00", "parallel", "shop_1"),
+        backup(0, "2026-02-01T02:00:00", "parallel", "shop_0"),
+    ]
+    kept, deleted = plan_retention(backups, keep_daily=1)
+    # La dernière reprend des fichiers de 3 et 1, et 3 de 2 : toute la chaîne est conservée
+    assert kept[4] == ["latest", "daily"]
+    assert kept[3] == ["base de shop_4"] and kept[1] == ["base de shop_4"]
+    assert kept[2] == ["base de shop_3"]
+    assert [item["id"] for item in deleted] == [0]
+
+
+def test_plan_retention_ignores_missing_bases():
+    backups = [backup(2, "2026-03-02T02:00:00", "incremental", "shop_2", depends_on=["shop_supprimée"]),
+               backup(1, "2026-03-01T02:00:00", "parallel", "shop_1")]
+    kept, deleted = plan_retention(backups, keep_daily=1)
+    assert set(kept) == {2} and [item["id"] for item in deleted] == [1]
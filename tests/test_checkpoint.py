@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from dump_checkpoint import CHECKPOINT_FILE, Checkpoint, file_sha256, find_resumable_backup
+from dump_parallel import MANIFEST_FILE
+from dump_pipeline import DumpError
+
+
+def write_part(output_dir, relative_path, data):
+    path = os.path.join(output_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_resume_keeps_file_names_plan_and_finished_parts(tmp_path):
+    output_dir = str(tmp_path / "shop_20260101_020000")
+    os.makedirs(output_dir)
+    first = Checkpoint(output_dir, "shop", "gzip")
+    assert not first.resumed and first.attempts == 1
+    first.start({"orders": "tables/orders", "users": "tables/users"}, {"orders": ("id", [(None, 500), (500, None)])})
+    write_part(output_dir, "tables/users.sql.gz", b"users")
+    first.record("tables/users.sql.gz")
+    first.record("tables/orders.part0000.sql.gz", {"size": 3, "sha256": "abc"})
+
+    second = Checkpoint(output_dir, "shop", "gzip")
+    assert second.resumed and second.attempts == 2
+    assert second.table_files == {"orders": "tables/orders", "users": "tables/users"}
+    assert second.chunk_plan == {"orders": ("id", [(None, 500), (500, None)])}
+    assert second.is_done("tables/users.sql.gz") and not second.is_done("tables/orders.part0001.sql.gz")
+    assert second.parts["tables/users.sql.gz"] == {"size": 5, "sha256": file_sha256(os.path.join(output_dir, "tables/users.sql.gz"))}
+
+
+def test_resume_with_other_parameters_is_refused(tmp_path):
+    output_dir = str(tmp_path)
+    Checkpoint(output_dir, "shop", "gzip").start({}, {})
+    with pytest.raises(DumpError, match="reprise impossible"):
+        Checkpoint(output_dir, "shop", "zstd")
+    with pytest.raises(DumpError, match="reprise impossible"):
+        Checkpoint(output_dir, "blog", "gzip")
+
+
+def test_verify_drops_missing_and_damaged_parts(tmp_path):
+    output_dir = str(tmp_path)
+    checkpoint = Checkpoint(output_dir, "shop", "gzip")
+    for name in ("intact", "damaged", "truncated", "missing"):
+        write_part(output_dir, f"tables/{name}.sql.gz", b"contenu de " + name.encode())
+        checkpoint.record(f"tables/{name}.sql.gz")
+    with open(os.path.join(output_dir, "tables/damaged.sql.gz"), 'r+b') as f:
+        f.write(b"C")
+    with open(os.path.join(output_dir, "tables/truncated.sql.gz"), 'r+b') as f:
+        f.truncate(4)
+    os.remove(os.path.join(output_dir, "tables/missing.sql.gz"))
+
+    invalid = Checkpoint(output_dir, "shop", "gzip").verify()
+    assert sorted(invalid) == ["tables/damaged.sql.gz", "tables/missing.sql.gz", "tables/truncated.sql.gz"]
+    resumed = Checkpoint(output_dir, "shop", "gzip")
+    assert list(resumed.parts) == ["tables/intact.sql.gz"]
+    assert sorted(os.listdir(os.path.join(output_dir, "tables"))) == ["intact.sql.gz"]
+
+
+def test_find_resumable_backup_skips_finished_backups(tmp_path):
+    output_folder = str(tmp_path)
+    for name in ("shop_20260101_020000", "shop_20260102_020000", "shop_20260103_020000", "shopping_20260104_020000"):
+        os.makedirs(os.path.join(output_folder, name))
+        write_part(output_folder, f"{name}/{CHECKPOINT_FILE}", b"{}")
+    write_part(output_folder, f"shop_20260103_020000/{MANIFEST_FILE}", b"{}")
+    assert find_resumable_backup(output_folder, "shop") == os.path.join(output_folder, "shop_20260102_020000")
+    assert find_resumable_backup(os.path.join(output_folder, "absent"), "shop") is None
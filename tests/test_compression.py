@@ -0,0 +1,49 @@
+import gzip
+import io
+import random
+import zlib
+
+import pytest
+
+from dump_compression import ParallelGzipWriter
+
+
+def compress(data, block_size, threads, write_size):
+    output = io.BytesIO()
+    writer = ParallelGzipWriter(output, level=6, threads=threads, block_size=block_size)
+    for start in range(0, len(data), write_size):
+        writer.write(data[start:start + write_size])
+    writer.close()
+    return output.getvalue()
+
+
+def sample_dump(size):
+    rng = random.Random(42)
+    words = [b"INSERT", b"INTO", b"`orders`", b"VALUES", b"NULL", b"'caf\xc3\xa9'", b"0x00ff", b"\x00\n"]
+    data = bytearray()
+    while len(data) < size:
+        data += rng.choice(words) + b" " + str(rng.randrange(10 ** 6)).encode()
+    return bytes(data[:size])
+
+
+@pytest.mark.parametrize("size, block_size, threads, write_size", [
+    (0, 1024, 2, 1),
+    (1, 1024, 2, 1),
+    (300_000, 1024, 4, 4096),
+    (300_000, 64 * 1024, 3, 777),
+    (64 * 1024, 64 * 1024, 2, 64 * 1024),  # Exactement un bloc
+])
+def test_parallel_gzip_round_trip(size, block_size, threads, write_size):
+    data = sample_dump(size)
+    archive = compress(data, block_size, threads, write_size)
+    # Un seul membre gzip standard, lisible par gzip et par zlib
+    assert gzip.decompress(archive) == data
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decompressor.decompress(archive) == data and decompressor.eof and not decompressor.unused_data
+
+
+def test_parallel_gzip_keeps_ratio_across_blocks():
+    # Les blocs sont amorcés avec la fin du précédent : une répétition à cheval sur deux blocs reste compressée
+    block = sample_dump(16 * 1024)
+    data = block * 8
+    assert len(compress(data, 16 * 1024, 4, len(data))) < 2 * len(zlib.compress(block, 6))
@@ -0,0 +1,72 @@
+import io
+import re
+
+import pytest
+
+from dump_diff import DumpReader, diff_streams
+
+CREATE = (b"CREATE TABLE `t` (\n  `id` int NOT NULL,\n  `v` varchar(20) DEFAULT NULL,\n"
+          b"  PRIMARY KEY (`id`)\n) ENGINE=InnoDB;\n")
+
+
+def dump(rows):
+    """Dump d'une table t(id, v) dont les lignes sont écrites dans l'ordre de rows."""
+    values = b",".join(b"(%d,'%s')" % (key, value) for key, value in rows)
+    return (b"-- MySQL dump 10.13\n/*!40101 SET NAMES utf8mb4 */;\n\n--\n-- Table structure for table `t`\n--\n\n" +
+            CREATE + b"\n--\n-- Dumping data for table `t`\n--\n\nLOCK TABLES `t` WRITE;\n" +
+            (b"INSERT INTO `t` VALUES " + values + b";\n" if rows else b"") +
+            b"UNLOCK TABLES;\n-- Dump completed on 2026-10-17 12:00:00\n")
+
+
+def reader(data):
+    return DumpReader(iter(data.splitlines(keepends=True)))
+
+
+def apply_script(rows, script):
+    """Applique à {id: v} le script produit pour t (DELETE ... IN, UPDATE, INSERT)."""
+    table = dict(rows)
+    for line in script.decode().splitlines():
+        if line.startswith("DELETE FROM `t` WHERE `id` IN ("):
+            for key in line[len("DELETE FROM `t` WHERE `id` IN ("):-2].split(","):
+                del table[int(key)]
+        elif line.startswith("UPDATE `t` SET "):
+            value, key = re.fullmatch(r"UPDATE `t` SET `v`='(\w*)' WHERE `id`=(-?\d+);", line).groups()
+            assert int(key) in table
+            table[int(key)] = value.encode()
+        elif line.startswith("INSERT INTO `t` (`id`,`v`) VALUES "):
+            for key, value in re.findall(r"\((-?\d+),'(\w*)'\)", line):
+                assert int(key) not in table
+                table[int(key)] = value.encode()
+        else:
+            assert not line or line.startswith("--"), line
+    return table
+
+
+def compare(old_rows, new_rows):
+    output = io.BytesIO()
+    tables = diff_streams(reader(dump(old_rows)), reader(dump(new_rows)), output)
+    assert apply_script(old_rows, output.getvalue()) == dict(new_rows)
+    return tables
+
+
+def test_diff_rows_in_key_order_is_minimal():
+    old = [(1, b"a"), (2, b"b"), (3, b"c"), (4, b"d")]
+    new = [(1, b"a"), (2, b"B"), (4, b"d"), (5, b"e")]
+    assert compare(old, new) == [{"table": "t", "status": "changed", "inserted": 1, "updated": 1, "deleted": 1}]
+
+
+@pytest.mark.parametrize("old, new", [
+    # Mêmes lignes, ordres différents (collation, table MyISAM) : le script reste exact
+    ([(1, b"a"), (3, b"c"), (2, b"b")], [(1, b"a"), (2, b"b"), (3, b"c")]),
+    ([(3, b"c"), (2, b"b"), (1, b"a")], [(1, b"a"), (2, b"b"), (3, b"c")]),
+    ([(1, b"a"), (2, b"b"), (3, b"c")], [(3, b"C"), (1, b"a"), (4, b"d"), (2, b"b")]),
+    ([(5, b"e"), (1, b"a"), (9, b"i"), (2, b"b")], [(9, b"I"), (2, b"b"), (7, b"g"), (1, b"a")]),
+])
+def test_diff_rows_with_out_of_order_keys_stays_exact(old, new):
+    tables = compare(old, new)
+    assert len(tables) == 1 and tables[0]["unordered"] > 0
+
+
+def test_identical_dumps_give_an_empty_script():
+    rows = [(2, b"b"), (1, b"a")]
+    assert compare(rows, rows) == []
@@ -0,0 +1,90 @@
+import csv
+import gzip
+import io
+import os
+import sqlite3
+
+import pytest
+
+from dump_export import FIELD_FORMATS, csv_string, export_database, load_export, tsv_string
+from dump_integrity import verify_backup
+from dump_native import SQLiteSource
+
+ROWS = [
+    (1, "simple", b"\x00\xff\t\n", None),
+    (2, "virgule, \"guillemets\"", b"", ""),
+    (3, "tab\tligne\nretour\r\\N", b"\\N", "\\N"),
+    (4, "", None, "ünïcödé")
+]
+
+
+def field(export_format, value):
+    formats = FIELD_FORMATS[export_format]
+    return formats.get(type(value), lambda other: formats[str](str(other)))(value)
+
+
+def test_csv_distinguishes_null_from_empty_string():
+    assert field("csv", None) == ""
+    assert field("csv", "") == '""'
+    assert csv_string("simple") == "simple"
+    assert csv_string('a "b", c') == '"a ""b"", c"'
+    assert csv_string("ligne\nsuivante") == '"ligne\nsuivante"'
+    assert field("csv", b"\x00\xff") == "00ff" and field("csv", b"") == '""'
+    assert field("csv", 1.5) == "1.5" and field("csv", True) == "1"
+
+
+def test_tsv_escapes_specials_and_keeps_binary_bytes():
+    assert field("tsv", None) == "\\N"
+    assert field("tsv", "") == ""
+    # La chaîne "\N" n'est pas confondue avec NULL
+    assert tsv_string("\\N") == "\\\\N"
+    assert tsv_string("a\tb\nc\rd\0e") == "a\\tb\\nc\\rd\\0e"
+    assert tsv_string("simple") == "simple"
+    # Les octets binaires sont écrits tels quels, seuls les caractères spéciaux sont protégés
+    binary = field("tsv", b"\xff\xfe\t\x00a")
+    assert binary.encode("utf-8", "surrogateescape") == b"\xff\xfe\\t\\0a"
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "shop.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT NOT NULL, data BLOB, note TEXT)")
+    connection.executemany("INSERT INTO items VALUES (?, ?, ?, ?)", ROWS)
+    connection.execute("CREATE TABLE empty (id INTEGER PRIMARY KEY)")
+    connection.commit()
+    connection.close()
+    return path
+
+
+def read_export(output_dir, name):
+    with open(os.path.join(output_dir, name), 'rb') as f:
+        return f.read()
+
+
+def test_export_csv_files(tmp_path, database):
+    output_dir = str(tmp_path / "shop_export")
+    manifest = export_database(lambda: SQLiteSource(database), "shop", output_dir, "csv", workers=2, compression="none")
+    assert [(table["name"], table["rows"]) for table in manifest["tables"]] == [("empty", 0), ("items", 4)]
+    data = read_export(output_dir, "items.csv")
+    lines = data.decode("utf-8").split("\n")
+    assert lines[0] == "id,label,data,note"
+    assert lines[1] == "1,simple,00ff090a,"
+    assert lines[2] == '2,"virgule, ""guillemets""","",""'
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+    assert rows[3] == ["3", "tab\tligne\nretour\r\\N", "5c4e", "\\N"]
+    assert read_export(output_dir, "empty.csv") == b"id\n"
+    assert load_export(output_dir)["dialect"]["null"] == ""
+    assert verify_backup(output_dir)["ok"]
+
+
+def test_export_tsv_files(tmp_path, database):
+    output_dir = str(tmp_path / "shop_export")
+    export_database(lambda: SQLiteSource(database), "shop", output_dir, "tsv", compression="gzip")
+    with gzip.open(os.path.join(output_dir, "items.tsv.gz")) as f:
+        lines = f.read().split(b"\n")
+    assert lines[0] == b"1\tsimple\t\\0\xff\\t\\n\t\\N"
+    assert lines[1] == b'2\tvirgule, "guillemets"\t\t'
+    assert lines[2] == b"3\ttab\\tligne\\nretour\\r\\\\N\t\\\\N\t\\\\N"
+    assert lines[3] == "4\t\t\\N\tünïcödé".encode("utf-8")
+    assert verify_backup(output_dir)["ok"]
@@ -0,0 +1,44 @@
+import json
+import os
+
+import dump_incremental
+from dump_incremental import dump_incremental as run_incremental
+from dump_parallel import MANIFEST_FILE
+
+CREATED = "2026-01-01 00:00:00"
+
+
+def write_previous_backup(output_folder, name, tables):
+    os.makedirs(os.path.join(output_folder, name))
+    manifest = {"database": "shop", "tables": [{"name": table, "file": f"tables/{table}.sql.gz", "fingerprint": fingerprint}
+                                               for table, fingerprint in tables.items()]}
+    with open(os.path.join(output_folder, name, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f)
+
+
+def test_unchanged_tables_are_reused_from_the_previous_backup(tmp_path, fake_mysql, monkeypatch):
+    output_folder = str(tmp_path / "sauvegardes")
+    write_previous_backup(output_folder, "shop_20260110_020000", {
+        "logs": f"update:2026-01-10 01:00:00|create:{CREATED}",
+        "orders": f"update:2026-01-10 01:00:00|create:{CREATED}",
+        "users": f"checksum:111|create:{CREATED}"
+    })
+    fake_mysql.set_results([
+        ("TABLE_TYPE, ENGINE", [[name, "BASE TABLE", "InnoDB", 10, 16384] for name in ("logs", "orders", "users")]),
+        ("CREATE_TIME, UPDATE_TIME", [["logs", CREATED, "2026-01-10 03:00:00"],
+                                      ["orders", CREATED, "2026-01-10 01:00:00"],
+                                      ["users", CREATED, None]]),
+        ("CHECKSUM TABLE", [["shop.users", 111]])
+    ])
+    calls = []
+    monkeypatch.setattr(dump_incremental, "dump_parallel", lambda *args, **options: calls.append(options) or {})
+
+    run_incremental("mysqldump", fake_mysql.path, [], "shop", os.path.join(output_folder, "shop_20260111_020000"), 2)
+
+    reuse = calls[0]["reuse"]
+    assert sorted(reuse) == ["orders", "users"]
+    assert reuse["orders"]["file"] == "../shop_20260110_020000/tables/orders.sql.gz"
+    assert reuse["users"]["reused_from"] == "shop_20260110_020000"
+    # Seule la table sans UPDATE_TIME passe par CHECKSUM TABLE
+    assert [query for query in fake_mysql.queries() if query.startswith("CHECKSUM")] == ["CHECKSUM TABLE `shop`.`users`"]
+    assert calls[0]["manifest_extra"]["incremental"] == {"base": "shop_20260110_020000", "method": "update_time"}
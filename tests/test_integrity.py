@@ -0,0 +1,99 @@
+import os
+import random
+import sys
+
+import pytest
+
+from dump_checkpoint import file_sha256
+from dump_compression import archive_extension, dump_to_archives
+from dump_integrity import verify_archive, verify_backup, write_integrity
+from dump_pipeline import HashingReader
+
+CAT = "import shutil, sys; shutil.copyfileobj(open(sys.argv[1], 'rb'), sys.stdout.buffer)"
+
+
+def write_dump(tmp_path, rows=20000):
+    generator = random.Random(7)
+    lines = [b"-- MySQL dump 10.13\n"]
+    lines += [b"INSERT INTO `t` VALUES (%d,'%s');\n" % (row, generator.randbytes(20).hex().encode()) for row in range(rows)]
+    lines.append(b"-- Dump completed on 2026-01-01  2:00:00\n")
+    path = str(tmp_path / "dump.sql")
+    with open(path, 'wb') as f:
+        f.write(b"".join(lines))
+    return path
+
+
+def write_archive(tmp_path, compression):
+    sql_path = write_dump(tmp_path)
+    archive_path = str(tmp_path / ("shop" + archive_extension(compression)))
+    returncode, _, integrity = dump_to_archives([[sys.executable, "-c", CAT, sql_path]], [(archive_path, compression)],
+                                                "shop.sql", threads=2)
+    assert returncode == 0
+    write_integrity(archive_path, integrity[0])
+    return archive_path
+
+
+def flip_byte(path, position):
+    with open(path, 'r+b') as f:
+        f.seek(position)
+        byte = f.read(1)[0]
+        f.seek(position)
+        f.write(bytes([byte ^ 0xFF]))
+
+
+def truncate(path, size):
+    with open(path, 'r+b') as f:
+        f.truncate(size)
+
+
+@pytest.mark.parametrize("compression", ["gzip", "seekable", "zip", "none"])
+def test_verify_accepts_an_intact_archive(tmp_path, compression):
+    report = verify_backup(write_archive(tmp_path, compression))
+    assert report["ok"], report
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zip", "none"])
+def test_verify_reports_a_flipped_byte(tmp_path, compression):
+    archive_path = write_archive(tmp_path, compression)
+    flip_byte(archive_path, os.path.getsize(archive_path) // 2)
+    report = verify_backup(archive_path)
+    assert not report["ok"]
+    assert report["files"][0]["errors"] == ["Le SHA-256 du fichier ne correspond pas à l'empreinte enregistrée"]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zip", "none"])
+def test_verify_reports_a_truncated_archive(tmp_path, compression):
+    archive_path = write_archive(tmp_path, compression)
+    truncate(archive_path, os.path.getsize(archive_path) - 100)
+    assert "Taille inattendue" in verify_backup(archive_path)["files"][0]["errors"][0]
+    # Sans fichier d'empreintes, la décompression ou la dernière ligne révèle la troncature
+    os.remove(archive_path + ".sha256.json")
+    errors = verify_backup(archive_path)["files"][0]["errors"]
+    assert errors and ("Décompression impossible" in errors[0] or "-- Dump completed" in errors[0])
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zip"])
+def test_archive_is_read_once_and_hashed_in_file_order(tmp_path, compression, monkeypatch):
+    archive_path = write_archive(tmp_path, compression)
+    readers = []
+
+    class CountingReader(HashingReader):
+        def __init__(self, path):
+            super().__init__(path)
+            self.read_bytes = 0
+            readers.append(self)
+
+        def read(self, size=-1):
+            data = super().read(size)
+            self.read_bytes += len(data)
+            return data
+
+        def readinto(self, buffer):
+            count = super().readinto(buffer)
+            self.read_bytes += count
+            return count
+
+    monkeypatch.setattr("dump_integrity.HashingReader", CountingReader)
+    assert verify_archive(archive_path, {"sha256": file_sha256(archive_path)}) == []
+    # Le répertoire central d'un zip est lu deux fois, le reste du fichier une seule
+    assert readers[0].read_bytes < os.path.getsize(archive_path) + 64 * 1024
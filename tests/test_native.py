@@ -0,0 +1,147 @@
+import re
+import sqlite3
+
+import pytest
+
+from dump_native import NativeDump, SQLiteSource, sql_literal
+from dump_parallel import TableSplitter
+from dump_restore import restore_backup
+
+ITEMS = [
+    (1, "O'Reilly", 0.1, b"\x00\x01\xff", None),
+    (2, 'anti\\slash "guillemets"', -2.5e-10, None, "ligne\nsuivante\r\x1a"),
+    (3, "nul\0au milieu", 1e100, b"'\\\n", ""),
+    (4, "ünïcödé €", 3.0, b"\n", "x")
+]
+UNESCAPES = {"0": "\0", "n": "\n", "r": "\r", "Z": "\x1a", "\\": "\\", "'": "'", '"': '"'}
+LITERAL = re.compile(r"NULL|0x[0-9a-f]+|'(?:[^'\\]|\\.)*'|[-+0-9.e]+|[(),]", re.S)
+
+
+class ListWriter:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def create_database(path):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT NOT NULL, price REAL, data BLOB, note TEXT)")
+    connection.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?)", ITEMS)
+    connection.execute("CREATE TABLE numbers (id INTEGER PRIMARY KEY, value TEXT)")
+    connection.executemany("INSERT INTO numbers VALUES (?, ?)", [(row, f"valeur {row}") for row in range(100)])
+    connection.execute("CREATE VIEW cheap AS SELECT id, label FROM items WHERE price < 1")
+    connection.commit()
+    connection.close()
+    return path
+
+
+def native_dump(path, **options):
+    output = ListWriter()
+    assert NativeDump(SQLiteSource(path), "shop", **options).stream(output) == (0, "")
+    return bytes(output.data)
+
+
+def parse_literal(token):
+    if token == "NULL":
+        return None
+    if token.startswith("0x"):
+        return bytes.fromhex(token[2:])
+    if token.startswith("'"):
+        return re.sub(r"\\(.)", lambda match: UNESCAPES[match.group(1)], token[1:-1], flags=re.S)
+    return int(token) if re.fullmatch(r"-?\d+", token) else float(token)
+
+
+def inserted_rows(dump, table):
+    """Lignes des INSERT de table, relues d'après la syntaxe des littéraux MySQL."""
+    rows = []
+    prefix = f"INSERT INTO `{table}` VALUES "
+    # Une instruction par ligne : les retours à la ligne des valeurs sont protégés
+    for line in dump.decode("utf-8").split("\n"):
+        if not line.startswith(prefix):
+            continue
+        row = None
+        for token in LITERAL.findall(line[len(prefix):]):
+            if token == "(":
+                row = []
+            elif token == ")":
+                rows.append(tuple(row))
+            elif token != ",":
+                row.append(parse_literal(token))
+    return rows
+
+
+def insert_lines(dump, table):
+    return [line for line in dump.split(b"\n") if line.startswith(b"INSERT INTO `%s` " % table.encode())]
+
+
+@pytest.fixture
+def database(tmp_path):
+    return create_database(str(tmp_path / "shop.sqlite"))
+
+
+def test_native_dump_round_trips_values(database):
+    dump = native_dump(database)
+    assert dump.rstrip().split(b"\n")[-1].startswith(b"-- Dump completed on ")
+    assert inserted_rows(dump, "numbers") == [(row, f"valeur {row}") for row in range(100)]
+    # Le NUL, l'antislash et les guillemets sont protégés ; les BLOB en hexadécimal
+    assert inserted_rows(dump, "items") == ITEMS
+    assert b"\0" not in dump and b"(3,'nul\\0au milieu',1e+100,0x275c0a,'')" in dump
+
+
+def test_sql_literal_formats():
+    assert sql_literal(None) == "NULL"
+    assert sql_literal(0.1) == "0.1" and sql_literal(-2.5e-10) == "-2.5e-10" and sql_literal(3.0) == "3.0"
+    assert sql_literal(b"\x00\xff") == "0x00ff" and sql_literal(b"") == "''"
+    assert sql_literal("a'b\\c\0d\"e\x1a") == "'a\\'b\\\\c\\0d\\\"e\\Z'"
+    assert sql_literal(True) == "1"
+
+
+def test_batch_rows_and_insert_size_split_inserts(database):
+    assert len(insert_lines(native_dump(database), "numbers")) == 1
+    assert len(insert_lines(native_dump(database, batch_rows=1), "numbers")) == 100
+    lines = insert_lines(native_dump(database, batch_rows=7), "numbers")
+    assert len(lines) == 15 and all(line.count(b"),(") < 7 for line in lines)
+    lines = insert_lines(native_dump(database, insert_size=200), "numbers")
+    assert len(lines) > 5 and all(len(line) <= 200 for line in lines)
+    assert inserted_rows(b"\n".join(lines) + b"\n", "numbers") == [(row, f"valeur {row}") for row in range(100)]
+
+
+def test_native_dump_is_split_by_table(database):
+    dump = native_dump(database, batch_rows=10)
+    files = {}
+
+    class TableWriter(ListWriter):
+        def __init__(self, name):
+            super().__init__()
+            files[name] = self
+
+    splitter = TableSplitter(TableWriter)
+    for start in range(0, len(dump), 1000):
+        splitter.write(dump[start:start + 1000])
+    splitter.close()
+    assert list(files) == ["items", "numbers"]
+    assert inserted_rows(bytes(files["numbers"].data), "numbers") == [(row, f"valeur {row}") for row in range(100)]
+    assert b"CREATE TABLE `items`" in files["items"].data and b"`numbers`" not in files["items"].data
+
+
+def test_native_dump_is_restored_table_by_table(tmp_path, database, fake_mysql):
+    archive = str(tmp_path / "shop.sql")
+    dump = native_dump(database, batch_rows=10)
+    with open(archive, 'wb') as f:
+        f.write(dump)
+    result = restore_backup(archive, fake_mysql.path, [], "restored", workers=2)
+    assert result["tables"] == 3
+    sessions = fake_mysql.sessions()
+    by_table = {table: [session for session in sessions if b"CREATE TABLE `%s`" % table.encode() in session["sql"]]
+                for table in ("items", "numbers")}
+    assert all(len(found) == 1 for found in by_table.values())
+    for table, (session,) in by_table.items():
+        assert insert_lines(session["sql"], table) == insert_lines(dump, table)
+    # Les vues définitives sont chargées après toutes les tables
+    assert b"CREATE VIEW cheap" in sessions[-1]["sql"]
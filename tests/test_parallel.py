@@ -0,0 +1,92 @@
+import pytest
+
+from dump_parallel import TableSplitter, limit_chunk_counts, range_where_clause, split_key_range
+
+HEADER = b"-- MySQL dump 10.13\n/*!40101 SET NAMES utf8mb4 */;\n"
+
+
+def section(name, rows):
+    return (b"--\n-- Table structure for table `%s`\n--\n\nCREATE TABLE `%s` (`id` int);\n" % (name, name) +
+            b"".join(b"INSERT INTO `%s` VALUES (%d);\n" % (name, row) for row in range(rows)) + b"\n")
+
+
+@pytest.mark.parametrize("min_value, max_value, count", [(1, 1000, 4), (0, 9, 3), (-50, 50, 7), (5, 7, 10)])
+def test_split_key_range_covers_the_interval_without_gaps(min_value, max_value, count):
+    ranges = split_key_range(min_value, max_value, count)
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    assert len(ranges) <= count
+    # Chaque plage commence où finit la précédente : aucune clé n'est oubliée ni exportée deux fois
+    for (_, upper), (lower, _) in zip(ranges, ranges[1:]):
+        assert upper == lower
+    bounds = [upper for _, upper in ranges[:-1]]
+    assert bounds == sorted(set(bounds))
+    assert all(min_value < bound <= max_value for bound in bounds)
+
+
+def test_split_key_range_of_equal_widths():
+    assert split_key_range(1, 1000, 4) == [(None, 251), (251, 501), (501, 751), (751, None)]
+    # Plus de plages que de clés : une plage par clé
+    assert split_key_range(5, 7, 10) == [(None, 6), (6, 7), (7, None)]
+    assert split_key_range(3, 3, 4) == [(None, None)]
+
+
+def test_range_where_clause():
+    assert range_where_clause("id", None, 251) == "`id` < 251"
+    assert range_where_clause("id", 251, 501) == "`id` >= 251 AND `id` < 501"
+    assert range_where_clause("id", None, None) == "1=1"
+
+
+def test_limit_chunk_counts_never_exceeds_workers():
+    counts = {"a": 8, "b": 8, "c": 8}
+    sizes = {"a": 800, "b": 400, "c": 100}
+    limited = limit_chunk_counts(counts, sizes, workers=7, other_tables=True)
+    # Un worker reste aux tables non découpées ; une table découpée garde au moins deux plages
+    assert sum(limited.values()) <= 6
+    assert all(count >= 2 for count in limited.values())
+    assert limited.get("a", 0) >= limited.get("c", 0)
+
+
+class BufferWriter:
+    def __init__(self, files, name):
+        self.files = files
+        self.name = name
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.files[self.name] = bytes(self.data)
+
+
+def split(stream, block_size):
+    files = {}
+    events = []
+    splitter = TableSplitter(lambda name: BufferWriter(files, name),
+                             on_table_start=lambda name: events.append(("start", name)),
+                             on_table_end=lambda name: events.append(("end", name)))
+    for start in range(0, len(stream), block_size):
+        splitter.write(stream[start:start + block_size])
+    splitter.close()
+    return files, events
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 5, 17, 4096])
+def test_table_splitter_copies_header_and_cuts_on_markers(block_size):
+    stream = HEADER + section(b"orders", 3) + section(b"we``ird", 2) + section(b"users", 1)
+    files, events = split(stream, block_size)
+    assert list(files) == ["orders", "we`ird", "users"]
+    assert events == [("start", "orders"), ("end", "orders"), ("start", "we`ird"), ("end", "we`ird"),
+                      ("start", "users"), ("end", "users")]
+    for name, data in files.items():
+        # Chaque fichier commence par l'en-tête du dump et reste chargeable seul
+        assert data.startswith(HEADER + b"--\n-- Table structure for table `")
+    assert files["orders"] == HEADER + section(b"orders", 3)
+    assert files["users"] == HEADER + section(b"users", 1)
+    assert b"".join(data[len(HEADER):] for data in files.values()) == stream[len(HEADER):]
+
+
+def test_table_splitter_ignores_markers_inside_data():
+    stream = HEADER + section(b"t", 1) + b"INSERT INTO `t` VALUES ('--\\n-- Table structure for table `x`');\n"
+    files, _ = split(stream, 7)
+    assert list(files) == ["t"]
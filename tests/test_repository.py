@@ -0,0 +1,141 @@
+import io
+import os
+import time
+
+import pytest
+
+import dump_repository
+from dump_pipeline import DumpError
+from dump_repository import (CHUNKS_DIR, SNAPSHOTS_DIR, WRITING_SUFFIX, RepositoryWriter, list_snapshots,
+                             prune_repository, restore_snapshot)
+
+
+def dump_lines(count, seed=b""):
+    return b"".join(b"INSERT INTO `t` VALUES (%d,'%s ligne %d');\n" % (row, seed, row) for row in range(count))
+
+
+def chunk_files(repository):
+    return {name for _, _, names in os.walk(os.path.join(repository, CHUNKS_DIR)) for name in names}
+
+
+def write_snapshot(repository, name, data):
+    writer = RepositoryWriter(repository, name, "shop", compression="none", threads=2)
+    writer.write(data)
+    return writer.commit()
+
+
+def age_chunks(repository, seconds=3600):
+    past = time.time() - seconds
+    for folder, _, names in os.walk(os.path.join(repository, CHUNKS_DIR)):
+        for name in names:
+            os.utime(os.path.join(folder, name), (past, past))
+
+
+def test_snapshot_round_trip_and_deduplication(tmp_path):
+    repository = str(tmp_path / "repository")
+    data = dump_lines(100000)
+    first = write_snapshot(repository, "shop_1", data)
+    second = write_snapshot(repository, "shop_2", data)
+    assert first["chunk_count"] > 1 and first["new_chunks"] == first["chunk_count"]
+    assert second["new_chunks"] == 0
+    output = io.BytesIO()
+    restore_snapshot(repository, "shop_2", output)
+    assert output.getvalue() == data
+    assert [index["snapshot"] for index in list_snapshots(repository)] == ["shop_1", "shop_2"]
+    assert not [name for name in os.listdir(os.path.join(repository, SNAPSHOTS_DIR)) if name.endswith(WRITING_SUFFIX)]
+
+
+def test_prune_removes_only_unreferenced_chunks(tmp_path):
+    repository = str(tmp_path / "repository")
+    kept = write_snapshot(repository, "shop_1", dump_lines(100000))
+    dropped = write_snapshot(repository, "shop_2", dump_lines(100000, b"autre"))
+    os.remove(dropped["path"])
+    removed, freed = prune_repository(repository)
+    assert removed == dropped["new_chunks"] and freed > 0
+    assert chunk_files(repository) == {chunk_hash for chunk_hash, _ in kept["chunks"]}
+
+
+@pytest.mark.skipif(dump_repository.fcntl is None, reason="verrou flock")
+def test_prune_is_refused_while_a_snapshot_is_written(tmp_path):
+    repository = str(tmp_path / "repository")
+    write_snapshot(repository, "shop_1", dump_lines(100000))
+    writer = RepositoryWriter(repository, "shop_2", "shop", compression="none")
+    writer.write(dump_lines(100000, b"autre"))
+    with pytest.raises(DumpError, match="en cours d'écriture"):
+        prune_repository(repository)
+    writer.commit()
+    assert prune_repository(repository) == (0, 0)
+
+
+@pytest.mark.skipif(dump_repository.fcntl is None, reason="verrou flock")
+def test_prune_after_interrupted_snapshot_removes_its_chunks_and_note(tmp_path):
+    repository = str(tmp_path / "repository")
+    writer = RepositoryWriter(repository, "shop_1", "shop", compression="none")
+    writer.write(dump_lines(100000))
+    writer.close()
+    # Arrêt brutal : ni index ni fin d'écriture, le verrou disparaît avec le processus
+    writer.lock.release()
+    removed, _ = prune_repository(repository)
+    assert removed > 0 and not chunk_files(repository)
+    assert os.listdir(os.path.join(repository, SNAPSHOTS_DIR)) == []
+
+
+def test_prune_without_lock_keeps_chunks_of_snapshots_in_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(dump_repository, "fcntl", None)
+    repository = str(tmp_path / "repository")
+    old = write_snapshot(repository, "shop_1", dump_lines(100000))
+    os.remove(old["path"])
+    age_chunks(repository)
+    writer = RepositoryWriter(repository, "shop_2", "shop", compression="none")
+    # Une partie des morceaux est réutilisée, l'autre est nouvelle ; aucun n'est encore référencé
+    writer.write(dump_lines(60000) + dump_lines(5000, b"autre"))
+    writer.close()
+    prune_repository(repository)
+    assert {chunk_hash for chunk_hash, _ in writer.chunks} <= chunk_files(repository)
+    index = writer.commit()
+    output = io.BytesIO()
+    restore_snapshot(repository, "shop_2", output)
+    assert output.getvalue() == dump_lines(60000) + dump_lines(5000, b"autre")
+    assert index["new_chunks"] < index["chunk_count"]
+
+
+def chunk_list(repository, name, data, write_size):
+    writer = RepositoryWriter(repository, name, "shop", compression="none", threads=2)
+    for start in range(0, len(data), write_size):
+        writer.write(data[start:start + write_size])
+    index = writer.commit()
+    return [chunk_hash for chunk_hash, _ in index["chunks"]]
+
+
+def test_content_defined_cuts_do_not_depend_on_write_sizes(tmp_path):
+    repository = str(tmp_path / "repository")
+    data = dump_lines(100000)
+    reference = chunk_list(repository, "shop_1", data, len(data))
+    assert len(reference) > 2
+    for position, write_size in enumerate((1000, 65536, 1 << 20)):
+        assert chunk_list(repository, f"shop_{position + 2}", data, write_size) == reference
+
+
+def test_content_defined_cuts_resynchronise_after_an_edit(tmp_path):
+    repository = str(tmp_path / "repository")
+    data = dump_lines(200000)
+    before = chunk_list(repository, "shop_1", data, 65536)
+    # Une ligne modifiée et une ligne ajoutée au début : seuls les morceaux qui les contiennent changent
+    lines = data.split(b"\n")
+    lines[10] = lines[10].replace(b"ligne", b"LIGNE")
+    lines.insert(20, b"INSERT INTO `t` VALUES (-1,'ajout');")
+    after = chunk_list(repository, "shop_2", b"\n".join(lines), 65536)
+    assert len(set(after) - set(before)) == 1
+    assert after[1:] == before[1:]
+
+
+def test_giant_line_is_cut_at_max_size(tmp_path):
+    repository = str(tmp_path / "repository")
+    data = b"INSERT INTO `t` VALUES ('" + b"x" * (2 * dump_repository.CDC_MAX_SIZE + 10) + b"');\n"
+    writer = RepositoryWriter(repository, "shop_1", "shop", compression="none")
+    writer.write(data)
+    index = writer.commit()
+    assert all(size <= dump_repository.CDC_MAX_SIZE for _, size in index["chunks"])
+    output = io.BytesIO()
+    restore_snapshot(repository, "shop_1", output)
+    assert output.getvalue() == data
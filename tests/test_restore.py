@@ -0,0 +1,230 @@
+import json
+import os
+
+import pytest
+
+from dump_pipeline import DumpError
+from dump_restore import (BULK_SESSION_SQL, BulkLoadWriter, DeferredIndexWriter, defer_secondary_indexes,
+                          restore_backup)
+from dump_seekable import SeekableGzipWriter
+
+HEADER = b"-- MySQL dump 10.13\n/*!40101 SET NAMES utf8mb4 */;\n"
+TRIGGER = (b"DELIMITER ;;\n"
+           b"/*!50003 CREATE TRIGGER `audit` AFTER INSERT ON `orders` FOR EACH ROW BEGIN\n"
+           b"LOCK TABLES `log` WRITE;\n"
+           b"INSERT INTO `log` VALUES (NEW.id);\n"
+           b"END */;;\n"
+           b"DELIMITER ;\n")
+
+
+class ListWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def close(self):
+        self.closed = True
+
+
+def create_table(name, keys=b""):
+    return (b"CREATE TABLE `%s` (\n  `id` int NOT NULL AUTO_INCREMENT,\n  `k` int DEFAULT NULL,\n"
+            b"  PRIMARY KEY (`id`)%s\n) ENGINE=InnoDB;\n" % (name, keys))
+
+
+def table_section(name, rows, keys=b""):
+    inserts = b"".join(b"INSERT INTO `%s` VALUES (%d,%d);\n" % (name, row, row) for row in rows)
+    return (b"--\n-- Table structure for table `%s`\n--\n\n" % name + create_table(name, keys) +
+            b"\n--\n-- Dumping data for table `%s`\n--\n\nLOCK TABLES `%s` WRITE;\n" % (name, name) +
+            inserts + b"UNLOCK TABLES;\n")
+
+
+def bulk_load(data, chunk_size=None, commit_bytes=64 * 1024 * 1024):
+    output = ListWriter()
+    writer = BulkLoadWriter(output, commit_bytes)
+    chunk_size = chunk_size or len(data)
+    for start in range(0, len(data), chunk_size):
+        writer.write(data[start:start + chunk_size])
+    writer.close()
+    return bytes(output.data)
+
+
+def test_bulk_load_removes_lock_tables_but_keeps_routine_bodies():
+    dump = HEADER + table_section(b"orders", range(1, 4)) + TRIGGER
+    output = bulk_load(dump)
+    assert b"LOCK TABLES `orders` WRITE;" not in output
+    assert b"UNLOCK TABLES;" not in output
+    # Le corps du trigger, entre deux DELIMITER, est transmis tel quel
+    assert TRIGGER in output
+    assert output.endswith(b"\nCOMMIT;\n")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100])
+def test_bulk_load_does_not_depend_on_block_boundaries(chunk_size):
+    dump = HEADER + table_section(b"orders", range(1, 50)) + TRIGGER
+    # Les COMMIT intermédiaires dépendent des blocs reçus ; le reste du flux n'en dépend pas
+    assert bulk_load(dump, chunk_size, commit_bytes=200).replace(b"COMMIT;\n", b"") == \
+        bulk_load(dump, commit_bytes=200).replace(b"COMMIT;\n", b"")
+
+
+def test_bulk_load_commits_between_inserts():
+    dump = HEADER + table_section(b"orders", range(1, 30))
+    output = bulk_load(dump, chunk_size=13, commit_bytes=100)
+    statements = output.split(b"\n")
+    assert statements.count(b"COMMIT;") > 3
+    for position, line in enumerate(statements):
+        if line == b"COMMIT;" and position + 1 < len(statements) and statements[position + 1]:
+            # Un COMMIT n'est inséré qu'avant un INSERT, jamais au milieu d'une instruction
+            assert statements[position + 1].startswith(b"INSERT INTO ")
+    assert b"".join(line for line in statements if line.startswith(b"INSERT")) == \
+        b"".join(line for line in dump.split(b"\n") if line.startswith(b"INSERT"))
+
+
+def test_defer_secondary_indexes_keeps_protected_fulltext_and_spatial_keys():
+    statement = (b"CREATE TABLE `t` (\n"
+                 b"  `id` int NOT NULL AUTO_INCREMENT,\n"
+                 b"  `seq` int NOT NULL AUTO_INCREMENT,\n"
+                 b"  `customer_id` int NOT NULL,\n"
+                 b"  `k` int DEFAULT NULL,\n"
+                 b"  `body` text,\n"
+                 b"  `place` point NOT NULL,\n"
+                 b"  PRIMARY KEY (`id`),\n"
+                 b"  UNIQUE KEY `uk` (`k`),\n"
+                 b"  KEY `seq` (`seq`),\n"
+                 b"  KEY `fk_customer` (`customer_id`),\n"
+                 b"  KEY `k_id` (`k`,`id`),\n"
+                 b"  FULLTEXT KEY `ft1` (`body`),\n"
+                 b"  FULLTEXT KEY `ft2` (`body`,`k`),\n"
+                 b"  SPATIAL KEY `sp` (`place`),\n"
+                 b"  CONSTRAINT `fk` FOREIGN KEY (`customer_id`) REFERENCES `customers` (`id`)\n"
+                 b") ENGINE=InnoDB;")
+    create, alter = defer_secondary_indexes(statement)
+    assert alter == b"ALTER TABLE `t` ADD UNIQUE KEY `uk` (`k`), ADD KEY `k_id` (`k`,`id`);\n"
+    for kept in (b"KEY `seq`", b"KEY `fk_customer`", b"FULLTEXT KEY `ft1`", b"FULLTEXT KEY `ft2`",
+                 b"SPATIAL KEY `sp`", b"CONSTRAINT `fk`"):
+        assert kept in create
+    assert b"`uk`" not in create and b"`k_id`" not in create
+    assert create.endswith(b"\n) ENGINE=InnoDB;")
+
+
+def test_defer_secondary_indexes_without_secondary_keys_is_unchanged():
+    statement = create_table(b"t").rstrip(b"\n")
+    assert defer_secondary_indexes(statement) == (statement, b"")
+
+
+def test_deferred_index_writer_appends_alter_after_data():
+    output = ListWriter()
+    writer = DeferredIndexWriter(output)
+    section = table_section(b"t", range(1, 3), keys=b",\n  KEY `k` (`k`)")
+    for start in range(0, len(section), 5):
+        writer.write(section[start:start + 5])
+    writer.close()
+    assert b"KEY `k`" not in output.data[:output.data.index(b"INSERT")]
+    assert output.data.endswith(b"ALTER TABLE `t` ADD KEY `k` (`k`);\n")
+    assert output.closed
+
+
+def write_parallel_backup(directory):
+    """Sauvegarde par table écrite à la main : une table découpée en trois morceaux et une table entière."""
+    os.makedirs(os.path.join(directory, "tables"))
+    files = {
+        "tables/big.part0000.sql": HEADER + table_section(b"big", range(1, 4), keys=b",\n  KEY `k` (`k`)"),
+        "tables/big.part0001.sql": HEADER + b"INSERT INTO `big` VALUES (4,4);\n",
+        "tables/big.part0002.sql": HEADER + b"INSERT INTO `big` VALUES (5,5);\n",
+        "tables/big.triggers.sql": HEADER + TRIGGER.replace(b"`orders`", b"`big`"),
+        "tables/small.sql": HEADER + table_section(b"small", range(1, 3)),
+        "schema.sql": HEADER + b"-- routines\n",
+    }
+    for name, data in files.items():
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(data)
+    manifest = {
+        "format": "mysqldumper-parallel",
+        "version": 1,
+        "database": "shop",
+        "compression": "none",
+        "schema": "schema.sql",
+        "views": None,
+        "tables": [
+            {"name": "big", "data_length": 3000, "triggers": "tables/big.triggers.sql",
+             "chunks": [{"file": f"tables/big.part{index:04d}.sql"} for index in range(3)]},
+            {"name": "small", "data_length": 10, "file": "tables/small.sql"}
+        ]
+    }
+    with open(os.path.join(directory, "manifest.json"), 'w') as f:
+        json.dump(manifest, f)
+
+
+def test_restore_directory_loads_chunks_after_first_and_indexes_last(tmp_path, fake_mysql):
+    backup = str(tmp_path / "backup")
+    write_parallel_backup(backup)
+    result = restore_backup(backup, fake_mysql.path, [], "restored", workers=3)
+    assert result["tables"] == 2
+    assert fake_mysql.queries() == ["CREATE DATABASE IF NOT EXISTS `restored`"]
+
+    sessions = fake_mysql.sessions()
+    assert all(session["database"] == "restored" and session["sql"].startswith(BULK_SESSION_SQL) for session in sessions)
+    by_content = {}
+    for session in sessions:
+        for marker in (b"CREATE TABLE `big`", b"VALUES (4,4)", b"VALUES (5,5)", b"CREATE TRIGGER", b"CREATE TABLE `small`",
+                       b"-- routines"):
+            if marker in session["sql"]:
+                by_content[marker] = session
+    assert len(sessions) == len(by_content) == 6
+    first = by_content[b"CREATE TABLE `big`"]
+    chunks = [by_content[b"VALUES (4,4)"], by_content[b"VALUES (5,5)"]]
+    finalize = by_content[b"CREATE TRIGGER"]
+    # Le premier morceau crée la table avant les autres ; triggers et index viennent après le dernier
+    assert all(first["ended"] < chunk["started"] for chunk in chunks)
+    assert all(chunk["ended"] < finalize["started"] for chunk in chunks)
+    assert b"KEY `k`" not in first["sql"]
+    assert finalize["sql"].endswith(b"ALTER TABLE `big` ADD KEY `k` (`k`);\n\nCOMMIT;\n")
+    routines = by_content[b"-- routines"]
+    assert routines["started"] > max(session["ended"] for session in sessions if session is not routines)
+    assert not any(b"LOCK TABLES `big` WRITE" in session["sql"] for session in sessions)
+
+
+def test_restore_seekable_loads_each_table_in_its_own_session(tmp_path, fake_mysql):
+    archive = str(tmp_path / "shop.sql.gz")
+    tail = b"--\n-- Dumping routines for database 'shop'\n--\n-- Dump completed\n"
+    writer = SeekableGzipWriter(archive, frame_size=64)
+    writer.write(HEADER + table_section(b"a", range(1, 20)) + table_section(b"b", range(1, 20)) + tail)
+    writer.close()
+    result = restore_backup(archive, fake_mysql.path, [], "restored", workers=2)
+    assert result["tables"] == 2
+
+    sessions = fake_mysql.sessions()
+    assert len(sessions) == 3
+    tables = [session for session in sessions if b"CREATE TABLE" in session["sql"]]
+    assert sorted(b"CREATE TABLE `a`" in session["sql"] for session in tables) == [False, True]
+    for session in tables:
+        # L'en-tête du dump précède chaque section ; une section ne contient qu'une table
+        assert HEADER in session["sql"]
+        assert session["sql"].count(b"CREATE TABLE") == 1
+        assert session["sql"].count(b"INSERT INTO") == 19
+    assert b"Dumping routines" in sessions[-1]["sql"]
+    assert sessions[-1]["started"] > max(session["ended"] for session in tables)
+
+
+def test_restore_stream_announces_spool_and_loads_sections(tmp_path, fake_mysql):
+    archive = str(tmp_path / "shop.sql")
+    with open(archive, 'wb') as f:
+        f.write(HEADER + table_section(b"a", range(1, 5)) + table_section(b"b", range(1, 5)))
+    messages = []
+    result = restore_backup(archive, fake_mysql.path, [], "restored", workers=2, progress=messages.append,
+                            temp_dir=str(tmp_path), spool_limit=1)
+    assert result["tables"] == 2
+    assert any("mise en attente dans" in message and str(tmp_path) in message for message in messages)
+    assert len(fake_mysql.sessions()) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("mysqldumper_restore_")]
+
+
+def test_restore_reports_mysql_errors(tmp_path, fake_mysql, monkeypatch):
+    backup = str(tmp_path / "backup")
+    write_parallel_backup(backup)
+    monkeypatch.setenv("FAKE_MYSQL_FAIL", "CREATE TABLE `small`")
+    with pytest.raises(DumpError, match="erreur simulée"):
+        restore_backup(backup, fake_mysql.path, [], "restored", workers=2)
@@ -0,0 +1,84 @@
+import pytest
+
+from dump_rewrite import SqlRewrite
+
+PREFIX = b"INSERT INTO `t` VALUES "
+# Lignes dont les chaînes contiennent des parenthèses, des apostrophes échappées et des "),("
+ROWS = [
+    b"(1,'simple',NULL)",
+    b"(2,'a),(b',0x00ff)",
+    b"(3,'it\\'s),(',_binary 'x')",
+    b"(4,'back\\\\',-1.5)",
+    b"(5,'\\'),(\\'',b'0101')",
+    b"(6,'" + b"long " * 30 + b"',NULL)",
+    b"(7,'(),(),()',x'0a')",
+    b"(8,'fin',NULL)",
+]
+
+
+class BufferWriter:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        pass
+
+
+def rewrite(data, write_size, **settings):
+    output = BufferWriter()
+    writer = SqlRewrite(**settings).wrap(output)
+    for start in range(0, len(data), write_size):
+        writer.write(data[start:start + write_size])
+    writer.close()
+    return bytes(output.data)
+
+
+def statement_rows(statement):
+    """Lignes d'origine d'un INSERT réécrit : ses valeurs doivent être une suite de lignes entières de ROWS."""
+    assert statement.startswith(PREFIX) and statement.endswith(b";")
+    values = statement[len(PREFIX):-1]
+    for start in range(len(ROWS)):
+        for end in range(start + 1, len(ROWS) + 1):
+            if b",".join(ROWS[start:end]) == values:
+                return list(range(start, end))
+    raise AssertionError(f"INSERT coupé à l'intérieur d'une ligne : {statement!r}")
+
+
+@pytest.mark.parametrize("statements", [[ROWS], [[row] for row in ROWS], [ROWS[:3], ROWS[3:5], ROWS[5:]]])
+@pytest.mark.parametrize("insert_size", [1, 40, 120, 300, 100_000])
+@pytest.mark.parametrize("write_size", [1, 13, 100_000])
+def test_insert_size_splits_and_merges_only_between_rows(statements, insert_size, write_size):
+    dump = b"".join(PREFIX + b",".join(rows) + b";\n" for rows in statements)
+    output = rewrite(dump, write_size, insert_size=insert_size)
+    lines = output.split(b"\n")
+    assert lines.pop() == b""
+    rows = [index for line in lines for index in statement_rows(line)]
+    assert rows == list(range(len(ROWS)))
+    for line in lines:
+        # Une instruction ne dépasse la limite que si elle ne contient qu'une ligne
+        assert len(line) + 1 <= insert_size or len(statement_rows(line)) == 1
+    if insert_size == 100_000:
+        assert len(lines) == 1
+
+
+def test_insert_size_never_merges_across_tables_or_other_lines():
+    dump = (PREFIX + ROWS[0] + b";\n" + PREFIX + ROWS[1] + b";\n" + b"/*!40000 ALTER TABLE `t` ENABLE KEYS */;\n" +
+            PREFIX + ROWS[2] + b";\n" + b"INSERT INTO `u` VALUES " + ROWS[3] + b";\n")
+    output = rewrite(dump, 7, insert_size=100_000)
+    assert output == (PREFIX + ROWS[0] + b"," + ROWS[1] + b";\n" + b"/*!40000 ALTER TABLE `t` ENABLE KEYS */;\n" +
+                      PREFIX + ROWS[2] + b";\n" + b"INSERT INTO `u` VALUES " + ROWS[3] + b";\n")
+
+
+def test_definer_and_schema_rewrite_leave_row_values_untouched():
+    dump = (b"USE `shop`;\n"
+            b"/*!50013 DEFINER=`root`@`localhost` SQL SECURITY DEFINER */\n"
+            b"INSERT INTO `t` VALUES (1,'DEFINER=`root`@`localhost` `shop`.`t`');\n"
+            b"/*!50001 VIEW `v` AS select `shop`.`t`.`id` AS `id` from `shop`.`t` */;\n")
+    output = rewrite(dump, 5, definer="strip", rename_schema=("shop", "shop_test"))
+    assert output == (b"USE `shop_test`;\n"
+                      b"/*!50013 SQL SECURITY DEFINER */\n"
+                      b"INSERT INTO `t` VALUES (1,'DEFINER=`root`@`localhost` `shop`.`t`');\n"
+                      b"/*!50001 VIEW `v` AS select `shop_test`.`t`.`id` AS `id` from `shop_test`.`t` */;\n")
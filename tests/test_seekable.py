@@ -0,0 +1,78 @@
+import gzip
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dump_seekable import SeekableGzipWriter, load_seekable_index, open_table_reader, section_frames
+
+HEADER = b"-- MySQL dump 10.13\n--\n-- Host: localhost    Database: shop\n\n/*!40101 SET NAMES utf8mb4 */;\n\n"
+
+
+def table_section(name, rows):
+    values = b",".join(b"(%d,'%s %d')" % (row, name, row) for row in range(rows))
+    return (b"--\n-- Table structure for table `%s`\n--\n\nDROP TABLE IF EXISTS `%s`;\n"
+            b"CREATE TABLE `%s` (`id` int NOT NULL, `label` text, PRIMARY KEY (`id`));\n\n"
+            b"--\n-- Dumping data for table `%s`\n--\n\nINSERT INTO `%s` VALUES %s;\n\n"
+            % (name, name, name, name, name, values))
+
+
+VIEW = b"--\n-- Temporary view structure for view `v`\n--\n\nCREATE VIEW `v` AS SELECT 1 AS `id`;\n\n"
+TAIL = b"--\n-- Final view structure for view `v`\n--\n\nDROP VIEW IF EXISTS `v`;\n\n-- Dump completed on 2026-01-01\n"
+SECTIONS = {"users": table_section(b"users", 30), "orders": table_section(b"orders", 200), "notes": table_section(b"notes", 3)}
+DUMP = HEADER + b"".join(SECTIONS.values()) + VIEW + TAIL
+
+
+def write_archive(path, data, block_size, frame_size=256):
+    with SeekableGzipWriter(path, level=1, threads=2, frame_size=frame_size) as writer:
+        for start in range(0, len(data), block_size):
+            writer.write(data[start:start + block_size])
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 7, 100, 4096, len(DUMP)])
+def test_extract_returns_header_and_table_section(tmp_path, block_size):
+    path = str(tmp_path / "shop.sql.gz")
+    write_archive(path, DUMP, block_size)
+    with open(path, 'rb') as f:
+        assert gzip.decompress(f.read()) == DUMP
+    index = load_seekable_index(path)
+    assert [(section["name"], section["kind"]) for section in index["sections"]] == [
+        (None, "header"), ("users", "table"), ("orders", "table"), ("notes", "table"), ("v", "view"), (None, "tail")]
+    for name, section in SECTIONS.items():
+        with open_table_reader(path, [name]) as reader:
+            assert reader.read() == HEADER + section
+
+
+def test_marker_cut_after_its_first_line_stays_in_its_section(tmp_path):
+    # Le bloc se termine par le "--" qui ouvre la section de orders
+    path = str(tmp_path / "shop.sql.gz")
+    cut = DUMP.index(SECTIONS["orders"]) + 3
+    with SeekableGzipWriter(path, frame_size=256) as writer:
+        writer.write(DUMP[:cut])
+        writer.write(DUMP[cut:])
+    with open_table_reader(path, ["orders"]) as reader:
+        assert reader.read() == HEADER + SECTIONS["orders"]
+    with open_table_reader(path, ["users"]) as reader:
+        assert reader.read() == HEADER + SECTIONS["users"]
+
+
+def test_section_frames_reads_only_header_and_requested_frames(tmp_path):
+    path = str(tmp_path / "shop.sql.gz")
+    write_archive(path, DUMP, 64, frame_size=128)
+    index = load_seekable_index(path)
+    header, users, orders = index["sections"][:3]
+    assert orders["frames"][1] > 1 # Une section plus grosse que frame_size occupe plusieurs frames
+    numbers = section_frames(index, [orders])
+    assert numbers == list(range(header["frames"][1])) + list(range(orders["frames"][0], sum(orders["frames"])))
+    assert not set(numbers) & set(range(users["frames"][0], sum(users["frames"])))
+
+
+def test_extract_command_writes_the_table_sql(tmp_path):
+    path = str(tmp_path / "shop.sql.gz")
+    output = str(tmp_path / "notes.sql")
+    write_archive(path, DUMP, 1000)
+    module = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dump_seekable.py")
+    subprocess.run([sys.executable, module, "extract", path, "notes", "-o", output], check=True)
+    with open(output, 'rb') as f:
+        assert f.read() == HEADER + SECTIONS["notes"]
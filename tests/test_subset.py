@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+from dump_pipeline import DumpError
+from dump_subset import key_batches, parse_sample_rule, plan_subset, subset_where_clauses
+
+
+def test_parse_sample_rule():
+    assert parse_sample_rule("10%") == ("percent", 10.0)
+    assert parse_sample_rule(" 2,5 % ") == ("percent", 2.5)
+    assert parse_sample_rule("1000") == ("limit", 1000)
+    assert parse_sample_rule("WHERE created_at > '2026-01-01'") == ("where", "created_at > '2026-01-01'")
+    assert parse_sample_rule("status = 'paid'") == ("where", "status = 'paid'")
+    for text in ("", "0%", "150%", "0"):
+        with pytest.raises(DumpError):
+            parse_sample_rule(text)
+
+
+def test_key_batches_respect_the_length_limit():
+    keys = {(str(value),) for value in range(1000)}
+    batches = list(key_batches(["id"], keys, max_length=200))
+    assert len(batches) > 1 and all(len(batch) <= 220 for batch in batches)
+    assert batches[0].startswith("`id` IN ('0', '1', '10', ")
+    found = {value.strip("' ") for batch in batches for value in batch[len("`id` IN ("):-1].split(",")}
+    assert found == {key[0] for key in keys}
+    # Une clé plus longue que la limite forme à elle seule un lot
+    assert list(key_batches(["id"], {("x" * 50,), ("y",)}, max_length=10)) == [f"`id` IN ('{'x' * 50}')", "`id` IN ('y')"]
+    assert list(key_batches(["a", "b"], {("1", "2")})) == ["(`a`, `b`) IN (('1', '2'))"]
+
+
+def selected_rows(clauses):
+    """Identifiants retenus par chaque clause sur une petite table SQLite (avec des valeurs NULL)."""
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (id TEXT PRIMARY KEY, note TEXT)")
+    connection.executemany("INSERT INTO t VALUES (?, ?)", [(str(value), None if value % 3 else "x") for value in range(30)])
+    return [[row[0] for row in connection.execute(f"SELECT id FROM t WHERE {clause} ORDER BY id")] for clause in clauses]
+
+
+def test_subset_where_clauses_export_each_row_once():
+    entry = {"clause": "(`note` = 'x')", "key": ["id"], "keys": {(str(value),) for value in range(0, 30, 2)}}
+    clauses = subset_where_clauses(entry, max_length=40)
+    assert len(clauses) > 2
+    assert clauses[1].endswith("AND NOT COALESCE(((`note` = 'x')), FALSE)")
+    rows = [row for batch in selected_rows(clauses) for row in batch]
+    expected = {str(value) for value in range(30) if value % 2 == 0 or value % 3 == 0}
+    # Les lignes dont note est NULL et dont la clé est dans un lot suivant sont bien exportées, une seule fois
+    assert sorted(rows) == sorted(expected)
+
+
+def test_subset_where_clauses_without_rule_or_keys():
+    assert subset_where_clauses({"clause": None, "key": ["id"], "keys": {("1",)}}) == ["`id` IN ('1')"]
+    assert subset_where_clauses({"clause": "(`a` > 1)", "key": ["id"], "keys": set()}) == ["(`a` > 1)"]
+
+
+def test_plan_subset_follows_a_foreign_key_cycle_to_its_closure(fake_mysql):
+    # orders.customer_id -> customers.id et customers.first_order_id -> orders.id
+    fake_mysql.set_results([
+        ("REFERENCED_COLUMN_NAME", [["customers", "fk_first_order", "first_order_id", "orders", "id"],
+                                    ["orders", "fk_customer", "customer_id", "customers", "id"]]),
+        ("CONSTRAINT_NAME = 'PRIMARY'", [["customers", "id"], ["orders", "id"]]),
+        ("TABLE_TYPE = 'BASE TABLE'", [["customers"], ["orders"]]),
+        ("LIMIT 2", [["1"], ["2"]]),
+        ("FROM `shop`.`orders` WHERE `id` IN ('1', '2'))", [["10"]]),
+        ("FROM `shop`.`customers` WHERE `id` IN ('10'))", [["2"], ["3"]]),
+        ("FROM `shop`.`orders` WHERE `id` IN ('3'))", [["10"]])
+    ])
+    selection = plan_subset(fake_mysql.path, [], "shop", ["orders"], ("limit", 2))
+    assert selection == {
+        "orders": {"clause": None, "key": ["id"], "keys": {("1",), ("2",), ("3",)}},
+        "customers": {"clause": None, "key": ["id"], "keys": {("10",)}}
+    }
+    # Chaque lot de clés nouvelles est suivi une seule fois : le parcours s'arrête malgré le cycle
+    assert len([query for query in fake_mysql.queries() if query.startswith("SELECT DISTINCT")]) == 3
+
+
+def test_plan_subset_rejects_unknown_tables(fake_mysql):
+    fake_mysql.set_results([("TABLE_TYPE = 'BASE TABLE'", [["orders"]])])
+    with pytest.raises(DumpError, match="introuvables"):
+        plan_subset(fake_mysql.path, [], "shop", ["invoices"], ("percent", 10.0))
@@ -0,0 +1,97 @@
+import io
+
+import pytest
+
+import dump_throttle
+from dump_pipeline import Cancellation, DumpCancelled
+from dump_throttle import BURST, MAX_PAUSE, SLOW_RATE, WAIT_SLICE, RateLimiter, ThrottleWriter, evaluate_load
+
+
+class FakeClock:
+    """Remplace le module time de dump_throttle : sleep avance l'horloge sans attendre."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dump_throttle, "time", clock)
+    return clock
+
+
+def test_consume_paces_streams_at_the_configured_rate(clock):
+    limiter = RateLimiter(1000)
+    start = clock.now
+    for _ in range(20):
+        limiter.consume(100)
+    assert clock.now - start == pytest.approx(2.0)
+    assert limiter.as_dict()["waited"] == pytest.approx(2.0)
+
+
+def test_idle_stream_gets_at_most_a_burst_ahead(clock):
+    limiter = RateLimiter(1000)
+    limiter.consume(100)
+    clock.now += 60
+    start = clock.now
+    # Après une période calme, BURST secondes de débit passent sans attendre, pas davantage
+    limiter.consume(int(1000 * BURST))
+    assert clock.now == start
+    limiter.consume(500)
+    assert clock.now - start == pytest.approx(0.5)
+
+
+def test_unlimited_limiter_never_waits(clock):
+    output = io.BytesIO()
+    writer = ThrottleWriter(output, RateLimiter())
+    for _ in range(100):
+        writer.write(b"x" * 65536)
+    assert output.getvalue() == b"x" * 6553600
+    assert clock.sleeps == []
+
+
+def test_slow_state_halves_the_rate(clock):
+    limiter = RateLimiter(1000)
+    limiter.set_state("slow")
+    start = clock.now
+    for _ in range(10):
+        limiter.consume(100)
+    assert clock.now - start == pytest.approx(2.0)
+    assert limiter.slowdowns == 1
+
+
+def test_pause_expires_after_max_pause(clock):
+    limiter = RateLimiter()
+    limiter.set_state("paused")
+    start = clock.now
+    limiter.consume(SLOW_RATE // 10)
+    # La pause est relue par tranches de WAIT_SLICE, puis le flux repart au débit ralenti
+    assert MAX_PAUSE <= clock.now - start <= MAX_PAUSE + WAIT_SLICE + 0.1 + 1e-6
+    assert limiter.pauses == 1 and limiter.state == "paused"
+
+
+def test_cancellation_interrupts_a_pause(clock):
+    limiter = RateLimiter(1000)
+    limiter.set_state("paused")
+    cancellation = Cancellation()
+    cancellation.cancel()
+    with pytest.raises(DumpCancelled):
+        limiter.consume(100, cancellation)
+
+
+def test_evaluate_load_thresholds():
+    assert evaluate_load({"threads_running": 10, "replica_lag": 5}, 32, 60) == ("normal", None)
+    assert evaluate_load({"threads_running": 24, "replica_lag": 5}, 32, 60) == ("slow", "Threads_running = 24, seuil 32")
+    assert evaluate_load({"threads_running": 24, "replica_lag": 60}, 32, 60) == ("paused", "retard de réplication (s) = 60, seuil 60")
+    # Un seuil à None, ou une mesure absente, n'est pas surveillé
+    assert evaluate_load({"threads_running": 100, "replica_lag": None}, None, 60) == ("normal", None)
+    assert evaluate_load({"threads_running": 40}, 32, 60)[0] == "paused"
@@ -0,0 +1,88 @@
+import io
+import os
+import random
+
+import pytest
+
+from dump_checkpoint import file_sha256
+from dump_compression import open_archive_reader
+from dump_pipeline import DumpError
+from dump_volumes import CHECKSUMS_FILE, MIN_VOLUME_SIZE, VolumeWriter, load_volumes, read_volumes
+
+BLOCK_SIZE = 65536
+
+
+def dump_data(size):
+    # Valeurs aléatoires : le volume compressé reste proche du volume SQL
+    generator = random.Random(42)
+    lines = []
+    total = 0
+    row = 0
+    while total < size:
+        line = b"INSERT INTO `t` VALUES (%d,'%s');\n" % (row, generator.randbytes(300).hex().encode())
+        lines.append(line)
+        total += len(line)
+        row += 1
+    return b"".join(lines)
+
+
+def write_volumes(output_dir, data, compression):
+    with VolumeWriter(output_dir, "shop_20260101_020000", "shop", compression, MIN_VOLUME_SIZE, threads=1) as writer:
+        for start in range(0, len(data), BLOCK_SIZE):
+            writer.write(data[start:start + BLOCK_SIZE])
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zip"])
+def test_volumes_round_trip_without_cutting_lines(tmp_path, compression):
+    output_dir = str(tmp_path / "shop_20260101_020000")
+    data = dump_data(8 * MIN_VOLUME_SIZE)
+    write_volumes(output_dir, data, compression)
+
+    manifest = load_volumes(output_dir)
+    assert manifest["complete"] and len(manifest["volumes"]) >= 3
+    sql_parts = []
+    for entry in manifest["volumes"]:
+        with open_archive_reader(os.path.join(output_dir, entry["file"])) as reader:
+            sql_parts.append(reader.read())
+        assert sql_parts[-1].endswith(b"\n") and len(sql_parts[-1]) == entry["sql_size"]
+    assert b"".join(sql_parts) == data
+    # Le premier volume d'un compresseur multi-thread peut dépasser la limite des blocs encore en mémoire
+    for entry in manifest["volumes"][1:-1]:
+        assert entry["size"] < MIN_VOLUME_SIZE + 2 * BLOCK_SIZE
+
+    output = io.BytesIO()
+    assert read_volumes(output_dir, output) == len(data)
+    assert output.getvalue() == data
+    with open(os.path.join(output_dir, CHECKSUMS_FILE)) as f:
+        checksums = [line.split() for line in f.read().splitlines()]
+    assert checksums == [[file_sha256(os.path.join(output_dir, entry["file"])), entry["file"]] for entry in manifest["volumes"]]
+
+
+def test_listed_volumes_are_complete_while_the_dump_continues(tmp_path):
+    output_dir = str(tmp_path / "shop_20260101_020000")
+    data = dump_data(3 * MIN_VOLUME_SIZE)
+    writer = VolumeWriter(output_dir, "shop_20260101_020000", "shop", "none", MIN_VOLUME_SIZE)
+    for start in range(0, 2 * MIN_VOLUME_SIZE, BLOCK_SIZE):
+        writer.write(data[start:start + BLOCK_SIZE])
+    manifest = load_volumes(output_dir)
+    assert not manifest["complete"] and manifest["volumes"]
+    for entry in manifest["volumes"]:
+        assert os.path.getsize(os.path.join(output_dir, entry["file"])) == entry["size"]
+    with pytest.raises(DumpError, match="incomplète"):
+        read_volumes(output_dir, io.BytesIO())
+    writer.close()
+
+
+def test_read_volumes_rejects_a_truncated_volume(tmp_path):
+    output_dir = str(tmp_path / "shop_20260101_020000")
+    write_volumes(output_dir, dump_data(2 * MIN_VOLUME_SIZE), "gzip")
+    first = os.path.join(output_dir, load_volumes(output_dir)["volumes"][0]["file"])
+    with open(first, 'r+b') as f:
+        f.truncate(os.path.getsize(first) - 10)
+    with pytest.raises(DumpError, match="taille inattendue"):
+        read_volumes(output_dir, io.BytesIO())
+
+
+def test_volume_size_below_minimum_is_refused(tmp_path):
+    with pytest.raises(DumpError, match="au moins"):
+        VolumeWriter(str(tmp_path / "shop"), "shop", "shop", "gzip", MIN_VOLUME_SIZE - 1)
@@ -0,0 +1,88 @@
+import gzip
+import os
+import random
+import sys
+
+import pytest
+
+import dump_zerocopy
+from dump_integrity import verify_archive
+from dump_pipeline import DumpError
+from dump_progress import DumpProgress
+from dump_zerocopy import dump_zero_copy, zero_copy_available
+
+pytestmark = pytest.mark.skipif(not zero_copy_available(), reason="os.splice indisponible")
+
+CAT = "import shutil, sys; shutil.copyfileobj(open(sys.argv[1], 'rb'), sys.stdout.buffer)"
+
+
+@pytest.fixture
+def dump_file(tmp_path):
+    generator = random.Random(3)
+    lines = [b"INSERT INTO `t` VALUES (%d,'%s');\n" % (row, generator.randbytes(40).hex().encode()) for row in range(30000)]
+    lines.append(b"-- Dump completed on 2026-01-01  2:00:00\n")
+    path = str(tmp_path / "dump.sql")
+    with open(path, 'wb') as f:
+        f.write(b"".join(lines))
+    return path
+
+
+@pytest.fixture
+def reservations(monkeypatch):
+    sizes = []
+    fallocate = os.posix_fallocate
+
+    def record(fd, offset, length):
+        sizes.append(offset + length)
+        fallocate(fd, offset, length)
+
+    monkeypatch.setattr(dump_zerocopy.os, "posix_fallocate", record)
+    return sizes
+
+
+def run(dump_file, targets, tracker):
+    returncode, stderr_output, integrity = dump_zero_copy([[sys.executable, "-c", CAT, dump_file]], targets, tracker=tracker)
+    assert (returncode, stderr_output) == (0, "")
+    return integrity
+
+
+def test_uncompressed_dump_is_reserved_only_with_an_estimate(tmp_path, dump_file, reservations):
+    sql_size = os.path.getsize(dump_file)
+    archive_path, copy_path = str(tmp_path / "shop.sql"), str(tmp_path / "copie.sql")
+    tracker = DumpProgress("shop")
+    integrity = run(dump_file, [(archive_path, "none"), (copy_path, "none")], tracker)
+    assert integrity[0] == {"size": sql_size, "sql_size": sql_size, "completed": True} == integrity[1]
+    assert tracker.bytes == sql_size
+    # Sans estimation, seule la copie (de taille connue) est réservée
+    assert reservations == [sql_size]
+    with open(archive_path, 'rb') as archive, open(copy_path, 'rb') as copy, open(dump_file, 'rb') as source:
+        assert archive.read() == copy.read() == source.read()
+
+    reservations.clear()
+    run(dump_file, [(archive_path, "none")], DumpProgress("shop", estimated_size=sql_size // 2))
+    assert reservations == [sql_size // 2]
+    # La réservation est ramenée à la taille écrite
+    assert os.path.getsize(archive_path) == sql_size
+
+
+def test_compressed_dump_counts_the_sql(tmp_path, dump_file, reservations):
+    sql_size = os.path.getsize(dump_file)
+    archive_path = str(tmp_path / "shop.sql.gz")
+    tracker = DumpProgress("shop", estimated_size=sql_size)
+    integrity = run(dump_file, [(archive_path, "gzip")], tracker)
+    # Le volume compté est celui du SQL, pas celui de l'archive, qui n'est pas réservée
+    assert tracker.bytes == integrity[0]["sql_size"] == sql_size
+    assert integrity[0]["size"] == os.path.getsize(archive_path) < sql_size
+    assert reservations == []
+    with gzip.open(archive_path) as f, open(dump_file, 'rb') as source:
+        assert f.read() == source.read()
+    assert verify_archive(archive_path, integrity[0]) == []
+
+
+def test_compressor_failure_is_reported(tmp_path, dump_file, monkeypatch):
+    failing = [sys.executable, "-c", "import sys; sys.stdin.buffer.read(1000); sys.exit('compresseur en panne')"]
+    monkeypatch.setattr(dump_zerocopy, "compressor_command", lambda *args: failing)
+    archive_path = str(tmp_path / "shop.sql.gz")
+    with pytest.raises(DumpError, match="compresseur en panne"):
+        dump_zero_copy([[sys.executable, "-c", CAT, dump_file]], [(archive_path, "gzip")])
+    assert not os.path.exists(archive_path)